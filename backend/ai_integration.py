@@ -8,6 +8,9 @@ import json
 import httpx
 from typing import Dict, Any, List, Optional
 import logging
+import time
+
+from metrics import OLLAMA_LATENCY
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,6 +28,8 @@ async def call_ollama(prompt: str, model: str = OLLAMA_MODEL) -> str:
     """
     Call Ollama API with the given prompt
     """
+    started = time.perf_counter()
+    outcome = "error"
     try:
         async with httpx.AsyncClient(timeout=30.0) as client:
             response = await client.post(
@@ -37,13 +42,17 @@ async def call_ollama(prompt: str, model: str = OLLAMA_MODEL) -> str:
             )
             response.raise_for_status()
             result = response.json()
+            outcome = "ok"
             return result.get("response", "")
     except httpx.TimeoutException:
+        outcome = "timeout"
         raise AIServiceError("AI service timeout - please try again")
     except httpx.RequestError as e:
         raise AIServiceError(f"AI service connection error: {str(e)}")
     except Exception as e:
         raise AIServiceError(f"AI service error: {str(e)}")
+    finally:
+        OLLAMA_LATENCY.observe(time.perf_counter() - started, model, outcome)
 
 def classify_service_request(text: str) -> Dict[str, Any]:
     """
@@ -178,61 +187,88 @@ def get_service_followups(service_id: str, answers: Dict[str, Any] = None) -> Di
         logger.error(f"Error generating followup questions: {str(e)}")
         raise AIServiceError(f"Followup generation failed: {str(e)}")
 
-def match_providers(service_id: str, spec: Dict[str, Any] = None, location: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+# Average doorstep travel speed used for ETAs
+CITY_SPEED_KMH = 25
+
+_demo_catalog = None
+
+
+def _demo_providers():
+    """Catalog of the demo providers in ai_services, for running the matcher standalone"""
+    global _demo_catalog
+    if _demo_catalog is None:
+        from ai_services import PROVIDERS
+        from provider_catalog import ProviderCatalog
+        catalog = ProviderCatalog()
+        catalog.load({"id": p["id"], "name": p["name"], "skills": p["skill_tags"], "hourly_rate": p["rate_hour"],
+                      "rating": p["avg_rating"], "latitude": p["lat"], "longitude": p["lng"]} for p in PROVIDERS)
+        _demo_catalog = catalog
+    return _demo_catalog
+
+
+def match_providers(service_id: str, spec: Dict[str, Any] = None, location: Optional[Dict[str, float]] = None,
+                    catalog=None, surge=None) -> Dict[str, Any]:
     """
     Match service providers based on service requirements and location
+
+    Candidates come from the provider catalog's skill index: taskers tagged
+    with the service id or its skill_tag. Without a catalog the demo
+    providers in ai_services are used. Each match carries a price range
+    for the service (see pricing.py), scaled by the surge multiplier for
+    the location when a surge aggregator is given (see surge.py).
     """
     try:
         if spec is None:
             spec = {}
-            
-        # Mock provider data (in real app, this would come from database)
-        mock_providers = [
-            {
-                "id": "provider_1",
-                "name": "John's Cleaning Service",
-                "rating": 4.8,
-                "price_range": "$50-100",
-                "services": ["home_cleaning"],
-                "location": {"lat": 37.7749, "lng": -122.4194},
-                "availability": "Available today",
-                "experience": "5+ years"
-            },
-            {
-                "id": "provider_2", 
-                "name": "Quick Fix Plumbing",
-                "rating": 4.6,
-                "price_range": "$75-150",
-                "services": ["plumbing"],
-                "location": {"lat": 37.7849, "lng": -122.4094},
-                "availability": "Available tomorrow",
-                "experience": "10+ years"
-            },
-            {
-                "id": "provider_3",
-                "name": "Spark Electric",
-                "rating": 4.9,
-                "price_range": "$100-200",
-                "services": ["electrical"],
-                "location": {"lat": 37.7649, "lng": -122.4294},
-                "availability": "Available this week",
-                "experience": "8+ years"
-            }
-        ]
-        
-        # Filter providers by service type
-        matching_providers = [
-            p for p in mock_providers 
-            if service_id in p["services"]
-        ]
-        
-        # Sort by rating (in real app, would consider location, availability, etc.)
-        matching_providers.sort(key=lambda x: x["rating"], reverse=True)
+
+        from ai_services import DEMO_LOC, SERVICES
+        from geo import haversine_km
+
+        service = next((s for s in SERVICES if s["id"] == service_id), None)
+        tags = [service_id] + ([service["skill_tag"]] if service else [])
+        catalog = catalog if catalog is not None else _demo_providers()
+        candidates = catalog.select(any_skills=tags, available=True,
+                                    columns=("id", "name", "skills", "hourly_rate", "rating", "latitude", "longitude"))
+
+        # Price range for every candidate at once, with the follow-up answers in spec applied
+        prices = None
+        surge_factor = 1.0
+        if service:
+            from pricing import answer_multiplier, price_matrix
+            if surge is not None and location:
+                surge_factor = surge.multiplier(location["lat"], location["lng"], service["skill_tag"])
+            prices = price_matrix((p["hourly_rate"] for p in candidates), service["estimate_hours"],
+                                  answer_multiplier(service_id, spec) * surge_factor)
+
+        origin = location or DEMO_LOC
+        matching_providers = []
+        for i, p in enumerate(candidates):
+            distance = None
+            if p["latitude"] is not None and p["longitude"] is not None:
+                distance = round(haversine_km(origin["lat"], origin["lng"], p["latitude"], p["longitude"]), 2)
+            rating = p["rating"] or 0
+            matching_providers.append({
+                "id": p["id"],
+                "name": p["name"],
+                "skills": p["skills"],
+                "rate_hour": p["hourly_rate"],
+                "avg_rating": rating,
+                "distance_km": distance,
+                "eta_min": round(distance / CITY_SPEED_KMH * 60) if distance is not None else None,
+                "price_min": float(prices[i, 0]) if prices is not None and p["hourly_rate"] is not None else None,
+                "price_max": float(prices[i, 1]) if prices is not None and p["hourly_rate"] is not None else None,
+                "reason_line": f"Rated {rating:.1f}" + (f", {distance} km away" if distance is not None else "")
+            })
+
+        # Best rated first, nearer first among equals
+        matching_providers.sort(key=lambda x: (-x["avg_rating"],
+                                               x["distance_km"] if x["distance_km"] is not None else float("inf")))
         
         return {
             "service_id": service_id,
             "providers": matching_providers[:5],  # Return top 5 matches
             "total_matches": len(matching_providers),
+            "surge": surge_factor,
             "spec": spec,
             "location": location
         }
@@ -68,6 +68,9 @@ SERVICES = [
 
 DEMO_LOC = {"lat": 40.7506, "lng": -73.9972}  # NYC area
 
+# Demo providers for running the matcher standalone; the API matches against
+# the tasker profiles in ProviderCatalog (provider_catalog.py). Track record
+# (jobs done, completion rate, reliability) comes from ProviderFeatureStore.
 PROVIDERS = [
     {
         "id": "p1",
@@ -77,9 +80,7 @@ PROVIDERS = [
         "avg_rating": 4.9,
         "lat": 40.754,
         "lng": -73.99,
-        "service_radius_km": 20,
-        "reliability": 0.9,
-        "stats": {"beauty_wellness": {"jobs_done": 72, "completion_rate": 0.98}}
+        "service_radius_km": 20
     },
     {
         "id": "p2",
@@ -89,9 +90,7 @@ PROVIDERS = [
         "avg_rating": 4.7,
         "lat": 40.742,
         "lng": -73.99,
-        "service_radius_km": 15,
-        "reliability": 0.85,
-        "stats": {"cleaning": {"jobs_done": 58, "completion_rate": 0.95}}
+        "service_radius_km": 15
     },
     {
         "id": "p3",
@@ -101,9 +100,7 @@ PROVIDERS = [
         "avg_rating": 4.6,
         "lat": 40.745,
         "lng": -74.004,
-        "service_radius_km": 25,
-        "reliability": 0.88,
-        "stats": {"car_care": {"jobs_done": 120, "completion_rate": 0.97}}
+        "service_radius_km": 25
     },
     {
         "id": "p4",
@@ -113,9 +110,7 @@ PROVIDERS = [
         "avg_rating": 4.8,
         "lat": 40.761,
         "lng": -73.985,
-        "service_radius_km": 30,
-        "reliability": 0.92,
-        "stats": {"appliance_repair": {"jobs_done": 210, "completion_rate": 0.99}}
+        "service_radius_km": 30
     },
     {
         "id": "p5",
@@ -125,8 +120,6 @@ PROVIDERS = [
         "avg_rating": 4.9,
         "lat": 40.748,
         "lng": -73.99,
-        "service_radius_km": 25,
-        "reliability": 0.93,
-        "stats": {"beauty_wellness": {"jobs_done": 340, "completion_rate": 0.98}}
+        "service_radius_km": 25
     }
 ]
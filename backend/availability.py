@@ -0,0 +1,137 @@
+"""
+Weekly Availability
+A provider's week as 7 x 48 half-hour slots packed into one 336-bit mask
+(bit = day * 48 + slot, Monday first), stored as 84 hex digits in
+provider_availability.slots. Windows such as {"day": "sat", "start":
+"10:00", "end": "14:00"} convert to and from masks.
+
+SlotMatrix holds the masks of many providers as rows of six uint64 words,
+so "who covers Saturday 10:00-12:00" is one vectorized AND/compare over
+every candidate. numpy is only imported with this module, which loads on
+first use.
+"""
+
+import re
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEK_SLOTS = len(DAYS) * SLOTS_PER_DAY
+WORDS = -(-WEEK_SLOTS // 64)
+HEX_DIGITS = WEEK_SLOTS // 4
+
+_DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+_WORD_MASK = (1 << 64) - 1
+_TIME_RE = re.compile(r"^(\d{1,2}):(\d{2})$")
+
+
+def day_index(day) -> int:
+    name = str(day).strip().lower()[:3]
+    if name not in DAYS:
+        raise ValueError(f"Unknown day: {day}")
+    return DAYS.index(name)
+
+
+def _minutes(value) -> int:
+    match = _TIME_RE.match(str(value).strip())
+    if not match:
+        raise ValueError(f"Time must be HH:MM: {value}")
+    hours, minutes = int(match.group(1)), int(match.group(2))
+    total = hours * 60 + minutes
+    if minutes >= 60 or total > 24 * 60:
+        raise ValueError(f"Invalid time: {value}")
+    return total
+
+
+def _clock(slot: int) -> str:
+    minutes = slot * SLOT_MINUTES
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def window_mask(day, start, end=None) -> int:
+    """Slots touched by [start, end) on one day; end defaults to one slot after start"""
+    first = _minutes(start) // SLOT_MINUTES
+    last = -(-_minutes(end) // SLOT_MINUTES) if end is not None else first + 1
+    if last <= first or last > SLOTS_PER_DAY:
+        raise ValueError(f"Window must end after it starts, within the day: {start}-{end}")
+    return ((1 << (last - first)) - 1) << (day_index(day) * SLOTS_PER_DAY + first)
+
+
+def mask_from_windows(windows: Iterable[Dict]) -> int:
+    """Mask for a provider's declared windows, which must lie on the half-hour grid"""
+    mask = 0
+    for window in windows:
+        if _minutes(window["start"]) % SLOT_MINUTES or _minutes(window["end"]) % SLOT_MINUTES:
+            raise ValueError(f"Windows must start and end on the half hour: {window['start']}-{window['end']}")
+        mask |= window_mask(window["day"], window["start"], window["end"])
+    return mask
+
+
+def windows_from_mask(mask: int) -> List[Dict]:
+    """Merged windows, Monday first"""
+    windows = []
+    for d, day in enumerate(DAYS):
+        bits = mask >> (d * SLOTS_PER_DAY) & _DAY_MASK
+        slot = 0
+        while bits:
+            # Skip to the next run of set bits, then measure it
+            skip = (bits & -bits).bit_length() - 1
+            bits >>= skip
+            slot += skip
+            run = (~bits & (bits + 1)).bit_length() - 1
+            windows.append({"day": day, "start": _clock(slot), "end": _clock(slot + run)})
+            bits >>= run
+            slot += run
+    return windows
+
+
+def summary(mask: int) -> str:
+    """Readable form kept in profiles.availability, e.g. Mon 09:00-17:00, Sat 10:00-14:00"""
+    return ", ".join(f"{w['day'].title()} {w['start']}-{w['end']}" for w in windows_from_mask(mask))
+
+
+def to_hex(mask: int) -> str:
+    return f"{mask:0{HEX_DIGITS}x}"
+
+
+def from_hex(text) -> int:
+    if not text:
+        return 0
+    mask = int(text, 16)
+    if mask >> WEEK_SLOTS:
+        raise ValueError("Availability mask has more than 336 slots")
+    return mask
+
+
+def to_words(mask: int) -> np.ndarray:
+    return np.array([(mask >> (64 * i)) & _WORD_MASK for i in range(WORDS)], dtype=np.uint64)
+
+
+class SlotMatrix:
+    """Availability masks indexed by catalog row, as a (rows, WORDS) uint64 array grown by doubling"""
+
+    def __init__(self, capacity: int = 1024):
+        self.words = np.zeros((capacity, WORDS), dtype=np.uint64)
+
+    def set(self, row: int, mask: int) -> None:
+        if row >= len(self.words):
+            grown = np.zeros((max(row + 1, 2 * len(self.words)), WORDS), dtype=np.uint64)
+            grown[:len(self.words)] = self.words
+            self.words = grown
+        self.words[row] = to_words(mask)
+
+    def get(self, row: int) -> int:
+        if row >= len(self.words):
+            return 0
+        return sum(int(word) << (64 * i) for i, word in enumerate(self.words[row]))
+
+    def covering(self, rows: Sequence[int], mask: int) -> List[int]:
+        """The rows whose masks contain every slot of `mask`, in the given order"""
+        index = np.asarray(rows, dtype=np.intp)
+        index = index[index < len(self.words)]
+        query = to_words(mask)
+        keep = ((self.words[index] & query) == query).all(axis=1)
+        return index[keep].tolist()
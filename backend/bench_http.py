@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+HTTP load and latency benchmark
+Drives the FastAPI app with the frontend's real call patterns, either
+in-process through the ASGI transport or over a real socket served by
+uvicorn, and reports throughput and p50/p95/p99 latency per route.
+
+The app runs against a freshly seeded local SQLite database, never the
+configured Supabase project. Results are written as JSON so runs can be
+compared with --compare.
+
+    python bench_http.py --requests 3000 --concurrency 16
+    python bench_http.py --transport socket --compare bench_results/before.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from metrics import percentile
+from seed_data import seed_local_data
+
+# (workload, weight) - mirrors what the pages do: bookings.html polls the
+# booking list, the home page lists taskers, booking creates a task then a
+# booking, and the provider dashboard moves bookings through their states.
+WORKLOAD_MIX = [
+    ("poll_customer_bookings", 35),
+    ("poll_provider_bookings", 20),
+    ("list_taskers", 20),
+    ("create_task_and_booking", 10),
+    ("update_booking_status", 15),
+]
+
+STATUS_UPDATES = ["accepted", "in-progress", "completed", "declined"]
+
+
+def load_app(db_path: str):
+    """Import main against a local SQLite file and return (app, db)"""
+    os.environ["STORAGE_BACKEND"] = "sqlite"
+    os.environ["SQLITE_PATH"] = db_path
+    import main
+    from sqlite_backend import SQLiteClient
+    client = main.db.inner.client
+    # A client built before this call points elsewhere (e.g. woke_local.db); never seed into it
+    if not isinstance(client, SQLiteClient) or os.path.abspath(client.path) != os.path.abspath(db_path):
+        raise RuntimeError("main was already imported with other storage; run the benchmark in its own process")
+    return main.app, main.db
+
+
+class Recorder:
+    """Latencies and status codes per route label"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, started: float, response: Optional[httpx.Response]) -> None:
+        self.latencies[route].append((time.perf_counter() - started) * 1000)
+        if response is None or response.status_code >= 400:
+            self.errors[route] += 1
+
+    def summary(self, elapsed: float) -> Dict:
+        def stats(values: List[float], errors: int) -> Dict:
+            values = sorted(values)
+            return {
+                "requests": len(values),
+                "errors": errors,
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "latency_ms": {
+                    "mean": round(sum(values) / len(values), 3) if values else 0.0,
+                    "p50": round(percentile(values, 50), 3),
+                    "p95": round(percentile(values, 95), 3),
+                    "p99": round(percentile(values, 99), 3),
+                    "max": round(values[-1], 3) if values else 0.0,
+                },
+            }
+
+        all_latencies = [v for values in self.latencies.values() for v in values]
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "total": stats(all_latencies, sum(self.errors.values())),
+            "routes": {route: stats(values, self.errors[route])
+                       for route, values in sorted(self.latencies.items())},
+        }
+
+
+class Workload:
+    """One simulated client session; picks operations from WORKLOAD_MIX"""
+
+    def __init__(self, client: httpx.AsyncClient, ids: Dict, recorder: Recorder, rng: random.Random):
+        self.client = client
+        self.ids = ids
+        self.recorder = recorder
+        self.rng = rng
+
+    async def _call(self, route: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        finally:
+            self.recorder.record(route, started, response)
+        return response
+
+    async def poll_customer_bookings(self):
+        await self._call("GET /bookings?customer_id", "GET", "/bookings",
+                         params={"customer_id": self.rng.choice(self.ids["customer_ids"])})
+
+    async def poll_provider_bookings(self):
+        await self._call("GET /bookings?provider_id", "GET", "/bookings",
+                         params={"provider_id": self.rng.choice(self.ids["tasker_ids"])})
+
+    async def list_taskers(self):
+        await self._call("GET /taskers", "GET", "/taskers")
+
+    async def create_task_and_booking(self):
+        customer_id = self.rng.choice(self.ids["customer_ids"])
+        response = await self._call("POST /tasks", "POST", "/tasks", json={
+            "title": "Home Cleaning", "description": "Benchmark request", "customer_id": customer_id})
+        if response is None or response.status_code != 200:
+            return
+        task_id = response.json()["task"][0]["id"]
+        response = await self._call("POST /bookings", "POST", "/bookings", json={
+            "task_id": str(task_id), "customer_id": customer_id,
+            "tasker_id": self.rng.choice(self.ids["tasker_ids"])})
+        if response is not None and response.status_code == 200:
+            self.ids["booking_ids"].append(response.json()["booking"][0]["id"])
+
+    async def update_booking_status(self):
+        booking_id = self.rng.choice(self.ids["booking_ids"])
+        await self._call("PATCH /bookings/{booking_id}", "PATCH", f"/bookings/{booking_id}",
+                         json={"status": self.rng.choice(STATUS_UPDATES)})
+
+    async def run(self, budget: "_Budget") -> None:
+        names, weights = zip(*WORKLOAD_MIX)
+        while budget.take():
+            await getattr(self, self.rng.choices(names, weights)[0])()
+
+
+class _Budget:
+    """Shared operation counter for the workers of one run"""
+
+    def __init__(self, total: int):
+        self.remaining = total
+
+    def take(self) -> bool:
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+async def _drive(client: httpx.AsyncClient, ids: Dict, requests: int, concurrency: int,
+                 seed: int, warmup: int) -> Dict:
+    if warmup:
+        warmup_budget = _Budget(warmup)
+        await asyncio.gather(*(Workload(client, ids, Recorder(), random.Random(seed - i - 1)).run(warmup_budget)
+                               for i in range(concurrency)))
+    recorder = Recorder()
+    budget = _Budget(requests)
+    started = time.perf_counter()
+    await asyncio.gather(*(Workload(client, ids, recorder, random.Random(seed + i)).run(budget)
+                           for i in range(concurrency)))
+    return recorder.summary(time.perf_counter() - started)
+
+
+def run_asgi(app, ids: Dict, requests: int, concurrency: int, seed: int = 0, warmup: int = 50) -> Dict:
+    """Benchmark in-process: no sockets, measures the app itself"""
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await _drive(client, ids, requests, concurrency, seed, warmup)
+    return asyncio.run(main())
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_socket(app, ids: Dict, requests: int, concurrency: int, seed: int = 0, warmup: int = 50) -> Dict:
+    """Benchmark over loopback TCP against a uvicorn server in a thread"""
+    import uvicorn
+
+    class _Server(uvicorn.Server):
+        def install_signal_handlers(self):
+            pass
+
+    port = _free_port()
+    server = _Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, name="bench-uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn failed to start")
+        time.sleep(0.01)
+
+    async def main():
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+            return await _drive(client, ids, requests, concurrency, seed, warmup)
+    try:
+        return asyncio.run(main())
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+TRANSPORTS = {"asgi": run_asgi, "socket": run_socket}
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(current: Dict, baseline: Dict) -> List[str]:
+    """Per-route changes in throughput and tail latency vs. an earlier run"""
+    def change(new, old):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    lines = []
+    for transport, result in current["transports"].items():
+        old_result = baseline.get("transports", {}).get(transport)
+        if not old_result:
+            continue
+        lines.append(f"[{transport}]")
+        routes = {"(all)": (result["total"], old_result["total"])}
+        routes.update({route: (stats, old_result["routes"][route])
+                       for route, stats in result["routes"].items() if route in old_result["routes"]})
+        for route, (new, old) in routes.items():
+            lines.append(f"  {route:32} rps {change(new['throughput_rps'], old['throughput_rps']):>8}"
+                         f"  p50 {change(new['latency_ms']['p50'], old['latency_ms']['p50']):>8}"
+                         f"  p95 {change(new['latency_ms']['p95'], old['latency_ms']['p95']):>8}"
+                         f"  p99 {change(new['latency_ms']['p99'], old['latency_ms']['p99']):>8}")
+    return lines
+
+
+def _print_result(transport: str, result: Dict) -> None:
+    print(f"\n[{transport}] {result['total']['requests']} requests in {result['elapsed_s']}s "
+          f"({result['total']['throughput_rps']} req/s, {result['total']['errors']} errors)")
+    print(f"  {'route':32} {'n':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for route, stats in result["routes"].items():
+        lat = stats["latency_ms"]
+        print(f"  {route:32} {stats['requests']:>6} {stats['throughput_rps']:>8} "
+              f"{lat['p50']:>8} {lat['p95']:>8} {lat['p99']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load/latency benchmark for the Woke API")
+    parser.add_argument("--transport", choices=["asgi", "socket", "both"], default="both")
+    parser.add_argument("--requests", type=int, default=2000, help="operations per transport")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--customers", type=int, default=50)
+    parser.add_argument("--taskers", type=int, default=100)
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON results path (default: bench_results/http_<time>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+    # httpx logs every request at INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app, db = load_app(os.path.join(tmp, "bench.db"))
+        ids = seed_local_data(db, args.customers, args.taskers, args.bookings, args.seed)
+
+        transports = ["asgi", "socket"] if args.transport == "both" else [args.transport]
+        results = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "git_revision": _git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "dataset": {"customers": args.customers, "taskers": args.taskers, "bookings": args.bookings},
+                "workload_mix": dict(WORKLOAD_MIX),
+                "seed": args.seed,
+            },
+            "transports": {},
+        }
+        for transport in transports:
+            result = TRANSPORTS[transport](app, ids, args.requests, args.concurrency, args.seed, args.warmup)
+            results["transports"][transport] = result
+            _print_result(transport, result)
+
+    output = args.output or os.path.join("bench_results", f"http_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📄 Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare} ({baseline['meta'].get('git_revision')}):")
+        print("\n".join(compare(results, baseline)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Cold-start import benchmark
+Imports main in fresh interpreters under `python -X importtime` (what a
+serverless cold start does via api/index.py) and reports the import time
+of main and its slowest modules.
+
+Exits non-zero when the median exceeds --max-ms or when a module that is
+meant to load lazily (Supabase client, httpx, the AI modules, numpy,
+static file serving) is imported at startup.
+
+    python bench_importtime.py --runs 5 --max-ms 1500
+    python bench_importtime.py --output before.json
+    python bench_importtime.py --compare before.json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Must not be imported just by importing main
+LAZY_MODULES = ("supabase", "httpx", "ai_integration", "ai_services", "sqlite_backend",
+                "starlette.staticfiles", "numpy")
+
+DEFAULT_MAX_MS = 1500.0
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, int]]:
+    """module -> {"self_us", "cumulative_us"} from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            modules[name] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us)}
+    return modules
+
+
+def import_once(module: str = "main") -> Dict[str, Dict[str, int]]:
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def run(runs: int = 5, module: str = "main", top: int = 15) -> Dict:
+    samples = [import_once(module) for _ in range(runs)]
+    totals = [s[module]["cumulative_us"] / 1000 for s in samples]
+    last = samples[-1]
+    slowest = sorted(last.items(), key=lambda item: item[1]["self_us"], reverse=True)[:top]
+    return {
+        "module": module,
+        "runs": runs,
+        "median_ms": round(statistics.median(totals), 3),
+        "min_ms": round(min(totals), 3),
+        "max_ms": round(max(totals), 3),
+        "modules_imported": len(last),
+        "lazy_modules_loaded": sorted(m for m in LAZY_MODULES if m in last),
+        "slowest_self_ms": {name: round(t["self_us"] / 1000, 3) for name, t in slowest},
+    }
+
+
+def check(result: Dict, max_ms: float) -> List[str]:
+    problems = []
+    if result["median_ms"] > max_ms:
+        problems.append(f"import {result['module']} took {result['median_ms']}ms (budget {max_ms}ms)")
+    for module in result["lazy_modules_loaded"]:
+        problems.append(f"{module} is imported at startup; it should load on first use")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the API")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=DEFAULT_MAX_MS)
+    parser.add_argument("--output", help="save results as JSON")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    result = run(args.runs)
+    print(f"import main: median {result['median_ms']}ms (min {result['min_ms']}, max {result['max_ms']}) "
+          f"over {result['runs']} runs, {result['modules_imported']} modules")
+    print("Slowest modules (self time):")
+    for name, ms in result["slowest_self_ms"].items():
+        print(f"  {ms:>9.3f}ms  {name}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"📄 Results saved to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        change = (result["median_ms"] - baseline["median_ms"]) / baseline["median_ms"] * 100
+        print(f"Compared with {args.compare}: {baseline['median_ms']}ms -> {result['median_ms']}ms ({change:+.1f}%)")
+
+    problems = check(result, args.max_ms)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        sys.exit(1)
+    print("✅ Cold-start import within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Booking Calendar
+Committed bookings (pending, accepted or in progress, with a booking_date
+and booking_time) per provider, kept as intervals sorted by start with a
+running maximum of their end times. Whether [start, end) clashes with
+anything is two bisects: of the intervals starting before `end`, the one
+reaching furthest must finish by `start`.
+
+reserve() checks and records a slot under one lock before the booking is
+inserted, so two requests in this process cannot both take the same
+provider and time. next_free_slots() merges per-provider generators of
+free start times (on the half-hour grid, inside each provider's weekly
+availability) into the earliest openings across many providers.
+
+Times are naive local datetimes, held as whole minutes since 1970.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from export_stream import iter_pages
+
+BLOCKING_STATUSES = ("pending", "accepted", "in-progress")
+SCHEDULE_FIELDS = ("booking_date", "booking_time", "estimated_duration")
+CALENDAR_COLUMNS = "id, tasker_id, status, booking_date, booking_time, estimated_duration"
+
+DEFAULT_DURATION_MINUTES = 60
+
+# Bookable hours for providers without a declared weekly availability
+DEFAULT_HOURS = ("08:00", "20:00")
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_minutes(moment: datetime) -> int:
+    return int((moment - _EPOCH).total_seconds() // 60)
+
+
+def from_minutes(minutes: int) -> datetime:
+    return _EPOCH + timedelta(minutes=minutes)
+
+
+def booking_interval(booking: Dict) -> Optional[Tuple[int, int]]:
+    """(start, end) in minutes for a booking with a date and time, else None
+
+    Raises ValueError when the date or time cannot be parsed.
+    """
+    day, clock = booking.get("booking_date"), booking.get("booking_time")
+    if not day or not clock:
+        return None
+    start = to_minutes(datetime.fromisoformat(f"{str(day)[:10]}T{str(clock)[:5]}"))
+    duration = int(booking.get("estimated_duration") or DEFAULT_DURATION_MINUTES)
+    if duration <= 0:
+        raise ValueError("estimated_duration must be positive")
+    return start, start + duration
+
+
+class _Intervals:
+    """One provider's bookings sorted by start; reach[i] = max(ends[:i + 1])"""
+
+    __slots__ = ("starts", "ends", "keys", "reach")
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.keys: List = []
+        self.reach: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _refresh_reach(self, i: int) -> None:
+        reach = self.reach[i - 1] if i else None
+        for j in range(i, len(self.ends)):
+            reach = self.ends[j] if reach is None else max(reach, self.ends[j])
+            self.reach[j] = reach
+
+    def add(self, start: int, end: int, key) -> None:
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.keys.insert(i, key)
+        self.reach.insert(i, end)
+        self._refresh_reach(i)
+
+    def remove(self, start: int, key) -> bool:
+        i = bisect_left(self.starts, start)
+        while i < len(self.starts) and self.starts[i] == start:
+            if self.keys[i] == key:
+                for column in (self.starts, self.ends, self.keys, self.reach):
+                    del column[i]
+                self._refresh_reach(i)
+                return True
+            i += 1
+        return False
+
+    def first_conflict(self, start: int, end: int) -> Optional[int]:
+        """Index of the earliest-starting interval overlapping [start, end)"""
+        before = bisect_left(self.starts, end)
+        if not before or self.reach[before - 1] <= start:
+            return None
+        # reach is non-decreasing; where it first passes `start` is an overlapping interval
+        return bisect_right(self.reach, start, 0, before)
+
+    def conflicts(self, start: int, end: int) -> List:
+        first = self.first_conflict(start, end)
+        if first is None:
+            return []
+        before = bisect_left(self.starts, end)
+        return [self.keys[j] for j in range(first, before) if self.ends[j] > start]
+
+
+class BookingCalendar:
+    """Per-provider interval index over committed bookings"""
+
+    def __init__(self, db=None, max_age: float = 300.0):
+        self.db = db
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._providers: Dict[str, _Intervals] = {}
+        # booking id (or reservation token) -> (tasker_id, start, end)
+        self._where: Dict[object, Tuple[str, int, int]] = {}
+        self._tokens = itertools.count(1)
+        self._loaded_at: Optional[float] = None
+        # Held for a whole load, so concurrent refreshes collapse into one
+        self._refresh_lock = threading.RLock()
+        # Keys added (with their entry) or released (None) while a load is reading; None when not loading
+        self._replay: Optional[List[Tuple[object, Optional[Tuple[str, int, int]]]]] = None
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def load(self, bookings: Optional[Iterable[Dict]] = None) -> int:
+        """(Re)build from committed bookings, read from today on when not given"""
+        with self._refresh_lock:
+            with self._lock:
+                self._replay = []
+            try:
+                if bookings is None:
+                    pages = iter_pages(self.db, "bookings", CALENDAR_COLUMNS,
+                                       [("status", "in_", list(BLOCKING_STATUSES)),
+                                        ("booking_date", "gte", date.today().isoformat())])
+                    bookings = (booking for page in pages for booking in page)
+                where: Dict[object, Tuple[str, int, int]] = {}
+                for booking in bookings:
+                    entry = self._entry(booking)
+                    if entry is not None:
+                        where[str(booking["id"])] = entry
+                # Adding in start order keeps every insert an append
+                providers: Dict[str, _Intervals] = {}
+                for key, (tasker_id, start, end) in sorted(where.items(), key=lambda item: item[1][1]):
+                    providers.setdefault(tasker_id, _Intervals()).add(start, end, key)
+                loaded = len(where)
+                with self._lock:
+                    # Slots held for bookings still being inserted are not in the database yet,
+                    # and writes made during the read may be missing from it
+                    reservations = [(key, entry) for key, entry in self._where.items()
+                                    if key.startswith("reservation:")]
+                    replay, self._replay = self._replay, None
+                    self._providers, self._where = providers, where
+                    for key, entry in reservations + replay:
+                        self._release_locked(key)
+                        if entry is not None:
+                            self._add_locked(key, *entry)
+                    self._loaded_at = time.monotonic()
+            finally:
+                with self._lock:
+                    self._replay = None
+        return loaded
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age
+
+    def refresh_if_stale(self) -> None:
+        """Reload when older than max_age; while one caller reloads the rest keep reading the current state"""
+        if not self._stale():
+            return
+        # Before the first load there is nothing to read, so wait for it
+        if not self._refresh_lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            if self._stale():
+                self.load()
+        finally:
+            self._refresh_lock.release()
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    @staticmethod
+    def _entry(booking: Dict) -> Optional[Tuple[str, int, int]]:
+        if booking.get("status", "pending") not in BLOCKING_STATUSES or not booking.get("tasker_id"):
+            return None
+        try:
+            interval = booking_interval(booking)
+        except ValueError:
+            return None
+        return (str(booking["tasker_id"]),) + interval if interval else None
+
+    def _add_locked(self, key, tasker_id: str, start: int, end: int) -> None:
+        self._providers.setdefault(tasker_id, _Intervals()).add(start, end, key)
+        self._where[key] = (tasker_id, start, end)
+        if self._replay is not None:
+            self._replay.append((key, (tasker_id, start, end)))
+
+    def _release_locked(self, key) -> bool:
+        if self._replay is not None:
+            self._replay.append((key, None))
+        entry = self._where.pop(key, None)
+        if entry is None:
+            return False
+        tasker_id, start, _ = entry
+        intervals = self._providers[tasker_id]
+        intervals.remove(start, key)
+        if not intervals:
+            del self._providers[tasker_id]
+        return True
+
+    # -- conflicts ---------------------------------------------------------
+
+    def conflicts(self, tasker_id: str, start: int, end: int, ignore=None) -> List:
+        """Keys of the provider's bookings overlapping [start, end)"""
+        with self._lock:
+            intervals = self._providers.get(str(tasker_id))
+            found = intervals.conflicts(start, end) if intervals else []
+        return [key for key in found if key != ignore]
+
+    def is_busy(self, tasker_id: str, booking: Dict) -> bool:
+        """Whether giving `booking` to this provider would double-book them"""
+        try:
+            interval = booking_interval(booking)
+        except ValueError:
+            return False
+        return bool(interval and self.conflicts(tasker_id, *interval, ignore=str(booking.get("id"))))
+
+    def reserve(self, tasker_id: str, start: int, end: int) -> Tuple[Optional[str], List]:
+        """Hold [start, end) for a booking about to be inserted
+
+        Returns (token, []) on success, to be passed to confirm() or
+        release(), or (None, conflicting keys).
+        """
+        tasker_id = str(tasker_id)
+        with self._lock:
+            intervals = self._providers.get(tasker_id)
+            clashes = intervals.conflicts(start, end) if intervals else []
+            if clashes:
+                return None, clashes
+            token = f"reservation:{next(self._tokens)}"
+            self._add_locked(token, tasker_id, start, end)
+            return token, []
+
+    def confirm(self, token: str, booking_id) -> None:
+        """Swap a reservation for the inserted booking's id"""
+        with self._lock:
+            entry = self._where.get(token)
+            if entry is not None:
+                self._release_locked(token)
+                self._add_locked(str(booking_id), *entry)
+
+    def release(self, key) -> bool:
+        with self._lock:
+            return self._release_locked(str(key))
+
+    def sync(self, booking: Dict) -> None:
+        """Apply a booking write: keep it while committed with a schedule, drop it otherwise"""
+        key = str(booking["id"])
+        entry = self._entry(booking)
+        with self._lock:
+            self._release_locked(key)
+            if entry is not None:
+                self._add_locked(key, *entry)
+
+    # -- free slots --------------------------------------------------------
+
+    def _free_starts(self, tasker_id: str, start: int, until: int, duration: int, mask: int) -> Iterator[int]:
+        """Free start times for one provider on the availability grid, earliest first"""
+        from availability import SLOT_MINUTES, SLOTS_PER_DAY, WEEK_SLOTS
+
+        needed = -(-duration // SLOT_MINUTES)
+        wrapped = mask | (mask << WEEK_SLOTS)  # lets a run of slots continue past Sunday midnight
+        run = (1 << needed) - 1
+        t = -(-start // SLOT_MINUTES) * SLOT_MINUTES
+        while t + duration <= until:
+            moment = from_minutes(t)
+            slot = moment.weekday() * SLOTS_PER_DAY + (moment.hour * 60 + moment.minute) // SLOT_MINUTES
+            if (wrapped >> slot) & run != run:
+                t += SLOT_MINUTES
+                continue
+            with self._lock:
+                intervals = self._providers.get(tasker_id)
+                clash = intervals.first_conflict(t, t + duration) if intervals else None
+                blocked_until = intervals.ends[clash] if clash is not None else None
+            if blocked_until is None:
+                yield t
+                t += SLOT_MINUTES
+            else:
+                t = -(-blocked_until // SLOT_MINUTES) * SLOT_MINUTES
+
+    def next_free_slots(self, tasker_ids: Iterable[str], after: datetime, duration: int = DEFAULT_DURATION_MINUTES,
+                        count: int = 5, horizon_days: int = 14,
+                        availability: Optional[Callable[[str], int]] = None) -> List[Dict]:
+        """The `count` earliest (provider, start) openings of `duration` minutes after `after`
+
+        `availability` maps a provider to their weekly slot mask; providers
+        without one are bookable during DEFAULT_HOURS every day.
+        """
+        from availability import DAYS, mask_from_windows
+
+        default_mask = mask_from_windows({"day": day, "start": DEFAULT_HOURS[0], "end": DEFAULT_HOURS[1]}
+                                         for day in DAYS)
+        start = to_minutes(after)
+        until = start + horizon_days * 24 * 60
+        streams = []
+        for tasker_id in dict.fromkeys(str(t) for t in tasker_ids):
+            mask = (availability(tasker_id) if availability else 0) or default_mask
+            streams.append(zip(self._free_starts(tasker_id, start, until, duration, mask), itertools.repeat(tasker_id)))
+        return [{"tasker_id": tasker_id, "start": from_minutes(t).isoformat(timespec="minutes"),
+                 "end": from_minutes(t + duration).isoformat(timespec="minutes")}
+                for t, tasker_id in itertools.islice(heapq.merge(*streams), count)]
@@ -0,0 +1,131 @@
+"""
+Booking Search Index
+In-process inverted index over bookings, used when the app runs without
+Supabase. It mirrors the weighted `search_vector` tsvector column and the
+`search_bookings` SQL function in updated_schema_uber_like.sql.
+"""
+
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# Same field weights as setweight(..., 'A'/'B'/'C') in the schema
+SEARCH_FIELDS = {
+    "service_name": 1.0,
+    "provider_name": 0.4,
+    "customer_name": 0.4,
+    "service_description": 0.2,
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase and split text into alphanumeric tokens"""
+    if not text:
+        return []
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+class BookingSearchIndex:
+    """Inverted index scoped per owner (customer or tasker)
+
+    Postings are keyed by (owner_id, term), so a query only touches the
+    bookings of the user searching, and only the postings for the query
+    terms, instead of scanning the user's whole history.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (owner_id, term) -> {booking_id: weighted term frequency}
+        self._postings: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(dict)
+        # owner_id -> number of indexed bookings (for idf)
+        self._owner_docs: Dict[str, int] = defaultdict(int)
+        # booking_id -> (owners, terms, stored booking fields)
+        self._docs: Dict[str, Tuple[Tuple[str, ...], Dict[str, float], Dict]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, booking: Dict) -> None:
+        """Index (or re-index) a booking row"""
+        booking_id = str(booking["id"])
+        owners = tuple(
+            str(owner) for owner in (booking.get("customer_id"), booking.get("tasker_id")) if owner
+        )
+        terms: Dict[str, float] = defaultdict(float)
+        for field, weight in SEARCH_FIELDS.items():
+            for token in tokenize(booking.get(field)):
+                terms[token] += weight
+
+        with self._lock:
+            self._remove_locked(booking_id)
+            for owner in owners:
+                self._owner_docs[owner] += 1
+                for term, tf in terms.items():
+                    self._postings[(owner, term)][booking_id] = tf
+            self._docs[booking_id] = (owners, dict(terms), dict(booking))
+
+    def remove(self, booking_id) -> None:
+        """Drop a booking from the index"""
+        with self._lock:
+            self._remove_locked(str(booking_id))
+
+    def _remove_locked(self, booking_id: str) -> None:
+        doc = self._docs.pop(booking_id, None)
+        if doc is None:
+            return
+        owners, terms, _ = doc
+        for owner in owners:
+            self._owner_docs[owner] -= 1
+            if self._owner_docs[owner] <= 0:
+                del self._owner_docs[owner]
+            for term in terms:
+                postings = self._postings.get((owner, term))
+                if postings is not None:
+                    postings.pop(booking_id, None)
+                    if not postings:
+                        del self._postings[(owner, term)]
+
+    def search(self, owner_id: str, query: str, limit: int = 20, offset: int = 0) -> List[Dict]:
+        """Return one page of the owner's bookings matching every query term, best first"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or limit <= 0:
+            return []
+        owner_id = str(owner_id)
+
+        with self._lock:
+            postings = [self._postings.get((owner_id, term)) for term in terms]
+            if any(not p for p in postings):
+                return []
+            total_docs = self._owner_docs.get(owner_id, 0)
+
+            # Intersect starting from the rarest term
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for p in postings[1:]:
+                candidates.intersection_update(p)
+                if not candidates:
+                    return []
+
+            idf = [math.log(1 + total_docs / len(p)) for p in postings]
+            scored = (
+                (sum(w * p[booking_id] for w, p in zip(idf, postings)), booking_id)
+                for booking_id in candidates
+            )
+            # Ties are broken by recency, like ORDER BY rank DESC, created_at DESC
+            top = heapq.nlargest(
+                offset + limit,
+                scored,
+                key=lambda item: (item[0], str(self._docs[item[1]][2].get("created_at") or "")),
+            )
+
+            results = []
+            for rank, booking_id in top[offset:offset + limit]:
+                row = dict(self._docs[booking_id][2])
+                row["rank"] = round(rank, 6)
+                results.append(row)
+            return results
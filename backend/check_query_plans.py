@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Query plan check for the hot queries
+Runs EXPLAIN for each query shape the API issues most often and fails if
+any of them falls back to a full table scan (or, on SQLite, sorts in a
+temporary B-tree instead of reading an index in order).
+
+By default a throwaway SQLite database is created from sqlite_schema.sql,
+seeded with seed_data.py and ANALYZEd. With --database-url (or
+DATABASE_URL) the same shapes are explained against an already seeded
+Postgres database; sequential scans are disabled for the session so any
+"Seq Scan" left in a plan means no usable index exists.
+
+    python check_query_plans.py
+    python check_query_plans.py --bookings 20000
+    python check_query_plans.py --database-url postgresql://localhost/woke
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from typing import Callable, Dict, List, NamedTuple
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+class HotQuery(NamedTuple):
+    name: str
+    # Builds the query on the storage client, exactly as the routes do
+    build: Callable
+    # The equivalent SQL for Postgres, with %(customer)s / %(tasker)s / %(category)s parameters
+    sql: str
+
+
+HOT_QUERIES = [
+    HotQuery("customer_bookings",
+             lambda db, p: db.table("bookings").select("id, status, created_at")
+             .eq("customer_id", p["customer"]).order("created_at", desc=True),
+             "SELECT id, status, created_at FROM bookings WHERE customer_id = %(customer)s "
+             "ORDER BY created_at DESC"),
+    HotQuery("tasker_bookings",
+             lambda db, p: db.table("bookings").select("id, status, created_at")
+             .eq("tasker_id", p["tasker"]).order("created_at", desc=True),
+             "SELECT id, status, created_at FROM bookings WHERE tasker_id = %(tasker)s "
+             "ORDER BY created_at DESC"),
+    HotQuery("pending_queue",
+             lambda db, p: db.table("bookings").select("id, tasker_id, priority, created_at")
+             .eq("status", "pending").order("created_at").limit(1000),
+             "SELECT id, tasker_id, priority, created_at FROM bookings WHERE status = 'pending' "
+             "ORDER BY created_at LIMIT 1000"),
+    HotQuery("active_load",
+             lambda db, p: db.table("bookings").select("tasker_id").in_("status", ["accepted", "in-progress"]),
+             "SELECT tasker_id FROM bookings WHERE status IN ('accepted', 'in-progress')"),
+    HotQuery("available_providers",
+             lambda db, p: db.table("profiles").select("id, name, skills, rating")
+             .eq("role", "tasker").eq("is_available", True).contains("skills", [p["category"]])
+             .order("rating", desc=True),
+             "SELECT id, name, skills, rating FROM profiles WHERE role = 'tasker' AND is_available = true "
+             "AND skills @> ARRAY[%(category)s]::text[] ORDER BY rating DESC"),
+    HotQuery("customer_tasks",
+             lambda db, p: db.table("tasks").select("id, title, status")
+             .eq("customer_id", p["customer"]).order("created_at", desc=True),
+             "SELECT id, title, status FROM tasks WHERE customer_id = %(customer)s ORDER BY created_at DESC"),
+    HotQuery("tasker_reviews",
+             lambda db, p: db.table("reviews").select("id, rating, created_at")
+             .eq("tasker_id", p["tasker"]).order("created_at", desc=True),
+             "SELECT id, rating, created_at FROM reviews WHERE tasker_id = %(tasker)s ORDER BY created_at DESC"),
+]
+
+# "SCAN bookings" is a full scan; "SCAN bookings USING INDEX ..." walks an index
+_SQLITE_FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def sqlite_problems(plan: List[str]) -> List[str]:
+    problems = []
+    for line in plan:
+        match = _SQLITE_FULL_SCAN.match(line)
+        if match:
+            problems.append(f"full scan of {match.group(1)}")
+        elif line.startswith("USE TEMP B-TREE FOR") and "ORDER BY" in line:
+            problems.append("sort not served by an index")
+    return problems
+
+
+def postgres_problems(plan: Dict) -> List[str]:
+    problems = []
+
+    def walk(node):
+        if node.get("Node Type") == "Seq Scan":
+            problems.append(f"sequential scan of {node.get('Relation Name')}")
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan["Plan"])
+    return problems
+
+
+def check_sqlite(db, params: Dict, queries=HOT_QUERIES) -> List[Dict]:
+    results = []
+    for query in queries:
+        plan = query.build(db, params).explain()
+        results.append({"name": query.name, "plan": plan, "problems": sqlite_problems(plan)})
+    return results
+
+
+def seeded_sqlite(path: str, bookings: int):
+    from seed_data import CATEGORIES, seed_local_data
+    from sqlite_backend import SQLiteClient
+
+    db = SQLiteClient(path)
+    ids = seed_local_data(db, bookings=bookings)
+    with db.connection() as conn:
+        conn.execute("ANALYZE")
+    params = {"customer": ids["customer_ids"][0], "tasker": ids["tasker_ids"][0], "category": next(iter(CATEGORIES))}
+    return db, params
+
+
+def check_postgres(database_url: str, queries=HOT_QUERIES) -> List[Dict]:
+    try:
+        import psycopg
+    except ImportError:
+        raise SystemExit("psycopg is required for --database-url (pip install psycopg)")
+
+    results = []
+    with psycopg.connect(database_url) as conn:
+        conn.execute("SET enable_seqscan = off")
+        customer, tasker = conn.execute(
+            "SELECT customer_id::text, tasker_id::text FROM bookings WHERE tasker_id IS NOT NULL LIMIT 1").fetchone()
+        params = {"customer": customer, "tasker": tasker, "category": "cleaning"}
+        for query in queries:
+            (plan,), = conn.execute(f"EXPLAIN (FORMAT JSON) {query.sql}", params).fetchall()
+            plan = plan[0] if isinstance(plan, list) else json.loads(plan)[0]
+            results.append({"name": query.name, "plan": plan, "problems": postgres_problems(plan)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a hot query falls back to a sequential scan")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"),
+                        help="explain against this seeded Postgres database instead of SQLite")
+    parser.add_argument("--bookings", type=int, default=5000, help="bookings to seed (SQLite)")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    if args.database_url:
+        results = check_postgres(args.database_url)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            db, params = seeded_sqlite(os.path.join(tmp, "plans.db"), args.bookings)
+            results = check_sqlite(db, params)
+
+    failed = [r for r in results if r["problems"]]
+    for result in results:
+        mark = "❌" if result["problems"] else "✅"
+        print(f"{mark} {result['name']}: {', '.join(result['problems']) or 'index used'}")
+        if args.verbose or result["problems"]:
+            plan = result["plan"]
+            print("    " + ("\n    ".join(plan) if isinstance(plan, list) else json.dumps(plan, indent=2)))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Booking Dispatcher
+Automatic dispatch for pending bookings (like Uber's driver matching).
+Pending bookings wait in a priority queue, urgent first, and each one is
+offered (or assigned) to the best available nearby provider returned by
+UberLikeBookingSystem.get_available_providers. Providers the booking
+calendar shows as busy at a scheduled booking's time are skipped.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+from geo import haversine_km
+from metrics import percentile
+
+PRIORITY_RANK = {"urgent": 0, "high": 1, "normal": 2, "low": 3}
+
+# How much each factor counts when ranking providers for a booking
+SCORE_WEIGHTS = {"rating": 0.6, "distance": 0.3, "load": 0.1}
+
+# Share of the score taken by track record when a feature store is attached
+RELIABILITY_WEIGHT = 0.2
+
+
+def _coords(row: Dict, lat_key: str = "latitude", lng_key: str = "longitude"):
+    lat, lng = row.get(lat_key), row.get(lng_key)
+    if lat is None or lng is None:
+        return None
+    return float(lat), float(lng)
+
+
+class BookingDispatcher:
+    """Priority-queue dispatcher with per-provider load tracking
+
+    mode="offer" re-points the pending booking at the chosen provider and
+    leaves acceptance to them; mode="assign" also moves it to accepted.
+    """
+
+    def __init__(self, booking_system, mode: str = "offer", max_load: int = 3,
+                 radius_km: float = 25.0, latency_window: int = 1000, features=None):
+        if mode not in ("offer", "assign"):
+            raise ValueError("mode must be 'offer' or 'assign'")
+        self.booking_system = booking_system
+        self.mode = mode
+        self.max_load = max_load
+        self.radius_km = radius_km
+        # Optional ProviderFeatureStore; its reliability feeds the score
+        self.features = features
+        # Called with (booking, provider) after each successful offer/assignment
+        self.on_dispatched: Optional[Callable[[Dict, Dict], None]] = None
+
+        self._lock = threading.Lock()
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        # booking_id -> (seq, booking, excluded provider ids, enqueued at)
+        self._queued: Dict[str, tuple] = {}
+        self._load: Dict[str, int] = defaultdict(int)
+
+        self._started_at = time.time()
+        self._dispatched_total = 0
+        self._unmatched_total = 0
+        self._latencies_ms: deque = deque(maxlen=latency_window)
+        self._dispatch_times: deque = deque(maxlen=latency_window)
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # -- queue -------------------------------------------------------------
+
+    def enqueue(self, booking: Dict, exclude: Iterable[str] = ()) -> None:
+        """Queue a pending booking; re-queuing replaces the earlier entry"""
+        booking_id = str(booking["id"])
+        rank = PRIORITY_RANK.get(booking.get("priority") or "normal", PRIORITY_RANK["normal"])
+        seq = next(self._seq)
+        with self._lock:
+            self._queued[booking_id] = (seq, dict(booking), set(exclude), time.perf_counter())
+            heapq.heappush(self._heap, (rank, str(booking.get("created_at") or ""), seq, booking_id))
+
+    def remove(self, booking_id) -> None:
+        """Forget a booking (accepted, cancelled, ...); its heap entry is skipped lazily"""
+        with self._lock:
+            self._queued.pop(str(booking_id), None)
+
+    def __len__(self) -> int:
+        return len(self._queued)
+
+    def load_pending(self, limit: int = 1000) -> int:
+        """Queue pending bookings and rebuild provider load from the database"""
+        db = self.booking_system.db
+        pending = db.table("bookings") \
+            .select("id, tasker_id, status, priority, created_at, service_category, latitude, longitude, "
+                    "booking_date, booking_time, estimated_duration") \
+            .eq("status", "pending") \
+            .order("created_at") \
+            .limit(limit) \
+            .execute()
+        active = db.table("bookings") \
+            .select("tasker_id") \
+            .in_("status", ["accepted", "in-progress"]) \
+            .execute()
+
+        with self._lock:
+            self._load.clear()
+            for row in active.data or []:
+                if row.get("tasker_id"):
+                    self._load[str(row["tasker_id"])] += 1
+        for booking in pending.data or []:
+            self.enqueue(booking)
+        return len(pending.data or [])
+
+    def release(self, provider_id: str) -> None:
+        """A provider finished, declined or lost a booking"""
+        with self._lock:
+            provider_id = str(provider_id)
+            if self._load.get(provider_id, 0) > 0:
+                self._load[provider_id] -= 1
+
+    # -- matching ----------------------------------------------------------
+
+    def _score(self, booking: Dict, provider: Dict) -> Optional[float]:
+        load = self._load.get(str(provider["id"]), 0)
+        if load >= self.max_load:
+            return None
+        calendar = getattr(self.booking_system, "calendar", None)
+        if calendar is not None and calendar.is_busy(provider["id"], booking):
+            return None
+
+        proximity = 0.5  # unknown location: neither near nor far
+        here, there = _coords(booking), _coords(provider)
+        if here and there:
+            distance = haversine_km(*here, *there)
+            if distance > self.radius_km:
+                return None
+            proximity = 1 - distance / self.radius_km
+
+        rating = float(provider.get("rating") or 0) / 5
+        score = (SCORE_WEIGHTS["rating"] * rating
+                 + SCORE_WEIGHTS["distance"] * proximity
+                 + SCORE_WEIGHTS["load"] * (1 - load / self.max_load))
+        if self.features is not None:
+            skill = booking.get("service_category")
+            reliability = self.features.features(provider["id"], skill)["reliability"]
+            score = (1 - RELIABILITY_WEIGHT) * score + RELIABILITY_WEIGHT * reliability
+        return score
+
+    def best_provider(self, booking: Dict, providers: List[Dict], exclude=()) -> Optional[Dict]:
+        best, best_score = None, None
+        for provider in providers:
+            if str(provider["id"]) in exclude:
+                continue
+            score = self._score(booking, provider)
+            if score is not None and (best_score is None or score > best_score):
+                best, best_score = provider, score
+        return best
+
+    def dispatch_batch(self, max_items: int = 100) -> List[Dict]:
+        """Dispatch up to `max_items` queued bookings, highest priority first"""
+        providers_by_category: Dict[Optional[str], List[Dict]] = {}
+        unmatched = []
+        results = []
+        if self.features is not None:
+            self.features.refresh_if_stale()
+
+        for _ in range(max_items):
+            with self._lock:
+                entry = None
+                while self._heap:
+                    _, _, seq, booking_id = heapq.heappop(self._heap)
+                    queued = self._queued.get(booking_id)
+                    if queued and queued[0] == seq:
+                        entry = self._queued.pop(booking_id)
+                        break
+            if entry is None:
+                break
+            _, booking, exclude, enqueued_at = entry
+
+            category = booking.get("service_category")
+            if category not in providers_by_category:
+                providers_by_category[category] = self.booking_system.get_available_providers(category)
+
+            with self._lock:
+                provider = self.best_provider(booking, providers_by_category[category], exclude)
+                if provider is not None:
+                    # Reserve capacity before the write so concurrent batches see it
+                    self._load[str(provider["id"])] += 1
+
+            if provider is None:
+                unmatched.append((booking, exclude))
+                results.append({"booking_id": booking["id"], "success": False, "message": "No available provider"})
+                continue
+
+            ok = self.booking_system.assign_provider(booking["id"], provider, accept=self.mode == "assign")
+            with self._lock:
+                if ok:
+                    self._dispatched_total += 1
+                    self._latencies_ms.append((time.perf_counter() - enqueued_at) * 1000)
+                    self._dispatch_times.append(time.time())
+                else:
+                    self._load[str(provider["id"])] -= 1
+            if ok and self.on_dispatched is not None:
+                self.on_dispatched(booking, provider)
+            results.append({
+                "booking_id": booking["id"],
+                "success": ok,
+                "provider_id": provider["id"] if ok else None,
+                "message": f"Booking {'assigned' if self.mode == 'assign' else 'offered'} to {provider.get('name', 'Provider')}"
+                if ok else "Booking is no longer pending"
+            })
+
+        # Leave unmatched bookings queued for the next round
+        with self._lock:
+            self._unmatched_total += len(unmatched)
+        for booking, exclude in unmatched:
+            self.enqueue(booking, exclude)
+        return results
+
+    # -- background loop ---------------------------------------------------
+
+    def start(self, interval: float = 5.0) -> None:
+        """Run dispatch_batch every `interval` seconds on a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.dispatch_batch()
+                except Exception as e:
+                    print(f"Error dispatching bookings: {e}")
+
+        self._thread = threading.Thread(target=loop, name="booking-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # -- metrics -----------------------------------------------------------
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            latencies = sorted(self._latencies_ms)
+            now = time.time()
+            recent = sum(1 for t in self._dispatch_times if now - t <= 60)
+            uptime = max(now - self._started_at, 1e-9)
+            return {
+                "mode": self.mode,
+                "queue_depth": len(self._queued),
+                "dispatched_total": self._dispatched_total,
+                "unmatched_total": self._unmatched_total,
+                "throughput_per_sec": round(self._dispatched_total / uptime, 3),
+                "throughput_last_minute": recent,
+                "latency_ms": {
+                    "p50": round(percentile(latencies, 50), 3),
+                    "p95": round(percentile(latencies, 95), 3),
+                    "p99": round(percentile(latencies, 99), 3),
+                },
+                "provider_load": {pid: n for pid, n in self._load.items() if n},
+            }
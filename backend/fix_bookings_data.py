@@ -6,6 +6,7 @@ Script to fix booking data integrity issues:
 """
 
 import os
+from collections import Counter
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
@@ -87,11 +88,16 @@ def verify_fix():
         customers_response = supabase.table("profiles").select("id, name").eq("role", "customer").execute()
         customers = customers_response.data or []
         
+        # One query for all customers' bookings instead of one per customer
+        counts = Counter()
+        if customers:
+            bookings_response = supabase.table("bookings").select("customer_id") \
+                .in_("customer_id", [c["id"] for c in customers]).execute()
+            counts.update(b["customer_id"] for b in bookings_response.data or [])
+        
         print("\n📊 Booking distribution by customer:")
         for customer in customers:
-            bookings_response = supabase.table("bookings").select("id").eq("customer_id", customer["id"]).execute()
-            booking_count = len(bookings_response.data or [])
-            print(f"  {customer['name']}: {booking_count} bookings")
+            print(f"  {customer['name']}: {counts.get(customer['id'], 0)} bookings")
             
     except Exception as e:
         print(f"❌ Error during verification: {e}")
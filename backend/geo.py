@@ -0,0 +1,69 @@
+"""
+Geospatial Helpers
+Distances and bounding boxes shared by the nearby-provider lookups. The
+database narrows candidates with a spatial index (earthdistance/GiST on
+Postgres, R*Tree on SQLite); nearest() then applies the exact radius and
+orders by distance. geohash() names the grid cell a point falls in.
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in km"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(a))
+
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lng, max_lng) enclosing the circle"""
+    angular = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angular)
+    # Widest longitude span of the circle (reached poleward of its centre)
+    ratio = math.sin(angular) / max(math.cos(math.radians(lat)), 1e-12)
+    dlng = 180.0 if ratio >= 1 else math.degrees(math.asin(ratio))
+    return max(-90.0, lat - dlat), min(90.0, lat + dlat), lng - dlng, lng + dlng
+
+
+def nearest(rows: Iterable[Dict], lat: float, lng: float, radius_km: float,
+            category: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+    """Rows within radius_km (and offering `category`), closest first, with distance_km"""
+    found = []
+    for row in rows:
+        if row.get("latitude") is None or row.get("longitude") is None:
+            continue
+        if category and category not in (row.get("skills") or []):
+            continue
+        distance = haversine_km(lat, lng, float(row["latitude"]), float(row["longitude"]))
+        if distance <= radius_km:
+            found.append({**row, "distance_km": round(distance, 3)})
+    found.sort(key=lambda row: row["distance_km"])
+    return found[:limit] if limit else found
+
+
+def geohash(lat: float, lng: float, precision: int = 5) -> str:
+    """Geohash of a point; 5 characters is a cell of about 4.9 x 4.9 km"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, longitude first
+        span, coordinate = (lng_range, lng) if even else (lat_range, lat)
+        middle = (span[0] + span[1]) / 2
+        if coordinate >= middle:
+            value = value << 1 | 1
+            span[0] = middle
+        else:
+            value <<= 1
+            span[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
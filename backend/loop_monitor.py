@@ -0,0 +1,140 @@
+"""
+Event Loop Lag Monitor
+A heartbeat task sleeps for a fixed interval and records how late it
+wakes up; that delay is the event-loop lag every connection on the worker
+sees. A watchdog thread watches the heartbeat and, when the loop has been
+stuck for longer than the threshold, captures the loop thread's stack so
+the blocking call can be found.
+
+Lag is exported as the event_loop_lag_seconds histogram plus p50/p95/p99
+gauges on /metrics; stall reports are served from /debug/loop.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, List, Optional
+
+from metrics import REGISTRY, percentile
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+LOOP_LAG = REGISTRY.histogram("event_loop_lag_seconds", "Event loop wake-up delay", buckets=LAG_BUCKETS)
+LOOP_STALLS = REGISTRY.counter("event_loop_blocked_total", "Times the loop was blocked beyond the threshold")
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, window: int = 2048, max_reports: int = 20):
+        self.interval = interval
+        self.threshold = threshold
+        self._lags: deque = deque(maxlen=window)
+        self._reports: deque = deque(maxlen=max_reports)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # Last heartbeat (perf_counter) and the stall currently being reported
+        self._last_beat = time.perf_counter()
+        self._stall: Optional[Dict] = None
+        self._lock = threading.Lock()
+
+    # -- heartbeat (runs on the loop) --------------------------------------
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self.record_lag(max(0.0, now - expected))
+            self._beat(now)
+
+    def record_lag(self, lag: float) -> None:
+        LOOP_LAG.observe(lag)
+        self._lags.append(lag)
+
+    def _beat(self, now: float) -> None:
+        with self._lock:
+            self._last_beat = now
+            if self._stall is not None:
+                self._stall["blocked_ms"] = round((now - self._stall["_started"]) * 1000, 3)
+                self._stall = None
+
+    # -- watchdog (runs on its own thread) ---------------------------------
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.threshold / 2):
+            self.check()
+
+    def check(self) -> Optional[Dict]:
+        """Capture the loop thread's stack if the heartbeat is overdue"""
+        now = time.perf_counter()
+        with self._lock:
+            overdue = now - self._last_beat - self.interval
+            if overdue < self.threshold or self._stall is not None or self._loop_thread is None:
+                return None
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = traceback.format_stack(frame) if frame is not None else []
+            self._stall = {
+                "detected_at": time.time(),
+                "blocked_ms": round(overdue * 1000, 3),  # updated once the loop recovers
+                "stack": [line.rstrip() for line in stack],
+                "_started": self._last_beat + self.interval,
+            }
+            self._reports.append(self._stall)
+        LOOP_STALLS.inc()
+        logger.warning("Event loop blocked for %.0fms:\n%s", overdue * 1000, "".join(stack))
+        return self._stall
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Call from the loop being monitored (e.g. a startup handler)"""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._task = self._loop.create_task(self._heartbeat())
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    # -- reporting ---------------------------------------------------------
+
+    def percentiles(self) -> Dict[str, float]:
+        lags = sorted(self._lags)
+        return {q: round(percentile(lags, pct), 6) for q, pct in (("0.5", 50), ("0.95", 95), ("0.99", 99))}
+
+    def stalls(self) -> List[Dict]:
+        with self._lock:
+            return [{k: v for k, v in report.items() if not k.startswith("_")} for report in reversed(self._reports)]
+
+    def status(self) -> Dict:
+        lags = list(self._lags)
+        return {
+            "running": self._task is not None,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "samples": len(lags),
+            "lag_ms": {q: round(v * 1000, 3) for q, v in self.percentiles().items()},
+            "max_lag_ms": round(max(lags) * 1000, 3) if lags else 0.0,
+            "stalls": self.stalls(),
+        }
+
+    def register_metrics(self, registry=REGISTRY) -> None:
+        registry.gauge("event_loop_lag_quantile_seconds", "Recent event loop lag percentiles", ("quantile",),
+                       lambda: {(q,): v for q, v in self.percentiles().items()})
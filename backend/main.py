@@ -1,19 +1,38 @@
-from fastapi import FastAPI, HTTPException, Path, Body, Query
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Path, Body, Query, Header
+from fastapi.responses import HTMLResponse, PlainTextResponse, ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
-from supabase import create_client
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
+from datetime import datetime
+import hmac
 import os
-from ai_integration import classify_service_request, get_service_followups, match_providers
-# from uber_like_booking_system import UberLikeBookingSystem
+from storage import LazyStorage
+from metrics import REGISTRY, InstrumentedClient, MetricsMiddleware
+import query_profiler
+from request_profiler import ProfileStore, RequestProfilerMiddleware
+import memory_diagnostics
+from loop_monitor import LoopLagMonitor
+from tasker_typeahead import TaskerPrefixIndex
+from dispatcher import BookingDispatcher
+from provider_features import ProviderFeatureStore
+from provider_catalog import CATALOG_FIELDS, ProviderCatalog
+from booking_calendar import SCHEDULE_FIELDS, BookingCalendar, booking_interval
+from surge import DemandSupplyAggregator
+from presence import PresenceStore
+from offer_scheduler import OfferExpiryScheduler
+from uber_like_booking_system import UberLikeBookingSystem
+import export_stream
+import rating_stats
+from response_models import (BookingList, ProfileOut, ReviewList, TaskList,
+                             select_columns)
 
 load_dotenv()
 app = FastAPI(
     title="Woke AI Platform",
-    description="Premium in-house services with AI-powered matching"
+    description="Premium in-house services with AI-powered matching",
+    # orjson serializes the validated response models several times faster
+    default_response_class=ORJSONResponse
 )
 
 # --------------------------
@@ -27,24 +46,130 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route counts and latency histograms, scraped from GET /metrics
+app.add_middleware(MetricsMiddleware)
+
 # --------------------------
-# Static Files (for Vercel)
+# Static Files
 # --------------------------
-app.mount("/static", StaticFiles(directory="../frontend"), name="static")
+# Vercel serves frontend/ from its CDN (see vercel.json). SERVE_STATIC=1
+# mounts it here too for local runs.
+if os.getenv("SERVE_STATIC", "").lower() in ("1", "true", "yes"):
+    from fastapi.staticfiles import StaticFiles
+    app.mount("/static", StaticFiles(directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend")), name="static")
 
 # --------------------------
-# Supabase client
+# Storage (Supabase, or embedded SQLite for local runs - see storage.py)
 # --------------------------
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-try:
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-except Exception as e:
-    print(f"Warning: Supabase connection failed: {e}")
-    supabase = None
+db = InstrumentedClient(LazyStorage())  # times every .execute(); client built on first query
+
+# Per-request query log with N+1 detection (QUERY_PROFILE=1; DEBUG=1 adds X-Query-Profile)
+DEBUG = os.getenv("DEBUG", "").lower() in ("1", "true", "yes")
+if DEBUG or os.getenv("QUERY_PROFILE", "").lower() in ("1", "true", "yes"):
+    db.add_observer(query_profiler.observe)
+    app.add_middleware(query_profiler.QueryProfilerMiddleware, debug_header=DEBUG)
+
+# Opt-in sampling profiler for single requests (X-Profile: $PROFILE_TOKEN or ?profile=...).
+# The same token guards every /debug endpoint.
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+profile_store = ProfileStore()
+if PROFILE_TOKEN:
+    app.add_middleware(
+        RequestProfilerMiddleware,
+        token=PROFILE_TOKEN,
+        store=profile_store,
+        interval=float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000,
+        max_per_minute=int(os.getenv("PROFILE_MAX_PER_MINUTE", "6"))
+    )
+
+# Columnar in-memory catalog of taskers for skill-filtered provider lists,
+# loaded on first use and fully reloaded every CATALOG_MAX_AGE seconds
+provider_catalog = ProviderCatalog(db, max_age=float(os.getenv("CATALOG_MAX_AGE", "300")))
+
+# Bookings created per geohash cell and category over SURGE_WINDOW_SECONDS against available
+# providers there, for surge pricing; supply is rebuilt from the catalog every SURGE_MAX_AGE seconds
+demand_supply = DemandSupplyAggregator(provider_catalog,
+                                       window_seconds=float(os.getenv("SURGE_WINDOW_SECONDS", "900")),
+                                       max_age=float(os.getenv("SURGE_MAX_AGE", "300")))
+
+# Provider heartbeats held in memory and written behind in bulk every PRESENCE_FLUSH_INTERVAL
+# seconds; providers silent for PRESENCE_STALE_AFTER seconds are marked unavailable
+presence = PresenceStore(db, catalog=provider_catalog, surge=demand_supply,
+                         stale_after=float(os.getenv("PRESENCE_STALE_AFTER", "120")))
+presence.register_metrics()
+
+# Committed booking intervals per provider for double-booking checks and free-slot search
+booking_calendar = BookingCalendar(db, max_age=float(os.getenv("CALENDAR_MAX_AGE", "300")))
+
+# Initialize Uber-like booking system on the same client
+booking_system = UberLikeBookingSystem(db, catalog=provider_catalog, calendar=booking_calendar)
+
+# Provider track record (per skill) from booking transitions, reloaded at most every FEATURES_MAX_AGE seconds
+provider_features = ProviderFeatureStore(db, max_age=float(os.getenv("FEATURES_MAX_AGE", "30")))
+
+# Automatic dispatch of pending bookings (background loop opt-in via DISPATCH_INTERVAL seconds)
+dispatcher = BookingDispatcher(booking_system, mode=os.getenv("DISPATCH_MODE", "offer"), features=provider_features)
+
+# Unanswered offers expire after OFFER_TTL_SECONDS and are re-offered or declined
+offer_scheduler = OfferExpiryScheduler(
+    booking_system,
+    dispatcher,
+    ttl_seconds=float(os.getenv("OFFER_TTL_SECONDS", "900")),
+    action=os.getenv("OFFER_EXPIRY_ACTION", "redispatch")
+)
+
+@app.on_event("startup")
+def start_dispatcher():
+    interval = os.getenv("DISPATCH_INTERVAL")
+    if interval:
+        dispatcher.load_pending()
+        dispatcher.start(float(interval))
+    if os.getenv("OFFER_TTL_SECONDS"):
+        # Timers are rebuilt from created_at/status_updated_at after a restart
+        offer_scheduler.reload()
+        offer_scheduler.start()
+
+# Event-loop lag watchdog; logs the loop's stack when a callback blocks it
+loop_monitor = LoopLagMonitor(threshold=float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100")) / 1000)
+loop_monitor.register_metrics()
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    if os.getenv("LOOP_MONITOR", "1").lower() not in ("0", "false", "no"):
+        loop_monitor.start()
+
+@app.on_event("shutdown")
+def stop_loop_monitor():
+    loop_monitor.stop()
+
+@app.on_event("startup")
+def start_presence():
+    presence.start(float(os.getenv("PRESENCE_FLUSH_INTERVAL", "2")))
+
+@app.on_event("shutdown")
+def stop_presence():
+    try:
+        presence.stop()
+    except Exception as e:
+        print(f"Error flushing provider presence: {e}")
+
+# Prefix index for tasker search-as-you-type, loaded on first use
+tasker_index = TaskerPrefixIndex()
+TASKER_COLUMNS = "id, name, skills, hourly_rate, bio, rating"
 
-# Initialize Uber-like booking system (temporarily disabled)
-# booking_system = UberLikeBookingSystem()
+# In-process structures reported by /debug/memory
+if os.getenv("MEMORY_TRACE", "").lower() in ("1", "true", "yes"):
+    memory_diagnostics.start_tracing()
+memory_diagnostics.register_store("tasker_index", tasker_index)
+memory_diagnostics.register_store("dispatch_queue", dispatcher,
+                                  fields=("_heap", "_queued", "_load", "_latencies_ms", "_dispatch_times"))
+memory_diagnostics.register_store("offer_timers", offer_scheduler, fields=("_wheel", "_tried"))
+memory_diagnostics.register_store("request_profiles", profile_store)
+memory_diagnostics.register_store("provider_features", provider_features, fields=("_counters",))
+memory_diagnostics.register_store("provider_catalog", provider_catalog, fields=("_cols",))
+memory_diagnostics.register_store("booking_calendar", booking_calendar, fields=("_providers", "_where"))
+memory_diagnostics.register_store("demand_supply", demand_supply, fields=("_demand", "_supply", "_providers"))
+memory_diagnostics.register_store("provider_presence", presence, fields=("_state", "_dirty"))
 
 # --------------------------
 # Schemas
@@ -86,16 +211,38 @@ class BookingCreate(BaseModel):
     task_id: str
     tasker_id: str
     customer_id: str
+    booking_date: Optional[str] = None  # YYYY-MM-DD
+    booking_time: Optional[str] = None  # HH:MM
+    estimated_duration: Optional[int] = None  # minutes
+    service_category: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 class BookingUpdate(BaseModel):
     status: str  # accepted, declined, completed
 
+class BulkBookingItem(BookingCreate):
+    service_name: Optional[str] = None
+    special_instructions: Optional[str] = None
+
+class BulkBookingCreate(BaseModel):
+    bookings: List[BulkBookingItem]
+
+class BulkStatusUpdate(BaseModel):
+    booking_ids: List[str]
+    status: str  # accepted, declined, in-progress, completed, cancelled
+
+MAX_BULK_ITEMS = 500
+
 class ReviewCreate(BaseModel):
     booking_id: int
     customer_id: str
     tasker_id: str
     rating: int
     review_text: Optional[str] = None # matches your table column
+    service_rating: Optional[int] = None
+    communication_rating: Optional[int] = None
+    timeliness_rating: Optional[int] = None
 
 # --------------------------
 # Root
@@ -104,9 +251,9 @@ class ReviewCreate(BaseModel):
 def root():
     return {"message": "Backend running"}
 
-@app.get("/profiles")
-def get_profiles():
-    response = supabase.table("profiles").select("*").execute()
+@app.get("/profiles", response_model=List[ProfileOut], response_model_exclude_unset=True)
+def get_profiles(fields: Optional[str] = Query(None, description="Comma-separated columns to return")):
+    response = db.table("profiles").select(select_columns("profiles", fields)).execute()
     return response.data
 
 # --------------------------
@@ -118,18 +265,14 @@ class LoginRequest(BaseModel):
 
 @app.post("/login/customer")
 def login_customer(email: str = Body(...), password: str = Body(...)):
-    if not supabase:
-        # Mock login for demo purposes when Supabase is not available
-        return {"message": "Login successful (demo mode)", "user_id": "demo_user_123", "user_name": "Demo User"}
-    
     try:
-        user = supabase.auth.sign_in_with_password({"email": email, "password": password})
+        user = db.auth.sign_in_with_password({"email": email, "password": password})
         if not user.user:
             raise HTTPException(status_code=400, detail="Login failed")
         
         # Get user profile to return name
         try:
-            profile_response = supabase.table("profiles").select("name").eq("id", user.user.id).execute()
+            profile_response = db.table("profiles").select("name").eq("id", user.user.id).execute()
             user_name = profile_response.data[0]["name"] if profile_response.data else "User"
         except:
             user_name = "User"
@@ -141,36 +284,147 @@ def login_customer(email: str = Body(...), password: str = Body(...)):
 # --------------------------
 # Step 2: Providers Endpoint
 # --------------------------
-@app.get("/providers")
-def get_providers(service: str = Query(..., description="Service type, e.g., cleaning, repairs, carcare, beauty, appliance")):
+@app.get("/providers", response_model=List[ProfileOut], response_model_exclude_unset=True)
+def get_providers(
+    service: Optional[str] = Query(None, description="Service type, e.g., cleaning, repairs, carcare, beauty, appliance"),
+    category: Optional[str] = Query(None, description="Alias of service, sent by the frontend"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    day: Optional[str] = Query(None, description="Only providers available on this weekday, e.g. sat"),
+    start: Optional[str] = Query(None, description="From this time (HH:MM) on `day`"),
+    end: Optional[str] = Query(None, description="Until this time (HH:MM); defaults to one half-hour slot")
+):
     """
-    Fetch providers filtered by service type.
+    Fetch providers filtered by service type and, optionally, weekly availability.
     """
+    service = service or category
+    if not service:
+        raise HTTPException(status_code=422, detail="service is required")
+    columns = select_columns("providers", fields)
+    slots = None
+    if day is not None or start is not None:
+        if day is None or start is None:
+            raise HTTPException(status_code=422, detail="day and start must be given together")
+        import availability
+        try:
+            slots = availability.window_mask(day, start, end)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     try:
-        # Assuming your Supabase table for providers is 'providers' 
-        # and each provider has a 'service_type' column like 'cleaning', 'repairs', etc.
-        response = supabase.table("providers").select("*").eq("service_type", service).execute()
+        # Providers are tasker profiles; the service type is one of their skills
+        names = columns.split(", ")
+        if set(names) <= set(CATALOG_FIELDS):
+            provider_catalog.refresh_if_stale()
+            return provider_catalog.select(skills=[service], columns=names, slots=slots)
+        query = db.table("profiles").select(columns)
+        if slots is not None:
+            provider_catalog.refresh_if_stale()
+            ids = [p["id"] for p in provider_catalog.select(skills=[service], columns=("id",), slots=slots)]
+            query = query.in_("id", ids)
+        response = query.eq("role", "tasker").contains("skills", [service]).execute()
         if response.data is None:
             return []
         return response.data
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch providers: {str(e)}")
 
+@app.get("/providers/nearby")
+def get_nearby_providers(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(10, gt=0, le=200),
+    service: Optional[str] = Query(None, description="Only providers offering this service"),
+    limit: int = Query(50, ge=1, le=200)
+):
+    """Available providers within radius_km of (lat, lng), closest first"""
+    providers = booking_system.get_available_providers(service, lat=lat, lng=lng, radius_km=radius_km, limit=limit)
+    return {"providers": providers}
+
+@app.get("/providers/free-slots")
+def get_free_slots(
+    service: Optional[str] = Query(None, description="Search every available provider offering this service"),
+    tasker_ids: Optional[str] = Query(None, description="Comma-separated provider ids"),
+    after: Optional[str] = Query(None, description="Earliest start (ISO datetime); defaults to now"),
+    duration: int = Query(60, ge=15, le=720, description="Length of the job in minutes"),
+    count: int = Query(5, ge=1, le=50)
+):
+    """The earliest openings of `duration` minutes across many providers, soonest first"""
+    if not service and not tasker_ids:
+        raise HTTPException(status_code=422, detail="service or tasker_ids is required")
+    try:
+        start = datetime.fromisoformat(after) if after else datetime.now()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="after must be an ISO datetime")
+    try:
+        booking_calendar.refresh_if_stale()
+        provider_catalog.refresh_if_stale()
+        if tasker_ids:
+            ids = [t.strip() for t in tasker_ids.split(",") if t.strip()]
+        else:
+            ids = [p["id"] for p in provider_catalog.select(skills=[service], available=True, columns=("id",))]
+        slots = booking_calendar.next_free_slots(ids, start, duration=duration, count=count,
+                                                 availability=provider_catalog.availability)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to find free slots: {str(e)}")
+    return {"slots": slots}
+
+@app.get("/surge")
+def get_surge(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    category: str = Query(..., description="Skill tag, e.g. cleaning")
+):
+    """Recent demand, current supply and the surge multiplier for a category around a point"""
+    try:
+        provider_catalog.refresh_if_stale()
+        demand_supply.refresh_if_stale()
+        return demand_supply.snapshot(lat, lng, category)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to read surge: {str(e)}")
+
+class Heartbeat(BaseModel):
+    is_available: Optional[bool] = None  # unchanged when omitted
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+@app.post("/providers/{tasker_id}/heartbeat")
+def provider_heartbeat(tasker_id: str, data: Heartbeat = None):
+    """Presence ping from the provider app; written to profiles in the next bulk flush"""
+    data = data or Heartbeat()
+    if (data.latitude is None) != (data.longitude is None):
+        raise HTTPException(status_code=422, detail="latitude and longitude must be given together")
+    try:
+        provider_catalog.refresh_if_stale()
+        state = presence.heartbeat(tasker_id, data.is_available, data.latitude, data.longitude)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Heartbeat failed: {str(e)}")
+    if state is None:
+        raise HTTPException(status_code=404, detail="Provider not found")
+    return {"tasker_id": tasker_id, **state}
+
+@app.get("/presence/metrics")
+def presence_metrics():
+    return presence.metrics()
+
+@app.get("/providers/{tasker_id}/features")
+def get_provider_features(tasker_id: str, skill: Optional[str] = None):
+    """Track record used by matching: jobs done, completion/acceptance rates, reliability"""
+    try:
+        provider_features.refresh_if_stale()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load provider features: {str(e)}")
+    return {"tasker_id": tasker_id, "skill": skill, **provider_features.features(tasker_id, skill)}
+
 # --------------------------
 # Registration Endpoints
 # --------------------------
 @app.post("/register/customer")
 def register_customer(data: CustomerRegister):
-    if not supabase:
-        # Mock registration for demo purposes when Supabase is not available
-        return {"message": "Customer registered (demo mode)", "user_id": f"demo_user_{data.email.replace('@', '_')}"}
-    
     try:
-        user = supabase.auth.sign_up({"email": data.email, "password": data.password})
+        user = db.auth.sign_up({"email": data.email, "password": data.password})
         if not user.user:
             raise HTTPException(status_code=400, detail=user.get("message", "Signup failed"))
 
-        supabase.table("profiles").insert({
+        db.table("profiles").insert({
             "id": user.user.id,
             "name": data.name,
             "role": "customer"
@@ -181,23 +435,23 @@ def register_customer(data: CustomerRegister):
 
 @app.post("/register/tasker")
 def register_tasker(data: TaskerRegister):
-    if not supabase:
-        # Mock registration for demo purposes when Supabase is not available
-        return {"message": "Tasker registered (demo mode)", "tasker_id": f"demo_tasker_{data.email.replace('@', '_')}"}
-    
     try:
-        user = supabase.auth.sign_up({"email": data.email, "password": data.password})
+        user = db.auth.sign_up({"email": data.email, "password": data.password})
         if not user.user:
             raise HTTPException(status_code=400, detail=user.get("message", "Signup failed"))
 
-        supabase.table("profiles").insert({
+        profile_data = {
             "id": user.user.id,
             "name": data.name,
             "role": "tasker",
             "skills": data.skills,
             "hourly_rate": data.hourly_rate,
             "bio": data.bio
-        }).execute()
+        }
+        db.table("profiles").insert(profile_data).execute()
+        tasker_index.upsert(profile_data)
+        provider_catalog.upsert(profile_data)
+        demand_supply.provider_changed(profile_data)
         return {"message": "Tasker registered", "tasker_id": user.user.id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
@@ -207,21 +461,8 @@ def register_tasker(data: TaskerRegister):
 # --------------------------
 @app.post("/tasks")
 def create_task(data: TaskCreate):
-    if not supabase:
-        # Mock task creation for demo purposes when Supabase is not available
-        task_id = f"demo_task_{len(str(hash(data.title + data.customer_id)))}"
-        mock_task = {
-            "id": task_id,
-            "title": data.title,
-            "description": data.description,
-            "customer_id": data.customer_id,
-            "status": data.status,
-            "created_at": "2024-01-01T00:00:00Z"
-        }
-        return {"message": "Task created (demo mode)", "task": [mock_task]}
-    
     try:
-        response = supabase.table("tasks").insert({
+        response = db.table("tasks").insert({
             "title": data.title,
             "description": data.description,
             "customer_id": data.customer_id,
@@ -233,24 +474,11 @@ def create_task(data: TaskCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Task creation failed: {str(e)}")
 
-@app.get("/tasks")
-def list_tasks(customer_id: str):
-    if not supabase:
-        # Mock task listing for demo purposes when Supabase is not available
-        mock_tasks = [
-            {
-                "id": "demo_task_1",
-                "title": "Sample Task",
-                "description": "This is a demo task",
-                "customer_id": customer_id,
-                "status": "open",
-                "created_at": "2024-01-01T00:00:00Z"
-            }
-        ]
-        return {"tasks": mock_tasks}
-    
+@app.get("/tasks", response_model=TaskList, response_model_exclude_unset=True)
+def list_tasks(customer_id: str, fields: Optional[str] = Query(None, description="Comma-separated columns to return")):
+    columns = select_columns("tasks", fields)
     try:
-        response = supabase.table("tasks").select("*").eq("customer_id", customer_id).execute()
+        response = db.table("tasks").select(columns).eq("customer_id", customer_id).execute()
         return {"tasks": response.data or []}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch tasks: {str(e)}")
@@ -261,7 +489,7 @@ def update_task(task_id: int = Path(...), data: TaskUpdate = None):
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
 
-    response = supabase.table("tasks").update(update_data).eq("id", task_id).execute()
+    response = db.table("tasks").update(update_data).eq("id", task_id).execute()
     if not response.data:
         raise HTTPException(status_code=404, detail="Task not found or update failed")
     return {"message": "Task updated", "task": response.data}
@@ -271,51 +499,194 @@ def update_task(task_id: int = Path(...), data: TaskUpdate = None):
 # --------------------------
 @app.post("/bookings")
 def create_booking(data: BookingCreate):
-    if not supabase:
-        # Mock booking creation for demo purposes when Supabase is not available
-        booking_id = f"demo_booking_{len(str(hash(str(data.task_id) + data.customer_id + data.tasker_id)))}"
-        mock_booking = {
-            "id": booking_id,
-            "task_id": data.task_id,
-            "customer_id": data.customer_id,
-            "tasker_id": data.tasker_id,
-            "status": "pending",
-            "created_at": "2024-01-01T00:00:00Z"
-        }
-        return {"message": "Booking created (demo mode)", "booking": [mock_booking]}
-    
+    values = data.dict()
+    schedule = {k: values[k] for k in SCHEDULE_FIELDS if values[k] is not None}
+    details = {k: values[k] for k in ("service_category", "latitude", "longitude") if values[k] is not None}
     try:
-        response = supabase.table("bookings").insert({
+        interval = booking_interval(schedule)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid schedule: {str(e)}")
+    if schedule and interval is None:
+        raise HTTPException(status_code=400, detail="booking_date and booking_time must be given together")
+
+    token = None
+    # Unassigned bookings (tasker_id "") are checked against the calendar when the dispatcher assigns them
+    if interval and data.tasker_id:
+        # Hold the slot before inserting so concurrent requests cannot double-book
+        try:
+            booking_calendar.refresh_if_stale()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Booking creation failed: {str(e)}")
+        token, clashes = booking_calendar.reserve(data.tasker_id, *interval)
+        if token is None:
+            raise HTTPException(status_code=409,
+                                detail=f"Provider is already booked at that time (bookings {', '.join(clashes)})")
+    try:
+        response = db.table("bookings").insert({
             "task_id": data.task_id,
             "customer_id": data.customer_id,
             "tasker_id": data.tasker_id,
-            "status": "pending"
+            "status": "pending",
+            **schedule,
+            **details
         }).execute()
         if not response.data:
             raise HTTPException(status_code=400, detail="Failed to create booking")
+        if token:
+            booking_calendar.confirm(token, response.data[0]["id"])
+            token = None
+        dispatcher.enqueue(response.data[0])
+        offer_scheduler.track(response.data[0])
+        demand_supply.record_booking(response.data[0])
         return {"message": "Booking created", "booking": response.data}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Booking creation failed: {str(e)}")
+    finally:
+        if token:
+            booking_calendar.release(token)
 
 
-@app.get("/bookings/tasker")
-def list_tasker_bookings(tasker_id: str):
-    if not supabase:
-        # Mock booking listing for demo purposes when Supabase is not available
-        mock_bookings = [
-            {
-                "id": "demo_booking_1",
-                "task_id": "demo_task_1",
-                "customer_id": "demo_customer_1",
-                "tasker_id": tasker_id,
-                "status": "pending",
-                "created_at": "2024-01-01T00:00:00Z"
-            }
-        ]
-        return {"bookings": mock_bookings}
-    
+@app.post("/bookings/bulk")
+def bulk_create_bookings(data: BulkBookingCreate):
+    """Create many bookings with one multi-row insert"""
+    if len(data.bookings) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_ITEMS} bookings per request")
+    try:
+        items = [item.dict() for item in data.bookings]
+        # Scheduled items reserve their slots against the calendar
+        booking_calendar.refresh_if_stale()
+        summary = booking_system.bulk_create_bookings(items)
+        for result in summary["results"]:
+            if result["success"]:
+                dispatcher.enqueue(result["booking"])
+                offer_scheduler.track(result["booking"])
+                demand_supply.record_booking(result["booking"])
+        return {"message": f"Created {summary['succeeded']} of {len(data.bookings)} bookings", **summary}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk booking creation failed: {str(e)}")
+
+def _settle_dispatch(booking_id, status: str, tasker_id: Optional[str]):
+    """A booking left pending: drop it from the dispatch queue and offer timers, and free the provider once done"""
+    if status == "pending":
+        return
+    dispatcher.remove(booking_id)
+    offer_scheduler.cancel(booking_id)
+    if status in ("completed", "cancelled", "declined") and tasker_id:
+        dispatcher.release(tasker_id)
+
+@app.patch("/bookings/bulk/status")
+def bulk_update_booking_status(data: BulkStatusUpdate):
+    """Apply one status transition to many bookings with a set-based update"""
+    if len(data.booking_ids) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_ITEMS} bookings per request")
     try:
-        response = supabase.table("bookings").select("*").eq("tasker_id", tasker_id).execute()
+        summary = booking_system.bulk_update_status(data.booking_ids, data.status)
+        for result in summary["results"]:
+            if result["success"]:
+                _settle_dispatch(result["booking_id"], data.status, result.get("tasker_id"))
+        return {"message": f"Updated {summary['succeeded']} of {len(data.booking_ids)} bookings", **summary}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk booking update failed: {str(e)}")
+
+@app.post("/dispatch/run")
+def run_dispatch(max_items: int = Query(100, ge=1, le=1000)):
+    """Dispatch queued pending bookings to the best available providers now"""
+    try:
+        results = dispatcher.dispatch_batch(max_items)
+        return {"dispatched": sum(1 for r in results if r["success"]), "results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Dispatch failed: {str(e)}")
+
+@app.get("/dispatch/metrics")
+def dispatch_metrics():
+    return {**dispatcher.metrics(), "offers": offer_scheduler.metrics()}
+
+def _require_debug_token(x_profile: Optional[str], profile: Optional[str]):
+    supplied = x_profile or profile or ""
+    if not PROFILE_TOKEN:
+        raise HTTPException(status_code=404, detail="Debug endpoints are disabled")
+    if not hmac.compare_digest(supplied, PROFILE_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid debug token")
+
+@app.get("/debug/profiles")
+def list_profiles(x_profile: str = Header(None), profile: str = Query(None)):
+    """Recently recorded request profiles (newest first)"""
+    _require_debug_token(x_profile, profile)
+    return {"profiles": profile_store.list()}
+
+@app.get("/debug/profiles/{profile_id}", response_class=PlainTextResponse)
+def download_profile(profile_id: str, x_profile: str = Header(None), profile: str = Query(None)):
+    """Collapsed stacks for flamegraph.pl / speedscope"""
+    _require_debug_token(x_profile, profile)
+    recorded = profile_store.get(profile_id)
+    if not recorded:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(recorded["collapsed"], headers={
+        "Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'
+    })
+
+@app.get("/debug/memory")
+def memory_summary(x_profile: str = Header(None), profile: str = Query(None)):
+    """Traced memory, max RSS and the size of every registered in-process store"""
+    _require_debug_token(x_profile, profile)
+    return memory_diagnostics.summary()
+
+@app.post("/debug/memory/tracing")
+def set_memory_tracing(enabled: bool = Body(..., embed=True), frames: int = Body(10, embed=True),
+                       x_profile: str = Header(None), profile: str = Query(None)):
+    _require_debug_token(x_profile, profile)
+    if enabled:
+        memory_diagnostics.start_tracing(max(1, min(frames, 50)))
+    else:
+        memory_diagnostics.stop_tracing()
+    return {"tracing": enabled}
+
+@app.get("/debug/memory/top")
+def memory_top(limit: int = Query(20, ge=1, le=200), group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+               x_profile: str = Header(None), profile: str = Query(None)):
+    """Largest live allocation sites (requires tracing)"""
+    _require_debug_token(x_profile, profile)
+    try:
+        return {"allocations": memory_diagnostics.top_allocations(limit, group_by)}
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/debug/memory/snapshots/{name}")
+def memory_snapshot(name: str, x_profile: str = Header(None), profile: str = Query(None)):
+    _require_debug_token(x_profile, profile)
+    try:
+        return memory_diagnostics.take_snapshot(name)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/debug/memory/diff")
+def memory_diff(before: str, after: str = Query(None), limit: int = Query(20, ge=1, le=200),
+                x_profile: str = Header(None), profile: str = Query(None)):
+    """Allocation growth between two snapshots (or from one snapshot to now)"""
+    _require_debug_token(x_profile, profile)
+    try:
+        return memory_diagnostics.diff_snapshots(before, after, limit)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+
+@app.get("/debug/loop")
+def event_loop_status(x_profile: str = Header(None), profile: str = Query(None)):
+    """Event-loop lag percentiles and stacks captured while the loop was blocked"""
+    _require_debug_token(x_profile, profile)
+    return loop_monitor.status()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text exposition of request, storage and Ollama metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/bookings/tasker", response_model=BookingList, response_model_exclude_unset=True)
+def list_tasker_bookings(tasker_id: str, fields: Optional[str] = Query(None, description="Comma-separated columns to return")):
+    columns = select_columns("tasker_bookings", fields)
+    try:
+        response = db.table("bookings").select(columns).eq("tasker_id", tasker_id).execute()
         return {"bookings": response.data or []}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch bookings: {str(e)}")
@@ -323,42 +694,37 @@ def list_tasker_bookings(tasker_id: str):
 @app.get("/taskers")
 def get_taskers():
     """Get all available taskers"""
-    if not supabase:
-        # Mock taskers for demo purposes when Supabase is not available
-        mock_taskers = [
-            {
-                "id": "demo_tasker_1",
-                "name": "John Smith",
-                "skills": ["cleaning", "repairs"],
-                "hourly_rate": 25.0,
-                "bio": "Experienced handyman with 5+ years of experience"
-            },
-            {
-                "id": "demo_tasker_2", 
-                "name": "Sarah Johnson",
-                "skills": ["beauty", "cleaning"],
-                "hourly_rate": 30.0,
-                "bio": "Professional beauty and cleaning specialist"
-            }
-        ]
-        return {"taskers": mock_taskers}
-    
     try:
-        response = supabase.table("profiles").select("id, name, skills, hourly_rate, bio").eq("role", "tasker").execute()
+        response = db.table("profiles").select(TASKER_COLUMNS).eq("role", "tasker").execute()
         return {"taskers": response.data or []}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch taskers: {str(e)}")
 
-@app.get("/profiles/{profile_id}")
-def get_profile(profile_id: str):
+@app.get("/taskers/search")
+def search_taskers(
+    q: str = Query(..., min_length=1, description="What the customer has typed so far"),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Search-as-you-type over tasker names, skills and bios"""
+    try:
+        if not tasker_index.loaded:
+            response = db.table("profiles").select(TASKER_COLUMNS).eq("role", "tasker").execute()
+            tasker_index.load(response.data or [])
+        return {"taskers": tasker_index.search(q, limit=limit)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search taskers: {str(e)}")
+
+@app.get("/profiles/{profile_id}", response_model=ProfileOut, response_model_exclude_unset=True)
+def get_profile(profile_id: str, fields: Optional[str] = Query(None, description="Comma-separated columns to return")):
     """Get user profile by ID"""
+    columns = select_columns("profile", fields)
     try:
-        response = supabase.table("profiles").select("*").eq("id", profile_id).execute()
-        if not response.data:
-            raise HTTPException(status_code=404, detail="Profile not found")
-        return response.data[0]
+        response = db.table("profiles").select(columns).eq("id", profile_id).execute()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch profile: {str(e)}")
+    if not response.data:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return response.data[0]
 
 class ProfileUpdate(BaseModel):
     name: Optional[str] = None
@@ -368,6 +734,9 @@ class ProfileUpdate(BaseModel):
     skills: Optional[list[str]] = None
     bio: Optional[str] = None
     availability: Optional[str] = None
+    is_available: Optional[bool] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 @app.patch("/profiles/{profile_id}")
 def update_profile(profile_id: str, data: ProfileUpdate):
@@ -384,26 +753,88 @@ def update_profile(profile_id: str, data: ProfileUpdate):
             update_data["bio"] = data.bio
         if data.availability is not None:
             update_data["availability"] = data.availability
+        for field in ("is_available", "latitude", "longitude"):
+            if getattr(data, field) is not None:
+                update_data[field] = getattr(data, field)
         # Note: phone and address are stored in localStorage on frontend
             
-        response = supabase.table("profiles").update(update_data).eq("id", profile_id).execute()
+        response = db.table("profiles").update(update_data).eq("id", profile_id).execute()
         if not response.data:
             raise HTTPException(status_code=404, detail="Profile not found")
-        return {"message": "Profile updated successfully", "profile": response.data[0]}
+        profile = response.data[0]
+        if profile.get("role") == "tasker":
+            tasker_index.upsert(profile)
+            provider_catalog.upsert(profile)
+            demand_supply.provider_changed(profile)
+            presence.observe(profile)
+        return {"message": "Profile updated successfully", "profile": profile}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update profile: {str(e)}")
 
+class AvailabilityWindow(BaseModel):
+    day: str
+    start: str
+    end: str
+
+class AvailabilityUpdate(BaseModel):
+    windows: List[AvailabilityWindow]
+
+@app.put("/profiles/{profile_id}/availability")
+def update_availability(profile_id: str, data: AvailabilityUpdate):
+    """Replace a tasker's weekly availability with half-hour aligned windows"""
+    import availability
+    try:
+        mask = availability.mask_from_windows(w.model_dump() for w in data.windows)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        profile = db.table("profiles").select("id, role").eq("id", profile_id).execute().data
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update availability: {str(e)}")
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if profile[0].get("role") != "tasker":
+        raise HTTPException(status_code=400, detail="Only taskers have availability")
+    try:
+        db.table("provider_availability").upsert({
+            "tasker_id": profile_id,
+            "slots": availability.to_hex(mask),
+            "updated_at": datetime.now().isoformat()
+        }, on_conflict="tasker_id").execute()
+        # The free-text column stays readable for existing clients
+        db.table("profiles").update({"availability": availability.summary(mask)}).eq("id", profile_id).execute()
+        provider_catalog.set_availability(profile_id, mask)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update availability: {str(e)}")
+    return {"tasker_id": profile_id, "windows": availability.windows_from_mask(mask),
+            "summary": availability.summary(mask)}
+
+@app.get("/profiles/{profile_id}/availability")
+def get_availability(profile_id: str):
+    """A tasker's weekly availability as merged windows, Monday first"""
+    import availability
+    try:
+        rows = db.table("provider_availability").select("slots").eq("tasker_id", profile_id).execute().data
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch availability: {str(e)}")
+    mask = availability.from_hex(rows[0]["slots"]) if rows else 0
+    return {"tasker_id": profile_id, "windows": availability.windows_from_mask(mask),
+            "summary": availability.summary(mask)}
+
 @app.patch("/bookings/{booking_id}")
 def update_booking(booking_id: int, data: BookingUpdate):
-    response = supabase.table("bookings").update({"status": data.status}).eq("id", booking_id).execute()
+    response = db.table("bookings").update({"status": data.status}).eq("id", booking_id).execute()
     if not response.data:
         raise HTTPException(status_code=404, detail="Booking not found or update failed")
+    booking = response.data[0]
+    booking_calendar.sync(booking)
+    _settle_dispatch(booking_id, data.status, booking.get("tasker_id"))
     return {"message": f"Booking updated to {data.status}", "booking": response.data}
 
 @app.patch("/bookings/{booking_id}/customer")
 def update_booking_customer(booking_id: int, customer_id: str):
     """Update customer_id for a booking (for fixing data issues)"""
-    response = supabase.table("bookings").update({"customer_id": customer_id}).eq("id", booking_id).execute()
+    response = db.table("bookings").update({"customer_id": customer_id}).eq("id", booking_id).execute()
     if not response.data:
         raise HTTPException(status_code=404, detail="Booking not found")
     return {"message": "Booking customer updated", "booking": response.data[0]}
@@ -413,15 +844,20 @@ def update_booking_customer(booking_id: int, customer_id: str):
 # --------------------------
 @app.post("/reviews")
 def create_review(data: ReviewCreate):
-    if data.rating < 1 or data.rating > 5:
+    ratings = [data.rating, data.service_rating, data.communication_rating, data.timeliness_rating]
+    if any(r is not None and (r < 1 or r > 5) for r in ratings):
         raise HTTPException(status_code=400, detail="Rating must be 1-5")
     try:
-        response = supabase.table("reviews").insert({
+        # The reviews_rating_stats trigger updates the tasker's aggregates in the same write
+        response = db.table("reviews").insert({
             "booking_id": data.booking_id,
             "customer_id": data.customer_id,
             "tasker_id": data.tasker_id,
             "rating": data.rating,
-            "review_text": data.review_text
+            "review_text": data.review_text,
+            "service_rating": data.service_rating,
+            "communication_rating": data.communication_rating,
+            "timeliness_rating": data.timeliness_rating
         }).execute()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create review: {str(e)}")
@@ -429,16 +865,77 @@ def create_review(data: ReviewCreate):
         raise HTTPException(status_code=400, detail="Failed to create review")
     return {"message": "Review submitted", "review": response.data}
 
-@app.get("/reviews/{tasker_id}")
-def list_tasker_reviews(tasker_id: str):
+@app.get("/reviews/{tasker_id}", response_model=ReviewList, response_model_exclude_unset=True)
+def list_tasker_reviews(tasker_id: str, fields: Optional[str] = Query(None, description="Comma-separated columns to return")):
+    columns = select_columns("reviews", fields)
     try:
-        response = supabase.table("reviews").select("*").eq("tasker_id", tasker_id).execute()
+        response = db.table("reviews").select(columns).eq("tasker_id", tasker_id).execute()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch reviews: {str(e)}")
     if response.data is None:
         return {"reviews": []}
     return {"reviews": response.data}
 
+@app.get("/reviews/{tasker_id}/summary")
+def tasker_rating_summary(tasker_id: str):
+    """Average, per-dimension averages and 1-5 histogram from the precomputed aggregates"""
+    try:
+        response = db.table("provider_rating_stats").select(", ".join(rating_stats.STATS_COLUMNS)) \
+            .eq("tasker_id", tasker_id).execute()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch rating summary: {str(e)}")
+    if not response.data:
+        return rating_stats.summarize(rating_stats.empty_stats(tasker_id))
+    return rating_stats.summarize(response.data[0])
+
+# --------------------------
+# Streaming Exports
+# --------------------------
+# Exports scoped to one customer or tasker are open like the list endpoints;
+# exporting every row needs X-Export-Token: $EXPORT_TOKEN.
+EXPORT_TOKEN = os.getenv("EXPORT_TOKEN", "")
+
+def _stream_export(table: str, projection: str, filters: list, format: str, fields: Optional[str],
+                   accept_encoding: Optional[str], x_export_token: Optional[str]) -> StreamingResponse:
+    if not filters and not (EXPORT_TOKEN and hmac.compare_digest(x_export_token or "", EXPORT_TOKEN)):
+        raise HTTPException(status_code=403, detail="Full exports require the export token")
+    columns = select_columns(projection, fields)
+    gzip = export_stream.accepts_gzip(accept_encoding)
+    headers = {"Content-Disposition": f'attachment; filename="{table}.{format}"', "Vary": "Accept-Encoding"}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        export_stream.export_stream(db, table, columns, format, filters, gzip=gzip),
+        media_type=export_stream.FORMATS[format],
+        headers=headers
+    )
+
+@app.get("/export/bookings")
+def export_bookings(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    customer_id: Optional[str] = None,
+    tasker_id: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated columns to export"),
+    accept_encoding: Optional[str] = Header(None),
+    x_export_token: Optional[str] = Header(None)
+):
+    """Booking history as NDJSON or CSV, streamed page by page"""
+    filters = [(c, v) for c, v in (("customer_id", customer_id), ("tasker_id", tasker_id)) if v]
+    return _stream_export("bookings", "export_bookings", filters, format, fields, accept_encoding, x_export_token)
+
+@app.get("/export/reviews")
+def export_reviews(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    customer_id: Optional[str] = None,
+    tasker_id: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated columns to export"),
+    accept_encoding: Optional[str] = Header(None),
+    x_export_token: Optional[str] = Header(None)
+):
+    """Review history as NDJSON or CSV, streamed page by page"""
+    filters = [(c, v) for c, v in (("customer_id", customer_id), ("tasker_id", tasker_id)) if v]
+    return _stream_export("reviews", "export_reviews", filters, format, fields, accept_encoding, x_export_token)
+
 # --------------------------
 # AI Integration Endpoints
 # --------------------------
@@ -457,6 +954,8 @@ class MatchRequest(BaseModel):
 @app.post("/api/ai/classify")
 def classify_service(data: ClassifyRequest):
     try:
+        # Imported on first use to keep cold starts fast
+        from ai_integration import classify_service_request
         result = classify_service_request(data.text)
         return result
     except Exception as e:
@@ -465,15 +964,63 @@ def classify_service(data: ClassifyRequest):
 @app.post("/api/ai/followups")
 def get_service_followups_endpoint(data: FollowupRequest):
     try:
+        from ai_integration import get_service_followups
         result = get_service_followups(data.service_id, data.answers)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Followup generation failed: {str(e)}")
 
+class QuoteRequest(BaseModel):
+    service_id: str
+    answers: Dict[str, Any] = {}
+    limit: Optional[int] = Field(None, ge=1)
+    location: Optional[Dict[str, float]] = None  # {"lat", "lng"}; applies the area's surge
+
+class QuoteBatchRequest(BaseModel):
+    quotes: List[QuoteRequest]
+
+MAX_QUOTES_PER_BATCH = 50
+
+_quote_engine = None
+
+def get_quote_engine():
+    """Price quotes over the provider catalog, built on first use (imports numpy)"""
+    global _quote_engine
+    if _quote_engine is None:
+        from pricing import QuoteEngine
+        _quote_engine = QuoteEngine(provider_catalog, max_entries=int(os.getenv("QUOTE_CACHE_SIZE", "1024")),
+                                    surge=demand_supply)
+        memory_diagnostics.register_store("quote_cache", _quote_engine, fields=("_cache",))
+    return _quote_engine
+
+@app.post("/api/ai/quotes")
+def batch_quotes(data: QuoteBatchRequest):
+    """Min/max price per matched provider for several (service, answers) pairs"""
+    if len(data.quotes) > MAX_QUOTES_PER_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_QUOTES_PER_BATCH} quotes per request")
+    try:
+        provider_catalog.refresh_if_stale()
+        demand_supply.refresh_if_stale()
+        engine = get_quote_engine()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Quoting failed: {str(e)}")
+    results = []
+    for i, item in enumerate(data.quotes):
+        try:
+            results.append({"index": i, "success": True,
+                            **engine.quote(item.service_id, item.answers, limit=item.limit, location=item.location)})
+        except ValueError as e:
+            results.append({"index": i, "success": False, "service_id": item.service_id, "message": str(e)})
+    return {"results": results}
+
 @app.post("/api/ai/match")
 def match_service_providers(data: MatchRequest):
     try:
-        result = match_providers(data.service_id, data.spec, data.location)
+        from ai_integration import match_providers
+        provider_catalog.refresh_if_stale()
+        demand_supply.refresh_if_stale()
+        result = match_providers(data.service_id, data.spec, data.location, catalog=provider_catalog,
+                                 surge=demand_supply)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Provider matching failed: {str(e)}")
@@ -535,13 +1082,9 @@ async def pay_success(booking_id: str):
 
 @app.post("/register/provider")
 def register_provider(provider: ProviderRegister):
-    if not supabase:
-        # Mock registration for demo purposes when Supabase is not available
-        return {"message": "Provider registered successfully (demo mode)", "provider_id": f"demo_provider_{provider.email.replace('@', '_')}"}
-    
     try:
         # Create auth user
-        user = supabase.auth.sign_up({
+        user = db.auth.sign_up({
             "email": provider.email,
             "password": provider.password
         })
@@ -559,7 +1102,10 @@ def register_provider(provider: ProviderRegister):
             "bio": provider.bio
         }
         
-        result = supabase.table("profiles").insert(profile_data).execute()
+        result = db.table("profiles").insert(profile_data).execute()
+        tasker_index.upsert(profile_data)
+        provider_catalog.upsert(profile_data)
+        demand_supply.provider_changed(profile_data)
         
         return {"message": "Provider registered successfully", "provider_id": user.user.id}
     except Exception as e:
@@ -567,17 +1113,13 @@ def register_provider(provider: ProviderRegister):
 
 @app.post("/login/provider")
 def login_provider(email: str = Body(...), password: str = Body(...)):
-    if not supabase:
-        # Mock login for demo purposes when Supabase is not available
-        return {"message": "Login successful (demo mode)", "provider_id": "demo_provider_123", "provider_name": "Demo Provider"}
-    
     try:
-        user = supabase.auth.sign_in_with_password({"email": email, "password": password})
+        user = db.auth.sign_in_with_password({"email": email, "password": password})
         if not user.user:
             raise HTTPException(status_code=400, detail="Login failed")
         
         # Get provider profile
-        profile_response = supabase.table("profiles").select("name").eq("id", user.user.id).execute()
+        profile_response = db.table("profiles").select("name").eq("id", user.user.id).execute()
         provider_name = profile_response.data[0]["name"] if profile_response.data else "Provider"
         
         return {"message": "Login successful", "provider_id": user.user.id, "provider_name": provider_name}
@@ -587,26 +1129,10 @@ def login_provider(email: str = Body(...), password: str = Body(...)):
 @app.get("/bookings")
 def get_bookings(customer_id: str = Query(None), provider_id: str = Query(None)):
     """Get bookings - simplified for performance"""
-    if not supabase:
-        # Mock bookings for demo purposes when Supabase is not available
-        mock_bookings = [
-            {
-                "id": "demo_booking_1",
-                "task_id": "demo_task_1",
-                "customer_id": customer_id or "demo_customer_1",
-                "tasker_id": provider_id or "demo_tasker_1",
-                "status": "pending",
-                "created_at": "2024-01-01T00:00:00Z",
-                "task": {"title": "Sample Service Request"},
-                "tasker": {"name": "Demo Provider"}
-            }
-        ]
-        return {"bookings": mock_bookings}
-    
     try:
         if customer_id:
             # Get bookings for a specific customer
-            response = supabase.table("bookings") \
+            response = db.table("bookings") \
                 .select("id, task_id, customer_id, status, created_at, task:tasks(title), tasker:profiles!bookings_tasker_id_fkey(name)") \
                 .execute()
             
@@ -616,7 +1142,7 @@ def get_bookings(customer_id: str = Query(None), provider_id: str = Query(None))
             return {"bookings": customer_bookings}
         elif provider_id:
             # Get bookings for a specific provider
-            response = supabase.table("bookings") \
+            response = db.table("bookings") \
                 .select("id, task_id, customer_id, status, created_at, task:tasks(title)") \
                 .eq("tasker_id", provider_id) \
                 .execute()
@@ -627,28 +1153,36 @@ def get_bookings(customer_id: str = Query(None), provider_id: str = Query(None))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch bookings: {str(e)}")
 
-@app.patch("/bookings/{booking_id}")
-def update_booking(booking_id: str, status: str = Body(...)):
-    """Update booking status - simplified for performance with Uber-like support"""
-    try:
-        # Handle 'cancelled' status by mapping to 'completed' in database
-        # but track the real status in a separate field or localStorage
-        db_status = status
-        if status == "cancelled":
-            db_status = "completed"  # Map cancelled to completed for database constraint
-        
-        response = supabase.table("bookings") \
-            .update({"status": db_status}) \
-            .eq("id", booking_id) \
-            .execute()
-        
-        if not response.data:
-            raise HTTPException(status_code=404, detail="Booking not found")
-        
-        # Return the original status for frontend
-        booking = response.data[0]
-        booking["status"] = status  # Return original status
+@app.get("/bookings/search")
+def search_bookings(
+    q: str = Query(..., min_length=1, description="Search text"),
+    customer_id: str = Query(None),
+    provider_id: str = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """Ranked full-text search over a customer's or provider's bookings"""
+    user_id = customer_id or provider_id
+    if not user_id:
+        raise HTTPException(status_code=400, detail="Either customer_id or provider_id must be provided")
+    role = "customer" if customer_id else "tasker"
+    
+    try:
+        # Fetch one extra row to know whether another page exists
+        response = db.rpc("search_bookings", {
+            "p_user_id": user_id,
+            "p_role": role,
+            "p_query": q,
+            "p_limit": limit + 1,
+            "p_offset": offset
+        }).execute()
+        rows = response.data or []
         
-        return {"message": "Booking updated successfully", "booking": booking}
+        return {
+            "bookings": rows[:limit],
+            "limit": limit,
+            "offset": offset,
+            "has_more": len(rows) > limit
+        }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to update booking: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to search bookings: {str(e)}")
@@ -0,0 +1,330 @@
+"""
+In-Memory Data Backend
+A small stand-in for the Supabase client that keeps tables as lists of
+dicts. It implements the subset of the supabase-py query builder used in
+this backend (table/select/insert/update/upsert/delete, the common filters,
+order/limit/range and rpc), so booking logic can run in tests and local
+tools without a database. The search_bookings rpc is served by the
+in-process inverted index from booking_search.py; nearby_providers scans
+the available taskers.
+"""
+
+import copy
+import itertools
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from booking_search import BookingSearchIndex
+from geo import nearest
+import provider_features
+import rating_stats
+
+# Tables whose primary key is a bigserial in updated_schema_uber_like.sql
+SERIAL_TABLES = {"tasks", "bookings", "reviews"}
+
+# Columns returned by the nearby_providers rpc
+NEARBY_COLUMNS = ("id", "name", "skills", "hourly_rate", "rating", "bio", "latitude", "longitude")
+
+
+class MemoryResponse:
+    """Mimics postgrest's APIResponse (.data / .count)"""
+
+    def __init__(self, data: List[Dict], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _parse_columns(columns: str) -> Optional[List[str]]:
+    """Split a select() column list; embedded resources are not resolved"""
+    columns = " ".join(columns.split())
+    if columns in ("", "*"):
+        return None
+    names, depth, current = [], 0, ""
+    for ch in columns:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            names.append(current.strip())
+            current = ""
+        else:
+            current += ch
+    names.append(current.strip())
+    # "task:tasks(title)" -> alias "task", returned as None
+    return [name.split(":")[0].split("(")[0].strip() for name in names if name]
+
+
+class MemoryQuery:
+    """Chainable query over one in-memory table"""
+
+    def __init__(self, client: "InMemoryClient", table: str):
+        self._client = client
+        self._table = table
+        self._op = "select"
+        self._columns: Optional[List[str]] = None
+        self._payload: Any = None
+        self._filters: List[Callable[[Dict], bool]] = []
+        self._order: List[tuple] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._count = False
+
+    # -- operations --------------------------------------------------------
+
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "MemoryQuery":
+        self._op = "select"
+        self._columns = _parse_columns(columns)
+        self._count = count is not None
+        return self
+
+    def insert(self, rows) -> "MemoryQuery":
+        self._op = "insert"
+        self._payload = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict: str = "id") -> "MemoryQuery":
+        self._op = "upsert"
+        self._payload = (rows if isinstance(rows, list) else [rows], on_conflict)
+        return self
+
+    def update(self, data: Dict) -> "MemoryQuery":
+        self._op = "update"
+        self._payload = data
+        return self
+
+    def delete(self) -> "MemoryQuery":
+        self._op = "delete"
+        return self
+
+    # -- filters -----------------------------------------------------------
+
+    def _where(self, predicate: Callable[[Dict], bool]) -> "MemoryQuery":
+        self._filters.append(predicate)
+        return self
+
+    def eq(self, column: str, value) -> "MemoryQuery":
+        return self._where(lambda row: _same(row.get(column), value))
+
+    def neq(self, column: str, value) -> "MemoryQuery":
+        return self._where(lambda row: not _same(row.get(column), value))
+
+    def gt(self, column: str, value) -> "MemoryQuery":
+        return self._where(lambda row: row.get(column) is not None and row.get(column) > value)
+
+    def gte(self, column: str, value) -> "MemoryQuery":
+        return self._where(lambda row: row.get(column) is not None and row.get(column) >= value)
+
+    def lt(self, column: str, value) -> "MemoryQuery":
+        return self._where(lambda row: row.get(column) is not None and row.get(column) < value)
+
+    def lte(self, column: str, value) -> "MemoryQuery":
+        return self._where(lambda row: row.get(column) is not None and row.get(column) <= value)
+
+    def in_(self, column: str, values) -> "MemoryQuery":
+        wanted = {str(v) for v in values}
+        return self._where(lambda row: row.get(column) is not None and str(row.get(column)) in wanted)
+
+    def is_(self, column: str, value) -> "MemoryQuery":
+        if value in (None, "null"):
+            return self._where(lambda row: row.get(column) is None)
+        return self._where(lambda row: row.get(column) is value)
+
+    def contains(self, column: str, values) -> "MemoryQuery":
+        wanted = list(values)
+        return self._where(lambda row: all(v in (row.get(column) or []) for v in wanted))
+
+    def ilike(self, column: str, pattern: str) -> "MemoryQuery":
+        needle = pattern.strip("%").lower()
+        return self._where(lambda row: needle in str(row.get(column) or "").lower())
+
+    # -- modifiers ---------------------------------------------------------
+
+    def order(self, column: str, desc: bool = False, nullsfirst: bool = False) -> "MemoryQuery":
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int) -> "MemoryQuery":
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int) -> "MemoryQuery":
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    # -- execution ---------------------------------------------------------
+
+    def execute(self) -> MemoryResponse:
+        with self._client._lock:
+            rows = self._client._tables.setdefault(self._table, [])
+            if self._op == "insert":
+                written = [self._client._insert(self._table, row) for row in self._payload]
+                self._client._reindex(self._table, written)
+                return MemoryResponse(copy.deepcopy(written))
+            if self._op == "upsert":
+                payload, key = self._payload
+                written = [self._client._upsert(self._table, row, key) for row in payload]
+                self._client._reindex(self._table, written)
+                return MemoryResponse(copy.deepcopy(written))
+
+            matched = [row for row in rows if all(f(row) for f in self._filters)]
+            if self._op == "update":
+                for row in matched:
+                    row.update(copy.deepcopy(self._payload))
+                self._client._reindex(self._table, matched)
+                return MemoryResponse([copy.deepcopy(row) for row in matched])
+            if self._op == "delete":
+                ids = {id(row) for row in matched}
+                rows[:] = [row for row in rows if id(row) not in ids]
+                self._client._reindex(self._table, matched, deleted=True)
+                return MemoryResponse([copy.deepcopy(row) for row in matched])
+
+            for column, desc in reversed(self._order):
+                matched.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+            total = len(matched)
+            end = None if self._limit is None else self._offset + self._limit
+            matched = matched[self._offset:end]
+            if self._columns is None:
+                data = [copy.deepcopy(row) for row in matched]
+            else:
+                data = [{c: copy.deepcopy(row.get(c)) for c in self._columns} for row in matched]
+            return MemoryResponse(data, total if self._count else None)
+
+
+class _RpcCall:
+    def __init__(self, fn: Callable, params: Dict):
+        self._fn = fn
+        self._params = params
+
+    def execute(self) -> MemoryResponse:
+        return MemoryResponse(self._fn(**self._params))
+
+
+class InMemoryClient:
+    """Drop-in replacement for the supabase client's table()/rpc() API"""
+
+    def __init__(self, tables: Optional[Dict[str, List[Dict]]] = None):
+        self._lock = threading.RLock()
+        self._tables: Dict[str, List[Dict]] = {}
+        self._sequences: Dict[str, itertools.count] = {}
+        self._functions: Dict[str, Callable] = {"search_bookings": self._search_bookings,
+                                                 "nearby_providers": self._nearby_providers}
+        self._search_index = BookingSearchIndex()
+        # review id -> the review values currently counted in provider_rating_stats
+        self._review_contributions: Dict[Any, Dict] = {}
+        # booking id -> the fields provider_skill_stats needs from the previous version
+        self._booking_states: Dict[Any, Dict] = {}
+        for name, rows in (tables or {}).items():
+            self.table(name).insert(rows).execute()
+
+    def table(self, name: str) -> MemoryQuery:
+        return MemoryQuery(self, name)
+
+    def register_rpc(self, name: str, fn: Callable) -> None:
+        """Provide a Python implementation for a SQL function called via rpc()"""
+        self._functions[name] = fn
+
+    def rpc(self, name: str, params: Optional[Dict] = None) -> _RpcCall:
+        if name not in self._functions:
+            raise KeyError(f"Function {name} is not registered")
+        return _RpcCall(self._functions[name], params or {})
+
+    def rows(self, name: str) -> List[Dict]:
+        """Direct access to a table's rows (for tests and tooling)"""
+        return self._tables.setdefault(name, [])
+
+    def _reindex(self, table: str, rows: List[Dict], deleted: bool = False) -> None:
+        if table == "reviews":
+            self._update_rating_stats(rows, deleted)
+        if table != "bookings":
+            return
+        self._update_skill_stats(rows, deleted)
+        for row in rows:
+            if deleted:
+                self._search_index.remove(row["id"])
+            else:
+                self._search_index.add(row)
+
+    def _update_rating_stats(self, reviews: List[Dict], deleted: bool) -> None:
+        """What the reviews_rating_stats trigger does in the databases"""
+        stats = {row["tasker_id"]: row for row in self.rows("provider_rating_stats")}
+        touched = set()
+        for review in reviews:
+            previous = self._review_contributions.pop(review["id"], None)
+            if previous is not None:
+                rating_stats.apply_review(stats[previous["tasker_id"]], previous, -1)
+                touched.add(previous["tasker_id"])
+            if deleted or review.get("tasker_id") is None:
+                continue
+            tasker_id = review["tasker_id"]
+            if tasker_id not in stats:
+                stats[tasker_id] = rating_stats.empty_stats(tasker_id)
+                self.rows("provider_rating_stats").append(stats[tasker_id])
+            current = {k: review.get(k) for k in ("tasker_id", "rating", "service_rating",
+                                                  "communication_rating", "timeliness_rating")}
+            rating_stats.apply_review(stats[tasker_id], current, 1)
+            self._review_contributions[review["id"]] = current
+            touched.add(tasker_id)
+        for profile in self.rows("profiles"):
+            if profile.get("id") in touched:
+                profile["rating"] = rating_stats.average(stats[profile["id"]])
+
+    def _update_skill_stats(self, bookings: List[Dict], deleted: bool) -> None:
+        """What the bookings_skill_stats trigger does in the databases"""
+        stats = None
+        for booking in bookings:
+            if deleted:
+                self._booking_states.pop(booking["id"], None)
+                continue
+            previous = self._booking_states.get(booking["id"])
+            self._booking_states[booking["id"]] = {k: booking.get(k) for k in
+                                                   ("status", "tasker_id", "status_updated_at", "created_at")}
+            deltas = provider_features.transition_deltas(previous, booking)
+            if not deltas:
+                continue
+            if stats is None:
+                stats = {(row["tasker_id"], row["skill"]): row for row in self.rows("provider_skill_stats")}
+            key = (booking["tasker_id"], booking.get("service_category") or provider_features.DEFAULT_SKILL)
+            if key not in stats:
+                stats[key] = {"tasker_id": key[0], "skill": key[1],
+                              **dict.fromkeys(provider_features.COUNTERS, 0)}
+                self.rows("provider_skill_stats").append(stats[key])
+            for name, delta in deltas.items():
+                stats[key][name] += delta
+
+    def _search_bookings(self, p_user_id: str, p_role: str, p_query: str,
+                         p_limit: int = 20, p_offset: int = 0) -> List[Dict]:
+        return self._search_index.search(p_user_id, p_query, limit=p_limit, offset=p_offset)
+
+    def _nearby_providers(self, p_lat: float, p_lng: float, p_radius_km: float,
+                          p_category: Optional[str] = None, p_limit: int = 50) -> List[Dict]:
+        with self._lock:
+            taskers = [{k: row.get(k) for k in NEARBY_COLUMNS} for row in self.rows("profiles")
+                       if row.get("role") == "tasker" and row.get("is_available")]
+        return nearest(taskers, p_lat, p_lng, p_radius_km, category=p_category, limit=p_limit)
+
+    def _insert(self, table: str, row: Dict) -> Dict:
+        row = copy.deepcopy(row)
+        if table in SERIAL_TABLES and row.get("id") is None:
+            existing = max((r["id"] for r in self.rows(table) if isinstance(r.get("id"), int)), default=0)
+            seq = self._sequences.setdefault(table, itertools.count(existing + 1))
+            row["id"] = next(seq)
+        row.setdefault("created_at", datetime.now().isoformat())
+        self.rows(table).append(row)
+        return row
+
+    def _upsert(self, table: str, row: Dict, key: str) -> Dict:
+        for existing in self.rows(table):
+            if _same(existing.get(key), row.get(key)):
+                existing.update(copy.deepcopy(row))
+                return existing
+        return self._insert(table, row)
+
+
+def _same(a, b) -> bool:
+    # PostgREST filters arrive as strings, so compare loosely like the database would
+    if a is None or b is None:
+        return a is b
+    return a == b or str(a) == str(b)
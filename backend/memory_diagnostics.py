@@ -0,0 +1,211 @@
+"""
+Memory Diagnostics
+tracemalloc-backed allocation reports (top allocation sites and diffs
+between named snapshots) plus the estimated footprint of every in-process
+cache, index and store registered with register_store().
+
+Tracing costs CPU and memory of its own, so it is off until started with
+start_tracing() (MEMORY_TRACE=1 at startup, or POST /debug/memory/tracing).
+Store sizes are always available.
+"""
+
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Containers bigger than this are measured on a sample and extrapolated
+SAMPLE_ITEMS = 200
+
+MAX_SNAPSHOTS = 10
+
+# Never descended into: code, threads and other non-data objects
+_OPAQUE_TYPES = (types.ModuleType, type, types.FunctionType, types.BuiltinFunctionType,
+                 types.MethodType, threading.Thread, type(threading.Lock()), type(threading.RLock()),
+                 threading.Condition, threading.Event)
+
+
+def estimate_size(obj, sample: int = SAMPLE_ITEMS) -> int:
+    """Approximate deep size in bytes, counting shared objects once"""
+    seen = set()
+
+    def size(o) -> float:
+        if id(o) in seen or isinstance(o, _OPAQUE_TYPES):
+            return 0
+        seen.add(id(o))
+        total = sys.getsizeof(o, 0)
+
+        if isinstance(o, dict):
+            items = list(islice(o.items(), sample))
+            measured = sum(size(k) + size(v) for k, v in items)
+            return total + _extrapolate(measured, len(items), len(o))
+        if isinstance(o, (list, tuple, set, frozenset, deque)):
+            items = list(islice(o, sample))
+            measured = sum(size(item) for item in items)
+            return total + _extrapolate(measured, len(items), len(o))
+        if isinstance(o, (str, bytes, bytearray, int, float, bool, type(None))):
+            return total
+
+        if hasattr(o, "__dict__"):
+            total += size(vars(o))
+        for slot in getattr(type(o), "__slots__", ()):
+            if hasattr(o, slot):
+                total += size(getattr(o, slot))
+        return total
+
+    return int(size(obj))
+
+
+def _extrapolate(measured: float, sampled: int, total: int) -> float:
+    if not sampled:
+        return 0
+    return measured * total / sampled
+
+
+class _Store:
+    def __init__(self, name: str, obj, fields: Iterable[str], entries: Optional[Callable[[], int]]):
+        self.name = name
+        self.obj = obj
+        self.fields = tuple(fields)
+        self.entries = entries
+
+    def report(self) -> Dict:
+        started = time.perf_counter()
+        targets = [getattr(self.obj, f) for f in self.fields] if self.fields else [self.obj]
+        if self.entries is not None:
+            entries = self.entries()
+        else:
+            entries = len(self.obj) if hasattr(self.obj, "__len__") else None
+        return {
+            "entries": entries,
+            "estimated_bytes": sum(estimate_size(t) for t in targets),
+            "type": type(self.obj).__name__,
+            "measure_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+
+_stores: "OrderedDict[str, _Store]" = OrderedDict()
+_snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def register_store(name: str, obj, fields: Iterable[str] = (), entries: Optional[Callable[[], int]] = None) -> None:
+    """Report `obj` (or just the named attributes of it) under `name`
+
+    Pass `fields` for objects that also hold references to clients or other
+    services, so only their own data is measured.
+    """
+    with _lock:
+        _stores[name] = _Store(name, obj, fields, entries)
+
+
+def store_sizes() -> Dict[str, Dict]:
+    with _lock:
+        stores = list(_stores.values())
+    return {store.name: store.report() for store in stores}
+
+
+def start_tracing(frames: int = 10) -> None:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracing() -> None:
+    with _lock:
+        _snapshots.clear()
+    tracemalloc.stop()
+
+
+def _require_tracing() -> None:
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not tracing; start it first")
+
+
+def _filtered(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+    return snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+
+
+def _site(stat) -> Dict:
+    frame = stat.traceback[0]
+    return {
+        "file": frame.filename,
+        "line": frame.lineno,
+        "size_bytes": stat.size,
+        "count": stat.count,
+        "traceback": [f"{f.filename}:{f.lineno}" for f in stat.traceback][:10],
+    }
+
+
+def top_allocations(limit: int = 20, group_by: str = "lineno") -> List[Dict]:
+    """Largest live allocation sites right now"""
+    _require_tracing()
+    stats = _filtered(tracemalloc.take_snapshot()).statistics(group_by)
+    return [_site(stat) for stat in stats[:limit]]
+
+
+def take_snapshot(name: str) -> Dict:
+    _require_tracing()
+    snapshot = _filtered(tracemalloc.take_snapshot())
+    with _lock:
+        _snapshots[name] = snapshot
+        _snapshots.move_to_end(name)
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return {"name": name, "traced_bytes": sum(stat.size for stat in snapshot.statistics("filename"))}
+
+
+def snapshot_names() -> List[str]:
+    with _lock:
+        return list(_snapshots)
+
+
+def diff_snapshots(before: str, after: Optional[str] = None, limit: int = 20,
+                   group_by: str = "lineno") -> Dict:
+    """Allocation growth from snapshot `before` to `after` (default: now)"""
+    _require_tracing()
+    with _lock:
+        if before not in _snapshots or (after is not None and after not in _snapshots):
+            raise KeyError("Unknown snapshot")
+        old = _snapshots[before]
+        new = _snapshots[after] if after is not None else None
+    if new is None:
+        new = _filtered(tracemalloc.take_snapshot())
+    stats = new.compare_to(old, group_by)
+    return {
+        "before": before,
+        "after": after or "now",
+        "size_diff_bytes": sum(stat.size_diff for stat in stats),
+        "top": [{**_site(stat), "size_diff_bytes": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in stats[:limit]],
+    }
+
+
+def summary() -> Dict:
+    tracing = tracemalloc.is_tracing()
+    current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+    max_rss = None
+    if resource is not None:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        max_rss = max_rss if sys.platform == "darwin" else max_rss * 1024
+    return {
+        "tracing": tracing,
+        "traced_current_bytes": current,
+        "traced_peak_bytes": peak,
+        "max_rss_bytes": max_rss,
+        "snapshots": snapshot_names(),
+        "stores": store_sizes(),
+    }
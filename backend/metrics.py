@@ -0,0 +1,309 @@
+"""
+Request and Upstream Metrics
+Per-route request counts, status classes and latency histograms, plus
+timings for every storage .execute() and Ollama call, rendered in the
+Prometheus text format for GET /metrics.
+
+Hot-path updates never take a lock: each thread writes into its own
+preallocated shard of every metric and a scrape sums the shards. The only
+lock is taken once per (thread, label set) when a shard is created.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Seconds; covers an in-process cache hit up to a slow LLM call
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Builder methods that name the statement being executed
+QUERY_OPERATIONS = {"select", "insert", "update", "upsert", "delete"}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values (0.0 when empty)"""
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Labelled metric whose samples live in per-thread shards"""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # label values -> every thread's shard for that label set
+        self._shards: Dict[Tuple[str, ...], List] = {}
+
+    def _new_shard(self):
+        raise NotImplementedError
+
+    def _shard(self, values: Tuple[str, ...]):
+        shards = getattr(self._local, "shards", None)
+        if shards is None:
+            shards = self._local.shards = {}
+        shard = shards.get(values)
+        if shard is None:
+            shard = shards[values] = self._new_shard()
+            with self._lock:
+                self._shards.setdefault(values, []).append(shard)
+        return shard
+
+    def _snapshot(self) -> Dict[Tuple[str, ...], List]:
+        with self._lock:
+            return {values: list(shards) for values, shards in self._shards.items()}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_shard(self):
+        return [0]
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._shard(label_values)[0] += amount
+
+    def value(self, *label_values: str) -> float:
+        return sum(shard[0] for shard in self._snapshot().get(label_values, []))
+
+    def render(self) -> List[str]:
+        lines = []
+        for values, shards in sorted(self._snapshot().items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, values)} "
+                         f"{_format_number(sum(s[0] for s in shards))}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; a shard is [bucket counts..., +Inf count, sum]"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_shard(self):
+        return [0] * (len(self.buckets) + 1) + [0.0]
+
+    def observe(self, seconds: float, *label_values: str) -> None:
+        shard = self._shard(label_values)
+        shard[bisect_left(self.buckets, seconds)] += 1
+        shard[-1] += seconds
+
+    def totals(self, *label_values: str) -> Tuple[List[int], float]:
+        """(non-cumulative counts per bucket incl. +Inf, sum) across threads"""
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        for shard in self._snapshot().get(label_values, []):
+            for i in range(len(counts)):
+                counts[i] += shard[i]
+            total += shard[-1]
+        return counts, total
+
+    def render(self) -> List[str]:
+        lines = []
+        for values in sorted(self._snapshot()):
+            counts, total = self.totals(*values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, values, le)} {cumulative}")
+            labels = _format_labels(self.label_names, values)
+            lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Values read from a callback at scrape time: fn() -> {label values: value}"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str], fn):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, values)} {_format_number(value)}"
+                for values, value in sorted(self.fn().items())]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def counter(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name: str, help_text: str, labels: Iterable[str], fn) -> Gauge:
+        return self._register(Gauge(name, help_text, labels, fn))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP requests by route and status class", ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+STORAGE_LATENCY = REGISTRY.histogram(
+    "storage_query_duration_seconds", "Storage .execute() latency by table and operation",
+    ("table", "operation", "outcome"))
+OLLAMA_LATENCY = REGISTRY.histogram(
+    "ollama_request_duration_seconds", "Ollama generate call latency", ("model", "outcome"))
+
+
+# --------------------------
+# HTTP middleware
+# --------------------------
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no per-request task or body buffering)"""
+
+    def __init__(self, app, skip_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.skip = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip:
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method, route, f"{status[0] // 100}xx")
+            HTTP_LATENCY.observe(elapsed, method, route)
+
+
+# --------------------------
+# Storage client instrumentation
+# --------------------------
+
+class _TimedQuery:
+    """Wraps a query/rpc builder so execute() is timed; chaining is forwarded
+
+    The chained builder calls are kept as ((method, args, kwargs), ...) so
+    observers can see the filters and columns of the executed query.
+    """
+
+    __slots__ = ("_builder", "_table", "_operation", "_client", "_calls")
+
+    def __init__(self, builder, table: str, operation: str, client: "InstrumentedClient", calls: tuple = ()):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+        self._client = client
+        self._calls = calls
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+        operation = name if name in QUERY_OPERATIONS else self._operation
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                return _TimedQuery(result, self._table, operation, self._client,
+                                   self._calls + ((name, args, kwargs),))
+            return result
+        return chained
+
+    def execute(self):
+        started = time.perf_counter()
+        try:
+            response = self._builder.execute()
+        except Exception:
+            self._client._observe(self, "error", time.perf_counter() - started, None)
+            raise
+        self._client._observe(self, "ok", time.perf_counter() - started, response)
+        return response
+
+
+class InstrumentedClient:
+    """Storage client proxy that times every .execute()
+
+    Extra observers registered with add_observer() are called after each
+    execute() as fn(table, operation, calls, outcome, seconds, response).
+    """
+
+    def __init__(self, client, histogram: Histogram = STORAGE_LATENCY):
+        self.inner = client
+        self._histogram = histogram
+        self._observers = []
+
+    def add_observer(self, fn) -> None:
+        self._observers.append(fn)
+
+    def table(self, name: str) -> _TimedQuery:
+        return _TimedQuery(self.inner.table(name), name, "select", self)
+
+    def rpc(self, name: str, params: Optional[Dict] = None) -> _TimedQuery:
+        return _TimedQuery(self.inner.rpc(name, params or {}), name, "rpc", self)
+
+    def _observe(self, query: _TimedQuery, outcome: str, seconds: float, response) -> None:
+        self._histogram.observe(seconds, query._table, query._operation, outcome)
+        for fn in self._observers:
+            fn(query._table, query._operation, query._calls, outcome, seconds, response)
+
+    def __getattr__(self, name):
+        # auth, storage buckets, ... pass straight through
+        return getattr(self.inner, name)
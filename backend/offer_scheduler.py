@@ -0,0 +1,256 @@
+"""
+Offer Expiry Scheduler
+Tracks an expiry for every pending booking offer and, when a provider
+never answers, either declines the booking or re-offers it through the
+dispatcher. Timers live in a hierarchical timer wheel, so scheduling and
+cancelling are O(1) no matter how many offers are outstanding.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+
+class TimerWheel:
+    """Hierarchical timer wheel (Varghese & Lauck / Linux kernel style)
+
+    Level 0 has `slots` buckets of `tick` seconds, each higher level covers
+    `slots` times the span of the one below. Timers sit in a dict per
+    bucket, so insert and cancel are O(1); timers in higher levels are
+    cascaded down when the wheel below wraps.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 64, levels: int = 4, now: Optional[float] = None):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self._wheels: List[List[Dict[Hashable, tuple]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        # key -> (level, slot, deadline tick, payload)
+        self._timers: Dict[Hashable, tuple] = {}
+        self._current = int((time.time() if now is None else now) // tick)
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def schedule(self, key: Hashable, deadline: float, payload=None) -> None:
+        """Fire `key` at `deadline` (epoch seconds); replaces an existing timer"""
+        self.cancel(key)
+        self._place(key, max(int(deadline // self.tick), self._current + 1), payload)
+
+    def cancel(self, key: Hashable) -> bool:
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        level, slot, _, _ = timer
+        self._wheels[level][slot].pop(key, None)
+        return True
+
+    def _place(self, key: Hashable, deadline_tick: int, payload) -> None:
+        # Lowest level whose bucket for the deadline is less than a full turn away
+        level, unit = 0, 1
+        while (deadline_tick // unit) - (self._current // unit) >= self.slots and level < self.levels - 1:
+            level += 1
+            unit *= self.slots
+        if (deadline_tick // unit) - (self._current // unit) >= self.slots:
+            # Beyond the wheel's range: park in the furthest top-level bucket
+            # and re-place it when that bucket cascades
+            slot = (self._current // unit + self.slots - 1) % self.slots
+        else:
+            slot = (deadline_tick // unit) % self.slots
+        self._wheels[level][slot][key] = (deadline_tick, payload)
+        self._timers[key] = (level, slot, deadline_tick, payload)
+
+    def advance(self, now: float) -> List[Tuple[Hashable, object]]:
+        """Move the wheel to `now` and return the (key, payload) pairs that expired"""
+        target = int(now // self.tick)
+        expired = []
+        while self._current < target:
+            self._current += 1
+            # Cascade higher levels whose lower wheel just wrapped, top first
+            for level in range(self.levels - 1, 0, -1):
+                span_below = self.slots ** level
+                if self._current % span_below == 0:
+                    slot = (self._current // span_below) % self.slots
+                    bucket = self._wheels[level][slot]
+                    self._wheels[level][slot] = {}
+                    for key, (deadline_tick, payload) in bucket.items():
+                        del self._timers[key]
+                        self._place(key, max(deadline_tick, self._current), payload)
+
+            slot = self._current % self.slots
+            bucket = self._wheels[0][slot]
+            self._wheels[0][slot] = {}
+            for key, (deadline_tick, payload) in bucket.items():
+                if deadline_tick <= self._current:
+                    del self._timers[key]
+                    expired.append((key, payload))
+                else:
+                    # Parked overflow timer that wrapped around; keep waiting
+                    del self._timers[key]
+                    self._place(key, deadline_tick, payload)
+        return expired
+
+
+def _parse_timestamp(value) -> Optional[float]:
+    if not value:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class OfferExpiryScheduler:
+    """Expires unanswered offers: decline them, or re-offer via the dispatcher
+
+    action="redispatch" re-queues the booking with every provider already
+    tried excluded, up to `max_offers` offers, then declines it.
+    """
+
+    def __init__(self, booking_system, dispatcher=None, ttl_seconds: float = 900,
+                 action: str = "redispatch", max_offers: int = 3,
+                 tick: float = 1.0, clock: Callable[[], float] = time.time):
+        if action not in ("decline", "redispatch"):
+            raise ValueError("action must be 'decline' or 'redispatch'")
+        self.booking_system = booking_system
+        self.dispatcher = dispatcher
+        self.ttl_seconds = ttl_seconds
+        self.action = action
+        self.max_offers = max_offers
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._wheel = TimerWheel(tick=tick, now=clock())
+        # booking_id -> providers that already had (and let lapse) an offer
+        self._tried: Dict[str, Set[str]] = {}
+        # booking_id -> provider whose load the dispatcher counted for the live offer
+        self._counted: Dict[str, str] = {}
+        self.expired_total = 0
+        self.declined_total = 0
+        self.reoffered_total = 0
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        if dispatcher is not None:
+            dispatcher.on_dispatched = self._on_dispatched
+
+    def __len__(self) -> int:
+        return len(self._wheel)
+
+    def track(self, booking: Dict, offered_at: Optional[float] = None) -> None:
+        """Start (or restart) the expiry clock for a pending booking"""
+        if offered_at is None:
+            offered_at = (_parse_timestamp(booking.get("status_updated_at"))
+                          or _parse_timestamp(booking.get("created_at"))
+                          or self.clock())
+        with self._lock:
+            self._wheel.schedule(str(booking["id"]), offered_at + self.ttl_seconds, dict(booking))
+            self._counted.pop(str(booking["id"]), None)
+
+    def cancel(self, booking_id) -> None:
+        """The booking was answered or cancelled; stop its timer"""
+        with self._lock:
+            self._wheel.cancel(str(booking_id))
+            self._tried.pop(str(booking_id), None)
+            self._counted.pop(str(booking_id), None)
+
+    def reload(self, limit: int = 100000) -> int:
+        """Rebuild timers for pending bookings after a restart"""
+        response = self.booking_system.db.table("bookings") \
+            .select("id, tasker_id, status, priority, created_at, status_updated_at, service_category, latitude, longitude") \
+            .eq("status", "pending") \
+            .limit(limit) \
+            .execute()
+        for booking in response.data or []:
+            self.track(booking)
+        return len(response.data or [])
+
+    def _on_dispatched(self, booking: Dict, provider: Dict) -> None:
+        offered = dict(booking, tasker_id=provider["id"])
+        if self.dispatcher is not None and self.dispatcher.mode == "assign":
+            self.cancel(booking["id"])
+        else:
+            self.track(offered, offered_at=self.clock())
+            with self._lock:
+                self._counted[str(booking["id"])] = str(provider["id"])
+
+    def run_due(self) -> Dict:
+        """Process every offer that has expired by now"""
+        with self._lock:
+            expired = self._wheel.advance(self.clock())
+            # Only offers made by the dispatcher added to a provider's load
+            counted = {booking_id: self._counted.pop(booking_id, None) for booking_id, _ in expired}
+        if not expired:
+            return {"expired": 0, "declined": 0, "reoffered": 0}
+
+        to_decline, to_reoffer = [], []
+        for booking_id, booking in expired:
+            tried = self._tried.setdefault(booking_id, set())
+            if booking.get("tasker_id"):
+                tried.add(str(booking["tasker_id"]))
+            if self.action == "redispatch" and self.dispatcher is not None and len(tried) < self.max_offers:
+                to_reoffer.append((booking, set(tried)))
+            else:
+                to_decline.append(booking_id)
+
+        declined = 0
+        if to_decline:
+            # One conditional update for the whole tick; answered bookings are skipped
+            summary = self.booking_system.bulk_update_status(to_decline, "declined")
+            declined = summary["succeeded"]
+            for booking_id in to_decline:
+                self._tried.pop(booking_id, None)
+                if self.dispatcher is not None:
+                    self.dispatcher.remove(booking_id)
+            for result in summary["results"]:
+                provider_id = counted.get(str(result["booking_id"]))
+                if result["success"] and provider_id and self.dispatcher is not None:
+                    self.dispatcher.release(provider_id)
+        for booking, tried in to_reoffer:
+            provider_id = counted.get(str(booking["id"]))
+            if provider_id:
+                self.dispatcher.release(provider_id)
+            self.dispatcher.enqueue(booking, exclude=tried)
+
+        self.expired_total += len(expired)
+        self.declined_total += declined
+        self.reoffered_total += len(to_reoffer)
+        return {"expired": len(expired), "declined": declined, "reoffered": len(to_reoffer)}
+
+    def start(self) -> None:
+        """Tick the wheel on a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self._wheel.tick):
+                try:
+                    self.run_due()
+                except Exception as e:
+                    print(f"Error expiring booking offers: {e}")
+
+        self._thread = threading.Thread(target=loop, name="offer-expiry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def metrics(self) -> Dict:
+        return {
+            "live_timers": len(self._wheel),
+            "ttl_seconds": self.ttl_seconds,
+            "action": self.action,
+            "expired_total": self.expired_total,
+            "declined_total": self.declined_total,
+            "reoffered_total": self.reoffered_total,
+        }
@@ -0,0 +1,229 @@
+"""
+Provider Presence
+Availability, last_seen and location of providers, kept in memory from
+the provider app's heartbeats. Changes to availability or location are
+applied to the provider catalog (and the surge aggregator) at once, so
+matching reads them without a database query; a heartbeat that changes
+nothing but last_seen touches neither.
+
+Writes are behind: a heartbeat only marks the provider dirty. flush()
+writes the latest state of every dirty provider in one bulk upsert on
+profiles (is_available, last_active, latitude, longitude), so a provider
+pinging every few seconds costs one row per flush rather than one request
+per ping. Providers not heard from for stale_after seconds are expired:
+marked unavailable and flushed the same way.
+
+Flush lag is the age of the oldest update not yet written.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from metrics import REGISTRY
+
+PRESENCE_FIELDS = ("is_available", "latitude", "longitude")
+
+
+class PresenceStore:
+    """In-memory provider presence with coalesced write-behind to profiles"""
+
+    def __init__(self, db, catalog=None, surge=None, stale_after: float = 120.0,
+                 clock: Callable[[], float] = time.time):
+        self.db = db
+        self.catalog = catalog
+        self.surge = surge
+        self.stale_after = stale_after
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # tasker_id -> {"is_available", "latitude", "longitude", "last_seen"}
+        self._state: Dict[str, Dict] = {}
+        # tasker_id -> time of the oldest update not yet flushed
+        self._dirty: Dict[str, float] = {}
+
+        self.heartbeats_total = 0
+        self.coalesced_total = 0
+        self.expired_total = 0
+        self.flushes_total = 0
+        self.rows_flushed_total = 0
+        self.flush_errors_total = 0
+        self.last_flush_at: Optional[float] = None
+        self.last_flush_ms: Optional[float] = None
+        self.last_flush_lag_seconds: Optional[float] = None
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    # -- updates -----------------------------------------------------------
+
+    def _mark_dirty_locked(self, tasker_id: str, now: float) -> None:
+        if tasker_id in self._dirty:
+            self.coalesced_total += 1
+        else:
+            self._dirty[tasker_id] = now
+
+    def _publish(self, tasker_id: str, changes: Dict) -> None:
+        """Push availability/location changes to the in-memory readers"""
+        profile = {"id": tasker_id, **changes}
+        if self.catalog is not None:
+            self.catalog.upsert(profile)
+        if self.surge is not None:
+            self.surge.provider_changed(profile)
+
+    def heartbeat(self, tasker_id: str, is_available: Optional[bool] = None,
+                  latitude: Optional[float] = None, longitude: Optional[float] = None) -> Optional[Dict]:
+        """Record a ping; returns the provider's presence, or None when they are not a known tasker"""
+        tasker_id = str(tasker_id)
+        now = self.clock()
+        with self._lock:
+            state = self._state.get(tasker_id)
+        if state is None:
+            known = self.catalog.get(tasker_id, PRESENCE_FIELDS) if self.catalog is not None else {}
+            if known is None:
+                return None
+            state = {field: known.get(field) for field in PRESENCE_FIELDS}
+
+        # Availability only changes when the app says so; a bare ping just refreshes last_seen
+        update = {} if is_available is None else {"is_available": is_available}
+        if latitude is not None and longitude is not None:
+            update.update(latitude=latitude, longitude=longitude)
+        with self._lock:
+            state = self._state.setdefault(tasker_id, state)
+            changes = {field: value for field, value in update.items() if state.get(field) != value}
+            state.update(update, last_seen=now)
+            self.heartbeats_total += 1
+            self._mark_dirty_locked(tasker_id, now)
+            snapshot = dict(state)
+        if changes:
+            self._publish(tasker_id, changes)
+        return snapshot
+
+    def observe(self, profile: Dict) -> None:
+        """Take availability/location written elsewhere (e.g. PATCH /profiles) without re-writing it"""
+        tasker_id = str(profile["id"])
+        with self._lock:
+            state = self._state.get(tasker_id)
+            if state is not None:
+                state.update((field, profile[field]) for field in PRESENCE_FIELDS if field in profile)
+
+    def get(self, tasker_id: str) -> Optional[Dict]:
+        with self._lock:
+            state = self._state.get(str(tasker_id))
+            return dict(state) if state is not None else None
+
+    def expire_stale(self) -> List[str]:
+        """Mark providers silent for stale_after seconds unavailable"""
+        now = self.clock()
+        cutoff = now - self.stale_after
+        with self._lock:
+            expired = [tasker_id for tasker_id, state in self._state.items()
+                       if state.get("is_available") and state["last_seen"] < cutoff]
+            for tasker_id in expired:
+                self._state[tasker_id]["is_available"] = False
+                self._mark_dirty_locked(tasker_id, now)
+            self.expired_total += len(expired)
+        for tasker_id in expired:
+            self._publish(tasker_id, {"is_available": False})
+        return expired
+
+    # -- write-behind ------------------------------------------------------
+
+    def flush(self) -> int:
+        """Write every dirty provider's latest state in one bulk upsert; returns rows written"""
+        with self._flush_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, {}
+                rows = []
+                for tasker_id in dirty:
+                    state = self._state[tasker_id]
+                    rows.append({
+                        "id": tasker_id,
+                        "is_available": bool(state.get("is_available")),
+                        "last_active": datetime.fromtimestamp(state["last_seen"]).isoformat(),
+                        "latitude": state.get("latitude"),
+                        "longitude": state.get("longitude"),
+                    })
+            if not rows:
+                return 0
+            started = time.perf_counter()
+            try:
+                self.db.table("profiles").upsert(rows, on_conflict="id").execute()
+            except Exception:
+                # Keep the rows for the next flush, unless a newer update already queued them
+                with self._lock:
+                    for tasker_id, since in dirty.items():
+                        self._dirty[tasker_id] = min(since, self._dirty.get(tasker_id, since))
+                    self.flush_errors_total += 1
+                raise
+            now = self.clock()
+            with self._lock:
+                self.flushes_total += 1
+                self.rows_flushed_total += len(rows)
+                self.last_flush_at = now
+                self.last_flush_ms = round((time.perf_counter() - started) * 1000, 3)
+                self.last_flush_lag_seconds = round(now - min(dirty.values()), 3)
+            return len(rows)
+
+    def flush_lag(self) -> float:
+        """Seconds since the oldest update still waiting to be written (0 when none)"""
+        with self._lock:
+            oldest = min(self._dirty.values(), default=None)
+        return 0.0 if oldest is None else max(0.0, self.clock() - oldest)
+
+    # -- background loop ---------------------------------------------------
+
+    def start(self, interval: float = 2.0) -> None:
+        """Expire stale providers and flush every `interval` seconds on a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.expire_stale()
+                    self.flush()
+                except Exception as e:
+                    print(f"Error flushing provider presence: {e}")
+
+        self._thread = threading.Thread(target=loop, name="presence-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the loop and write whatever is still pending"""
+        self._stop.set()
+        self.flush()
+
+    # -- metrics -----------------------------------------------------------
+
+    def metrics(self) -> Dict:
+        lag = self.flush_lag()
+        with self._lock:
+            return {
+                "tracked": len(self._state),
+                "online": sum(1 for state in self._state.values() if state.get("is_available")),
+                "pending_rows": len(self._dirty),
+                "flush_lag_seconds": round(lag, 3),
+                "last_flush_lag_seconds": self.last_flush_lag_seconds,
+                "last_flush_ms": self.last_flush_ms,
+                "last_flush_at": self.last_flush_at,
+                "heartbeats_total": self.heartbeats_total,
+                "coalesced_total": self.coalesced_total,
+                "flushes_total": self.flushes_total,
+                "rows_flushed_total": self.rows_flushed_total,
+                "flush_errors_total": self.flush_errors_total,
+                "expired_total": self.expired_total,
+                "stale_after_seconds": self.stale_after,
+            }
+
+    def register_metrics(self, registry=REGISTRY) -> None:
+        registry.gauge("provider_presence", "Provider presence write-behind state", ("stat",),
+                       lambda: {(name,): value for name, value in self.metrics().items()
+                                if name in ("online", "pending_rows", "flush_lag_seconds",
+                                            "rows_flushed_total", "expired_total", "flush_errors_total")})
@@ -0,0 +1,173 @@
+"""
+Price Quotes
+Min/max price for a service across every matched provider in one NumPy
+operation: the outer product of the providers' hourly rates with the
+service's estimate_hours range (ai_services.SERVICES), scaled by the
+follow-up answers.
+
+Each answer with an entry in ANSWER_MULTIPLIERS scales the price (a
+kitchen-only clean is cheaper, a truck costs more to wash than a sedan);
+anything else counts as 1.0. Quotes are cached per (service, hash of the
+answers) and recomputed once the provider catalog has changed; a surge
+multiplier for the customer's area is applied on top when asked for.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from ai_services import SERVICES
+
+SERVICES_BY_ID = {service["id"]: service for service in SERVICES}
+
+# service id -> follow-up question id -> answer -> price multiplier
+ANSWER_MULTIPLIERS = {
+    "beauty_massage": {
+        "duration": {"30 min": 0.5, "60 min": 1.0, "90 min": 1.5},
+        "type": {"Swedish": 1.0, "Deep Tissue": 1.15, "Hot Stone": 1.25, "Aromatherapy": 1.1},
+    },
+    "home_cleaning": {
+        "rooms": {"All rooms": 1.0, "Kitchen only": 0.5, "Bathrooms only": 0.5, "Bedrooms only": 0.6},
+        "frequency": {"One-time": 1.0, "Weekly": 0.85, "Bi-weekly": 0.9, "Monthly": 0.95},
+    },
+    "car_wash": {
+        "service_type": {"Basic wash": 1.0, "Premium wash": 1.5, "Full detail": 2.5},
+        "vehicle_size": {"Hatchback": 0.9, "Sedan": 1.0, "SUV": 1.25, "Truck": 1.4},
+    },
+    "appliance_repair": {
+        "appliance": {"Refrigerator": 1.2, "Washing Machine": 1.1, "AC": 1.3, "Microwave": 0.7, "Other": 1.0},
+    },
+    "beauty_facial": {
+        "concerns": {"Acne": 1.1, "Aging": 1.2, "Dark spots": 1.15, "General glow": 1.0},
+    },
+}
+
+# Answers are matched case-insensitively
+_MULTIPLIERS = {
+    service_id: {question: {answer.lower(): factor for answer, factor in options.items()}
+                 for question, options in questions.items()}
+    for service_id, questions in ANSWER_MULTIPLIERS.items()
+}
+
+QUOTE_COLUMNS = ("id", "name", "hourly_rate")
+
+
+def answers_key(answers: Optional[Dict]) -> str:
+    """Stable hash of follow-up answers, independent of key order"""
+    canonical = json.dumps(answers or {}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+def answer_multiplier(service_id: str, answers: Optional[Dict]) -> float:
+    """Product of the multipliers for every recognised answer"""
+    questions = _MULTIPLIERS.get(service_id, {})
+    factor = 1.0
+    for question, answer in (answers or {}).items():
+        factor *= questions.get(question, {}).get(str(answer).strip().lower(), 1.0)
+    return factor
+
+
+def price_matrix(rates: Iterable[Optional[float]], hours: Tuple[float, float], factor: float = 1.0) -> np.ndarray:
+    """(n, 2) array of min/max prices for n hourly rates; a missing rate gives a NaN row"""
+    rates = np.fromiter((np.nan if r is None else r for r in rates), dtype=np.float64)
+    return np.round(np.multiply.outer(rates, np.asarray(hours, dtype=np.float64) * factor), 2)
+
+
+class QuoteEngine:
+    """Cached price quotes for a service across the catalog's matching providers
+
+    With a surge aggregator (see surge.py), quotes for a location are
+    scaled by the surge multiplier of its cell; the cached prices are not.
+    """
+
+    def __init__(self, catalog, max_entries: int = 1024, surge=None):
+        self.catalog = catalog
+        self.max_entries = max_entries
+        self.surge = surge
+        self._lock = threading.Lock()
+        # (service id, answers key) -> (catalog price_version, quote)
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[int, Dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def quote(self, service_id: str, answers: Optional[Dict] = None, limit: Optional[int] = None,
+              location: Optional[Dict[str, float]] = None) -> Dict:
+        """Price range per available provider for the service, cheapest first
+
+        Raises ValueError for a service not in ai_services.SERVICES or a
+        location without both lat and lng.
+        """
+        service = SERVICES_BY_ID.get(service_id)
+        if service is None:
+            raise ValueError(f"Unknown service: {service_id}")
+        if location and not {"lat", "lng"} <= location.keys():
+            raise ValueError("location needs both lat and lng")
+        key = (service_id, answers_key(answers))
+        version = self.catalog.price_version
+        with self._lock:
+            entry = self._cache.get(key)
+            cached = entry is not None and entry[0] == version
+            if cached:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if cached:
+            result = entry[1]
+        else:
+            # Stored under the version read before computing, so a concurrent change forces a recompute
+            result = self._compute(service, answers)
+            with self._lock:
+                self._cache[key] = (version, result)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+
+        surge = 1.0
+        if self.surge is not None and location:
+            surge = self.surge.multiplier(location["lat"], location["lng"], service["skill_tag"])
+        prices = result["prices"][:limit] if limit else result["prices"]
+        if surge != 1.0:
+            prices = np.round(prices * surge, 2)
+        providers = [{**provider, "price_min": low, "price_max": high}
+                     for provider, (low, high) in zip(result["providers"], prices.tolist())]
+        totals = {"price_min": None, "price_max": None}
+        if len(result["prices"]):
+            totals = {"price_min": round(result["price_min"] * surge, 2),
+                      "price_max": round(result["price_max"] * surge, 2)}
+        return {**result["summary"], **totals, "surge": surge, "providers": providers, "cached": cached}
+
+    def _compute(self, service: Dict, answers: Optional[Dict]) -> Dict:
+        candidates = self.catalog.select(any_skills=[service["id"], service["skill_tag"]], available=True,
+                                         columns=QUOTE_COLUMNS)
+        factor = answer_multiplier(service["id"], answers)
+        prices = price_matrix((p["hourly_rate"] for p in candidates), service["estimate_hours"], factor)
+        priced = np.flatnonzero(~np.isnan(prices[:, 0]))
+        order = priced[np.argsort(prices[priced, 0], kind="stable")]
+        prices = prices[order]
+        return {
+            "summary": {
+                "service_id": service["id"],
+                "label": service["label"],
+                "estimate_hours": list(service["estimate_hours"]),
+                "multiplier": round(factor, 4),
+                "total_providers": len(order),
+            },
+            "providers": [{"id": candidates[i]["id"], "name": candidates[i]["name"],
+                           "rate_hour": candidates[i]["hourly_rate"]} for i in order.tolist()],
+            # (n, 2) min/max prices in provider order, before any surge
+            "prices": prices,
+            "price_min": float(prices[:, 0].min()) if len(prices) else None,
+            "price_max": float(prices[:, 1].max()) if len(prices) else None,
+        }
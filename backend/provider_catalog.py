@@ -0,0 +1,354 @@
+"""
+Provider Catalog
+Tasker profiles held in process as parallel columns (array-backed floats,
+plain lists for strings) rather than one dict per provider, plus an
+inverted index from skill tag to a bitset of catalog rows. A skill filter
+is a bitset intersection or union; only the rows that survive are turned
+back into dicts.
+
+Bitsets are Python ints (bit i = row i), so AND/OR/popcount run in C over
+machine words. Removed rows are reused so the bitsets stay dense.
+
+Weekly availability masks (see availability.py) sit in a numpy slot
+matrix alongside the columns; a slot filter runs vectorized over the rows
+left after the skill filter.
+
+The catalog loads every tasker in keyset-paginated pages on first use and
+is kept current by upsert()/remove()/set_availability() at the write
+sites; a full reload after max_age picks up writes made elsewhere (e.g.
+ratings kept by database triggers). One caller reloads while the others
+keep reading the current generation, and writes that arrive while the
+pages are being read are replayed onto the new one before it is swapped in.
+"""
+
+import heapq
+import math
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from export_stream import iter_pages
+
+CATALOG_FIELDS = ("id", "name", "skills", "hourly_rate", "bio", "rating", "latitude", "longitude", "is_available")
+FLOAT_FIELDS = ("hourly_rate", "rating", "latitude", "longitude")
+# Fields price quotes read; only changes to these move price_version
+PRICE_FIELDS = ("name", "skills", "hourly_rate", "is_available")
+
+# Column defaults for a new row, as in the profiles table
+_DEFAULTS = {"rating": 0.0}
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Row numbers set in a bitset, lowest first"""
+    digits = bin(bits)[:1:-1]  # least significant bit first
+    i = digits.find("1")
+    while i != -1:
+        yield i
+        i = digits.find("1", i + 1)
+
+
+def _float(value) -> float:
+    return math.nan if value is None else float(value)
+
+
+class _Columns:
+    """One generation of catalog state; load() builds a new one and swaps it in"""
+
+    __slots__ = ("ids", "names", "bios", "skills", "floats", "row_of", "free",
+                 "live", "available", "skill_bits", "skill_sets", "slots")
+
+    def __init__(self):
+        self.ids: List[Optional[str]] = []
+        self.names: List[Optional[str]] = []
+        self.bios: List[Optional[str]] = []
+        self.skills: List[tuple] = []
+        self.floats = {field: array("d") for field in FLOAT_FIELDS}
+        self.row_of: Dict[str, int] = {}
+        self.free: List[int] = []
+        self.live = 0
+        self.available = 0
+        self.skill_bits: Dict[str, int] = {}
+        # Identical skill lists are stored once and shared between rows
+        self.skill_sets: Dict[tuple, tuple] = {}
+        # availability.SlotMatrix, created when the first mask arrives
+        self.slots = None
+
+    def _new_row(self, tasker_id: str) -> int:
+        if self.free:
+            row = self.free.pop()
+        else:
+            row = len(self.ids)
+            self.ids.append(None)
+            self.names.append(None)
+            self.bios.append(None)
+            self.skills.append(())
+            for column in self.floats.values():
+                column.append(math.nan)
+        self.ids[row] = tasker_id
+        self.row_of[tasker_id] = row
+        for field, value in _DEFAULTS.items():
+            self.floats[field][row] = value
+        self.live |= 1 << row
+        self.available |= 1 << row
+        return row
+
+    def _set_skills(self, row: int, skills: Iterable[str]) -> None:
+        bit = 1 << row
+        old = self.skills[row]
+        key = tuple(dict.fromkeys(sys.intern(str(s)) for s in skills or ()))
+        new = self.skill_sets.setdefault(key, key)
+        for skill in set(old) - set(new):
+            remaining = self.skill_bits[skill] & ~bit
+            if remaining:
+                self.skill_bits[skill] = remaining
+            else:
+                del self.skill_bits[skill]
+        for skill in set(new) - set(old):
+            self.skill_bits[skill] = self.skill_bits.get(skill, 0) | bit
+        self.skills[row] = new
+
+    def upsert(self, profile: Dict) -> None:
+        tasker_id = str(profile["id"])
+        if profile.get("role", "tasker") != "tasker":
+            self.remove(tasker_id)
+            return
+        row = self.row_of.get(tasker_id)
+        if row is None:
+            row = self._new_row(tasker_id)
+        # Fields missing from a partial update keep their current values
+        if "name" in profile:
+            self.names[row] = profile["name"]
+        if "bio" in profile:
+            self.bios[row] = profile["bio"]
+        if "skills" in profile:
+            self._set_skills(row, profile["skills"])
+        for field in FLOAT_FIELDS:
+            if field in profile:
+                self.floats[field][row] = _float(profile[field])
+        if "is_available" in profile:
+            bit = 1 << row
+            self.available = self.available | bit if profile["is_available"] else self.available & ~bit
+
+    def set_slots(self, tasker_id: str, mask: int) -> bool:
+        row = self.row_of.get(str(tasker_id))
+        if row is None:
+            return False
+        if self.slots is None:
+            if not mask:
+                return True
+            from availability import SlotMatrix
+            self.slots = SlotMatrix(max(1024, len(self.ids)))
+        self.slots.set(row, mask)
+        return True
+
+    def remove(self, tasker_id: str) -> None:
+        row = self.row_of.pop(str(tasker_id), None)
+        if row is None:
+            return
+        self._set_skills(row, ())
+        if self.slots is not None:
+            self.slots.set(row, 0)
+        bit = 1 << row
+        self.live &= ~bit
+        self.available &= ~bit
+        self.ids[row] = self.names[row] = self.bios[row] = None
+        for column in self.floats.values():
+            column[row] = math.nan
+        self.free.append(row)
+
+    def record(self, row: int, columns: Sequence[str]) -> Dict:
+        values = {}
+        for column in columns:
+            if column == "id":
+                values["id"] = self.ids[row]
+            elif column == "name":
+                values["name"] = self.names[row]
+            elif column == "bio":
+                values["bio"] = self.bios[row]
+            elif column == "skills":
+                values["skills"] = list(self.skills[row])
+            elif column == "is_available":
+                values["is_available"] = bool(self.available >> row & 1)
+            else:
+                value = self.floats[column][row]
+                values[column] = None if math.isnan(value) else value
+        return values
+
+
+class ProviderCatalog:
+    """Columnar tasker catalog with a skill -> row bitset inverted index"""
+
+    def __init__(self, db=None, max_age: float = 300.0):
+        self.db = db
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # Held for a whole load, so concurrent refreshes collapse into one
+        self._refresh_lock = threading.RLock()
+        self._cols = _Columns()
+        self._loaded_at: Optional[float] = None
+        # Writes made while a load is reading, as (_Columns method, args); None when not loading
+        self._replay: Optional[List[tuple]] = None
+        # Bumped on every change, so derived caches can tell they are stale
+        self.version = 0
+        # Bumped only when something a price quote reads changes (not e.g. a location ping)
+        self.price_version = 0
+
+    def __len__(self) -> int:
+        return len(self._cols.row_of)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def load(self, profiles: Optional[Iterable[Dict]] = None,
+             availability: Optional[Iterable[Dict]] = None) -> int:
+        """(Re)build from tasker profiles and provider_availability rows, read from the database when not given"""
+        with self._refresh_lock:
+            with self._lock:
+                self._replay = []
+            try:
+                if profiles is None:
+                    pages = iter_pages(self.db, "profiles", ", ".join(CATALOG_FIELDS), [("role", "tasker")])
+                    profiles = (profile for page in pages for profile in page)
+                    if availability is None:
+                        slot_pages = iter_pages(self.db, "provider_availability", "tasker_id, slots",
+                                                key="tasker_id")
+                        availability = (row for page in slot_pages for row in page)
+                cols = _Columns()
+                for profile in profiles:
+                    cols.upsert(profile)
+                if availability:
+                    from availability import from_hex
+                    for row in availability:
+                        cols.set_slots(row["tasker_id"], from_hex(row["slots"]))
+                with self._lock:
+                    for method, args in self._replay:
+                        getattr(cols, method)(*args)
+                    self._cols = cols
+                    self._loaded_at = time.monotonic()
+                    self.version += 1
+                    self.price_version += 1
+            finally:
+                with self._lock:
+                    self._replay = None
+        return len(cols.row_of)
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age
+
+    def refresh_if_stale(self) -> None:
+        """Reload when older than max_age; while one caller reloads the rest keep reading the current state"""
+        if not self._stale():
+            return
+        # Before the first load there is nothing to read, so wait for it
+        if not self._refresh_lock.acquire(blocking=not self.loaded):
+            return
+        try:
+            if self._stale():
+                self.load()
+        finally:
+            self._refresh_lock.release()
+
+    def _apply_locked(self, method: str, *args):
+        if self._replay is not None:
+            self._replay.append((method, args))
+        return getattr(self._cols, method)(*args)
+
+    def invalidate(self) -> None:
+        """Force a full reload on next use (e.g. after switching storage)"""
+        self._loaded_at = None
+
+    def upsert(self, profile: Dict) -> None:
+        """Apply a registration or (partial) profile update; non-taskers are dropped"""
+        with self._lock:
+            before = self._price_fields_locked(profile["id"])
+            self._apply_locked("upsert", profile)
+            self.version += 1
+            if self._price_fields_locked(profile["id"]) != before:
+                self.price_version += 1
+
+    def remove(self, tasker_id: str) -> None:
+        with self._lock:
+            self._apply_locked("remove", tasker_id)
+            self.version += 1
+            self.price_version += 1
+
+    def _price_fields_locked(self, tasker_id) -> Optional[Dict]:
+        row = self._cols.row_of.get(str(tasker_id))
+        return self._cols.record(row, PRICE_FIELDS) if row is not None else None
+
+    def set_availability(self, tasker_id: str, mask: int) -> bool:
+        """Replace a provider's weekly slot mask; False when they are not in the catalog"""
+        with self._lock:
+            return self._apply_locked("set_slots", tasker_id, mask)
+
+    def get(self, tasker_id: str, columns: Sequence[str] = CATALOG_FIELDS) -> Optional[Dict]:
+        """One provider as a dict of `columns`, or None when not in the catalog"""
+        with self._lock:
+            row = self._cols.row_of.get(str(tasker_id))
+            return self._cols.record(row, columns) if row is not None else None
+
+    def availability(self, tasker_id: str) -> int:
+        cols = self._cols
+        row = cols.row_of.get(str(tasker_id))
+        return cols.slots.get(row) if row is not None and cols.slots is not None else 0
+
+    def match(self, skills: Sequence[str] = (), any_skills: Sequence[str] = (),
+              available: Optional[bool] = None) -> int:
+        """Bitset of rows offering every skill in `skills` and at least one of `any_skills`"""
+        cols = self._cols
+        bits = cols.live
+        for skill in skills:
+            bits &= cols.skill_bits.get(skill, 0)
+        if any_skills:
+            union = 0
+            for skill in any_skills:
+                union |= cols.skill_bits.get(skill, 0)
+            bits &= union
+        if available is not None:
+            bits = bits & cols.available if available else bits & ~cols.available
+        return bits
+
+    def _rows(self, cols: _Columns, bits: int, slots: Optional[int]) -> Iterable[int]:
+        """Rows of a bitset, narrowed to those covering every slot in `slots`"""
+        if slots is None:
+            return iter_bits(bits)
+        if cols.slots is None:
+            return []
+        return cols.slots.covering(list(iter_bits(bits)), slots)
+
+    def count(self, skills: Sequence[str] = (), any_skills: Sequence[str] = (),
+              available: Optional[bool] = None, slots: Optional[int] = None) -> int:
+        bits = self.match(skills, any_skills, available)
+        if slots is None:
+            return bits.bit_count()
+        with self._lock:
+            return len(self._rows(self._cols, bits, slots))
+
+    def select(self, skills: Sequence[str] = (), any_skills: Sequence[str] = (),
+               available: Optional[bool] = None, columns: Sequence[str] = CATALOG_FIELDS,
+               order_by: Optional[str] = None, limit: Optional[int] = None,
+               slots: Optional[int] = None) -> List[Dict]:
+        """Matching providers as dicts of `columns`, highest `order_by` first when given
+
+        `slots` is a weekly availability mask every returned provider covers.
+        """
+        unknown = set(columns) - set(CATALOG_FIELDS)
+        if unknown:
+            raise ValueError(f"Not in the catalog: {', '.join(sorted(unknown))}")
+        with self._lock:
+            cols = self._cols
+            rows = self._rows(cols, self.match(skills, any_skills, available), slots)
+            if order_by is not None:
+                values = cols.floats[order_by]
+
+                def key(row):
+                    value = values[row]
+                    return -math.inf if math.isnan(value) else value
+
+                rows = heapq.nlargest(limit, rows, key=key) if limit else sorted(rows, key=key, reverse=True)
+            elif limit:
+                rows = [row for row, _ in zip(rows, range(limit))]
+            return [cols.record(row, columns) for row in rows]
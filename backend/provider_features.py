@@ -0,0 +1,139 @@
+"""
+Provider Performance Features
+Per-provider, per-skill counters in the provider_skill_stats table, bumped
+by booking transitions as they happen: offered, accepted (plus total
+seconds from offer to acceptance), declined, completed, and cancelled after
+acceptance. The databases apply them with triggers on bookings (see the
+schema files); the in-memory backend applies transition_deltas() from its
+write hook.
+
+ProviderFeatureStore loads the whole table in one read into a compact
+snapshot that matching code queries in O(1), refreshing it when stale.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+COUNTERS = ("offered", "accepted", "declined", "completed", "cancelled", "accept_seconds")
+STATS_COLUMNS = ("tasker_id", "skill") + COUNTERS
+
+DEFAULT_SKILL = "general"
+
+# Reliability is smoothed towards this prior as if each provider had
+# PRIOR_JOBS resolved jobs at that rate, so one early cancellation does not
+# sink a new provider
+PRIOR_RELIABILITY = 0.9
+PRIOR_JOBS = 5
+
+
+def _seconds_between(start, end) -> float:
+    try:
+        started = datetime.fromisoformat(str(start))
+        ended = datetime.fromisoformat(str(end)) if end else datetime.now()
+    except ValueError:
+        return 0.0
+    return max(0.0, (ended - started).total_seconds())
+
+
+def transition_deltas(old: Optional[Dict], new: Dict) -> Dict[str, float]:
+    """Counter changes for one booking write, as the bookings_skill_stats triggers compute them
+
+    `old` is None for an insert. Returns {} when nothing is counted.
+    """
+    if new.get("tasker_id") is None:
+        return {}
+    old = old or {}
+    status, old_status = new.get("status"), old.get("status")
+    deltas = {}
+    if status == "pending" and new.get("tasker_id") != old.get("tasker_id"):
+        deltas["offered"] = 1
+    if status != old_status:
+        if status == "accepted":
+            deltas["accepted"] = 1
+            offered_at = old.get("status_updated_at") or old.get("created_at") or new.get("created_at")
+            deltas["accept_seconds"] = _seconds_between(offered_at, new.get("accepted_at")) if offered_at else 0.0
+        elif status in ("declined", "completed"):
+            deltas[status] = 1
+        elif status == "cancelled" and old_status in ("accepted", "in-progress"):
+            deltas["cancelled"] = 1
+    return deltas
+
+
+def derive(counters: Dict) -> Dict:
+    """Matching features from raw counters"""
+    offered, accepted = counters.get("offered", 0), counters.get("accepted", 0)
+    completed, cancelled = counters.get("completed", 0), counters.get("cancelled", 0)
+    resolved = completed + cancelled
+    return {
+        "jobs_done": completed,
+        "completion_rate": round(completed / resolved, 4) if resolved else None,
+        "acceptance_rate": round(accepted / offered, 4) if offered else None,
+        "reliability": round((completed + PRIOR_RELIABILITY * PRIOR_JOBS) / (resolved + PRIOR_JOBS), 4),
+        "avg_accept_seconds": round(counters.get("accept_seconds", 0) / accepted, 1) if accepted else None,
+    }
+
+
+class ProviderFeatureStore:
+    """In-process snapshot of provider_skill_stats, reloaded in one query when older than max_age"""
+
+    def __init__(self, db, max_age: float = 30.0):
+        self.db = db
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # tasker_id -> skill -> counters tuple in COUNTERS order
+        self._counters: Dict[str, Dict[str, Tuple]] = {}
+        self._loaded_at: Optional[float] = None
+        # Held for a whole load, so concurrent refreshes collapse into one
+        self._refresh_lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def load(self) -> int:
+        with self._refresh_lock:
+            rows = self.db.table("provider_skill_stats").select(", ".join(STATS_COLUMNS)).execute().data or []
+            counters: Dict[str, Dict[str, Tuple]] = {}
+            for row in rows:
+                counters.setdefault(str(row["tasker_id"]), {})[row["skill"]] = \
+                    tuple(row.get(c) or 0 for c in COUNTERS)
+            with self._lock:
+                self._counters = counters
+                self._loaded_at = time.monotonic()
+        return len(rows)
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age
+
+    def refresh_if_stale(self) -> None:
+        """Reload when older than max_age; while one caller reloads the rest keep reading the current snapshot"""
+        if not self._stale():
+            return
+        # Before the first load there is nothing to read, so wait for it
+        if not self._refresh_lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            if self._stale():
+                self.load()
+        finally:
+            self._refresh_lock.release()
+
+    def counters(self, tasker_id: str, skill: Optional[str] = None) -> Dict:
+        """Raw counters for one skill, or summed over all of the provider's skills"""
+        skills = self._counters.get(str(tasker_id), {})
+        found = [skills.get(skill)] if skill is not None else list(skills.values())
+        totals = dict.fromkeys(COUNTERS, 0)
+        for values in filter(None, found):
+            for name, value in zip(COUNTERS, values):
+                totals[name] += value
+        return totals
+
+    def features(self, tasker_id: str, skill: Optional[str] = None) -> Dict:
+        return derive(self.counters(tasker_id, skill))
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict]]:
+        """{tasker_id: {skill: features}} for every provider with activity"""
+        counters = self._counters
+        return {tasker_id: {skill: derive(dict(zip(COUNTERS, values))) for skill, values in skills.items()}
+                for tasker_id, skills in counters.items()}
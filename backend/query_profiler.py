@@ -0,0 +1,166 @@
+"""
+Request-Scoped Query Profiler
+Records every storage query issued while handling one request (table,
+operation, filters, selected columns, row count, payload bytes, duration)
+and flags repeated identical query shapes as likely N+1 patterns.
+
+Hooks into metrics.InstrumentedClient as an observer. Turn it on with
+QUERY_PROFILE=1; with DEBUG=1 it also adds an X-Query-Profile summary
+header to each response.
+"""
+
+import contextvars
+import json
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# A shape seen this many times in one request is reported as N+1
+N_PLUS_ONE_THRESHOLD = 2
+
+# Builder methods whose first argument is a column name
+FILTER_METHODS = {"eq", "neq", "gt", "gte", "lt", "lte", "in_", "is_", "contains", "ilike", "like",
+                  "match", "filter", "not_", "or_", "order"}
+
+_current: contextvars.ContextVar[Optional["QueryRecorder"]] = contextvars.ContextVar("query_recorder", default=None)
+
+
+def _payload_bytes(data) -> int:
+    if data is None:
+        return 0
+    return len(json.dumps(data, default=str, separators=(",", ":")))
+
+
+def describe_calls(calls) -> Dict:
+    """Split builder calls into selected columns and filters"""
+    columns, filters = None, []
+    for name, args, kwargs in calls:
+        if name == "select":
+            columns = " ".join(str(args[0] if args else kwargs.get("columns", "*")).split())
+        elif name in FILTER_METHODS and args:
+            value = args[1] if len(args) > 1 else kwargs.get("desc", "")
+            filters.append((name, str(args[0]), value))
+        elif name in ("limit", "range", "single"):
+            filters.append((name, "", args[0] if args else ""))
+    return {"columns": columns, "filters": filters}
+
+
+def query_shape(table: str, operation: str, calls) -> str:
+    """The query with filter values removed, e.g. profiles.select(name) eq(id)"""
+    parts = [f"{table}.{operation}"]
+    for name, args, _ in calls:
+        if name == "select":
+            parts[0] += f"({' '.join(str(args[0] if args else '*').split())})"
+        elif name in FILTER_METHODS and args:
+            parts.append(f"{name}({args[0]})")
+    return " ".join(parts)
+
+
+class QueryRecorder:
+    """Queries issued by one request (or one block of script code)"""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.queries: List[Dict] = []
+
+    def record(self, table: str, operation: str, calls, outcome: str, seconds: float, response) -> None:
+        data = getattr(response, "data", None)
+        details = describe_calls(calls)
+        entry = {
+            "table": table,
+            "operation": operation,
+            "columns": details["columns"],
+            "filters": details["filters"],
+            "shape": query_shape(table, operation, calls),
+            "rows": len(data) if isinstance(data, list) else int(data is not None),
+            "payload_bytes": _payload_bytes(data),
+            "duration_ms": round(seconds * 1000, 3),
+            "outcome": outcome,
+        }
+        self.queries.append(entry)
+        logger.debug("query %s filters=%s rows=%d bytes=%d %.2fms", entry["shape"], entry["filters"],
+                     entry["rows"], entry["payload_bytes"], entry["duration_ms"])
+
+    def n_plus_one(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        """Query shapes repeated at least `threshold` times"""
+        counts = Counter(q["shape"] for q in self.queries)
+        return {shape: n for shape, n in counts.most_common() if n >= threshold}
+
+    def summary(self) -> Dict:
+        return {
+            "queries": len(self.queries),
+            "total_ms": round(sum(q["duration_ms"] for q in self.queries), 3),
+            "rows": sum(q["rows"] for q in self.queries),
+            "payload_bytes": sum(q["payload_bytes"] for q in self.queries),
+            "n_plus_one": self.n_plus_one(),
+        }
+
+    def header(self) -> str:
+        summary = self.summary()
+        value = (f"queries={summary['queries']}; total_ms={summary['total_ms']}; "
+                 f"rows={summary['rows']}; bytes={summary['payload_bytes']}")
+        if summary["n_plus_one"]:
+            value += "; n+1=" + ", ".join(f"{shape} x{n}" for shape, n in summary["n_plus_one"].items())
+        return value
+
+
+def observe(table: str, operation: str, calls, outcome: str, seconds: float, response) -> None:
+    """InstrumentedClient observer: record into the active recorder, if any"""
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.record(table, operation, calls, outcome, seconds, response)
+
+
+@contextmanager
+def profile_queries(label: str = ""):
+    """Record queries made inside the block (scripts, tests, background jobs)"""
+    recorder = QueryRecorder(label)
+    token = _current.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current.reset(token)
+        _warn_n_plus_one(recorder)
+
+
+def _warn_n_plus_one(recorder: QueryRecorder) -> None:
+    repeated = recorder.n_plus_one()
+    if repeated:
+        logger.warning("Possible N+1 in %s: %s", recorder.label or "block",
+                       ", ".join(f"{shape} x{n}" for shape, n in repeated.items()))
+
+
+class QueryProfilerMiddleware:
+    """Starts a QueryRecorder per HTTP request; adds X-Query-Profile in debug mode
+
+    Sync endpoints run in a worker thread with a copy of the request's
+    context, so the recorder set here is the one they record into.
+    """
+
+    def __init__(self, app, debug_header: bool = False):
+        self.app = app
+        self.debug_header = debug_header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        recorder = QueryRecorder(f"{scope['method']} {scope['path']}")
+        token = _current.set(recorder)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and self.debug_header:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-profile", recorder.header().encode("latin-1", "replace")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            _warn_n_plus_one(recorder)
@@ -0,0 +1,57 @@
+"""
+Provider Rating Aggregates
+Running sums and counts per tasker (overall, per dimension, and a 1-5
+histogram) in the provider_rating_stats table. The databases keep them in
+step with reviews through triggers (see the schema files); the in-memory
+backend applies the same deltas with apply_review(). summarize() turns a
+stats row into the API shape in O(1).
+"""
+
+from typing import Dict, Optional
+
+DIMENSIONS = ("service", "communication", "timeliness")
+
+STATS_COLUMNS = ("tasker_id", "review_count", "rating_sum",
+                 "service_count", "service_sum", "communication_count", "communication_sum",
+                 "timeliness_count", "timeliness_sum",
+                 "rating_1", "rating_2", "rating_3", "rating_4", "rating_5")
+
+
+def empty_stats(tasker_id: str) -> Dict:
+    return {"tasker_id": tasker_id, **{column: 0 for column in STATS_COLUMNS[1:]}}
+
+
+def apply_review(stats: Dict, review: Dict, sign: int = 1) -> Dict:
+    """Add (sign=1) or remove (sign=-1) one review's contribution, like apply_review_stats()"""
+    stats["review_count"] += sign
+    stats["rating_sum"] += sign * review["rating"]
+    for dimension in DIMENSIONS:
+        value = review.get(f"{dimension}_rating")
+        if value is not None:
+            stats[f"{dimension}_count"] += sign
+            stats[f"{dimension}_sum"] += sign * value
+    stats[f"rating_{review['rating']}"] += sign
+    return stats
+
+
+def average(stats: Optional[Dict]) -> float:
+    """profiles.rating for these stats (0 without reviews)"""
+    if not stats or not stats["review_count"]:
+        return 0
+    return round(stats["rating_sum"] / stats["review_count"], 2)
+
+
+def summarize(stats: Optional[Dict]) -> Dict:
+    stats = stats or empty_stats(None)
+
+    def mean(total, count):
+        return round(total / count, 2) if count else None
+
+    return {
+        "tasker_id": stats["tasker_id"],
+        "average": mean(stats["rating_sum"], stats["review_count"]),
+        "count": stats["review_count"],
+        "dimensions": {d: {"average": mean(stats[f"{d}_sum"], stats[f"{d}_count"]), "count": stats[f"{d}_count"]}
+                       for d in DIMENSIONS},
+        "histogram": {str(star): stats[f"rating_{star}"] for star in range(1, 6)},
+    }
@@ -0,0 +1,195 @@
+"""
+Opt-in Per-Request CPU Profiling
+A request carrying the profiling token (X-Profile header or ?profile=
+query parameter, matched against PROFILE_TOKEN) is sampled while it runs.
+The resulting stacks are stored in the collapsed "frame;frame;frame count"
+format that flamegraph.pl, speedscope and inferno read, and can be
+downloaded from /debug/profiles/{id}.
+
+The sampler reads every busy thread's stack with sys._current_frames(),
+so a request that overlaps others on the same worker also shows their
+stacks. Only one request is profiled at a time, the sampling interval has
+a floor, and profiled requests are capped per minute.
+"""
+
+import hmac
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+# Sampling faster than this costs more than it tells
+MIN_INTERVAL = 0.001
+
+# Innermost functions of a thread that is waiting rather than running
+IDLE_FUNCTIONS = {"wait", "select", "poll", "accept", "_wait_for_tstate_lock"}
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples the stacks of all busy threads on a background thread"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = max(interval, MIN_INTERVAL)
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me or frame.f_code.co_name in IDLE_FUNCTIONS:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            labels.append(names.get(ident, "thread"))
+            self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        # Very short requests may finish before the first tick
+        if not self.samples:
+            self._sample()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """The most recent profiles, oldest evicted first"""
+
+    def __init__(self, max_profiles: int = 20):
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._profiles: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def add(self, method: str, path: str, duration: float, profiler: SamplingProfiler) -> str:
+        with self._lock:
+            profile_id = str(next(self._ids))
+            self._profiles[profile_id] = {
+                "id": profile_id,
+                "method": method,
+                "path": path,
+                "recorded_at": time.time(),
+                "duration_ms": round(duration * 1000, 3),
+                "interval_ms": round(profiler.interval * 1000, 3),
+                "samples": profiler.samples,
+                "collapsed": profiler.collapsed(),
+            }
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+            return profile_id
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return [{k: v for k, v in p.items() if k != "collapsed"} for p in reversed(self._profiles.values())]
+
+
+class RequestProfilerMiddleware:
+    """Profiles requests that present the token, within the rate cap"""
+
+    def __init__(self, app, token: str, store: ProfileStore, interval: float = 0.005,
+                 max_per_minute: int = 6):
+        self.app = app
+        self.token = token
+        self.store = store
+        self.interval = max(interval, MIN_INTERVAL)
+        self.max_per_minute = max_per_minute
+        self._lock = threading.Lock()
+        self._active = False
+        self._recent: deque = deque()
+
+    def authorized(self, scope) -> bool:
+        supplied = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-profile":
+                supplied = value.decode("latin-1")
+                break
+        if supplied is None:
+            supplied = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile", [None])[0]
+        return bool(self.token) and supplied is not None and hmac.compare_digest(supplied, self.token)
+
+    def _acquire(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if self._active or len(self._recent) >= self.max_per_minute:
+                return False
+            self._active = True
+            self._recent.append(now)
+            return True
+
+    def _release(self) -> None:
+        with self._lock:
+            self._active = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.authorized(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if not self._acquire():
+            async def send_skipped(message):
+                if message["type"] == "http.response.start":
+                    message = {**message, "headers": list(message.get("headers", [])) + [
+                        (b"x-profile-skipped", b"rate-limited")]}
+                await send(message)
+            await self.app(scope, receive, send_skipped)
+            return
+
+        profiler = SamplingProfiler(self.interval)
+        started = time.perf_counter()
+        stopped = False
+
+        def finish() -> str:
+            nonlocal stopped
+            stopped = True
+            profiler.stop()
+            self._release()
+            return self.store.add(scope["method"], scope["path"], time.perf_counter() - started, profiler)
+
+        async def send_wrapper(message):
+            # The handler has returned by the time the response starts
+            if message["type"] == "http.response.start" and not stopped:
+                profile_id = finish()
+                message = {**message, "headers": list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not stopped:
+                finish()
@@ -0,0 +1,167 @@
+"""
+Response Models and Column Projections
+Typed response models for the read endpoints, and the columns each
+endpoint selects. Endpoints select an explicit default column set instead
+of "*", and accept `fields=a,b,c` to pick any subset of the allowed
+columns.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+PROFILE_COLUMNS = ("id", "name", "role", "skills", "hourly_rate", "bio", "rating", "created_at",
+                   "phone", "address", "city", "state", "zip_code", "latitude", "longitude",
+                   "is_available", "last_active", "availability")
+
+TASK_COLUMNS = ("id", "customer_id", "title", "description", "status", "created_at", "category",
+                "estimated_duration", "estimated_price", "priority")
+
+REVIEW_COLUMNS = ("id", "booking_id", "customer_id", "tasker_id", "rating", "review_text", "created_at",
+                  "service_rating", "communication_rating", "timeliness_rating")
+
+BOOKING_COLUMNS = ("id", "task_id", "customer_id", "tasker_id", "status", "created_at",
+                   "customer_name", "customer_phone", "customer_address", "customer_email",
+                   "service_name", "service_description", "service_category",
+                   "provider_name", "provider_phone",
+                   "booking_date", "booking_time", "estimated_duration", "estimated_price", "final_price",
+                   "pickup_address", "dropoff_address", "latitude", "longitude",
+                   "status_updated_at", "accepted_at", "started_at", "completed_at", "cancelled_at",
+                   "special_instructions", "priority", "payment_status", "payment_method")
+
+# endpoint -> (columns a caller may ask for, columns returned by default)
+PROJECTIONS: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "profiles": (PROFILE_COLUMNS,
+                 ("id", "name", "role", "skills", "hourly_rate", "bio", "rating", "city", "is_available")),
+    "profile": (PROFILE_COLUMNS,
+                ("id", "name", "role", "skills", "hourly_rate", "bio", "rating", "phone", "address",
+                 "city", "state", "zip_code", "availability", "is_available")),
+    "providers": (PROFILE_COLUMNS,
+                  ("id", "name", "skills", "hourly_rate", "bio", "rating")),
+    "tasks": (TASK_COLUMNS,
+              ("id", "title", "description", "status", "created_at", "category", "priority")),
+    "reviews": (REVIEW_COLUMNS,
+                ("id", "booking_id", "customer_id", "rating", "review_text", "created_at",
+                 "service_rating", "communication_rating", "timeliness_rating")),
+    "tasker_bookings": (BOOKING_COLUMNS,
+                        ("id", "task_id", "customer_id", "status", "created_at", "service_name",
+                         "customer_name", "customer_address", "booking_date", "booking_time",
+                         "estimated_duration", "estimated_price", "priority", "special_instructions")),
+    "export_bookings": (BOOKING_COLUMNS, BOOKING_COLUMNS),
+    "export_reviews": (REVIEW_COLUMNS, REVIEW_COLUMNS),
+}
+
+
+def select_columns(endpoint: str, fields: Optional[str] = None) -> str:
+    """The select() list for an endpoint; `fields` is the caller's comma-separated choice"""
+    allowed, default = PROJECTIONS[endpoint]
+    if not fields:
+        return ", ".join(default)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # id is always returned so rows can be told apart
+    return ", ".join(dict.fromkeys(["id"] + requested))
+
+
+# --------------------------
+# Response models
+# --------------------------
+# Every column is optional because `fields=` may leave it out; endpoints
+# use response_model_exclude_unset so unselected columns are not emitted.
+
+class ProfileOut(BaseModel):
+    id: str
+    name: Optional[str] = None
+    role: Optional[str] = None
+    skills: Optional[List[str]] = None
+    hourly_rate: Optional[float] = None
+    bio: Optional[str] = None
+    rating: Optional[float] = None
+    created_at: Optional[str] = None
+    phone: Optional[str] = None
+    address: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    zip_code: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    is_available: Optional[bool] = None
+    last_active: Optional[str] = None
+    availability: Optional[str] = None
+
+
+class TaskOut(BaseModel):
+    id: int
+    customer_id: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[str] = None
+    category: Optional[str] = None
+    estimated_duration: Optional[int] = None
+    estimated_price: Optional[float] = None
+    priority: Optional[str] = None
+
+
+class ReviewOut(BaseModel):
+    id: int
+    booking_id: Optional[int] = None
+    customer_id: Optional[str] = None
+    tasker_id: Optional[str] = None
+    rating: Optional[int] = None
+    review_text: Optional[str] = None
+    created_at: Optional[str] = None
+    service_rating: Optional[int] = None
+    communication_rating: Optional[int] = None
+    timeliness_rating: Optional[int] = None
+
+
+class BookingOut(BaseModel):
+    id: int
+    task_id: Optional[int] = None
+    customer_id: Optional[str] = None
+    tasker_id: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[str] = None
+    customer_name: Optional[str] = None
+    customer_phone: Optional[str] = None
+    customer_address: Optional[str] = None
+    customer_email: Optional[str] = None
+    service_name: Optional[str] = None
+    service_description: Optional[str] = None
+    service_category: Optional[str] = None
+    provider_name: Optional[str] = None
+    provider_phone: Optional[str] = None
+    booking_date: Optional[str] = None
+    booking_time: Optional[str] = None
+    estimated_duration: Optional[int] = None
+    estimated_price: Optional[float] = None
+    final_price: Optional[float] = None
+    pickup_address: Optional[str] = None
+    dropoff_address: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    status_updated_at: Optional[str] = None
+    accepted_at: Optional[str] = None
+    started_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    cancelled_at: Optional[str] = None
+    special_instructions: Optional[str] = None
+    priority: Optional[str] = None
+    payment_status: Optional[str] = None
+    payment_method: Optional[str] = None
+
+
+class TaskList(BaseModel):
+    tasks: List[TaskOut]
+
+
+class ReviewList(BaseModel):
+    reviews: List[ReviewOut]
+
+
+class BookingList(BaseModel):
+    bookings: List[BookingOut]
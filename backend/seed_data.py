@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Seed data generator for the local storage backends
+Fills a SQLiteClient or InMemoryClient with customers, taskers, tasks,
+bookings and reviews at realistic volumes for benchmarks and query-plan checks.
+Seeded accounts cannot sign in (their password hash is a placeholder).
+"""
+
+import argparse
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+CATEGORIES = {
+    "cleaning": ["Home Cleaning", "Deep Cleaning", "Kitchen Cleaning", "Bathroom Cleaning"],
+    "repairs": ["Plumbing Repair", "Electrical Repair", "Furniture Assembly", "Handyman"],
+    "carcare": ["Car Wash", "Car Detailing", "Oil Change"],
+    "beauty": ["Haircut", "Massage", "Facial", "Manicure"],
+    "appliance": ["AC Repair", "Washing Machine Repair", "Refrigerator Repair"],
+}
+
+# (status, weight) - most bookings in a live system are finished
+STATUS_MIX = [("completed", 55), ("pending", 15), ("accepted", 12), ("in-progress", 6),
+              ("cancelled", 8), ("declined", 4)]
+
+FIRST_NAMES = ["Alex", "Sam", "Priya", "Maria", "John", "Wei", "Fatima", "Liam", "Noah", "Ava",
+               "Mike", "Sara", "Ravi", "Chen", "Olga", "Omar", "Emma", "Lucas", "Mia", "Ken"]
+LAST_NAMES = ["Smith", "Patel", "Garcia", "Kim", "Nguyen", "Brown", "Khan", "Lopez", "Muller", "Ito"]
+
+# Around downtown Atlanta
+CENTER = (33.749, -84.388)
+
+
+def _name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def _near(rng: random.Random, spread: float = 0.25):
+    return round(CENTER[0] + rng.uniform(-spread, spread), 6), round(CENTER[1] + rng.uniform(-spread, spread), 6)
+
+
+def _chunks(rows: List[Dict], size: int = 500):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def seed_local_data(db, customers: int = 50, taskers: int = 100, bookings: int = 2000, seed: int = 0) -> Dict:
+    """Insert a reproducible data set; returns the ids that were created"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+
+    users, profiles = [], []
+    customer_ids, tasker_ids = [], []
+    for i in range(customers + taskers):
+        user_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        users.append({"id": user_id, "email": f"seed{i}@example.com", "password_hash": "!"})
+        lat, lng = _near(rng)
+        profile = {"id": user_id, "name": _name(rng), "latitude": lat, "longitude": lng,
+                   "phone": f"+1-555-{rng.randint(1000, 9999)}", "city": "Atlanta"}
+        if i < customers:
+            profile["role"] = "customer"
+            customer_ids.append(user_id)
+        else:
+            category = rng.choice(list(CATEGORIES))
+            profile.update({
+                "role": "tasker",
+                "skills": rng.sample(CATEGORIES[category], 2) + [category],
+                "hourly_rate": float(rng.randint(20, 90)),
+                "bio": f"Experienced {category} professional",
+                "rating": round(rng.uniform(3.0, 5.0), 1),
+                "is_available": rng.random() < 0.8,
+            })
+            tasker_ids.append(user_id)
+        profiles.append(profile)
+
+    for chunk in _chunks(users):
+        db.table("users").insert(chunk).execute()
+    for chunk in _chunks(profiles):
+        db.table("profiles").insert(chunk).execute()
+    names = {p["id"]: p["name"] for p in profiles}
+
+    statuses, weights = zip(*STATUS_MIX)
+    tasks, booking_rows = [], []
+    for i in range(bookings):
+        customer_id = rng.choice(customer_ids)
+        tasker_id = rng.choice(tasker_ids)
+        category = rng.choice(list(CATEGORIES))
+        service = rng.choice(CATEGORIES[category])
+        created = start + timedelta(minutes=rng.randint(0, 60 * 24 * 180))
+        tasks.append({"title": service, "description": f"{service} request", "customer_id": customer_id,
+                      "category": category, "created_at": created.isoformat()})
+        lat, lng = _near(rng)
+        booking_rows.append({
+            "customer_id": customer_id,
+            "tasker_id": tasker_id,
+            "status": rng.choices(statuses, weights)[0],
+            "created_at": created.isoformat(),
+            "customer_name": names[customer_id],
+            "provider_name": names[tasker_id],
+            "service_name": service,
+            "service_description": f"{service} request",
+            "service_category": category,
+            "booking_date": (created + timedelta(days=rng.randint(0, 14))).date().isoformat(),
+            "booking_time": f"{rng.randint(8, 19):02d}:{rng.choice(['00', '30'])}",
+            "estimated_duration": rng.choice([60, 90, 120, 180]),
+            "estimated_price": float(rng.randint(40, 400)),
+            "latitude": lat,
+            "longitude": lng,
+            "priority": rng.choices(["low", "normal", "high", "urgent"], [10, 70, 15, 5])[0],
+        })
+
+    task_ids = []
+    for chunk in _chunks(tasks):
+        task_ids.extend(row["id"] for row in db.table("tasks").insert(chunk).execute().data)
+    for row, task_id in zip(booking_rows, task_ids):
+        row["task_id"] = task_id
+    booking_ids = []
+    for chunk in _chunks(booking_rows):
+        booking_ids.extend(row["id"] for row in db.table("bookings").insert(chunk).execute().data)
+
+    reviews = []
+    for row, booking_id in zip(booking_rows, booking_ids):
+        if row["status"] == "completed" and rng.random() < 0.6:
+            reviews.append({
+                "booking_id": booking_id,
+                "customer_id": row["customer_id"],
+                "tasker_id": row["tasker_id"],
+                "rating": rng.choices([1, 2, 3, 4, 5], [3, 5, 12, 35, 45])[0],
+                "review_text": "Seeded review",
+                "created_at": row["created_at"],
+                "service_rating": rng.randint(3, 5),
+                "communication_rating": rng.randint(3, 5),
+                "timeliness_rating": rng.randint(3, 5),
+            })
+    review_ids = []
+    for chunk in _chunks(reviews):
+        review_ids.extend(row["id"] for row in db.table("reviews").insert(chunk).execute().data)
+
+    return {"customer_ids": customer_ids, "tasker_ids": tasker_ids,
+            "task_ids": task_ids, "booking_ids": booking_ids, "review_ids": review_ids}
+
+
+if __name__ == "__main__":
+    from sqlite_backend import SQLiteClient
+
+    parser = argparse.ArgumentParser(description="Seed a local SQLite database")
+    parser.add_argument("path", help="SQLite file to create or extend")
+    parser.add_argument("--customers", type=int, default=50)
+    parser.add_argument("--taskers", type=int, default=100)
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ids = seed_local_data(SQLiteClient(args.path), args.customers, args.taskers, args.bookings, args.seed)
+    print(f"✅ Seeded {len(ids['customer_ids'])} customers, {len(ids['tasker_ids'])} taskers, "
+          f"{len(ids['booking_ids'])} bookings into {args.path}")
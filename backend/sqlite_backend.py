@@ -0,0 +1,512 @@
+"""
+Embedded SQLite Storage Backend
+Local implementation of the storage interface the routes use (the
+supabase-py client's table()/rpc()/auth API), backed by an SQLite file
+that mirrors updated_schema_uber_like.sql (see sqlite_schema.sql).
+Runs in WAL mode with one connection per thread, so benchmarks, tests and
+local development execute real queries against realistic data volumes.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from booking_search import tokenize
+from geo import bounding_box, nearest
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sqlite_schema.sql")
+
+# SQLite caps bound parameters per statement; stay well below the limit
+MAX_VARIABLES = 30000
+
+
+class QueryResponse:
+    """Mimics postgrest's APIResponse (.data / .count)"""
+
+    def __init__(self, data: List[Dict], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _split_top_level(columns: str) -> List[str]:
+    parts, depth, current = [], 0, ""
+    for ch in " ".join(columns.split()):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += ch
+    parts.append(current.strip())
+    return [p for p in parts if p]
+
+
+def _parse_select(columns: str) -> Tuple[Optional[List[str]], List[Dict]]:
+    """Split a PostgREST select string into plain columns and embedded resources"""
+    plain: List[str] = []
+    embeds: List[Dict] = []
+    star = False
+    for part in _split_top_level(columns or "*"):
+        if "(" in part:
+            head, inner = part.split("(", 1)
+            alias, _, target = head.partition(":") if ":" in head else (head, "", head)
+            target, _, hint = target.partition("!")
+            embeds.append({
+                "alias": alias.strip(),
+                "table": target.strip(),
+                "hint": hint.strip() or None,
+                "columns": inner.rsplit(")", 1)[0],
+            })
+        elif part == "*":
+            star = True
+        else:
+            plain.append(part)
+    return (None if star else plain), embeds
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+class SQLiteQuery:
+    """Chainable query translated to one SQL statement"""
+
+    def __init__(self, client: "SQLiteClient", table: str):
+        self._client = client
+        self._table = table
+        self._op = "select"
+        self._columns = "*"
+        self._count = False
+        self._payload: Any = None
+        self._where: List[str] = []
+        self._params: List[Any] = []
+        self._order: List[str] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+
+    # -- operations --------------------------------------------------------
+
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "SQLiteQuery":
+        self._op = "select"
+        self._columns = columns
+        self._count = count is not None
+        return self
+
+    def insert(self, rows) -> "SQLiteQuery":
+        self._op = "insert"
+        self._payload = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict: str = "id") -> "SQLiteQuery":
+        self._op = "upsert"
+        self._payload = (rows if isinstance(rows, list) else [rows], on_conflict)
+        return self
+
+    def update(self, data: Dict) -> "SQLiteQuery":
+        self._op = "update"
+        self._payload = data
+        return self
+
+    def delete(self) -> "SQLiteQuery":
+        self._op = "delete"
+        return self
+
+    # -- filters -----------------------------------------------------------
+
+    def _filter(self, column: str, sql: str, *params) -> "SQLiteQuery":
+        self._where.append(sql.format(col=self._client._column(self._table, column)))
+        self._params.extend(_encode(p) for p in params)
+        return self
+
+    def eq(self, column: str, value) -> "SQLiteQuery":
+        return self._filter(column, "{col} = ?", value)
+
+    def neq(self, column: str, value) -> "SQLiteQuery":
+        return self._filter(column, "{col} != ?", value)
+
+    def gt(self, column: str, value) -> "SQLiteQuery":
+        return self._filter(column, "{col} > ?", value)
+
+    def gte(self, column: str, value) -> "SQLiteQuery":
+        return self._filter(column, "{col} >= ?", value)
+
+    def lt(self, column: str, value) -> "SQLiteQuery":
+        return self._filter(column, "{col} < ?", value)
+
+    def lte(self, column: str, value) -> "SQLiteQuery":
+        return self._filter(column, "{col} <= ?", value)
+
+    def in_(self, column: str, values) -> "SQLiteQuery":
+        values = list(values)
+        if not values:
+            self._where.append("0")
+            return self
+        return self._filter(column, "{col} IN (" + ", ".join("?" * len(values)) + ")", *values)
+
+    def is_(self, column: str, value) -> "SQLiteQuery":
+        if value in (None, "null"):
+            return self._filter(column, "{col} IS NULL")
+        return self._filter(column, "{col} IS ?", value)
+
+    def contains(self, column: str, values) -> "SQLiteQuery":
+        for value in values:
+            self._filter(column, "EXISTS (SELECT 1 FROM json_each({col}) WHERE value = ?)", value)
+        return self
+
+    def ilike(self, column: str, pattern: str) -> "SQLiteQuery":
+        # SQLite's LIKE is already case-insensitive for ASCII
+        return self._filter(column, "{col} LIKE ?", pattern)
+
+    # -- modifiers ---------------------------------------------------------
+
+    def order(self, column: str, desc: bool = False, nullsfirst: bool = False) -> "SQLiteQuery":
+        self._order.append(f"{self._client._column(self._table, column)} {'DESC' if desc else 'ASC'}")
+        return self
+
+    def limit(self, size: int) -> "SQLiteQuery":
+        self._limit = int(size)
+        return self
+
+    def range(self, start: int, end: int) -> "SQLiteQuery":
+        self._offset = int(start)
+        self._limit = int(end) - int(start) + 1
+        return self
+
+    # -- execution ---------------------------------------------------------
+
+    def _where_sql(self) -> str:
+        return f" WHERE {' AND '.join(self._where)}" if self._where else ""
+
+    def execute(self) -> QueryResponse:
+        table = self._client._table(self._table)
+        with self._client.connection() as conn:
+            if self._op == "select":
+                return self._execute_select(conn, table)
+            if self._op == "insert":
+                return QueryResponse(self._client._insert(conn, self._table, self._payload))
+            if self._op == "upsert":
+                rows, key = self._payload
+                return QueryResponse(self._client._insert(conn, self._table, rows, on_conflict=key))
+            if self._op == "update":
+                assignments = ", ".join(f"{self._client._column(self._table, c)} = ?" for c in self._payload)
+                sql = f"UPDATE {table} SET {assignments}{self._where_sql()} RETURNING *"
+                params = [_encode(v) for v in self._payload.values()] + self._params
+            else:
+                sql = f"DELETE FROM {table}{self._where_sql()} RETURNING *"
+                params = self._params
+            rows = conn.execute(sql, params).fetchall()
+            return QueryResponse([self._client._decode(self._table, row) for row in rows])
+
+    def _execute_select(self, conn, table: str) -> QueryResponse:
+        plain, embeds = _parse_select(self._columns)
+        fk_columns = {}
+        for embed in embeds:
+            fk_columns[embed["alias"]] = self._client._foreign_key(self._table, embed["table"], embed["hint"])
+
+        if plain is None:
+            select_sql = "*"
+        else:
+            needed = list(dict.fromkeys(plain + [fk for fk, _ in fk_columns.values()]))
+            select_sql = ", ".join(self._client._column(self._table, c) for c in needed) or "1"
+
+        sql, params = self._select_statement(table, select_sql)
+        rows = [self._client._decode(self._table, row) for row in conn.execute(sql, params).fetchall()]
+
+        for embed in embeds:
+            fk, target_key = fk_columns[embed["alias"]]
+            self._client._embed(conn, rows, embed, fk, target_key)
+        if plain is not None:
+            keep = set(plain) | {embed["alias"] for embed in embeds}
+            rows = [{k: v for k, v in row.items() if k in keep} for row in rows]
+
+        count = None
+        if self._count:
+            count = conn.execute(f"SELECT COUNT(*) FROM {table}{self._where_sql()}", self._params).fetchone()[0]
+        return QueryResponse(rows, count)
+
+
+    def _select_statement(self, table: str, select_sql: str) -> Tuple[str, List[Any]]:
+        sql = f"SELECT {select_sql} FROM {table}{self._where_sql()}"
+        if self._order:
+            sql += " ORDER BY " + ", ".join(self._order)
+        params = list(self._params)
+        if self._limit is not None or self._offset:
+            sql += " LIMIT ? OFFSET ?"
+            params += [self._limit if self._limit is not None else -1, self._offset]
+        return sql, params
+
+    def explain(self) -> List[str]:
+        """EXPLAIN QUERY PLAN details for this select (embedded resources excluded)"""
+        plain, _ = _parse_select(self._columns)
+        select_sql = "*" if plain is None else ", ".join(self._client._column(self._table, c) for c in plain) or "1"
+        sql, params = self._select_statement(self._client._table(self._table), select_sql)
+        with self._client.connection() as conn:
+            return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+
+class _RpcCall:
+    def __init__(self, client: "SQLiteClient", fn, params: Dict):
+        self._client = client
+        self._fn = fn
+        self._params = params
+
+    def execute(self) -> QueryResponse:
+        with self._client.connection() as conn:
+            return QueryResponse(self._fn(conn, **self._params))
+
+
+class AuthUser:
+    def __init__(self, id: str, email: str):
+        self.id = id
+        self.email = email
+
+
+class AuthResponse:
+    def __init__(self, user: Optional[AuthUser]):
+        self.user = user
+
+
+class SQLiteAuth:
+    """Email/password sign-up and sign-in against the local users table"""
+
+    ITERATIONS = 100000
+
+    def __init__(self, client: "SQLiteClient"):
+        self._client = client
+
+    def _hash(self, password: str, salt: str) -> str:
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), self.ITERATIONS)
+        return f"{salt}${digest.hex()}"
+
+    def sign_up(self, credentials: Dict) -> AuthResponse:
+        user_id = str(uuid.uuid4())
+        email = credentials["email"].strip().lower()
+        with self._client.connection() as conn:
+            try:
+                conn.execute(
+                    "INSERT INTO users (id, email, password_hash) VALUES (?, ?, ?)",
+                    (user_id, email, self._hash(credentials["password"], secrets.token_hex(8))),
+                )
+            except sqlite3.IntegrityError:
+                raise ValueError("User already registered")
+        return AuthResponse(AuthUser(user_id, email))
+
+    def sign_in_with_password(self, credentials: Dict) -> AuthResponse:
+        email = credentials["email"].strip().lower()
+        with self._client.connection() as conn:
+            row = conn.execute("SELECT id, password_hash FROM users WHERE email = ?", (email,)).fetchone()
+        if row is None:
+            raise ValueError("Invalid login credentials")
+        salt = row["password_hash"].split("$", 1)[0]
+        if not hmac.compare_digest(self._hash(credentials["password"], salt), row["password_hash"]):
+            raise ValueError("Invalid login credentials")
+        return AuthResponse(AuthUser(row["id"], email))
+
+
+def _search_bookings(conn, p_user_id: str, p_role: str, p_query: str,
+                     p_limit: int = 20, p_offset: int = 0) -> List[Dict]:
+    """SQLite version of the search_bookings SQL function (FTS5 + bm25)"""
+    terms = tokenize(p_query)
+    if not terms:
+        return []
+    owner = "customer_id" if p_role == "customer" else "tasker_id"
+    rows = conn.execute(
+        f"""
+        SELECT b.id, b.task_id, b.customer_id, b.tasker_id, b.status, b.created_at,
+               b.service_name, b.service_description, b.provider_name, b.customer_name,
+               -bm25(bookings_fts, 1.0, 0.4, 0.4, 0.2) AS rank
+        FROM bookings_fts JOIN bookings b ON b.id = bookings_fts.rowid
+        WHERE bookings_fts MATCH ? AND b.{owner} = ?
+        ORDER BY rank DESC, b.created_at DESC
+        LIMIT ? OFFSET ?
+        """,
+        (" ".join(f'"{t}"' for t in terms), p_user_id, p_limit, p_offset),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def _nearby_providers(conn, p_lat: float, p_lng: float, p_radius_km: float,
+                      p_category: Optional[str] = None, p_limit: int = 50) -> List[Dict]:
+    """SQLite version of the nearby_providers SQL function (R*Tree box + exact radius)"""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(p_lat, p_lng, p_radius_km)
+    rows = conn.execute(
+        """
+        SELECT p.id, p.name, p.skills, p.hourly_rate, p.rating, p.bio, p.latitude, p.longitude
+        FROM profiles_geo g JOIN profiles p ON p.rowid = g.id
+        WHERE g.min_lat >= ? AND g.max_lat <= ? AND g.min_lng >= ? AND g.max_lng <= ?
+          AND p.role = 'tasker' AND p.is_available = 1
+        """,
+        (min_lat, max_lat, min_lng, max_lng),
+    ).fetchall()
+    candidates = [{**dict(row), "skills": json.loads(row["skills"]) if row["skills"] else []} for row in rows]
+    return nearest(candidates, p_lat, p_lng, p_radius_km, category=p_category, limit=p_limit)
+
+
+class SQLiteClient:
+    """Storage backend with the same table()/rpc()/auth surface as supabase-py"""
+
+    def __init__(self, path: str = "woke_local.db"):
+        self.path = path
+        self._memory = path == ":memory:"
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._shared: Optional[sqlite3.Connection] = None
+        self._table_columns: Dict[str, Dict[str, str]] = {}
+        self._functions = {"search_bookings": _search_bookings, "nearby_providers": _nearby_providers}
+        self.auth = SQLiteAuth(self)
+
+        with open(SCHEMA_PATH) as f:
+            schema = f.read()
+        with self.connection() as conn:
+            conn.executescript(schema)
+
+    # -- connections -------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=not self._memory)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA busy_timeout = 5000")
+        if not self._memory:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Yield this thread's connection"""
+        if self._memory:
+            # One shared connection: an in-memory database is per-connection
+            with self._lock:
+                if self._shared is None:
+                    self._shared = self._connect()
+                yield self._shared
+        else:
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = self._local.conn = self._connect()
+            yield conn
+
+    # -- public API --------------------------------------------------------
+
+    def table(self, name: str) -> SQLiteQuery:
+        return SQLiteQuery(self, name)
+
+    def register_rpc(self, name: str, fn) -> None:
+        """Provide a Python implementation fn(conn, **params) for an rpc() call"""
+        self._functions[name] = fn
+
+    def rpc(self, name: str, params: Optional[Dict] = None) -> _RpcCall:
+        if name not in self._functions:
+            raise KeyError(f"Function {name} does not exist")
+        return _RpcCall(self, self._functions[name], params or {})
+
+    # -- schema helpers ----------------------------------------------------
+
+    def _columns(self, table: str) -> Dict[str, str]:
+        columns = self._table_columns.get(table)
+        if columns is None:
+            with self.connection() as conn:
+                info = conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+            if not info:
+                raise ValueError(f'relation "{table}" does not exist')
+            columns = {row["name"]: (row["type"] or "").upper() for row in info}
+            self._table_columns[table] = columns
+        return columns
+
+    def _table(self, table: str) -> str:
+        self._columns(table)
+        return f'"{table}"'
+
+    def _column(self, table: str, column: str) -> str:
+        if column not in self._columns(table):
+            raise ValueError(f"column {table}.{column} does not exist")
+        return f'"{column}"'
+
+    def _decode(self, table: str, row: sqlite3.Row) -> Dict:
+        types = self._columns(table)
+        data = dict(row)
+        for key, value in data.items():
+            kind = types.get(key)
+            if value is None or kind is None:
+                continue
+            if kind == "JSON":
+                data[key] = json.loads(value)
+            elif kind == "BOOLEAN":
+                data[key] = bool(value)
+        return data
+
+    def _foreign_key(self, table: str, target: str, hint: Optional[str]) -> Tuple[str, str]:
+        """Resolve the FK column for an embedded resource like tasker:profiles!bookings_tasker_id_fkey(name)"""
+        with self.connection() as conn:
+            keys = [dict(row) for row in conn.execute(f'PRAGMA foreign_key_list("{table}")').fetchall()]
+        keys = [k for k in keys if k["table"] == target]
+        if hint:
+            column = hint[len(table) + 1:-len("_fkey")] if hint.endswith("_fkey") else hint
+            keys = [k for k in keys if k["from"] == column]
+        if len(keys) != 1:
+            raise ValueError(f"Could not find a unique relationship between {table} and {target}")
+        return keys[0]["from"], keys[0]["to"] or "id"
+
+    def _embed(self, conn, rows: List[Dict], embed: Dict, fk: str, target_key: str) -> None:
+        ids = list({row[fk] for row in rows if row.get(fk) is not None})
+        related: Dict[Any, Dict] = {}
+        columns, _ = _parse_select(embed["columns"])
+        for start in range(0, len(ids), MAX_VARIABLES):
+            chunk = ids[start:start + MAX_VARIABLES]
+            select = "*" if columns is None else ", ".join(
+                self._column(embed["table"], c) for c in dict.fromkeys(columns + [target_key]))
+            sql = (f"SELECT {select} FROM {self._table(embed['table'])} "
+                   f"WHERE {self._column(embed['table'], target_key)} IN ({', '.join('?' * len(chunk))})")
+            for row in conn.execute(sql, chunk).fetchall():
+                data = self._decode(embed["table"], row)
+                related[data[target_key]] = data if columns is None else {c: data.get(c) for c in columns}
+        for row in rows:
+            row[embed["alias"]] = related.get(row.get(fk))
+
+    def _insert(self, conn, table: str, rows: List[Dict], on_conflict: Optional[str] = None) -> List[Dict]:
+        """Multi-row INSERT ... RETURNING, one statement per column set"""
+        if not rows:
+            return []
+        groups: Dict[Tuple[str, ...], List[Dict]] = {}
+        for row in rows:
+            groups.setdefault(tuple(row), []).append(row)
+
+        inserted = []
+        # IMMEDIATE takes the write lock up front so concurrent writers wait on
+        # busy_timeout instead of failing to upgrade a read snapshot
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for columns, group in groups.items():
+                cols_sql = ", ".join(self._column(table, c) for c in columns)
+                conflict_sql = ""
+                if on_conflict:
+                    updates = ", ".join(f'"{c}" = excluded."{c}"' for c in columns if c != on_conflict)
+                    conflict_sql = (f' ON CONFLICT ({self._column(table, on_conflict)}) DO UPDATE SET {updates}'
+                                    if updates else f' ON CONFLICT ({self._column(table, on_conflict)}) DO NOTHING')
+                per_statement = max(1, MAX_VARIABLES // max(len(columns), 1))
+                for start in range(0, len(group), per_statement):
+                    chunk = group[start:start + per_statement]
+                    placeholders = ", ".join("(" + ", ".join("?" * len(columns)) + ")" for _ in chunk)
+                    params = [_encode(row[c]) for row in chunk for c in columns]
+                    sql = f"INSERT INTO {self._table(table)} ({cols_sql}) VALUES {placeholders}{conflict_sql} RETURNING *"
+                    inserted.extend(self._decode(table, r) for r in conn.execute(sql, params).fetchall())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return inserted
@@ -0,0 +1,431 @@
+-- =====================================================
+-- UBER-LIKE BOOKING SYSTEM - EMBEDDED SQLITE SCHEMA
+-- =====================================================
+-- SQLite mirror of updated_schema_uber_like.sql used by the local storage
+-- backend (sqlite_backend.py). Keep tables, checks and indexes in step
+-- with the Postgres schema.
+--
+-- Type mapping: uuid -> TEXT, text[] -> JSON (a JSON array in TEXT),
+-- numeric -> REAL, boolean -> BOOLEAN (0/1), timestamp/date/time -> TEXT.
+
+PRAGMA journal_mode = WAL;
+PRAGMA foreign_keys = ON;
+
+-- Stand-in for Supabase's auth.users
+create table if not exists users (
+  id text primary key,
+  email text not null unique,
+  password_hash text not null,
+  created_at timestamp default current_timestamp
+);
+
+-- Users & Profiles (Enhanced)
+create table if not exists profiles (
+  id text primary key references users(id) on delete cascade,
+  name text,
+  role text check (role in ('customer','tasker')) default 'customer',
+  skills json,
+  hourly_rate real,
+  bio text,
+  rating real default 0,
+  created_at timestamp default current_timestamp,
+  -- Additional Uber-like fields
+  phone text,
+  address text,
+  city text,
+  state text,
+  zip_code text,
+  latitude real,
+  longitude real,
+  is_available boolean default 1,
+  last_active timestamp default current_timestamp,
+  availability text
+);
+
+-- Tasks (Service Requests)
+create table if not exists tasks (
+  id integer primary key autoincrement,
+  customer_id text references profiles(id),
+  title text not null,
+  description text,
+  status text check (status in ('open','in-progress','completed')) default 'open',
+  created_at timestamp default current_timestamp,
+  -- Additional service details
+  category text,
+  estimated_duration integer, -- in minutes
+  estimated_price real,
+  priority text check (priority in ('low','normal','high','urgent')) default 'normal'
+);
+
+-- Bookings (Uber-like booking system)
+create table if not exists bookings (
+  id integer primary key autoincrement,
+  task_id integer references tasks(id),
+  customer_id text references profiles(id),
+  tasker_id text references profiles(id),
+
+  -- Core booking status (Uber-like lifecycle)
+  status text check (status in ('pending','accepted','in-progress','completed','cancelled','declined')) default 'pending',
+  created_at timestamp default current_timestamp,
+
+  -- Customer details
+  customer_name text,
+  customer_phone text,
+  customer_address text,
+  customer_email text,
+
+  -- Service details
+  service_name text,
+  service_description text,
+  service_category text,
+
+  -- Provider details
+  provider_name text,
+  provider_phone text,
+
+  -- Booking details
+  booking_date text,
+  booking_time text,
+  estimated_duration integer, -- in minutes
+  estimated_price real,
+  final_price real,
+
+  -- Location details
+  pickup_address text,
+  dropoff_address text,
+  latitude real,
+  longitude real,
+
+  -- Status tracking
+  status_updated_at timestamp default current_timestamp,
+  accepted_at timestamp,
+  started_at timestamp,
+  completed_at timestamp,
+  cancelled_at timestamp,
+
+  -- Additional Uber-like features
+  special_instructions text,
+  priority text check (priority in ('low','normal','high','urgent')) default 'normal',
+  payment_status text check (payment_status in ('pending','paid','refunded')) default 'pending',
+  payment_method text
+);
+
+-- Reviews (Enhanced)
+create table if not exists reviews (
+  id integer primary key autoincrement,
+  booking_id integer references bookings(id),
+  customer_id text references profiles(id),
+  tasker_id text references profiles(id),
+  rating integer not null check (rating >= 1 and rating <= 5),
+  review_text text,
+  created_at timestamp default current_timestamp,
+  -- Additional review details
+  service_rating integer check (service_rating >= 1 and service_rating <= 5),
+  communication_rating integer check (communication_rating >= 1 and communication_rating <= 5),
+  timeliness_rating integer check (timeliness_rating >= 1 and timeliness_rating <= 5)
+);
+
+-- =====================================================
+-- PERFORMANCE INDEXES
+-- =====================================================
+
+-- Same shapes as the Postgres indexes. There is no GIN, so skills filters
+-- run over the (small) partial index of available taskers.
+
+-- Bookings table indexes
+CREATE INDEX IF NOT EXISTS idx_bookings_customer_created ON bookings(customer_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_bookings_tasker_created ON bookings(tasker_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_bookings_pending ON bookings(created_at) WHERE status = 'pending';
+-- status IN (...) arrives as bound parameters, which a partial index
+-- predicate cannot match; this covers the tasker ids instead
+CREATE INDEX IF NOT EXISTS idx_bookings_status_tasker ON bookings(status, tasker_id);
+CREATE INDEX IF NOT EXISTS idx_bookings_created_at ON bookings(created_at);
+CREATE INDEX IF NOT EXISTS idx_bookings_booking_date ON bookings(booking_date);
+
+-- Profiles table indexes
+CREATE INDEX IF NOT EXISTS idx_profiles_available_taskers ON profiles(rating DESC)
+  WHERE role = 'tasker' AND is_available = 1;
+CREATE INDEX IF NOT EXISTS idx_profiles_city ON profiles(city);
+
+-- Tasks table indexes
+CREATE INDEX IF NOT EXISTS idx_tasks_customer_created ON tasks(customer_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks(category);
+
+-- Reviews table indexes
+CREATE INDEX IF NOT EXISTS idx_reviews_booking_id ON reviews(booking_id);
+CREATE INDEX IF NOT EXISTS idx_reviews_customer_id ON reviews(customer_id);
+CREATE INDEX IF NOT EXISTS idx_reviews_tasker_created ON reviews(tasker_id, created_at DESC);
+
+DROP INDEX IF EXISTS idx_bookings_customer_id;
+DROP INDEX IF EXISTS idx_bookings_tasker_id;
+DROP INDEX IF EXISTS idx_bookings_status;
+DROP INDEX IF EXISTS idx_bookings_payment_status;
+DROP INDEX IF EXISTS idx_bookings_priority;
+DROP INDEX IF EXISTS idx_profiles_role;
+DROP INDEX IF EXISTS idx_profiles_is_available;
+DROP INDEX IF EXISTS idx_profiles_rating;
+DROP INDEX IF EXISTS idx_tasks_customer_id;
+DROP INDEX IF EXISTS idx_tasks_status;
+DROP INDEX IF EXISTS idx_tasks_priority;
+DROP INDEX IF EXISTS idx_reviews_tasker_id;
+DROP INDEX IF EXISTS idx_reviews_rating;
+
+-- =====================================================
+-- FULL-TEXT SEARCH
+-- =====================================================
+-- FTS5 stands in for the search_vector tsvector column and its GIN index.
+-- Column order matches the A/B/B/C weights used by search_bookings.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS bookings_fts USING fts5(
+  service_name, provider_name, customer_name, service_description,
+  content='bookings', content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS bookings_fts_insert AFTER INSERT ON bookings BEGIN
+  INSERT INTO bookings_fts(rowid, service_name, provider_name, customer_name, service_description)
+  VALUES (new.id, new.service_name, new.provider_name, new.customer_name, new.service_description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS bookings_fts_delete AFTER DELETE ON bookings BEGIN
+  INSERT INTO bookings_fts(bookings_fts, rowid, service_name, provider_name, customer_name, service_description)
+  VALUES ('delete', old.id, old.service_name, old.provider_name, old.customer_name, old.service_description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS bookings_fts_update AFTER UPDATE OF service_name, provider_name, customer_name, service_description ON bookings BEGIN
+  INSERT INTO bookings_fts(bookings_fts, rowid, service_name, provider_name, customer_name, service_description)
+  VALUES ('delete', old.id, old.service_name, old.provider_name, old.customer_name, old.service_description);
+  INSERT INTO bookings_fts(rowid, service_name, provider_name, customer_name, service_description)
+  VALUES (new.id, new.service_name, new.provider_name, new.customer_name, new.service_description);
+END;
+
+-- =====================================================
+-- NEARBY PROVIDERS
+-- =====================================================
+-- R*Tree over profile positions (keyed by the profiles rowid) stands in
+-- for the earthdistance GiST index used by nearby_providers.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS profiles_geo USING rtree(id, min_lat, max_lat, min_lng, max_lng);
+
+INSERT INTO profiles_geo
+  SELECT rowid, latitude, latitude, longitude, longitude FROM profiles
+  WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+    AND rowid NOT IN (SELECT id FROM profiles_geo);
+
+CREATE TRIGGER IF NOT EXISTS profiles_geo_insert AFTER INSERT ON profiles
+WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN
+  INSERT INTO profiles_geo VALUES (new.rowid, new.latitude, new.latitude, new.longitude, new.longitude);
+END;
+
+CREATE TRIGGER IF NOT EXISTS profiles_geo_update AFTER UPDATE OF latitude, longitude ON profiles BEGIN
+  DELETE FROM profiles_geo WHERE id = old.rowid;
+  INSERT INTO profiles_geo
+    SELECT new.rowid, new.latitude, new.latitude, new.longitude, new.longitude
+    WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS profiles_geo_delete AFTER DELETE ON profiles BEGIN
+  DELETE FROM profiles_geo WHERE id = old.rowid;
+END;
+
+-- =====================================================
+-- PROVIDER RATING AGGREGATES
+-- =====================================================
+-- Same table as Postgres; the triggers inline apply_review_stats().
+
+create table if not exists provider_rating_stats (
+  tasker_id text primary key references profiles(id) on delete cascade,
+  review_count integer not null default 0,
+  rating_sum integer not null default 0,
+  service_count integer not null default 0,
+  service_sum integer not null default 0,
+  communication_count integer not null default 0,
+  communication_sum integer not null default 0,
+  timeliness_count integer not null default 0,
+  timeliness_sum integer not null default 0,
+  rating_1 integer not null default 0,
+  rating_2 integer not null default 0,
+  rating_3 integer not null default 0,
+  rating_4 integer not null default 0,
+  rating_5 integer not null default 0,
+  updated_at timestamp default current_timestamp
+);
+
+-- Backfill taskers whose reviews predate the triggers
+INSERT INTO provider_rating_stats (
+  tasker_id, review_count, rating_sum, service_count, service_sum,
+  communication_count, communication_sum, timeliness_count, timeliness_sum,
+  rating_1, rating_2, rating_3, rating_4, rating_5
+)
+SELECT tasker_id, count(*), sum(rating),
+       count(service_rating), coalesce(sum(service_rating), 0),
+       count(communication_rating), coalesce(sum(communication_rating), 0),
+       count(timeliness_rating), coalesce(sum(timeliness_rating), 0),
+       sum(rating = 1), sum(rating = 2), sum(rating = 3), sum(rating = 4), sum(rating = 5)
+FROM reviews
+WHERE tasker_id IS NOT NULL AND tasker_id NOT IN (SELECT tasker_id FROM provider_rating_stats)
+GROUP BY tasker_id;
+
+UPDATE profiles SET rating = (
+  SELECT round(1.0 * rating_sum / review_count, 2) FROM provider_rating_stats WHERE tasker_id = profiles.id)
+WHERE id IN (SELECT tasker_id FROM provider_rating_stats WHERE review_count > 0);
+
+CREATE TRIGGER IF NOT EXISTS reviews_rating_stats_insert AFTER INSERT ON reviews
+WHEN new.tasker_id IS NOT NULL BEGIN
+  INSERT OR IGNORE INTO provider_rating_stats (tasker_id) VALUES (new.tasker_id);
+  UPDATE provider_rating_stats SET
+    review_count = review_count + 1,
+    rating_sum = rating_sum + new.rating,
+    service_count = service_count + (new.service_rating IS NOT NULL),
+    service_sum = service_sum + coalesce(new.service_rating, 0),
+    communication_count = communication_count + (new.communication_rating IS NOT NULL),
+    communication_sum = communication_sum + coalesce(new.communication_rating, 0),
+    timeliness_count = timeliness_count + (new.timeliness_rating IS NOT NULL),
+    timeliness_sum = timeliness_sum + coalesce(new.timeliness_rating, 0),
+    rating_1 = rating_1 + (new.rating = 1),
+    rating_2 = rating_2 + (new.rating = 2),
+    rating_3 = rating_3 + (new.rating = 3),
+    rating_4 = rating_4 + (new.rating = 4),
+    rating_5 = rating_5 + (new.rating = 5),
+    updated_at = current_timestamp
+  WHERE tasker_id = new.tasker_id;
+  UPDATE profiles SET rating = coalesce(
+    (SELECT round(1.0 * rating_sum / nullif(review_count, 0), 2)
+     FROM provider_rating_stats WHERE tasker_id = new.tasker_id), 0)
+  WHERE id = new.tasker_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS reviews_rating_stats_delete AFTER DELETE ON reviews
+WHEN old.tasker_id IS NOT NULL BEGIN
+  UPDATE provider_rating_stats SET
+    review_count = review_count - 1,
+    rating_sum = rating_sum - old.rating,
+    service_count = service_count - (old.service_rating IS NOT NULL),
+    service_sum = service_sum - coalesce(old.service_rating, 0),
+    communication_count = communication_count - (old.communication_rating IS NOT NULL),
+    communication_sum = communication_sum - coalesce(old.communication_rating, 0),
+    timeliness_count = timeliness_count - (old.timeliness_rating IS NOT NULL),
+    timeliness_sum = timeliness_sum - coalesce(old.timeliness_rating, 0),
+    rating_1 = rating_1 - (old.rating = 1),
+    rating_2 = rating_2 - (old.rating = 2),
+    rating_3 = rating_3 - (old.rating = 3),
+    rating_4 = rating_4 - (old.rating = 4),
+    rating_5 = rating_5 - (old.rating = 5),
+    updated_at = current_timestamp
+  WHERE tasker_id = old.tasker_id;
+  UPDATE profiles SET rating = coalesce(
+    (SELECT round(1.0 * rating_sum / nullif(review_count, 0), 2)
+     FROM provider_rating_stats WHERE tasker_id = old.tasker_id), 0)
+  WHERE id = old.tasker_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS reviews_rating_stats_update
+AFTER UPDATE OF tasker_id, rating, service_rating, communication_rating, timeliness_rating ON reviews BEGIN
+  UPDATE provider_rating_stats SET
+    review_count = review_count - 1,
+    rating_sum = rating_sum - old.rating,
+    service_count = service_count - (old.service_rating IS NOT NULL),
+    service_sum = service_sum - coalesce(old.service_rating, 0),
+    communication_count = communication_count - (old.communication_rating IS NOT NULL),
+    communication_sum = communication_sum - coalesce(old.communication_rating, 0),
+    timeliness_count = timeliness_count - (old.timeliness_rating IS NOT NULL),
+    timeliness_sum = timeliness_sum - coalesce(old.timeliness_rating, 0),
+    rating_1 = rating_1 - (old.rating = 1),
+    rating_2 = rating_2 - (old.rating = 2),
+    rating_3 = rating_3 - (old.rating = 3),
+    rating_4 = rating_4 - (old.rating = 4),
+    rating_5 = rating_5 - (old.rating = 5),
+    updated_at = current_timestamp
+  WHERE tasker_id = old.tasker_id;
+  UPDATE profiles SET rating = coalesce(
+    (SELECT round(1.0 * rating_sum / nullif(review_count, 0), 2)
+     FROM provider_rating_stats WHERE tasker_id = old.tasker_id), 0)
+  WHERE id = old.tasker_id;
+  INSERT OR IGNORE INTO provider_rating_stats (tasker_id) SELECT new.tasker_id WHERE new.tasker_id IS NOT NULL;
+  UPDATE provider_rating_stats SET
+    review_count = review_count + 1,
+    rating_sum = rating_sum + new.rating,
+    service_count = service_count + (new.service_rating IS NOT NULL),
+    service_sum = service_sum + coalesce(new.service_rating, 0),
+    communication_count = communication_count + (new.communication_rating IS NOT NULL),
+    communication_sum = communication_sum + coalesce(new.communication_rating, 0),
+    timeliness_count = timeliness_count + (new.timeliness_rating IS NOT NULL),
+    timeliness_sum = timeliness_sum + coalesce(new.timeliness_rating, 0),
+    rating_1 = rating_1 + (new.rating = 1),
+    rating_2 = rating_2 + (new.rating = 2),
+    rating_3 = rating_3 + (new.rating = 3),
+    rating_4 = rating_4 + (new.rating = 4),
+    rating_5 = rating_5 + (new.rating = 5),
+    updated_at = current_timestamp
+  WHERE tasker_id = new.tasker_id;
+  UPDATE profiles SET rating = coalesce(
+    (SELECT round(1.0 * rating_sum / nullif(review_count, 0), 2)
+     FROM provider_rating_stats WHERE tasker_id = new.tasker_id), 0)
+  WHERE id = new.tasker_id;
+END;
+
+-- =====================================================
+-- PROVIDER PERFORMANCE FEATURES
+-- =====================================================
+-- Same table as Postgres; the triggers inline bookings_skill_stats() and
+-- match provider_features.transition_deltas().
+
+create table if not exists provider_skill_stats (
+  tasker_id text not null references profiles(id) on delete cascade,
+  skill text not null,
+  offered integer not null default 0,
+  accepted integer not null default 0,
+  declined integer not null default 0,
+  completed integer not null default 0,
+  cancelled integer not null default 0,
+  accept_seconds real not null default 0,
+  updated_at timestamp default current_timestamp,
+  primary key (tasker_id, skill)
+);
+
+CREATE TRIGGER IF NOT EXISTS bookings_skill_stats_insert AFTER INSERT ON bookings
+WHEN new.tasker_id IS NOT NULL BEGIN
+  INSERT OR IGNORE INTO provider_skill_stats (tasker_id, skill)
+    VALUES (new.tasker_id, coalesce(new.service_category, 'general'));
+  UPDATE provider_skill_stats SET
+    offered = offered + (new.status IS 'pending'),
+    accepted = accepted + (new.status IS 'accepted'),
+    accept_seconds = accept_seconds + CASE WHEN new.status IS 'accepted'
+      THEN coalesce(max(0, (julianday(coalesce(new.accepted_at, datetime('now', 'localtime')))
+                            - julianday(new.created_at)) * 86400), 0)
+      ELSE 0 END,
+    declined = declined + (new.status IS 'declined'),
+    completed = completed + (new.status IS 'completed'),
+    updated_at = current_timestamp
+  WHERE tasker_id = new.tasker_id AND skill = coalesce(new.service_category, 'general');
+END;
+
+CREATE TRIGGER IF NOT EXISTS bookings_skill_stats_update AFTER UPDATE OF status, tasker_id ON bookings
+WHEN new.tasker_id IS NOT NULL AND (new.status IS NOT old.status OR new.tasker_id IS NOT old.tasker_id) BEGIN
+  INSERT OR IGNORE INTO provider_skill_stats (tasker_id, skill)
+    VALUES (new.tasker_id, coalesce(new.service_category, 'general'));
+  UPDATE provider_skill_stats SET
+    offered = offered + (new.status = 'pending' AND new.tasker_id IS NOT old.tasker_id),
+    accepted = accepted + (new.status = 'accepted' AND new.status IS NOT old.status),
+    accept_seconds = accept_seconds + CASE WHEN new.status = 'accepted' AND new.status IS NOT old.status
+      THEN coalesce(max(0, (julianday(coalesce(new.accepted_at, datetime('now', 'localtime')))
+                            - julianday(coalesce(old.status_updated_at, old.created_at, new.created_at))) * 86400), 0)
+      ELSE 0 END,
+    declined = declined + (new.status = 'declined' AND new.status IS NOT old.status),
+    completed = completed + (new.status = 'completed' AND new.status IS NOT old.status),
+    cancelled = cancelled + coalesce(new.status = 'cancelled' AND old.status IN ('accepted', 'in-progress'), 0),
+    updated_at = current_timestamp
+  WHERE tasker_id = new.tasker_id AND skill = coalesce(new.service_category, 'general');
+END;
+
+-- =====================================================
+-- WEEKLY AVAILABILITY
+-- =====================================================
+-- 7 x 48 half-hour slots as one 336-bit mask in 84 hex digits, Monday
+-- 00:00 in the lowest bit (see availability.py). profiles.availability
+-- keeps a readable summary.
+
+create table if not exists provider_availability (
+  tasker_id text primary key references profiles(id) on delete cascade,
+  slots text not null check (length(slots) = 84),
+  updated_at timestamp default current_timestamp
+);
@@ -0,0 +1,58 @@
+"""
+Storage Backend Selection
+The routes talk to storage through the supabase-py client surface
+(table()/rpc()/auth). Two backends implement it:
+
+- supabase: the hosted Supabase/PostgREST project (SUPABASE_URL/SUPABASE_KEY)
+- sqlite:   the embedded engine in sqlite_backend.py (SQLITE_PATH)
+
+STORAGE_BACKEND picks one explicitly; by default Supabase is used when
+SUPABASE_URL is set and SQLite otherwise. A configured Supabase that
+cannot be reached is an error, never a silent switch to a local file.
+
+LazyStorage defers building the client (and importing supabase) until
+the first query, so a serverless cold start does not pay for it.
+"""
+
+import os
+import threading
+
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "woke_local.db")
+
+
+def create_storage(backend: str = None):
+    """Build the storage client for this process"""
+    backend = (backend or os.getenv("STORAGE_BACKEND", "")).lower()
+
+    if backend not in ("", "supabase", "sqlite"):
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+    url = os.getenv("SUPABASE_URL")
+    if backend == "supabase" or (backend == "" and url):
+        from supabase import create_client
+        return create_client(url, os.getenv("SUPABASE_KEY"))
+
+    if backend == "":
+        print("SUPABASE_URL is not set; using local SQLite storage")
+    from sqlite_backend import SQLiteClient
+    return SQLiteClient(os.getenv("SQLITE_PATH", DEFAULT_SQLITE_PATH))
+
+
+class LazyStorage:
+    """Storage client built by `factory` on first attribute access"""
+
+    def __init__(self, factory=create_storage):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
@@ -0,0 +1,229 @@
+"""
+Demand/Supply Surge
+Live demand and supply per (geohash cell, category), so the quote and
+match paths can price peaks without querying the database.
+
+Demand is the number of bookings created in the cell for the category
+over the last window_seconds, counted in a ring buffer of per-interval
+buckets with a running total. Recording a booking and reading a count are
+O(1), plus clearing the buckets that expired since the counter was last
+touched (at most one pass over the ring).
+
+Supply is the number of available providers located in the cell with the
+category among their skills. It is a level rather than an event rate, so
+it is kept as a plain count: each provider change (registration, profile
+update, going on/offline) is diffed against the provider's previous
+state. load() rebuilds it from the provider catalog; demand lives only in
+this process.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from geo import geohash
+
+SUPPLY_COLUMNS = ("id", "skills", "latitude", "longitude", "is_available")
+_PROVIDER_FIELDS = SUPPLY_COLUMNS[1:]
+
+# Surge starts once a cell has more than SURGE_THRESHOLD bookings per available
+# provider in the window (and at least MIN_DEMAND bookings), rising by
+# SURGE_STEP per extra booking per provider up to MAX_SURGE.
+SURGE_THRESHOLD = 1.0
+SURGE_STEP = 0.25
+MIN_DEMAND = 3
+MAX_SURGE = 2.5
+
+
+def surge_multiplier(demand: int, supply: int) -> float:
+    ratio = demand / max(supply, 1)
+    if demand < MIN_DEMAND or ratio <= SURGE_THRESHOLD:
+        return 1.0
+    return round(min(MAX_SURGE, 1.0 + SURGE_STEP * (ratio - SURGE_THRESHOLD)), 2)
+
+
+class WindowCounter:
+    """Events in the last len(counts) * bucket_seconds seconds"""
+
+    __slots__ = ("counts", "bucket_seconds", "head", "total")
+
+    def __init__(self, buckets: int, bucket_seconds: float):
+        self.counts = [0] * buckets
+        self.bucket_seconds = bucket_seconds
+        self.head: Optional[int] = None  # absolute number of the newest bucket
+        self.total = 0
+
+    def _advance(self, now: float) -> None:
+        bucket = int(now // self.bucket_seconds)
+        if self.head is None or bucket - self.head >= len(self.counts):
+            self.counts = [0] * len(self.counts)
+            self.total = 0
+        else:
+            for expired in range(self.head + 1, bucket + 1):
+                slot = expired % len(self.counts)
+                self.total -= self.counts[slot]
+                self.counts[slot] = 0
+        if self.head is None or bucket > self.head:
+            self.head = bucket
+
+    def add(self, now: float, amount: int = 1) -> None:
+        self._advance(now)
+        # Events stamped before the newest bucket count in it
+        self.counts[self.head % len(self.counts)] += amount
+        self.total += amount
+
+    def count(self, now: float) -> int:
+        self._advance(now)
+        return self.total
+
+
+class DemandSupplyAggregator:
+    """Sliding-window demand and current supply per (geohash cell, category)"""
+
+    def __init__(self, catalog=None, window_seconds: float = 900.0, buckets: int = 15, precision: int = 5,
+                 max_age: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.catalog = catalog
+        self.window_seconds = window_seconds
+        self.buckets = buckets
+        self.precision = precision
+        self.max_age = max_age
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._demand: Dict[Tuple[str, str], WindowCounter] = {}
+        self._supply: Dict[Tuple[str, str], int] = {}
+        # tasker_id -> last known skills/location/availability
+        self._providers: Dict[str, Dict] = {}
+        self._loaded_at: Optional[float] = None
+        # Held for a whole load, so concurrent refreshes collapse into one
+        self._refresh_lock = threading.RLock()
+        # Provider changes made while a load reads the catalog; None when not loading
+        self._replay: Optional[List[Dict]] = None
+
+    def cell(self, lat: float, lng: float) -> str:
+        return geohash(float(lat), float(lng), self.precision)
+
+    # -- supply ------------------------------------------------------------
+
+    def load(self, providers: Optional[Iterable[Dict]] = None) -> int:
+        """Rebuild supply from provider rows, the catalog's available taskers when not given"""
+        with self._refresh_lock:
+            with self._lock:
+                self._replay = []
+            try:
+                if providers is None:
+                    providers = self.catalog.select(columns=SUPPLY_COLUMNS)
+                with self._lock:
+                    replay, self._replay = self._replay, None
+                    self._supply, self._providers = {}, {}
+                    for provider in providers:
+                        self._provider_changed_locked(provider)
+                    # Changes that landed after the catalog was read
+                    for profile in replay:
+                        self._provider_changed_locked(profile)
+                    # Cells with no bookings left in the window are dropped
+                    now = self.clock()
+                    self._demand = {key: counter for key, counter in self._demand.items() if counter.count(now)}
+                    self._loaded_at = time.monotonic()
+                    return len(self._providers)
+            finally:
+                with self._lock:
+                    self._replay = None
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age
+
+    def refresh_if_stale(self) -> None:
+        """Reload when older than max_age; while one caller reloads the rest keep reading the current state"""
+        if not self._stale():
+            return
+        # Before the first load there is nothing to read, so wait for it
+        if not self._refresh_lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            if self._stale():
+                self.load()
+        finally:
+            self._refresh_lock.release()
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    def _contribution(self, state: Dict) -> Optional[Tuple[str, tuple]]:
+        if not state.get("is_available", True) or state.get("latitude") is None or state.get("longitude") is None:
+            return None
+        return self.cell(state["latitude"], state["longitude"]), tuple(state.get("skills") or ())
+
+    def _shift_supply(self, contribution: Optional[Tuple[str, tuple]], amount: int) -> None:
+        if contribution is None:
+            return
+        cell, skills = contribution
+        for skill in skills:
+            key = (cell, skill)
+            count = self._supply.get(key, 0) + amount
+            if count > 0:
+                self._supply[key] = count
+            else:
+                self._supply.pop(key, None)
+
+    def _provider_changed_locked(self, profile: Dict) -> None:
+        tasker_id = str(profile["id"])
+        previous = self._providers.get(tasker_id)
+        if profile.get("role", "tasker") != "tasker":
+            if previous is not None:
+                self._shift_supply(self._contribution(previous), -1)
+                del self._providers[tasker_id]
+            return
+        # Fields missing from a partial update keep their previous values
+        state = dict(previous or {})
+        state.update((field, profile[field]) for field in _PROVIDER_FIELDS if field in profile)
+        old, new = self._contribution(previous or {"is_available": False}), self._contribution(state)
+        if old != new:
+            self._shift_supply(old, -1)
+            self._shift_supply(new, 1)
+        self._providers[tasker_id] = state
+
+    def provider_changed(self, profile: Dict) -> None:
+        """Apply a registration or (partial) profile/availability update"""
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(profile)
+            self._provider_changed_locked(profile)
+
+    def remove_provider(self, tasker_id: str) -> None:
+        self.provider_changed({"id": tasker_id, "role": None})
+
+    # -- demand ------------------------------------------------------------
+
+    def record_booking(self, booking: Dict) -> bool:
+        """Count a booking creation; False when it has no location or category"""
+        category = booking.get("service_category")
+        if not category or booking.get("latitude") is None or booking.get("longitude") is None:
+            return False
+        key = (self.cell(booking["latitude"], booking["longitude"]), str(category))
+        with self._lock:
+            counter = self._demand.get(key)
+            if counter is None:
+                counter = self._demand[key] = WindowCounter(self.buckets, self.window_seconds / self.buckets)
+            counter.add(self.clock())
+        return True
+
+    # -- reads -------------------------------------------------------------
+
+    def demand(self, cell: str, category: str) -> int:
+        with self._lock:
+            counter = self._demand.get((cell, category))
+            return counter.count(self.clock()) if counter else 0
+
+    def supply(self, cell: str, category: str) -> int:
+        return self._supply.get((cell, category), 0)
+
+    def snapshot(self, lat: float, lng: float, category: str) -> Dict:
+        cell = self.cell(lat, lng)
+        demand, supply = self.demand(cell, category), self.supply(cell, category)
+        return {"cell": cell, "category": category, "demand": demand, "supply": supply,
+                "window_seconds": self.window_seconds, "multiplier": surge_multiplier(demand, supply)}
+
+    def multiplier(self, lat: float, lng: float, category: str) -> float:
+        """Surge multiplier for a category at a point (1.0 when there is no peak)"""
+        cell = self.cell(lat, lng)
+        return surge_multiplier(self.demand(cell, category), self.supply(cell, category))
@@ -0,0 +1,150 @@
+"""
+Tasker Typeahead Index
+In-memory prefix index over tasker names, skills and bio tokens for
+search-as-you-type on the category pages. Tokens are kept in a sorted
+array and looked up with bisect, so each keystroke costs a binary search
+plus a bounded scan of the matching tokens.
+"""
+
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Set
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Which field a token came from decides how strongly it matches
+FIELD_WEIGHTS = {"name": 3.0, "skills": 2.0, "bio": 1.0}
+
+# Cap on distinct tokens expanded per prefix (like max_expansions in search engines)
+MAX_EXPANSIONS = 64
+
+# Profile fields kept in the index and returned to the typeahead
+STORED_FIELDS = ("id", "name", "skills", "hourly_rate", "bio", "rating")
+
+
+def _tokens(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+class TaskerPrefixIndex:
+    """Sorted-token prefix index with incremental upsert/remove"""
+
+    def __init__(self, max_expansions: int = MAX_EXPANSIONS):
+        self.max_expansions = max_expansions
+        self._lock = threading.Lock()
+        self._sorted_tokens: List[str] = []
+        # token -> {tasker_id: best field weight}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        # tasker_id -> (indexed tokens, profile)
+        self._profiles: Dict[str, tuple] = {}
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def load(self, profiles: List[Dict]) -> None:
+        """Bulk (re)build the index from a list of tasker profiles"""
+        with self._lock:
+            self._sorted_tokens = []
+            self._postings = {}
+            self._profiles = {}
+            for profile in profiles:
+                self._upsert_locked(profile, bulk=True)
+            self._sorted_tokens = sorted(self._postings)
+            self.loaded = True
+
+    def upsert(self, profile: Dict) -> None:
+        """Add or refresh one tasker after a registration or profile update"""
+        with self._lock:
+            self._upsert_locked(profile)
+
+    def remove(self, tasker_id: str) -> None:
+        with self._lock:
+            self._remove_locked(str(tasker_id))
+
+    def _field_tokens(self, profile: Dict) -> Dict[str, float]:
+        weights: Dict[str, float] = {}
+        fields = {
+            "name": _tokens(profile.get("name")),
+            "skills": [t for skill in profile.get("skills") or [] for t in _tokens(skill)],
+            "bio": _tokens(profile.get("bio")),
+        }
+        for field, tokens in fields.items():
+            for token in tokens:
+                weights[token] = max(weights.get(token, 0.0), FIELD_WEIGHTS[field])
+        return weights
+
+    def _upsert_locked(self, profile: Dict, bulk: bool = False) -> None:
+        tasker_id = str(profile["id"])
+        self._remove_locked(tasker_id)
+        weights = self._field_tokens(profile)
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                if not bulk:
+                    insort(self._sorted_tokens, token)
+            postings[tasker_id] = weight
+        stored = {field: profile[field] for field in STORED_FIELDS if field in profile}
+        self._profiles[tasker_id] = (tuple(weights), stored)
+
+    def _remove_locked(self, tasker_id: str) -> None:
+        entry = self._profiles.pop(tasker_id, None)
+        if entry is None:
+            return
+        for token in entry[0]:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(tasker_id, None)
+            if not postings:
+                del self._postings[token]
+                i = bisect_left(self._sorted_tokens, token)
+                if i < len(self._sorted_tokens) and self._sorted_tokens[i] == token:
+                    del self._sorted_tokens[i]
+
+    def _prefix_scores(self, prefix: str) -> Dict[str, float]:
+        scores: Dict[str, float] = {}
+        tokens = self._sorted_tokens
+        i = bisect_left(tokens, prefix)
+        expanded = 0
+        while i < len(tokens) and expanded < self.max_expansions and tokens[i].startswith(prefix):
+            token = tokens[i]
+            # Whole-word matches beat partial ones
+            bonus = 0.5 if token == prefix else 0.0
+            for tasker_id, weight in self._postings[token].items():
+                score = weight + bonus
+                if score > scores.get(tasker_id, 0.0):
+                    scores[tasker_id] = score
+            i += 1
+            expanded += 1
+        return scores
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Top `limit` taskers whose tokens start with every word of the query"""
+        words = list(dict.fromkeys(_tokens(query)))
+        if not words or limit <= 0:
+            return []
+
+        with self._lock:
+            combined: Optional[Dict[str, float]] = None
+            for word in words:
+                scores = self._prefix_scores(word)
+                if combined is None:
+                    combined = scores
+                else:
+                    keep: Set[str] = combined.keys() & scores.keys()
+                    combined = {tid: combined[tid] + scores[tid] for tid in keep}
+                if not combined:
+                    return []
+
+            top = heapq.nlargest(
+                limit,
+                combined.items(),
+                key=lambda item: (item[1], self._profiles[item[0]][1].get("rating") or 0),
+            )
+            return [dict(self._profiles[tasker_id][1]) for tasker_id, _ in top]
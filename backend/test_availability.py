@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test script for weekly availability bitmaps and slot matching
+"""
+
+import sys
+import os
+import random
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import availability
+import main
+from memory_backend import InMemoryClient
+from provider_catalog import ProviderCatalog
+from sqlite_backend import SQLiteClient
+
+
+def test_windows_round_trip():
+    windows = [{"day": "mon", "start": "09:00", "end": "12:00"}, {"day": "mon", "start": "12:00", "end": "17:30"},
+               {"day": "Saturday", "start": "22:00", "end": "24:00"}]
+    mask = availability.mask_from_windows(windows)
+    assert availability.windows_from_mask(mask) == [{"day": "mon", "start": "09:00", "end": "17:30"},
+                                                    {"day": "sat", "start": "22:00", "end": "24:00"}]
+    assert availability.summary(mask) == "Mon 09:00-17:30, Sat 22:00-24:00"
+    assert len(availability.to_hex(mask)) == availability.HEX_DIGITS
+    assert availability.from_hex(availability.to_hex(mask)) == mask
+    assert mask >> (5 * 48) == 0b1111 << 44  # Saturday 22:00 is slot 44 of day 5
+
+    # Queries round outward to every slot they touch
+    assert availability.window_mask("tue", "10:15", "10:45") == 0b11 << (48 + 20)
+    assert availability.window_mask("tue", "10:00") == 1 << (48 + 20)
+    for bad in ({"day": "mon", "start": "09:15", "end": "10:00"}, {"day": "xyz", "start": "09:00", "end": "10:00"},
+                {"day": "mon", "start": "10:00", "end": "09:00"}, {"day": "mon", "start": "25:00", "end": "26:00"}):
+        try:
+            availability.mask_from_windows([bad])
+            assert False, bad
+        except ValueError:
+            pass
+
+
+def test_slot_matrix_matches_integer_check():
+    rng = random.Random(11)
+    masks = [rng.getrandbits(availability.WEEK_SLOTS) | availability.window_mask("sat", "10:00", "12:00")
+             if rng.random() < 0.3 else rng.getrandbits(availability.WEEK_SLOTS) for _ in range(3000)]
+    matrix = availability.SlotMatrix(capacity=16)
+    for row, mask in enumerate(masks):
+        matrix.set(row, mask)
+    assert matrix.get(1234) == masks[1234]
+
+    for query in (availability.window_mask("sat", "10:00", "12:00"), availability.window_mask("sun", "23:30"),
+                  availability.window_mask("mon", "00:00", "01:00")):
+        rows = list(range(0, 3000, 2)) + [5000]  # rows past the matrix have no availability
+        assert matrix.covering(rows, query) == [r for r in rows if r < 3000 and masks[r] & query == query]
+
+
+def test_catalog_filters_by_slots():
+    db = SQLiteClient(":memory:")
+    for i, skills in enumerate((["cleaning"], ["cleaning"], ["repairs"])):
+        db.table("users").insert({"id": f"t{i}", "email": f"t{i}@example.com", "password_hash": "!"}).execute()
+        db.table("profiles").insert({"id": f"t{i}", "name": f"T{i}", "role": "tasker", "skills": skills}).execute()
+    weekend = availability.mask_from_windows([{"day": "sat", "start": "08:00", "end": "18:00"}])
+    for tasker_id in ("t0", "t2"):
+        db.table("provider_availability").insert({"tasker_id": tasker_id, "slots": availability.to_hex(weekend)}) \
+            .execute()
+
+    catalog = ProviderCatalog(db)
+    catalog.load()
+    saturday = availability.window_mask("sat", "10:00", "12:00")
+    assert [p["id"] for p in catalog.select(skills=["cleaning"], columns=("id",), slots=saturday)] == ["t0"]
+    assert catalog.count(slots=saturday) == 2
+    assert catalog.count(slots=availability.window_mask("sat", "17:30", "18:30")) == 0
+
+    catalog.set_availability("t1", weekend)
+    catalog.remove("t0")
+    assert [p["id"] for p in catalog.select(skills=["cleaning"], columns=("id",), slots=saturday)] == ["t1"]
+    assert catalog.availability("t1") == weekend and catalog.availability("t0") == 0
+
+
+def test_availability_endpoints():
+    storage = main.db.inner
+    previous = storage._client
+    storage._client = InMemoryClient({"profiles": [
+        {"id": "c1", "name": "Customer", "role": "customer"},
+        {"id": "t1", "name": "Mike", "role": "tasker", "skills": ["cleaning"], "is_available": True},
+        {"id": "t2", "name": "Ann", "role": "tasker", "skills": ["cleaning"], "is_available": True},
+    ]})
+    main.provider_catalog.invalidate()
+    try:
+        client = TestClient(main.app)
+        windows = [{"day": "sat", "start": "09:00", "end": "13:00"}, {"day": "sun", "start": "10:00", "end": "12:00"}]
+        response = client.put("/profiles/t1/availability", json={"windows": windows})
+        assert response.status_code == 200
+        assert response.json()["summary"] == "Sat 09:00-13:00, Sun 10:00-12:00"
+        assert client.get("/profiles/t1/availability").json()["windows"] == windows
+        assert client.get("/profiles/t1").json()["availability"] == "Sat 09:00-13:00, Sun 10:00-12:00"
+
+        def available(**params):
+            return [p["id"] for p in client.get("/providers", params={"service": "cleaning", **params}).json()]
+
+        assert available() == ["t1", "t2"]
+        assert available(day="sat", start="10:00") == ["t1"]
+        assert available(day="sat", start="12:00", end="13:30") == []
+        assert available(day="sat", start="10:00", fields="phone") == ["t1"]
+        assert client.get("/providers", params={"service": "cleaning", "day": "sat"}).status_code == 422
+        assert client.get("/providers", params={"service": "cleaning", "day": "someday", "start": "10:00"}) \
+            .status_code == 400
+
+        bad = {"windows": [{"day": "sat", "start": "09:10", "end": "13:00"}]}
+        assert client.put("/profiles/t1/availability", json=bad).status_code == 400
+        assert client.put("/profiles/c1/availability", json={"windows": windows}).status_code == 400
+        assert client.put("/profiles/nobody/availability", json={"windows": windows}).status_code == 404
+        assert client.get("/profiles/t2/availability").json()["windows"] == []
+    finally:
+        storage._client = previous
+        main.provider_catalog.invalidate()
+
+
+if __name__ == "__main__":
+    test_windows_round_trip()
+    test_slot_matrix_matches_integer_check()
+    test_catalog_filters_by_slots()
+    test_availability_endpoints()
+    print("✅ Availability tests passed")
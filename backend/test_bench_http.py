@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Smoke test for the HTTP benchmark harness (tiny in-process run)
+"""
+
+import sys
+import os
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import bench_http
+from seed_data import seed_local_data
+
+
+def test_asgi_benchmark_reports_per_route():
+    with tempfile.TemporaryDirectory() as tmp:
+        app, db = bench_http.load_app(os.path.join(tmp, "bench.db"))
+        ids = seed_local_data(db, customers=5, taskers=5, bookings=30)
+        result = bench_http.run_asgi(app, ids, requests=60, concurrency=4, warmup=0)
+        # main's storage is already built on bench.db; seeding another file must refuse
+        try:
+            bench_http.load_app(os.path.join(tmp, "other.db"))
+            assert False
+        except RuntimeError:
+            pass
+
+    assert result["total"]["errors"] == 0
+    assert sum(r["requests"] for r in result["routes"].values()) == result["total"]["requests"] >= 60
+    assert "GET /bookings?customer_id" in result["routes"]
+    stats = result["total"]["latency_ms"]
+    assert 0 < stats["p50"] <= stats["p95"] <= stats["p99"] <= stats["max"]
+
+    report = {"transports": {"asgi": result}}
+    lines = bench_http.compare(report, report)
+    assert lines[0] == "[asgi]" and "+0.0%" in lines[1]
+
+
+if __name__ == "__main__":
+    test_asgi_benchmark_reports_per_route()
+    print("✅ Benchmark harness test passed")
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-provider booking calendar
+"""
+
+import sys
+import os
+import random
+import threading
+from datetime import datetime
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import availability
+import main
+from booking_calendar import BookingCalendar, _Intervals, booking_interval, to_minutes
+from dispatcher import BookingDispatcher
+from memory_backend import InMemoryClient
+from sqlite_backend import SQLiteClient
+from uber_like_booking_system import UberLikeBookingSystem
+
+MONDAY = "2030-01-07"
+
+
+def _at(clock, day=MONDAY):
+    return to_minutes(datetime.fromisoformat(f"{day}T{clock}"))
+
+
+def test_intervals_match_brute_force():
+    rng = random.Random(7)
+    intervals, live = _Intervals(), {}
+    for n in range(600):
+        if live and rng.random() < 0.3:
+            key = rng.choice(list(live))
+            assert intervals.remove(live.pop(key)[0], key)
+        else:
+            start = rng.randrange(0, 2000)
+            # Overlapping rows can exist in old data, so the index must not assume disjointness
+            live[n] = (start, start + rng.randrange(5, 120))
+            intervals.add(*live[n], n)
+        start = rng.randrange(0, 2100)
+        end = start + rng.randrange(1, 90)
+        expected = {k for k, (s, e) in live.items() if s < end and e > start}
+        assert set(intervals.conflicts(start, end)) == expected
+        assert (intervals.first_conflict(start, end) is None) == (not expected)
+
+
+def test_reserve_confirm_release_and_sync():
+    calendar = BookingCalendar()
+    calendar.load([
+        {"id": 1, "tasker_id": "t1", "status": "accepted", "booking_date": MONDAY, "booking_time": "10:00",
+         "estimated_duration": 90},
+        {"id": 2, "tasker_id": "t1", "status": "cancelled", "booking_date": MONDAY, "booking_time": "14:00"},
+        {"id": 3, "tasker_id": "t2", "status": "pending", "booking_date": MONDAY, "booking_time": "bad"},
+    ])
+    assert len(calendar) == 1
+    assert calendar.conflicts("t1", _at("11:00"), _at("12:00")) == ["1"]
+    assert calendar.conflicts("t1", _at("11:30"), _at("12:00")) == []
+
+    token, clashes = calendar.reserve("t1", _at("09:30"), _at("10:30"))
+    assert token is None and clashes == ["1"]
+    token, _ = calendar.reserve("t1", _at("12:00"), _at("13:00"))
+    assert calendar.reserve("t1", _at("12:30"), _at("13:30"))[1] == [token]
+    calendar.confirm(token, 9)
+    assert calendar.conflicts("t1", _at("12:30"), _at("12:45")) == ["9"]
+
+    # Cancelling frees the slot; rescheduling moves it
+    calendar.sync({"id": 9, "tasker_id": "t1", "status": "cancelled", "booking_date": MONDAY, "booking_time": "12:00"})
+    assert calendar.conflicts("t1", _at("12:00"), _at("13:00")) == []
+    calendar.sync({"id": 1, "tasker_id": "t2", "status": "accepted", "booking_date": MONDAY, "booking_time": "10:00"})
+    assert calendar.conflicts("t1", _at("10:00"), _at("11:00")) == []
+    assert calendar.is_busy("t2", {"id": 5, "booking_date": MONDAY, "booking_time": "10:30"})
+    assert not calendar.is_busy("t2", {"id": 1, "booking_date": MONDAY, "booking_time": "10:30"})
+    assert calendar.release("1") and len(calendar) == 0
+
+
+def test_next_free_slots_across_providers():
+    assert datetime.fromisoformat(MONDAY).weekday() == 0
+    calendar = BookingCalendar()
+    calendar.load([{"id": 1, "tasker_id": "a", "status": "accepted", "booking_date": MONDAY,
+                    "booking_time": "09:45", "estimated_duration": 60}])
+    masks = {"a": availability.mask_from_windows([{"day": "mon", "start": "09:00", "end": "12:00"}])}
+
+    slots = calendar.next_free_slots(["a", "b"], datetime.fromisoformat(f"{MONDAY}T08:50"), duration=45, count=6,
+                                     availability=lambda tasker_id: masks.get(tasker_id, 0))
+    assert [(s["tasker_id"], s["start"][11:]) for s in slots] == [
+        ("a", "09:00"), ("b", "09:00"), ("b", "09:30"), ("b", "10:00"), ("b", "10:30"), ("a", "11:00")]
+    assert slots[0]["end"] == f"{MONDAY}T09:45"
+
+    # Outside availability entirely: nothing within the horizon
+    assert calendar.next_free_slots(["a"], datetime.fromisoformat(f"{MONDAY}T12:00"), duration=240, count=1,
+                                    horizon_days=3, availability=masks.get) == []
+
+
+def test_dispatcher_skips_busy_providers():
+    db = InMemoryClient({"profiles": [
+        {"id": "t1", "name": "Top", "role": "tasker", "skills": ["cleaning"], "rating": 5.0, "is_available": True},
+        {"id": "t2", "name": "Free", "role": "tasker", "skills": ["cleaning"], "rating": 3.0, "is_available": True},
+    ]})
+    calendar = BookingCalendar(db)
+    calendar.load([{"id": 1, "tasker_id": "t1", "status": "accepted", "booking_date": MONDAY,
+                    "booking_time": "10:00"}])
+    dispatcher = BookingDispatcher(UberLikeBookingSystem(db, calendar=calendar))
+    providers = dispatcher.booking_system.get_available_providers("cleaning")
+    booking = {"id": 2, "service_category": "cleaning", "booking_date": MONDAY, "booking_time": "10:30"}
+    assert dispatcher.best_provider(booking, providers)["id"] == "t2"
+    assert dispatcher.best_provider({**booking, "booking_time": "12:00"}, providers)["id"] == "t1"
+
+
+def test_booking_endpoints_prevent_double_booking():
+    storage = main.db.inner
+    previous = storage._client
+    storage._client = InMemoryClient({"profiles": [
+        {"id": "c1", "name": "Customer", "role": "customer"},
+        {"id": "t1", "name": "Mike", "role": "tasker", "skills": ["cleaning"], "is_available": True},
+        {"id": "t2", "name": "Ann", "role": "tasker", "skills": ["cleaning"], "is_available": True},
+    ]})
+    main.booking_calendar.invalidate()
+    main.provider_catalog.invalidate()
+    try:
+        client = TestClient(main.app)
+        booking = {"task_id": "1", "customer_id": "c1", "tasker_id": "t1",
+                   "booking_date": "2099-03-02", "booking_time": "10:00", "estimated_duration": 120}
+        first = client.post("/bookings", json=booking)
+        assert first.status_code == 200
+        booking_id = first.json()["booking"][0]["id"]
+
+        clash = client.post("/bookings", json={**booking, "booking_time": "11:30"})
+        assert clash.status_code == 409 and str(booking_id) in clash.json()["detail"]
+        assert client.post("/bookings", json={**booking, "booking_time": "12:00"}).status_code == 200
+        assert client.post("/bookings", json={**booking, "tasker_id": "t2"}).status_code == 200
+        assert client.post("/bookings", json={**booking, "booking_time": None}).status_code == 400
+        assert client.post("/bookings", json={**booking, "booking_date": "someday"}).status_code == 400
+        # Bookings left for the dispatcher do not hold a slot for anyone
+        unassigned = {**booking, "tasker_id": "", "booking_time": "15:00"}
+        for _ in range(2):
+            response = client.post("/bookings", json=unassigned)
+            assert response.status_code == 200
+            main.dispatcher.remove(response.json()["booking"][0]["id"])
+            main.offer_scheduler.cancel(response.json()["booking"][0]["id"])
+
+        bulk = client.post("/bookings/bulk", json={"bookings": [
+            {**booking, "booking_time": "08:00", "estimated_duration": 60},
+            {**booking, "booking_time": "08:30", "estimated_duration": 60},
+        ]}).json()
+        assert [r["success"] for r in bulk["results"]] == [True, False]
+
+        # Cancelling releases the slot
+        assert client.patch(f"/bookings/{booking_id}", json={"status": "cancelled"}).status_code == 200
+        assert client.post("/bookings", json={**booking, "booking_time": "11:30", "estimated_duration": 30}) \
+            .status_code == 200
+
+        slots = client.get("/providers/free-slots", params={
+            "service": "cleaning", "after": "2099-03-02T08:00", "duration": 60, "count": 3}).json()["slots"]
+        assert [(s["tasker_id"], s["start"]) for s in slots] == [
+            ("t2", "2099-03-02T08:00"), ("t2", "2099-03-02T08:30"), ("t1", "2099-03-02T09:00")]
+        assert client.get("/providers/free-slots").status_code == 422
+
+        # Bulk create reloads a stale calendar before reserving
+        main.db.table("bookings").insert({"tasker_id": "t2", "status": "accepted", "booking_date": "2099-03-03",
+                                          "booking_time": "09:00"}).execute()
+        main.booking_calendar.invalidate()
+        bulk = client.post("/bookings/bulk", json={"bookings": [
+            {**booking, "tasker_id": "t2", "booking_date": "2099-03-03", "booking_time": "09:30"}]}).json()
+        assert bulk["results"][0]["message"] == "Provider is already booked at that time"
+    finally:
+        storage._client = previous
+        main.booking_calendar.invalidate()
+        main.provider_catalog.invalidate()
+
+
+def test_load_pages_through_bookings_and_keeps_reservations():
+    rows = [{"id": i, "tasker_id": f"t{i % 7}", "status": "accepted", "booking_date": MONDAY,
+             "booking_time": f"{8 + i // 7 % 12:02d}:00", "estimated_duration": 30} for i in range(1, 1201)]
+    rows.append({"id": 1201, "tasker_id": "t1", "status": "accepted", "booking_date": "2001-01-01",
+                 "booking_time": "10:00"})
+    db = InMemoryClient({"bookings": rows})
+    calendar = BookingCalendar(db)
+    token, _ = calendar.reserve("t9", _at("09:00"), _at("10:00"))
+    # More rows than one page (and than PostgREST's default response cap)
+    assert calendar.load() == 1200
+    assert calendar.conflicts("t9", _at("09:30"), _at("09:45")) == [token]
+    assert calendar.reserve("t9", _at("09:00"), _at("09:30"))[0] is None
+    calendar.confirm(token, 5000)
+    assert calendar.load() == 1200 and calendar.conflicts("t9", _at("09:00"), _at("10:00")) == []
+
+
+def test_writes_during_a_load_are_replayed():
+    reading, release = threading.Event(), threading.Event()
+
+    def bookings():
+        yield {"id": 1, "tasker_id": "t1", "status": "accepted", "booking_date": MONDAY, "booking_time": "10:00"}
+        reading.set()
+        assert release.wait(5)
+
+    calendar = BookingCalendar()
+    calendar.load([])
+    loader = threading.Thread(target=calendar.load, args=(bookings(),))
+    loader.start()
+    assert reading.wait(5)
+    token, _ = calendar.reserve("t1", _at("12:00"), _at("13:00"))
+    calendar.sync({"id": 2, "tasker_id": "t1", "status": "pending", "booking_date": MONDAY, "booking_time": "14:00"})
+    # Booking 1 was cancelled after the load read it
+    calendar.sync({"id": 1, "tasker_id": "t1", "status": "cancelled", "booking_date": MONDAY, "booking_time": "10:00"})
+    release.set()
+    loader.join(5)
+
+    assert calendar.conflicts("t1", _at("08:00"), _at("18:00")) == [token, "2"]
+    calendar.confirm(token, 3)
+    assert len(calendar) == 2
+
+
+def test_bulk_create_confirms_each_reservation_to_its_booking():
+    db = SQLiteClient(":memory:")
+    for user_id, role in (("c1", "customer"), ("t1", "tasker"), ("t2", "tasker")):
+        db.table("users").insert({"id": user_id, "email": f"{user_id}@example.com", "password_hash": "!"}).execute()
+        db.table("profiles").insert({"id": user_id, "name": user_id.upper(), "role": role}).execute()
+    db.table("tasks").insert({"id": 1, "customer_id": "c1", "title": "Home Cleaning"}).execute()
+    calendar = BookingCalendar()
+    calendar.load([])
+    system = UberLikeBookingSystem(db, calendar=calendar)
+
+    # Scheduled and unscheduled items mixed in one batch
+    summary = system.bulk_create_bookings([
+        {"customer_id": "c1", "tasker_id": "t1", "task_id": 1},
+        {"customer_id": "c1", "tasker_id": "t1", "task_id": 1, "booking_date": MONDAY, "booking_time": "10:00"},
+        {"customer_id": "c1", "tasker_id": "t2", "task_id": 1},
+        {"customer_id": "c1", "tasker_id": "t2", "task_id": 1, "booking_date": MONDAY, "booking_time": "15:00",
+         "estimated_duration": 30},
+    ])
+    assert summary["succeeded"] == 4
+    ids = [result["booking_id"] for result in summary["results"]]
+    rows = {row["id"]: row for row in db.table("bookings").select("id, tasker_id, booking_time").execute().data}
+    assert [rows[booking_id]["booking_time"] for booking_id in ids] == [None, "10:00", None, "15:00"]
+    assert calendar.conflicts("t1", _at("10:00"), _at("11:00")) == [str(ids[1])]
+    assert calendar.conflicts("t2", _at("15:00"), _at("15:30")) == [str(ids[3])]
+    assert len(calendar) == 2
+
+
+def test_booking_interval():
+    assert booking_interval({"booking_date": MONDAY, "booking_time": "10:00:00", "estimated_duration": 30}) == \
+        (_at("10:00"), _at("10:30"))
+    assert booking_interval({"booking_date": MONDAY}) is None
+
+
+if __name__ == "__main__":
+    test_intervals_match_brute_force()
+    test_reserve_confirm_release_and_sync()
+    test_next_free_slots_across_providers()
+    test_dispatcher_skips_busy_providers()
+    test_booking_endpoints_prevent_double_booking()
+    test_load_pages_through_bookings_and_keeps_reservations()
+    test_writes_during_a_load_are_replayed()
+    test_bulk_create_confirms_each_reservation_to_its_booking()
+    test_booking_interval()
+    print("✅ Booking calendar tests passed")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-process booking search index
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from booking_search import BookingSearchIndex
+
+
+def _booking(booking_id, customer_id, service_name, description="", provider_name="Mike Tasker", created_at="2024-01-01"):
+    return {
+        "id": booking_id,
+        "customer_id": customer_id,
+        "tasker_id": "tasker-1",
+        "status": "pending",
+        "created_at": created_at,
+        "service_name": service_name,
+        "service_description": description,
+        "provider_name": provider_name,
+        "customer_name": "John Customer",
+    }
+
+
+def test_search_is_scoped_ranked_and_paginated():
+    index = BookingSearchIndex()
+    index.add(_booking(1, "c1", "Home Cleaning", "Deep clean 3-bedroom apartment"))
+    index.add(_booking(2, "c1", "Car Wash", "Full exterior clean"))
+    index.add(_booking(3, "c1", "Window Cleaning", created_at="2024-02-01"))
+    index.add(_booking(4, "c2", "Home Cleaning"))
+    index.add(_booking(5, "c1", "Kitchen Help", "Wash the dishes"))
+
+    # Service name matches outrank description matches
+    assert [r["id"] for r in index.search("c1", "wash")] == [2, 5]
+    results = index.search("c1", "clean")
+    assert {r["id"] for r in results} == {1, 2}
+    assert all(r["customer_id"] == "c1" for r in results)
+
+    # Every term must match
+    assert [r["id"] for r in index.search("c1", "cleaning home")] == [1]
+
+    # Pagination
+    page = index.search("c1", "cleaning", limit=1, offset=1)
+    assert len(page) == 1
+    assert index.search("c1", "cleaning", limit=1)[0]["id"] != page[0]["id"]
+
+    # Providers search across their customers
+    assert {r["id"] for r in index.search("tasker-1", "home cleaning")} == {1, 4}
+
+
+def test_reindex_and_remove():
+    index = BookingSearchIndex()
+    index.add(_booking(1, "c1", "Home Cleaning"))
+    index.add(_booking(1, "c1", "Haircut"))
+    assert index.search("c1", "cleaning") == []
+    assert index.search("c1", "haircut")[0]["id"] == 1
+
+    index.remove(1)
+    assert index.search("c1", "haircut") == []
+    assert len(index) == 0
+
+
+if __name__ == "__main__":
+    test_search_is_scoped_ranked_and_paginated()
+    test_reindex_and_remove()
+    print("✅ Booking search tests passed")
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk booking creation and status transitions
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+from booking_calendar import booking_interval
+from memory_backend import InMemoryClient
+from sqlite_backend import SQLiteClient
+from uber_like_booking_system import UberLikeBookingSystem
+
+
+def _system():
+    db = InMemoryClient({
+        "profiles": [
+            {"id": "c1", "name": "John Customer", "role": "customer", "phone": "+1-555-0101"},
+            {"id": "t1", "name": "Mike Tasker", "role": "tasker", "hourly_rate": 40},
+        ],
+        "tasks": [{"id": 1, "title": "Home Cleaning", "description": "Deep clean", "customer_id": "c1"}],
+    })
+    return db, UberLikeBookingSystem(db)
+
+
+def test_bulk_create():
+    db, system = _system()
+    summary = system.bulk_create_bookings([
+        {"customer_id": "c1", "tasker_id": "t1", "task_id": 1},
+        {"customer_id": "c1", "tasker_id": "", "task_id": 1},
+        {"customer_id": "c1", "tasker_id": "t1", "task_id": 1, "service_name": "Kitchen"},
+    ])
+    assert summary["succeeded"] == 2 and summary["failed"] == 1
+    assert summary["results"][1]["message"] == "Missing tasker_id"
+
+    rows = db.rows("bookings")
+    assert [row["service_name"] for row in rows] == ["Home Cleaning", "Kitchen"]
+    assert rows[0]["provider_name"] == "Mike Tasker"
+    assert rows[0]["estimated_price"] == 40
+
+
+def test_bulk_status_transitions():
+    db, system = _system()
+    db.table("bookings").insert([
+        {"id": 1, "status": "pending"},
+        {"id": 2, "status": "completed"},
+        {"id": 3, "status": "pending"},
+    ]).execute()
+
+    summary = system.bulk_update_status(["1", "2", "3", "99"], "accepted")
+    assert summary["succeeded"] == 2
+    by_id = {r["booking_id"]: r for r in summary["results"]}
+    assert by_id["2"]["message"] == "Cannot change status from completed to accepted"
+    assert by_id["99"]["message"] == "Booking not found"
+
+    rows = {row["id"]: row for row in db.rows("bookings")}
+    assert rows[1]["status"] == "accepted" and rows[1]["accepted_at"]
+    assert rows[2]["status"] == "completed"
+
+    assert system.bulk_update_status(["1"], "pending")["failed"] == 1
+
+
+def test_bulk_create_mixed_location_batch():
+    db = SQLiteClient(":memory:")
+    for user_id, role in (("c1", "customer"), ("t1", "tasker")):
+        db.table("users").insert({"id": user_id, "email": f"{user_id}@example.com", "password_hash": "!"}).execute()
+        db.table("profiles").insert({"id": user_id, "name": user_id.upper(), "role": role}).execute()
+    db.table("tasks").insert({"id": 1, "customer_id": "c1", "title": "Home Cleaning"}).execute()
+    system = UberLikeBookingSystem(db)
+
+    # Located and unlocated items in one insert still land on their own ids
+    summary = system.bulk_create_bookings([
+        {"customer_id": "c1", "tasker_id": "t1", "task_id": 1, "service_category": "cleaning",
+         "latitude": 40.75, "longitude": -73.99},
+        {"customer_id": "c1", "tasker_id": "t1", "task_id": 1},
+        {"customer_id": "c1", "tasker_id": "t1", "task_id": 1, "service_category": "repairs",
+         "latitude": 40.70, "longitude": -73.90},
+    ])
+    assert summary["succeeded"] == 3
+    rows = {row["id"]: row for row in db.table("bookings")
+            .select("id, service_category, latitude, longitude").execute().data}
+    assert [{k: v for k, v in rows[result["booking_id"]].items() if k != "id"} for result in summary["results"]] == [
+        {"service_category": "cleaning", "latitude": 40.75, "longitude": -73.99},
+        {"service_category": None, "latitude": None, "longitude": None},
+        {"service_category": "repairs", "latitude": 40.70, "longitude": -73.90},
+    ]
+
+
+def test_bulk_created_bookings_are_queued_and_tracked():
+    storage = main.db.inner
+    previous = storage._client
+    storage._client = InMemoryClient({
+        "profiles": [
+            {"id": "c1", "name": "Customer", "role": "customer"},
+            {"id": "t1", "name": "Mike", "role": "tasker", "skills": ["cleaning"], "is_available": True,
+             "latitude": 40.55, "longitude": -74.10},
+        ],
+        "tasks": [{"id": 1, "title": "Home Cleaning", "customer_id": "c1"}],
+    })
+    main.provider_catalog.invalidate()
+    for booking_id in list(main.dispatcher._queued):
+        main.dispatcher.remove(booking_id)
+    for booking_id in list(main.offer_scheduler._wheel._timers):
+        main.offer_scheduler.cancel(booking_id)
+    ids = []
+    try:
+        client = TestClient(main.app)
+        booking = {"task_id": "1", "customer_id": "c1", "tasker_id": "t1", "service_category": "cleaning",
+                   "latitude": 40.55, "longitude": -74.10}
+        response = client.post("/bookings/bulk", json={"bookings": [booking, {**booking, "tasker_id": ""}, booking]})
+        summary = response.json()
+        assert summary["succeeded"] == 2
+        ids = [str(result["booking_id"]) for result in summary["results"] if result["success"]]
+        assert [result["booking"]["tasker_id"] for result in summary["results"] if result["success"]] == ["t1", "t1"]
+        assert all(booking_id in main.dispatcher._queued for booking_id in ids)
+        assert all(booking_id in main.offer_scheduler._wheel for booking_id in ids)
+        assert len(main.dispatcher) == len(main.offer_scheduler) == 2
+    finally:
+        storage._client = previous
+        main.provider_catalog.invalidate()
+        for booking_id in ids:
+            main.dispatcher.remove(booking_id)
+            main.offer_scheduler.cancel(booking_id)
+
+
+def test_bulk_endpoints_over_http():
+    sqlite = SQLiteClient(":memory:")
+    for user_id, role in (("c1", "customer"), ("t1", "tasker"), ("t2", "tasker")):
+        sqlite.table("users").insert({"id": user_id, "email": f"{user_id}@example.com", "password_hash": "!"}).execute()
+        sqlite.table("profiles").insert({"id": user_id, "name": user_id.upper(), "role": role,
+                                         "hourly_rate": 40}).execute()
+    sqlite.table("tasks").insert({"id": 1, "customer_id": "c1", "title": "Home Cleaning"}).execute()
+    storage = main.db.inner
+    previous = storage._client
+    storage._client = sqlite
+    main.booking_calendar.invalidate()
+    ids = []
+    try:
+        client = TestClient(main.app)
+        # Optional fields set on some items only; each result must describe its own input
+        items = [
+            {"task_id": "1", "customer_id": "c1", "tasker_id": "t1"},
+            {"task_id": "1", "customer_id": "c1", "tasker_id": "t2", "service_name": "Kitchen",
+             "booking_date": "2099-03-02", "booking_time": "10:00"},
+            {"task_id": "1", "customer_id": "c1", "tasker_id": "t1", "service_category": "cleaning",
+             "latitude": 40.75, "longitude": -73.99},
+            {"task_id": "1", "customer_id": "c1", "tasker_id": "t2", "special_instructions": "Ring twice"},
+            {"task_id": "1", "customer_id": "c1", "tasker_id": "t1", "service_name": "Garage",
+             "booking_date": "2099-03-02", "booking_time": "12:00"},
+        ]
+        summary = client.post("/bookings/bulk", json={"bookings": items}).json()
+        assert summary["succeeded"] == 5
+        for item, result in zip(items, summary["results"]):
+            booking = result["booking"]
+            assert booking["id"] == result["booking_id"]
+            row = main.db.table("bookings").select("*").eq("id", result["booking_id"]).execute().data[0]
+            for field in ("tasker_id", "service_name", "booking_time", "service_category", "latitude",
+                          "special_instructions"):
+                if field in item:
+                    assert row[field] == item[field] == booking[field], field
+            ids.append(str(result["booking_id"]))
+        assert main.booking_calendar.conflicts("t1", *booking_interval(items[4])) == [ids[4]]
+        too_many = {"bookings": [items[0]] * (main.MAX_BULK_ITEMS + 1)}
+        assert client.post("/bookings/bulk", json=too_many).status_code == 400
+
+        response = client.patch("/bookings/bulk/status", json={"booking_ids": ids[:3] + ["999"], "status": "accepted"})
+        summary = response.json()
+        assert response.status_code == 200 and summary["succeeded"] == 3
+        assert [r["tasker_id"] for r in summary["results"][:3]] == ["t1", "t2", "t1"]
+        assert summary["results"][3] == {"booking_id": "999", "success": False, "message": "Booking not found"}
+        assert client.patch("/bookings/bulk/status", json={"booking_ids": ids[:1], "status": "pending"}) \
+            .json()["failed"] == 1
+        statuses = {str(r["id"]): r["status"] for r in main.db.table("bookings").select("id, status").execute().data}
+        assert [statuses[booking_id] for booking_id in ids] == ["accepted"] * 3 + ["pending"] * 2
+    finally:
+        storage._client = previous
+        main.booking_calendar.invalidate()
+        for booking_id in ids:
+            main.dispatcher.remove(booking_id)
+            main.offer_scheduler.cancel(booking_id)
+
+
+if __name__ == "__main__":
+    test_bulk_create()
+    test_bulk_status_transitions()
+    test_bulk_create_mixed_location_batch()
+    test_bulk_created_bookings_are_queued_and_tracked()
+    test_bulk_endpoints_over_http()
+    print("✅ Bulk booking tests passed")
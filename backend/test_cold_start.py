@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Test that importing main stays lazy (guards serverless cold starts)
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import bench_importtime
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      5741 |       5741 |   metrics
+import time:     74766 |     591715 | main
+"""
+
+
+def test_parse_importtime():
+    modules = bench_importtime.parse_importtime(SAMPLE)
+    assert modules["main"] == {"self_us": 74766, "cumulative_us": 591715}
+    assert modules["metrics"]["self_us"] == 5741
+
+
+def test_main_import_defers_heavy_modules():
+    result = bench_importtime.run(runs=1)
+    assert result["lazy_modules_loaded"] == []
+    assert bench_importtime.check({**result, "median_ms": 0}, max_ms=1) == []
+
+
+if __name__ == "__main__":
+    test_parse_importtime()
+    test_main_import_defers_heavy_modules()
+    print("✅ Cold start tests passed")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script for the booking dispatcher against the in-memory data backend
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+from memory_backend import InMemoryClient
+from uber_like_booking_system import UberLikeBookingSystem
+from dispatcher import BookingDispatcher
+
+PROVIDERS = [
+    {"id": "near", "name": "Near Cleaner", "role": "tasker", "is_available": True, "skills": ["cleaning"],
+     "rating": 4.5, "latitude": 40.750, "longitude": -73.997},
+    {"id": "far", "name": "Far Cleaner", "role": "tasker", "is_available": True, "skills": ["cleaning"],
+     "rating": 5.0, "latitude": 41.500, "longitude": -74.500},
+    {"id": "busy", "name": "Offline Cleaner", "role": "tasker", "is_available": False, "skills": ["cleaning"],
+     "rating": 5.0, "latitude": 40.750, "longitude": -73.997},
+    {"id": "washer", "name": "Car Washer", "role": "tasker", "is_available": True, "skills": ["carcare"],
+     "rating": 4.8, "latitude": 40.750, "longitude": -73.997},
+]
+
+
+def _setup(bookings, **kwargs):
+    db = InMemoryClient({"profiles": PROVIDERS, "bookings": bookings})
+    dispatcher = BookingDispatcher(UberLikeBookingSystem(db), **kwargs)
+    dispatcher.load_pending()
+    return db, dispatcher
+
+
+def _booking(booking_id, priority="normal", category="cleaning", created_at="2024-01-01T10:00:00"):
+    return {"id": booking_id, "status": "pending", "priority": priority, "service_category": category,
+            "created_at": created_at, "latitude": 40.751, "longitude": -73.995}
+
+
+def test_urgent_first_and_nearby_provider():
+    db, dispatcher = _setup([
+        _booking(1, "low", created_at="2024-01-01T09:00:00"),
+        _booking(2, "urgent"),
+        _booking(3, category="carcare"),
+    ])
+
+    results = dispatcher.dispatch_batch(max_items=1)
+    assert results[0]["booking_id"] == 2
+    # The far provider is out of radius, the offline one is not available
+    assert results[0]["provider_id"] == "near"
+
+    dispatcher.dispatch_batch()
+    rows = {row["id"]: row for row in db.rows("bookings")}
+    assert rows[1]["tasker_id"] == "near"
+    assert rows[3]["tasker_id"] == "washer"
+    assert all(row["status"] == "pending" for row in rows.values())
+
+    metrics = dispatcher.metrics()
+    assert metrics["dispatched_total"] == 3
+    assert metrics["queue_depth"] == 0
+    assert metrics["provider_load"] == {"near": 2, "washer": 1}
+
+
+def test_load_cap_and_assign_mode():
+    db, dispatcher = _setup([_booking(i) for i in range(1, 4)], mode="assign", max_load=2)
+
+    results = dispatcher.dispatch_batch()
+    assert [r["success"] for r in results] == [True, True, False]
+    assert len(dispatcher) == 1
+    assert sum(1 for row in db.rows("bookings") if row["status"] == "accepted") == 2
+
+    # Capacity freed up: the waiting booking goes out on the next round
+    dispatcher.release("near")
+    assert dispatcher.dispatch_batch()[0]["provider_id"] == "near"
+
+
+def test_skips_bookings_no_longer_pending():
+    db, dispatcher = _setup([_booking(1)])
+    db.table("bookings").update({"status": "cancelled"}).eq("id", 1).execute()
+
+    assert dispatcher.dispatch_batch()[0]["success"] is False
+    assert dispatcher.metrics()["provider_load"] == {}
+
+
+def _reset_main_dispatcher():
+    for booking_id in list(main.dispatcher._queued):
+        main.dispatcher.remove(booking_id)
+    main.dispatcher._load.clear()
+
+
+def test_status_updates_release_provider_load_over_http():
+    storage = main.db.inner
+    previous = storage._client
+    storage._client = InMemoryClient({"profiles": [
+        {"id": "c1", "name": "Customer", "role": "customer"},
+        {"id": "solo", "name": "Solo Cleaner", "role": "tasker", "is_available": True, "skills": ["cleaning"],
+         "rating": 4.5, "latitude": 40.650, "longitude": -73.950},
+    ]})
+    main.provider_catalog.invalidate()
+    _reset_main_dispatcher()
+    try:
+        client = TestClient(main.app)
+        booking = {"task_id": "1", "customer_id": "c1", "tasker_id": "", "service_category": "cleaning",
+                   "latitude": 40.651, "longitude": -73.949}
+        # More rounds than max_load: each finished job must give its slot back
+        for _ in range(main.dispatcher.max_load + 2):
+            booking_id = client.post("/bookings", json=booking).json()["booking"][0]["id"]
+            dispatched = client.post("/dispatch/run").json()
+            assert dispatched["dispatched"] == 1 and dispatched["results"][0]["provider_id"] == "solo"
+            assert client.patch(f"/bookings/{booking_id}", json={"status": "accepted"}).status_code == 200
+            assert main.dispatcher.metrics()["provider_load"] == {"solo": 1}
+            assert client.patch(f"/bookings/{booking_id}", json={"status": "completed"}).status_code == 200
+            assert main.dispatcher.metrics()["provider_load"] == {}
+        assert len(main.dispatcher) == 0
+    finally:
+        storage._client = previous
+        main.provider_catalog.invalidate()
+        _reset_main_dispatcher()
+
+
+if __name__ == "__main__":
+    test_urgent_first_and_nearby_provider()
+    test_load_cap_and_assign_mode()
+    test_skips_bookings_no_longer_pending()
+    test_status_updates_release_provider_load_over_http()
+    print("✅ Dispatcher tests passed")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming NDJSON/CSV exports
+"""
+
+import sys
+import os
+import csv
+import gzip
+import io
+import json
+from contextlib import contextmanager
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import export_stream
+import main
+from memory_backend import InMemoryClient
+from metrics import InstrumentedClient
+
+
+def _bookings(n):
+    return [{"id": i, "customer_id": f"c{i % 3}", "tasker_id": f"t{i % 2}", "status": "pending",
+             "service_name": f"Job, \"{i}\""} for i in range(1, n + 1)]
+
+
+@contextmanager
+def _client(tables):
+    storage = main.db.inner
+    previous = storage._client
+    storage._client = InMemoryClient(tables)
+    try:
+        yield TestClient(main.app)
+    finally:
+        storage._client = previous
+
+
+def test_keyset_pages_fetch_each_row_once():
+    queries = []
+    db = InstrumentedClient(InMemoryClient({"bookings": _bookings(25)}))
+    db.add_observer(lambda table, op, calls, *rest: queries.append(calls))
+    pages = list(export_stream.iter_pages(db, "bookings", "id, status", [("tasker_id", "t1")], page_size=5))
+    ids = [row["id"] for page in pages for row in page]
+    assert ids == list(range(1, 26, 2))
+    assert [len(page) for page in pages] == [5, 5, 3]
+    assert len(queries) == 3
+    assert ("gt", ("id", 19), {}) in queries[2]
+
+
+def test_gzip_chunks_round_trip():
+    chunks = [b"a" * 1000, b"b" * 1000, b""]
+    assert gzip.decompress(b"".join(export_stream.gzip_chunks(chunks))) == b"".join(chunks)
+    assert export_stream.accepts_gzip("deflate, gzip;q=0.8")
+    assert not export_stream.accepts_gzip("gzip;q=0")
+    assert not export_stream.accepts_gzip(None)
+
+
+def test_export_bookings_ndjson_and_csv():
+    with _client({"bookings": _bookings(1200)}) as client:
+        response = client.get("/export/bookings", params={"customer_id": "c1", "fields": "status,service_name"},
+                              headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.headers["vary"] == "Accept-Encoding"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 400 and rows[0] == {"id": 1, "status": "pending", "service_name": 'Job, "1"'}
+
+        response = client.get("/export/bookings", params={"tasker_id": "t0", "format": "csv",
+                                                          "fields": "service_name"},
+                              headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        table = list(csv.reader(io.StringIO(response.text)))
+        assert table[0] == ["id", "service_name"]
+        assert table[1] == ["2", 'Job, "2"'] and len(table) == 601
+
+
+def test_full_export_needs_token():
+    with _client({"reviews": [{"id": 1, "tasker_id": "t1", "rating": 5}]}) as client:
+        previous, main.EXPORT_TOKEN = main.EXPORT_TOKEN, "secret"
+        try:
+            assert client.get("/export/reviews").status_code == 403
+            response = client.get("/export/reviews", headers={"X-Export-Token": "secret"})
+            assert json.loads(response.text)["rating"] == 5
+        finally:
+            main.EXPORT_TOKEN = previous
+        assert client.get("/export/reviews", params={"format": "xml", "tasker_id": "t1"}).status_code == 422
+
+
+class _FailingAfter(InMemoryClient):
+    """Serves `pages` page queries, then fails like a dropped database connection"""
+
+    def __init__(self, tables, pages):
+        self.pages = None
+        super().__init__(tables)
+        self.pages = pages
+
+    def table(self, name):
+        if name == "bookings" and self.pages is not None:
+            if self.pages == 0:
+                raise ConnectionError("database went away")
+            self.pages -= 1
+        return super().table(name)
+
+
+def test_storage_error_aborts_the_export():
+    db = _FailingAfter({"bookings": _bookings(30)}, pages=2)
+    chunks = export_stream.export_stream(db, "bookings", "id, status", "ndjson", page_size=10)
+    assert next(chunks).count(b"\n") == 10 and next(chunks).count(b"\n") == 10
+    try:
+        next(chunks)
+        assert False, "a partial export must not end cleanly"
+    except ConnectionError:
+        pass
+
+
+if __name__ == "__main__":
+    test_keyset_pages_fetch_each_row_once()
+    test_gzip_chunks_round_trip()
+    test_export_bookings_ndjson_and_csv()
+    test_full_export_needs_token()
+    test_storage_error_aborts_the_export()
+    print("✅ Streaming export tests passed")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script for per-endpoint column projections and `fields=`
+"""
+
+import sys
+import os
+from contextlib import contextmanager
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import main
+from memory_backend import InMemoryClient
+from response_models import PROJECTIONS, select_columns
+
+
+@contextmanager
+def _client():
+    storage = main.db.inner
+    previous = storage._client
+    storage._client = InMemoryClient({
+        "profiles": [
+            {"id": "c1", "name": "John Customer", "role": "customer", "phone": "555-0100",
+             "address": "1 Main St"},
+            {"id": "t1", "name": "Mike Tasker", "role": "tasker", "skills": ["cleaning"],
+             "hourly_rate": 40, "bio": "Tidy", "rating": 4.5, "phone": "555-0101"},
+            {"id": "t2", "name": "Ann Fixer", "role": "tasker", "skills": ["repairs"], "hourly_rate": 55},
+        ],
+        "tasks": [{"id": 1, "customer_id": "c1", "title": "Home Cleaning", "description": "x" * 500,
+                   "status": "open"}],
+        "bookings": [{"id": 1, "task_id": 1, "customer_id": "c1", "tasker_id": "t1", "status": "pending",
+                      "customer_phone": "555-0100", "service_name": "Home Cleaning"}],
+        "reviews": [{"id": 1, "booking_id": 1, "customer_id": "c1", "tasker_id": "t1", "rating": 5,
+                     "review_text": "Great"}],
+    })
+    main.provider_catalog.invalidate()
+    try:
+        yield TestClient(main.app)
+    finally:
+        storage._client = previous
+        main.provider_catalog.invalidate()
+
+
+def test_select_columns():
+    allowed, default = PROJECTIONS["profiles"]
+    assert select_columns("profiles") == ", ".join(default)
+    assert select_columns("profiles", "name, rating") == "id, name, rating"
+    try:
+        select_columns("profiles", "name,password_hash")
+        assert False, "unknown field accepted"
+    except HTTPException as e:
+        assert e.status_code == 400 and "password_hash" in e.detail
+
+
+def test_default_projection_omits_unlisted_columns():
+    with _client() as client:
+        profiles = client.get("/profiles").json()
+        assert {p["id"] for p in profiles} == {"c1", "t1", "t2"}
+        assert all("phone" not in p for p in profiles)
+
+        profile = client.get("/profiles/t1").json()
+        assert profile["phone"] == "555-0101" and profile["skills"] == ["cleaning"]
+        assert client.get("/profiles/missing").status_code == 404
+
+        bookings = client.get("/bookings/tasker", params={"tasker_id": "t1"}).json()["bookings"]
+        assert bookings[0]["service_name"] == "Home Cleaning" and "customer_phone" not in bookings[0]
+
+
+def test_fields_selector():
+    with _client() as client:
+        response = client.get("/tasks", params={"customer_id": "c1", "fields": "title,status"})
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == {"tasks": [{"id": 1, "title": "Home Cleaning", "status": "open"}]}
+
+        reviews = client.get("/reviews/t1", params={"fields": "rating"}).json()
+        assert reviews == {"reviews": [{"id": 1, "rating": 5}]}
+
+        assert client.get("/profiles", params={"fields": "secret"}).status_code == 400
+
+
+def test_providers_filter_by_skill():
+    with _client() as client:
+        providers = client.get("/providers", params={"service": "cleaning"}).json()
+        assert [p["id"] for p in providers] == ["t1"]
+        assert client.get("/providers", params={"category": "repairs"}).json()[0]["name"] == "Ann Fixer"
+
+
+if __name__ == "__main__":
+    test_select_columns()
+    test_default_projection_omits_unlisted_columns()
+    test_fields_selector()
+    test_providers_filter_by_skill()
+    print("✅ Field projection tests passed")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for memory diagnostics (store sizes and tracemalloc diffs)
+"""
+
+import sys
+import os
+import threading
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import memory_diagnostics
+from memory_diagnostics import estimate_size, register_store, store_sizes
+
+
+class _Cache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.client = {"huge": "x" * 1_000_000}  # not part of the cache
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def test_estimate_size_extrapolates_large_containers():
+    rows = {i: f"{i:0100d}" for i in range(1000, 6000)}
+    exact = sys.getsizeof(rows) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in rows.items())
+    estimate = estimate_size(rows, sample=100)
+    assert abs(estimate - exact) / exact < 0.05
+
+
+def test_registered_store_measures_only_named_fields():
+    cache = _Cache()
+    cache.entries.update({f"k{i}": [i] * 10 for i in range(100)})
+    register_store("test_cache", cache, fields=("entries",))
+    report = store_sizes()["test_cache"]
+    assert report["entries"] == 100
+    assert 10_000 < report["estimated_bytes"] < 1_000_000
+    assert report["type"] == "_Cache"
+
+
+def test_snapshot_diff_finds_growth():
+    memory_diagnostics.start_tracing()
+    try:
+        memory_diagnostics.take_snapshot("before")
+        retained = [bytearray(4096) for _ in range(500)]
+        diff = memory_diagnostics.diff_snapshots("before", limit=5)
+        assert diff["size_diff_bytes"] > 2_000_000
+        assert diff["top"][0]["file"].endswith("test_memory_diagnostics.py")
+        assert memory_diagnostics.top_allocations(limit=3)
+        assert len(retained) == 500
+    finally:
+        memory_diagnostics.stop_tracing()
+    assert memory_diagnostics.snapshot_names() == []
+
+
+if __name__ == "__main__":
+    test_estimate_size_extrapolates_large_containers()
+    test_registered_store_measures_only_named_fields()
+    test_snapshot_diff_finds_growth()
+    print("✅ Memory diagnostics tests passed")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for request/storage metrics and the Prometheus exposition
+"""
+
+import sys
+import os
+import threading
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from memory_backend import InMemoryClient
+from metrics import (MetricsRegistry, MetricsMiddleware, InstrumentedClient,
+                     HTTP_REQUESTS, HTTP_LATENCY)
+
+
+def test_histogram_and_counter_render():
+    registry = MetricsRegistry()
+    requests = registry.counter("jobs_total", "Jobs", ("kind",))
+    latency = registry.histogram("job_seconds", "Job latency", ("kind",), buckets=(0.1, 1.0))
+
+    def work():
+        for _ in range(1000):
+            requests.inc("a")
+            latency.observe(0.5, "a")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latency.observe(0.05, "a")
+    latency.observe(5, "a")
+
+    assert requests.value("a") == 4000
+    text = registry.render()
+    assert '# TYPE job_seconds histogram' in text
+    assert 'job_seconds_bucket{kind="a",le="0.1"} 1' in text
+    assert 'job_seconds_bucket{kind="a",le="1.0"} 4001' in text
+    assert 'job_seconds_bucket{kind="a",le="+Inf"} 4002' in text
+    assert 'job_seconds_count{kind="a"} 4002' in text
+    assert 'jobs_total{kind="a"} 4000' in text
+
+
+def test_middleware_labels_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/widgets/{widget_id}")
+    def get_widget(widget_id: int):
+        if widget_id == 0:
+            raise HTTPException(status_code=404, detail="missing")
+        return {"id": widget_id}
+
+    client = TestClient(app)
+    before = HTTP_REQUESTS.value("GET", "/widgets/{widget_id}", "2xx")
+    client.get("/widgets/1")
+    client.get("/widgets/2")
+    client.get("/widgets/0")
+    client.get("/nowhere")
+
+    assert HTTP_REQUESTS.value("GET", "/widgets/{widget_id}", "2xx") - before == 2
+    assert HTTP_REQUESTS.value("GET", "/widgets/{widget_id}", "4xx") >= 1
+    assert HTTP_REQUESTS.value("GET", "unmatched", "4xx") >= 1
+    counts, _ = HTTP_LATENCY.totals("GET", "/widgets/{widget_id}")
+    assert sum(counts) >= 3
+
+
+def test_instrumented_client_times_execute():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("q_seconds", "Query latency", ("table", "operation", "outcome"))
+    db = InstrumentedClient(InMemoryClient({"bookings": [{"id": 1, "status": "pending"}]}), histogram)
+    seen = []
+    db.add_observer(lambda table, op, calls, outcome, seconds, response: seen.append((table, op, outcome)))
+
+    rows = db.table("bookings").select("id").eq("status", "pending").order("id").execute()
+    assert rows.data == [{"id": 1}]
+    db.table("bookings").update({"status": "accepted"}).eq("id", 1).execute()
+    try:
+        db.rpc("missing_fn")
+    except KeyError:
+        pass
+
+    assert seen == [("bookings", "select", "ok"), ("bookings", "update", "ok")]
+    assert sum(histogram.totals("bookings", "update", "ok")[0]) == 1
+
+
+if __name__ == "__main__":
+    test_histogram_and_counter_render()
+    test_middleware_labels_by_route_template()
+    test_instrumented_client_times_execute()
+    print("✅ Metrics tests passed")
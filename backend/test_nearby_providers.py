@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for the database-level nearby provider lookup
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from geo import bounding_box, haversine_km
+from memory_backend import InMemoryClient
+from seed_data import CENTER, seed_local_data
+from sqlite_backend import SQLiteClient
+from uber_like_booking_system import UberLikeBookingSystem
+
+
+def _brute_force(db, lat, lng, radius_km, category=None):
+    taskers = db.table("profiles").select("id, skills, latitude, longitude") \
+        .eq("role", "tasker").eq("is_available", True).execute().data
+    return sorted(t["id"] for t in taskers
+                  if haversine_km(lat, lng, t["latitude"], t["longitude"]) <= radius_km
+                  and (category is None or category in t["skills"]))
+
+
+def test_bounding_box_encloses_radius():
+    min_lat, max_lat, min_lng, max_lng = bounding_box(33.749, -84.388, 10)
+    assert haversine_km(33.749, -84.388, max_lat, -84.388) >= 9.99
+    assert haversine_km(33.749, -84.388, 33.749, max_lng) >= 9.99
+    assert bounding_box(89.9999999, 0, 10)[2:] == (-180.0, 180.0)
+
+
+def test_sqlite_and_memory_match_brute_force():
+    sqlite = SQLiteClient(":memory:")
+    memory = InMemoryClient()
+    for db in (sqlite, memory):
+        seed_local_data(db, customers=5, taskers=200, bookings=0)
+        for radius, category in ((5, None), (12, "cleaning"), (0.1, None)):
+            found = db.rpc("nearby_providers", {"p_lat": CENTER[0], "p_lng": CENTER[1], "p_radius_km": radius,
+                                                "p_category": category, "p_limit": 1000}).execute().data
+            assert sorted(p["id"] for p in found) == _brute_force(db, *CENTER, radius, category)
+            distances = [p["distance_km"] for p in found]
+            assert distances == sorted(distances) and all(d <= radius for d in distances)
+
+
+def test_sqlite_index_follows_moves():
+    db = SQLiteClient(":memory:")
+    db.table("users").insert({"id": "t1", "email": "t1@example.com", "password_hash": "!"}).execute()
+    db.table("profiles").insert({"id": "t1", "name": "Mike", "role": "tasker", "skills": ["cleaning"],
+                                 "latitude": 40.0, "longitude": -74.0, "is_available": True}).execute()
+    system = UberLikeBookingSystem(db)
+    assert [p["id"] for p in system.get_available_providers("cleaning", lat=40.01, lng=-74.0, radius_km=5)] == ["t1"]
+
+    db.table("profiles").update({"latitude": 41.0}).eq("id", "t1").execute()
+    assert system.get_available_providers("cleaning", lat=40.01, lng=-74.0, radius_km=5) == []
+    nearby = system.get_available_providers(lat=41.0, lng=-74.0, radius_km=1)
+    assert nearby[0]["distance_km"] == 0.0
+
+    db.table("profiles").delete().eq("id", "t1").execute()
+    assert system.get_available_providers(lat=41.0, lng=-74.0, radius_km=1) == []
+
+
+if __name__ == "__main__":
+    test_bounding_box_encloses_radius()
+    test_sqlite_and_memory_match_brute_force()
+    test_sqlite_index_follows_moves()
+    print("✅ Nearby provider tests passed")
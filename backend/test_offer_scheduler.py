@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Test script for the timer wheel and booking offer expiry
+"""
+
+import sys
+import os
+import random
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+from memory_backend import InMemoryClient
+from uber_like_booking_system import UberLikeBookingSystem
+from dispatcher import BookingDispatcher
+from offer_scheduler import TimerWheel, OfferExpiryScheduler
+
+
+def test_timer_wheel_fires_each_timer_once_on_time():
+    wheel = TimerWheel(tick=1.0, slots=8, levels=3, now=0)
+    rng = random.Random(7)
+    deadlines = {i: rng.randint(1, 2000) for i in range(2000)}
+    for key, deadline in deadlines.items():
+        wheel.schedule(key, deadline)
+    for key in range(0, 2000, 10):
+        assert wheel.cancel(key)
+        del deadlines[key]
+
+    fired = {}
+    for now in range(1, 2001):
+        for key, _ in wheel.advance(now):
+            assert key not in fired
+            fired[key] = now
+    assert fired == deadlines
+    assert len(wheel) == 0
+
+
+def test_timer_wheel_reschedule_and_overflow():
+    wheel = TimerWheel(tick=1.0, slots=4, levels=2, now=0)
+    wheel.schedule("a", 5)
+    wheel.schedule("a", 3)
+    wheel.schedule("far", 100)  # beyond 4 * 4 ticks
+    assert [k for k, _ in wheel.advance(3)] == ["a"]
+    assert wheel.advance(99) == []
+    assert [k for k, _ in wheel.advance(100)] == ["far"]
+
+
+class _Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _setup(action):
+    db = InMemoryClient({
+        "profiles": [
+            {"id": "t1", "name": "First", "role": "tasker", "is_available": True, "skills": ["cleaning"], "rating": 5},
+            {"id": "t2", "name": "Second", "role": "tasker", "is_available": True, "skills": ["cleaning"], "rating": 4},
+        ],
+        "bookings": [
+            {"id": 1, "status": "pending", "tasker_id": "t1", "service_category": "cleaning",
+             "created_at": "2024-01-01T10:00:00+00:00"},
+            {"id": 2, "status": "pending", "tasker_id": "t1", "service_category": "cleaning",
+             "created_at": "2024-01-01T10:00:00+00:00", "status_updated_at": "2024-01-01T10:30:00+00:00"},
+        ],
+    })
+    system = UberLikeBookingSystem(db)
+    dispatcher = BookingDispatcher(system)
+    clock = _Clock(1704103200.0)  # 2024-01-01T10:00:00Z
+    scheduler = OfferExpiryScheduler(system, dispatcher, ttl_seconds=600, action=action, max_offers=2, clock=clock)
+    assert scheduler.reload() == 2
+    return db, dispatcher, scheduler, clock
+
+
+def test_reload_and_decline_on_timeout():
+    db, dispatcher, scheduler, clock = _setup("decline")
+    # t1's load from an accepted job; reloaded offers were never counted
+    dispatcher._load["t1"] += 1
+
+    clock.now += 601
+    assert scheduler.run_due() == {"expired": 1, "declined": 1, "reoffered": 0}
+    rows = {row["id"]: row["status"] for row in db.rows("bookings")}
+    assert rows == {1: "declined", 2: "pending"}
+    assert dispatcher.metrics()["provider_load"] == {"t1": 1}
+
+    # Booking 2 restarted its clock at status_updated_at
+    scheduler.cancel(2)
+    clock.now += 3600
+    assert scheduler.run_due()["expired"] == 0
+
+
+def test_redispatch_to_another_provider_then_decline():
+    db, dispatcher, scheduler, clock = _setup("redispatch")
+    scheduler.cancel(2)
+
+    clock.now += 601
+    assert scheduler.run_due()["reoffered"] == 1
+    result = dispatcher.dispatch_batch()[0]
+    assert result["provider_id"] == "t2"
+    assert len(scheduler) == 1
+
+    # Second provider lets it lapse too: out of offers, so it is declined
+    clock.now += 601
+    assert scheduler.run_due()["declined"] == 1
+    assert db.rows("bookings")[0]["status"] == "declined"
+    assert dispatcher.metrics()["provider_load"] == {}
+
+
+def _main_with_provider():
+    storage = main.db.inner
+    previous = storage._client
+    storage._client = InMemoryClient({"profiles": [
+        {"id": "c1", "name": "Customer", "role": "customer"},
+        {"id": "solo", "name": "Solo Cleaner", "role": "tasker", "is_available": True, "skills": ["cleaning"],
+         "rating": 4.5, "latitude": 40.650, "longitude": -73.950},
+    ]})
+    main.provider_catalog.invalidate()
+    return storage, previous
+
+
+def _reset_main_dispatch():
+    for booking_id in list(main.dispatcher._queued):
+        main.dispatcher.remove(booking_id)
+    main.dispatcher._load.clear()
+    for key in list(main.offer_scheduler._wheel._timers):
+        main.offer_scheduler.cancel(key)
+
+
+def _create_and_dispatch(client, count):
+    booking = {"task_id": "1", "customer_id": "c1", "tasker_id": "", "service_category": "cleaning",
+               "latitude": 40.651, "longitude": -73.949}
+    ids = [str(client.post("/bookings", json=booking).json()["booking"][0]["id"]) for _ in range(count)]
+    assert all(booking_id in main.offer_scheduler._wheel for booking_id in ids)
+    assert client.post("/dispatch/run").json()["dispatched"] == count
+    return ids
+
+
+def test_status_route_cancels_offer_timer():
+    storage, previous = _main_with_provider()
+    _reset_main_dispatch()
+    try:
+        client = TestClient(main.app)
+        first, second = _create_and_dispatch(client, 2)
+        assert client.patch(f"/bookings/{first}", json={"status": "accepted"}).status_code == 200
+        assert client.patch(f"/bookings/{second}", json={"status": "cancelled"}).status_code == 200
+        assert len(main.offer_scheduler) == 0
+        assert main.dispatcher.metrics()["provider_load"] == {"solo": 1}
+
+        # Nothing left to expire, so an accepted booking is never re-offered
+        assert main.offer_scheduler.run_due() == {"expired": 0, "declined": 0, "reoffered": 0}
+        assert client.patch(f"/bookings/{first}", json={"status": "completed"}).status_code == 200
+        assert main.dispatcher.metrics()["provider_load"] == {}
+    finally:
+        storage._client = previous
+        main.provider_catalog.invalidate()
+        _reset_main_dispatch()
+
+
+def test_bulk_status_cancels_timers_and_releases_load():
+    storage, previous = _main_with_provider()
+    _reset_main_dispatch()
+    try:
+        client = TestClient(main.app)
+        ids = _create_and_dispatch(client, 3)
+        assert main.dispatcher.metrics()["provider_load"] == {"solo": 3}
+
+        response = client.patch("/bookings/bulk/status", json={"booking_ids": ids[:2], "status": "accepted"})
+        assert response.json()["succeeded"] == 2
+        assert len(main.offer_scheduler) == 1 and ids[2] in main.offer_scheduler._wheel
+        assert main.dispatcher.metrics()["provider_load"] == {"solo": 3}
+
+        client.patch("/bookings/bulk/status", json={"booking_ids": ids[:2], "status": "in-progress"})
+        response = client.patch("/bookings/bulk/status", json={"booking_ids": ids[:2], "status": "completed"})
+        assert response.json()["succeeded"] == 2
+        assert main.dispatcher.metrics()["provider_load"] == {"solo": 1}
+
+        response = client.patch("/bookings/bulk/status", json={"booking_ids": ids[2:], "status": "declined"})
+        assert response.json()["succeeded"] == 1
+        assert len(main.offer_scheduler) == 0 and main.dispatcher.metrics()["provider_load"] == {}
+    finally:
+        storage._client = previous
+        main.provider_catalog.invalidate()
+        _reset_main_dispatch()
+
+
+if __name__ == "__main__":
+    test_timer_wheel_fires_each_timer_once_on_time()
+    test_timer_wheel_reschedule_and_overflow()
+    test_reload_and_decline_on_timeout()
+    test_redispatch_to_another_provider_then_decline()
+    test_status_route_cancels_offer_timer()
+    test_bulk_status_cancels_timers_and_releases_load()
+    print("✅ Offer scheduler tests passed")
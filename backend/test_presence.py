@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Test script for provider presence and its write-behind flush
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+from memory_backend import InMemoryClient
+from presence import PresenceStore
+from provider_catalog import ProviderCatalog
+from sqlite_backend import SQLiteClient
+from surge import DemandSupplyAggregator
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class BrokenClient:
+    def table(self, name):
+        raise RuntimeError("database unavailable")
+
+
+def _sqlite_with_taskers(*ids):
+    db = SQLiteClient(":memory:")
+    for tasker_id in ids:
+        db.table("users").insert({"id": tasker_id, "email": f"{tasker_id}@example.com", "password_hash": "!"}).execute()
+        db.table("profiles").insert({"id": tasker_id, "name": tasker_id.upper(), "role": "tasker",
+                                     "skills": ["cleaning"], "is_available": False}).execute()
+    return db
+
+
+def test_heartbeats_coalesce_into_one_upsert():
+    db = _sqlite_with_taskers("t1", "t2", "t3")
+    catalog = ProviderCatalog(db)
+    catalog.load()
+    clock = FakeClock()
+    presence = PresenceStore(db, catalog=catalog, clock=clock)
+
+    assert presence.heartbeat("nobody") is None
+    for i in range(50):
+        clock.now += 1
+        presence.heartbeat("t1", is_available=True, latitude=40.75, longitude=-73.99 + i / 1000)
+        presence.heartbeat("t2", is_available=True)
+    assert presence.metrics()["pending_rows"] == 2 and presence.coalesced_total == 98
+    assert presence.flush_lag() == 49
+    # Availability is visible to matching before anything is written
+    assert [p["id"] for p in catalog.select(skills=["cleaning"], available=True, columns=("id",))] == ["t1", "t2"]
+    assert db.table("profiles").select("id").eq("is_available", True).execute().data == []
+
+    assert presence.flush() == 2 and presence.flush() == 0
+    rows = {r["id"]: r for r in db.table("profiles").select("id, is_available, latitude, longitude, last_active")
+            .execute().data}
+    assert rows["t1"]["is_available"] and rows["t1"]["longitude"] == -73.99 + 49 / 1000
+    assert rows["t2"]["is_available"] and rows["t2"]["latitude"] is None
+    assert not rows["t3"]["is_available"]
+    assert rows["t1"]["last_active"].startswith("2023-11-1")
+    metrics = presence.metrics()
+    assert metrics["flushes_total"] == 1 and metrics["rows_flushed_total"] == 2
+    assert metrics["last_flush_lag_seconds"] == 49 and metrics["flush_lag_seconds"] == 0
+
+
+def test_only_changes_reach_the_catalog():
+    catalog = ProviderCatalog()
+    catalog.load([{"id": "t1", "skills": ["cleaning"], "is_available": True, "latitude": 40.75, "longitude": -73.99}])
+    surge = DemandSupplyAggregator(catalog)
+    surge.load()
+    presence = PresenceStore(InMemoryClient(), catalog=catalog, surge=surge)
+    version = catalog.version
+    presence.heartbeat("t1", latitude=40.75, longitude=-73.99)
+    presence.heartbeat("t1")
+    assert catalog.version == version  # last_seen alone does not invalidate cached quotes
+
+    presence.heartbeat("t1", is_available=False)
+    assert catalog.version == version + 1 and catalog.count(available=True) == 0
+    assert surge.supply(surge.cell(40.75, -73.99), "cleaning") == 0
+    # A ping without is_available keeps the provider offline
+    assert presence.heartbeat("t1")["is_available"] is False
+    assert catalog.version == version + 1 and catalog.count(available=True) == 0
+
+    # A profile update elsewhere is adopted, not overwritten by the next flush
+    presence.observe({"id": "t1", "latitude": 41.0, "longitude": -74.0})
+    assert presence.get("t1")["latitude"] == 41.0
+
+
+def test_stale_providers_expire():
+    db = _sqlite_with_taskers("t1", "t2")
+    catalog = ProviderCatalog(db)
+    catalog.load()
+    clock = FakeClock()
+    presence = PresenceStore(db, catalog=catalog, stale_after=60, clock=clock)
+    presence.heartbeat("t1", is_available=True)
+    presence.heartbeat("t2", is_available=True)
+    presence.flush()
+
+    clock.now += 45
+    presence.heartbeat("t2")
+    clock.now += 30
+    assert presence.expire_stale() == ["t1"]
+    assert presence.expire_stale() == []
+    assert [p["id"] for p in catalog.select(available=True, columns=("id",))] == ["t2"]
+    assert presence.flush() == 2
+    assert db.table("profiles").select("id").eq("is_available", True).execute().data == [{"id": "t2"}]
+    assert presence.metrics()["expired_total"] == 1
+
+
+def test_failed_flush_keeps_pending_rows():
+    catalog = ProviderCatalog()
+    catalog.load([{"id": "t1", "skills": []}])
+    clock = FakeClock()
+    db = InMemoryClient({"profiles": [{"id": "t1", "role": "tasker", "is_available": False}]})
+    presence = PresenceStore(BrokenClient(), catalog=catalog, clock=clock)
+    presence.heartbeat("t1")
+    clock.now += 5
+    try:
+        presence.flush()
+        assert False
+    except RuntimeError:
+        pass
+    assert presence.metrics()["pending_rows"] == 1 and presence.flush_errors_total == 1
+    assert presence.flush_lag() == 5
+
+    presence.db = db
+    assert presence.flush() == 1
+    assert db.rows("profiles")[0]["is_available"] is True
+
+
+def test_presence_endpoints():
+    storage = main.db.inner
+    previous = storage._client
+    storage._client = InMemoryClient({"profiles": [
+        {"id": "t1", "name": "Mike", "role": "tasker", "skills": ["cleaning"], "is_available": True},
+        {"id": "c1", "name": "Customer", "role": "customer"},
+    ]})
+    main.provider_catalog.invalidate()
+    try:
+        client = TestClient(main.app)
+        response = client.post("/providers/t1/heartbeat", json={"is_available": False, "latitude": 40.7,
+                                                                 "longitude": -74.0})
+        assert response.status_code == 200 and response.json()["is_available"] is False
+        assert client.get("/providers", params={"service": "cleaning", "fields": "id,is_available"}).json() == \
+            [{"id": "t1", "is_available": False}]
+        # A bare ping leaves availability as it was
+        assert client.post("/providers/t1/heartbeat").json()["is_available"] is False
+        assert client.post("/providers/t1/heartbeat", json={"is_available": True}).json()["is_available"] is True
+        assert client.post("/providers/c1/heartbeat").status_code == 404
+        assert client.post("/providers/t1/heartbeat", json={"latitude": 40.7}).status_code == 422
+
+        assert client.get("/presence/metrics").json()["pending_rows"] >= 1
+        main.presence.flush()
+        assert main.db.table("profiles").select("latitude").eq("id", "t1").execute().data == [{"latitude": 40.7}]
+        assert "provider_presence{stat=\"pending_rows\"} 0" in client.get("/metrics").text
+    finally:
+        storage._client = previous
+        main.provider_catalog.invalidate()
+
+
+if __name__ == "__main__":
+    test_heartbeats_coalesce_into_one_upsert()
+    test_only_changes_reach_the_catalog()
+    test_stale_providers_expire()
+    test_failed_flush_keeps_pending_rows()
+    test_presence_endpoints()
+    print("✅ Presence tests passed")
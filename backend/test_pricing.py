@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test script for the vectorized price quote engine
+"""
+
+import sys
+import os
+import math
+import random
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+import pricing
+from memory_backend import InMemoryClient
+from provider_catalog import ProviderCatalog
+
+
+def _catalog():
+    catalog = ProviderCatalog()
+    catalog.load([
+        {"id": "t1", "name": "Mike", "skills": ["cleaning"], "hourly_rate": 1500, "is_available": True},
+        {"id": "t2", "name": "Ann", "skills": ["home_cleaning"], "hourly_rate": 1200, "is_available": True},
+        {"id": "t3", "name": "Off", "skills": ["cleaning"], "hourly_rate": 900, "is_available": False},
+        {"id": "t4", "name": "No rate", "skills": ["cleaning"], "is_available": True},
+        {"id": "t5", "name": "Washer", "skills": ["car_care"], "hourly_rate": 800, "is_available": True},
+    ])
+    return catalog
+
+
+def test_multipliers_and_keys():
+    assert pricing.answers_key({"a": 1, "b": "x"}) == pricing.answers_key({"b": "x", "a": 1})
+    assert pricing.answers_key({"a": 1}) != pricing.answers_key({"a": 2})
+    assert pricing.answers_key(None) == pricing.answers_key({})
+    assert pricing.answer_multiplier("car_wash", {"vehicle_size": "suv", "service_type": "Full detail"}) == 1.25 * 2.5
+    assert pricing.answer_multiplier("car_wash", {"vehicle_size": "Spaceship", "color": "red"}) == 1.0
+    assert pricing.answer_multiplier("other", {"describe": "anything"}) == 1.0
+
+
+def test_price_matrix_matches_loop():
+    rng = random.Random(5)
+    rates = [None if rng.random() < 0.1 else rng.uniform(100, 3000) for _ in range(1000)]
+    prices = pricing.price_matrix(rates, (0.75, 1.5), 1.3)
+    assert prices.shape == (1000, 2)
+    for rate, (low, high) in zip(rates, prices.tolist()):
+        if rate is None:
+            assert math.isnan(low) and math.isnan(high)
+        else:
+            assert low == round(rate * 0.75 * 1.3, 2) and high == round(rate * 1.5 * 1.3, 2)
+
+
+def test_quote_engine_caches_per_answers():
+    catalog = _catalog()
+    engine = pricing.QuoteEngine(catalog, max_entries=2)
+    quote = engine.quote("home_cleaning", {"rooms": "Kitchen only"})
+    # Available providers with a rate, cheapest first
+    assert [p["id"] for p in quote["providers"]] == ["t2", "t1"]
+    assert quote["providers"][0]["price_min"] == 1200 * 1.5 * 0.5
+    assert quote["providers"][0]["price_max"] == 1200 * 3 * 0.5
+    assert (quote["price_min"], quote["price_max"]) == (900.0, 2250.0)
+    assert quote["multiplier"] == 0.5 and not quote["cached"]
+
+    assert engine.quote("home_cleaning", {"rooms": "Kitchen only"}, limit=1)["cached"]
+    assert len(engine.quote("home_cleaning", {"rooms": "Kitchen only"}, limit=1)["providers"]) == 1
+    assert not engine.quote("home_cleaning", {"rooms": "All rooms"})["cached"]
+    assert (engine.hits, engine.misses) == (2, 2)
+
+    # Location and rating updates leave cached quotes alone
+    catalog.upsert({"id": "t1", "latitude": 40.75, "longitude": -73.99, "rating": 4.9})
+    catalog.upsert({"id": "t2", "hourly_rate": 1200, "is_available": True})
+    assert engine.quote("home_cleaning", {"rooms": "All rooms"})["cached"]
+
+    # A rate change reaches the next quote
+    catalog.upsert({"id": "t1", "hourly_rate": 1000})
+    quote = engine.quote("home_cleaning", {"rooms": "All rooms"})
+    assert not quote["cached"] and quote["providers"][0] == {
+        "id": "t1", "name": "Mike", "rate_hour": 1000, "price_min": 1500.0, "price_max": 3000.0}
+
+    engine.quote("car_wash")
+    assert len(engine) == 2
+    assert engine.quote("car_wash")["providers"][0]["id"] == "t5"
+    assert engine.quote("beauty_facial")["providers"] == []
+    try:
+        engine.quote("moon_landing")
+        assert False
+    except ValueError:
+        pass
+
+
+def test_quote_and_match_endpoints():
+    storage = main.db.inner
+    previous = storage._client
+    storage._client = InMemoryClient({"profiles": [
+        {"id": "t1", "name": "Mike", "role": "tasker", "skills": ["car_care"], "hourly_rate": 800,
+         "is_available": True, "rating": 4.5},
+        {"id": "t2", "name": "Ann", "role": "tasker", "skills": ["car_wash"], "hourly_rate": 600,
+         "is_available": True, "rating": 4.0},
+    ]})
+    main.provider_catalog.invalidate()
+    try:
+        client = TestClient(main.app)
+        answers = {"vehicle_size": "Truck", "service_type": "Premium wash"}
+        response = client.post("/api/ai/quotes", json={"quotes": [
+            {"service_id": "car_wash", "answers": answers},
+            {"service_id": "car_wash", "answers": answers, "limit": 1},
+            {"service_id": "teleport"},
+            {"service_id": "car_wash", "location": {"lat": 40.7}},
+        ]})
+        assert response.status_code == 200
+        first, second, unknown, no_lng = response.json()["results"]
+        assert not no_lng["success"] and "lat and lng" in no_lng["message"]
+        assert [p["id"] for p in first["providers"]] == ["t2", "t1"]
+        assert first["providers"][0]["price_min"] == round(600 * 0.75 * 1.4 * 1.5, 2)
+        assert second["cached"] and len(second["providers"]) == 1
+        assert not unknown["success"] and "Unknown service" in unknown["message"]
+        assert client.post("/api/ai/quotes", json={"quotes": [{"service_id": "car_wash"}] * 51}).status_code == 400
+        assert client.post("/api/ai/quotes", json={"quotes": [{"service_id": "car_wash", "limit": -1}]}) \
+            .status_code == 422
+
+        match = client.post("/api/ai/match", json={"service_id": "car_wash", "spec": answers}).json()
+        assert match["providers"][0]["id"] == "t1"
+        assert match["providers"][0]["price_max"] == round(800 * 1.5 * 1.4 * 1.5, 2)
+    finally:
+        storage._client = previous
+        main.provider_catalog.invalidate()
+
+
+if __name__ == "__main__":
+    test_multipliers_and_keys()
+    test_price_matrix_matches_loop()
+    test_quote_engine_caches_per_answers()
+    test_quote_and_match_endpoints()
+    print("✅ Pricing tests passed")
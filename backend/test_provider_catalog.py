@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test script for the columnar provider catalog and its skill bitset index
+"""
+
+import sys
+import os
+import random
+import threading
+import time
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+from memory_backend import InMemoryClient
+from memory_diagnostics import estimate_size
+from provider_catalog import ProviderCatalog, iter_bits
+from uber_like_booking_system import UberLikeBookingSystem
+
+SKILLS = ["cleaning", "repairs", "carcare", "beauty", "appliance", "plumbing"]
+
+
+def _profiles(n, seed=5):
+    rng = random.Random(seed)
+    profiles = [{"id": "c0", "name": "Customer", "role": "customer"}]
+    for i in range(n):
+        profiles.append({
+            "id": f"t{i}", "name": f"Tasker {i}", "role": "tasker", "bio": "Reliable",
+            "skills": rng.sample(SKILLS, rng.randint(0, 3)), "hourly_rate": rng.choice([None, 30, 45.5]),
+            "rating": round(rng.uniform(3, 5), 6), "is_available": rng.random() < 0.8,
+            "latitude": 40.7 + rng.random() / 10, "longitude": -74.0 + rng.random() / 10,
+        })
+    return profiles
+
+
+def test_iter_bits():
+    assert list(iter_bits(0)) == []
+    assert list(iter_bits(0b101100)) == [2, 3, 5]
+    assert list(iter_bits(1 << 200)) == [200]
+
+
+def test_bitset_queries_match_a_scan():
+    profiles = _profiles(500)
+    taskers = [p for p in profiles if p["role"] == "tasker"]
+    catalog = ProviderCatalog(InMemoryClient({"profiles": profiles}))
+    assert catalog.load() == 500
+
+    def scan(pred):
+        # The catalog is loaded in id order
+        return sorted(p["id"] for p in taskers if pred(p))
+
+    assert [p["id"] for p in catalog.select(skills=["cleaning"], columns=("id",))] == \
+        scan(lambda p: "cleaning" in p["skills"])
+    assert [p["id"] for p in catalog.select(skills=["cleaning", "repairs"], available=True, columns=("id",))] == \
+        scan(lambda p: {"cleaning", "repairs"} <= set(p["skills"]) and p["is_available"])
+    assert catalog.count(any_skills=["beauty", "carcare"]) == \
+        len(scan(lambda p: {"beauty", "carcare"} & set(p["skills"])))
+    assert catalog.count(skills=["unknown"]) == 0
+
+    ranked = catalog.select(skills=["plumbing"], available=True, order_by="rating", limit=5)
+    expected = sorted((p for p in taskers if "plumbing" in p["skills"] and p["is_available"]),
+                      key=lambda p: p["rating"], reverse=True)[:5]
+    assert [p["id"] for p in ranked] == [p["id"] for p in expected]
+    assert ranked[0]["hourly_rate"] == expected[0]["hourly_rate"] and ranked[0]["skills"] == expected[0]["skills"]
+
+
+def test_incremental_updates():
+    catalog = ProviderCatalog()
+    catalog.load(_profiles(3))
+    catalog.upsert({"id": "t0", "skills": ["gardening"], "is_available": False})
+    assert catalog.select(skills=["gardening"], columns=("id", "name", "is_available")) == \
+        [{"id": "t0", "name": "Tasker 0", "is_available": False}]
+
+    # A removed row is reused by the next new provider
+    catalog.remove("t1")
+    assert len(catalog) == 2
+    catalog.upsert({"id": "t9", "name": "New", "role": "tasker", "skills": ["gardening"]})
+    assert catalog._cols.row_of["t9"] == 1
+    assert [p["id"] for p in catalog.select(skills=["gardening"], columns=("id",))] == ["t0", "t9"]
+    assert catalog.select(skills=["gardening"], available=True, columns=("id", "rating")) == \
+        [{"id": "t9", "rating": 0.0}]
+
+    catalog.upsert({"id": "t9", "role": "customer"})
+    catalog.upsert({"id": "t0", "skills": []})
+    assert catalog.count(skills=["gardening"]) == 0 and "gardening" not in catalog._cols.skill_bits
+
+
+def test_footprint_per_provider():
+    catalog = ProviderCatalog()
+    catalog.load(_profiles(5000))
+    # A million providers must fit in a few hundred MB
+    assert estimate_size(catalog._cols) / 5000 < 400
+
+
+def test_available_providers_from_catalog():
+    profiles = _profiles(200)
+    db = InMemoryClient({"profiles": profiles})
+    with_catalog = UberLikeBookingSystem(db, catalog=ProviderCatalog(db))
+    without = UberLikeBookingSystem(db)
+    for category in (None, "cleaning", "appliance"):
+        assert with_catalog.get_available_providers(category) == without.get_available_providers(category)
+
+
+def test_endpoints_use_catalog():
+    storage = main.db.inner
+    previous = storage._client
+    storage._client = InMemoryClient({"profiles": [
+        {"id": "t1", "name": "Mike", "role": "tasker", "skills": ["cleaning"], "rating": 4.2,
+         "is_available": True, "latitude": 40.751, "longitude": -73.998},
+        {"id": "t2", "name": "Ann", "role": "tasker", "skills": ["repairs"], "rating": 4.9, "is_available": True},
+    ]})
+    main.provider_catalog.invalidate()
+    try:
+        client = TestClient(main.app)
+        assert [p["id"] for p in client.get("/providers", params={"service": "cleaning"}).json()] == ["t1"]
+
+        assert client.patch("/profiles/t2", json={"skills": ["repairs", "cleaning"]}).status_code == 200
+        providers = client.get("/providers", params={"service": "cleaning", "fields": "name"}).json()
+        assert providers == [{"id": "t1", "name": "Mike"}, {"id": "t2", "name": "Ann"}]
+        # Columns the catalog does not hold are read from the database
+        assert client.get("/providers", params={"service": "cleaning", "fields": "phone"}).status_code == 200
+
+        match = client.post("/api/ai/match", json={"service_id": "home_cleaning"}).json()
+        assert [p["id"] for p in match["providers"]] == ["t2", "t1"]
+        assert match["providers"][1]["eta_min"] is not None and match["providers"][0]["distance_km"] is None
+    finally:
+        storage._client = previous
+        main.provider_catalog.invalidate()
+
+
+class _GatedClient(InMemoryClient):
+    """Profile reads wait until `release` is set"""
+
+    def __init__(self, tables):
+        self.gated = False
+        super().__init__(tables)
+        self.profile_reads = 0
+        self.reading = threading.Event()
+        self.release = threading.Event()
+        self.gated = True
+
+    def table(self, name):
+        if name == "profiles" and self.gated:
+            self.profile_reads += 1
+            self.reading.set()
+            assert self.release.wait(5)
+        return super().table(name)
+
+
+def test_refresh_is_single_flight_and_keeps_writes_made_during_it():
+    db = _GatedClient({"profiles": [
+        {"id": "t1", "role": "tasker", "skills": ["cleaning"]},
+        {"id": "t2", "role": "tasker", "skills": ["cleaning"]},
+    ]})
+    catalog = ProviderCatalog(db, max_age=0)
+    catalog.load([{"id": "t1", "skills": ["cleaning"]}])
+    time.sleep(0.001)
+
+    loader = threading.Thread(target=catalog.refresh_if_stale)
+    loader.start()
+    assert db.reading.wait(5)
+    # Other callers keep reading the current generation instead of loading too
+    for _ in range(3):
+        catalog.refresh_if_stale()
+    assert [p["id"] for p in catalog.select(columns=("id",))] == ["t1"]
+    catalog.upsert({"id": "t9", "skills": ["repairs"]})
+    catalog.remove("t1")
+
+    db.release.set()
+    loader.join(5)
+    assert db.profile_reads == 1
+    assert [p["id"] for p in catalog.select(columns=("id",))] == ["t2", "t9"]
+    assert catalog.count(skills=["repairs"]) == 1
+
+
+if __name__ == "__main__":
+    test_iter_bits()
+    test_bitset_queries_match_a_scan()
+    test_incremental_updates()
+    test_footprint_per_provider()
+    test_available_providers_from_catalog()
+    test_endpoints_use_catalog()
+    test_refresh_is_single_flight_and_keeps_writes_made_during_it()
+    print("✅ Provider catalog tests passed")
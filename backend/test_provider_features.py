@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test script for the provider performance feature store
+"""
+
+import sys
+import os
+from datetime import datetime
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import provider_features
+from dispatcher import BookingDispatcher
+from memory_backend import InMemoryClient
+from provider_features import ProviderFeatureStore, transition_deltas
+from sqlite_backend import SQLiteClient
+from uber_like_booking_system import UberLikeBookingSystem
+
+
+def _setup(db):
+    for user_id, role in (("c1", "customer"), ("t1", "tasker"), ("t2", "tasker")):
+        db.table("users").insert({"id": user_id, "email": f"{user_id}@example.com", "password_hash": "!"}).execute()
+        db.table("profiles").insert({"id": user_id, "name": user_id, "role": role, "skills": ["cleaning"],
+                                     "rating": 4.5, "is_available": True}).execute()
+    db.table("tasks").insert({"id": 1, "customer_id": "c1", "title": "Home Cleaning"}).execute()
+    return UberLikeBookingSystem(db)
+
+
+def _booking(system, tasker_id):
+    return system.db.table("bookings").insert({
+        "task_id": 1, "customer_id": "c1", "tasker_id": tasker_id, "status": "pending",
+        "service_category": "cleaning", "created_at": datetime.now().isoformat(),
+    }).execute().data[0]["id"]
+
+
+def _run_history(system):
+    # t1: completes two jobs, one cancelled after acceptance; t2: declines one, completes one
+    for status_path in (["accepted", "in-progress", "completed"], ["accepted", "in-progress", "completed"],
+                        ["accepted", "cancelled"]):
+        booking_id = _booking(system, "t1")
+        for status in status_path:
+            assert system.update_booking_status(booking_id, status, "t1")["success"]
+    declined = _booking(system, "t2")
+    assert system.update_booking_status(declined, "declined", "t2")["success"]
+    offered = _booking(system, "t1")
+    assert system.assign_provider(offered, {"id": "t2", "name": "t2"})
+    for status in ("accepted", "in-progress", "completed"):
+        assert system.update_booking_status(offered, status, "t2")["success"]
+
+
+def test_transition_deltas():
+    assert transition_deltas(None, {"tasker_id": "t1", "status": "pending"}) == {"offered": 1}
+    assert transition_deltas({"status": "pending", "tasker_id": "t1"},
+                             {"status": "pending", "tasker_id": "t2"}) == {"offered": 1}
+    accepted = transition_deltas({"status": "pending", "tasker_id": "t1", "status_updated_at": "2025-01-01T10:00:00"},
+                                 {"status": "accepted", "tasker_id": "t1", "accepted_at": "2025-01-01T10:01:30"})
+    assert accepted == {"accepted": 1, "accept_seconds": 90.0}
+    assert transition_deltas({"status": "pending", "tasker_id": "t1"},
+                             {"status": "cancelled", "tasker_id": "t1"}) == {}
+    assert transition_deltas({"status": "in-progress", "tasker_id": "t1"},
+                             {"status": "cancelled", "tasker_id": "t1"}) == {"cancelled": 1}
+    assert transition_deltas(None, {"tasker_id": None, "status": "pending"}) == {}
+
+
+def test_backends_count_the_same_transitions():
+    counted = []
+    for db in (SQLiteClient(":memory:"), InMemoryClient()):
+        system = _setup(db)
+        _run_history(system)
+        store = ProviderFeatureStore(db)
+        assert store.load() == 2
+        counters = {t: store.counters(t, "cleaning") for t in ("t1", "t2")}
+        for values in counters.values():
+            assert values.pop("accept_seconds") >= 0
+        counted.append(counters)
+
+    sqlite, memory = counted
+    assert sqlite == memory
+    assert sqlite["t1"] == {"offered": 4, "accepted": 3, "declined": 0, "completed": 2, "cancelled": 1}
+    assert sqlite["t2"] == {"offered": 2, "accepted": 1, "declined": 1, "completed": 1, "cancelled": 0}
+
+
+def test_inserts_count_like_transitions_from_nothing():
+    rows = [
+        {"status": "accepted", "created_at": "2025-01-01T10:00:00", "accepted_at": "2025-01-01T10:02:00"},
+        {"status": "completed"},
+        {"status": "cancelled"},
+        {"status": "declined"},
+        {"status": None},
+    ]
+    expected = {"offered": 0, "accepted": 0, "declined": 0, "completed": 0, "cancelled": 0, "accept_seconds": 0.0}
+    for row in rows:
+        for name, delta in transition_deltas(None, {"tasker_id": "t1", **row}).items():
+            expected[name] += delta
+    assert expected["accepted"] == 1 and expected["accept_seconds"] == 120.0 and expected["cancelled"] == 0
+
+    for db in (SQLiteClient(":memory:"), InMemoryClient()):
+        _setup(db)
+        for row in rows:
+            db.table("bookings").insert({"task_id": 1, "customer_id": "c1", "tasker_id": "t1",
+                                         "service_category": "repairs", "created_at": "2025-01-01T09:00:00",
+                                         **row}).execute()
+        store = ProviderFeatureStore(db)
+        store.load()
+        counters = store.counters("t1", "repairs")
+        assert abs(counters.pop("accept_seconds") - expected["accept_seconds"]) < 0.01
+        assert counters == {name: value for name, value in expected.items() if name != "accept_seconds"}
+
+
+def test_features_and_dispatch_ranking():
+    db = InMemoryClient()
+    system = _setup(db)
+    _run_history(system)
+    store = ProviderFeatureStore(db)
+    store.load()
+
+    t1 = store.features("t1", "cleaning")
+    assert t1["jobs_done"] == 2 and t1["completion_rate"] == round(2 / 3, 4)
+    assert t1["acceptance_rate"] == 0.75
+    assert t1["reliability"] == round((2 + 0.9 * provider_features.PRIOR_JOBS) / (3 + provider_features.PRIOR_JOBS), 4)
+    assert store.features("nobody")["reliability"] == provider_features.PRIOR_RELIABILITY
+    assert set(store.snapshot()) == {"t1", "t2"}
+
+    # Same rating, distance and load: the provider without a cancellation wins
+    dispatcher = BookingDispatcher(system, features=store)
+    providers = [{"id": "t1", "rating": 4.5}, {"id": "t2", "rating": 4.5}]
+    assert dispatcher.best_provider({"service_category": "cleaning"}, providers)["id"] == "t2"
+
+
+if __name__ == "__main__":
+    test_transition_deltas()
+    test_backends_count_the_same_transitions()
+    test_inserts_count_like_transitions_from_nothing()
+    test_features_and_dispatch_ranking()
+    print("✅ Provider feature store tests passed")
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Test that the hot queries are served by indexes
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import check_query_plans
+
+
+def test_hot_queries_use_indexes():
+    db, params = check_query_plans.seeded_sqlite(":memory:", bookings=500)
+    results = check_query_plans.check_sqlite(db, params)
+    assert {r["name"] for r in results} == {q.name for q in check_query_plans.HOT_QUERIES}
+    assert [r for r in results if r["problems"]] == []
+
+    # An unindexed filter is reported
+    plan = db.table("bookings").select("id").eq("payment_method", "cash").explain()
+    assert "full scan of bookings" in check_query_plans.sqlite_problems(plan)
+
+
+def test_postgres_plan_walk():
+    plan = {"Plan": {"Node Type": "Sort", "Plans": [
+        {"Node Type": "Bitmap Heap Scan", "Relation Name": "profiles"},
+        {"Node Type": "Seq Scan", "Relation Name": "bookings"},
+    ]}}
+    assert check_query_plans.postgres_problems(plan) == ["sequential scan of bookings"]
+
+
+if __name__ == "__main__":
+    test_hot_queries_use_indexes()
+    test_postgres_plan_walk()
+    print("✅ Query plan tests passed")
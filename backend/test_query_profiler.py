@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script for the request-scoped query profiler
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from memory_backend import InMemoryClient
+from metrics import InstrumentedClient
+from query_profiler import QueryProfilerMiddleware, observe, profile_queries
+from uber_like_booking_system import UberLikeBookingSystem
+
+
+def _db():
+    db = InstrumentedClient(InMemoryClient({
+        "profiles": [
+            {"id": "c1", "name": "John Customer", "role": "customer"},
+            {"id": "c2", "name": "Jane Customer", "role": "customer"},
+            {"id": "t1", "name": "Mike Tasker", "role": "tasker", "hourly_rate": 40},
+        ],
+        "tasks": [{"id": 1, "title": "Home Cleaning", "customer_id": "c1"}],
+        "bookings": [{"id": 1, "customer_id": "c1"}, {"id": 2, "customer_id": "c2"}],
+    }))
+    db.add_observer(observe)
+    return db
+
+
+def test_records_query_details_and_flags_n_plus_one():
+    db = _db()
+    with profile_queries("verify") as recorder:
+        customers = db.table("profiles").select("id, name").eq("role", "customer").execute().data
+        for customer in customers:
+            db.table("bookings").select("id").eq("customer_id", customer["id"]).execute()
+
+    first = recorder.queries[0]
+    assert first["table"] == "profiles" and first["columns"] == "id, name"
+    assert first["filters"] == [("eq", "role", "customer")]
+    assert first["rows"] == 2 and first["payload_bytes"] > 0
+    assert recorder.n_plus_one() == {"bookings.select(id) eq(customer_id)": 2}
+    assert "n+1=bookings.select(id) eq(customer_id) x2" in recorder.header()
+
+    # Outside a profiled block nothing is recorded
+    db.table("profiles").select("id").execute()
+    assert len(recorder.queries) == 3
+
+
+def test_create_booking_has_no_repeated_queries():
+    db = _db()
+    with profile_queries("create_booking") as recorder:
+        result = UberLikeBookingSystem(db).create_booking("c1", "t1", 1)
+    assert result["success"]
+    assert recorder.n_plus_one() == {}
+    assert [q["table"] for q in recorder.queries] == ["profiles", "tasks", "bookings"]
+
+
+def test_middleware_adds_debug_header():
+    db = _db()
+    app = FastAPI()
+    app.add_middleware(QueryProfilerMiddleware, debug_header=True)
+
+    @app.get("/names")
+    def names():
+        return [db.table("profiles").select("name").eq("id", pid).execute().data for pid in ("c1", "t1")]
+
+    header = TestClient(app).get("/names").headers["x-query-profile"]
+    assert header.startswith("queries=2;")
+    assert "profiles.select(name) eq(id) x2" in header
+
+
+if __name__ == "__main__":
+    test_records_query_details_and_flags_n_plus_one()
+    test_create_booking_has_no_repeated_queries()
+    test_middleware_adds_debug_header()
+    print("✅ Query profiler tests passed")
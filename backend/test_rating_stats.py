@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script for incrementally maintained provider rating aggregates
+"""
+
+import sys
+import os
+import random
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+import rating_stats
+from memory_backend import InMemoryClient
+from sqlite_backend import SQLiteClient
+
+
+def _with_taskers(db):
+    for user_id, role in (("c1", "customer"), ("t1", "tasker"), ("t2", "tasker")):
+        db.table("users").insert({"id": user_id, "email": f"{user_id}@example.com", "password_hash": "!"}).execute()
+        db.table("profiles").insert({"id": user_id, "name": user_id, "role": role}).execute()
+    return db
+
+
+def _recomputed(db, tasker_id):
+    stats = rating_stats.empty_stats(tasker_id)
+    for review in db.table("reviews").select("*").eq("tasker_id", tasker_id).execute().data:
+        rating_stats.apply_review(stats, review)
+    return stats
+
+
+def _stored(db, tasker_id):
+    rows = db.table("provider_rating_stats").select(", ".join(rating_stats.STATS_COLUMNS)) \
+        .eq("tasker_id", tasker_id).execute().data
+    return rows[0] if rows else rating_stats.empty_stats(tasker_id)
+
+
+def test_aggregates_follow_review_writes():
+    rng = random.Random(3)
+    for db in (_with_taskers(SQLiteClient(":memory:")), _with_taskers(InMemoryClient())):
+        for _ in range(40):
+            db.table("reviews").insert({
+                "customer_id": "c1", "tasker_id": rng.choice(["t1", "t2"]), "rating": rng.randint(1, 5),
+                "service_rating": rng.choice([None, 3, 4, 5]), "timeliness_rating": rng.choice([None, 5]),
+            }).execute()
+        ids = [r["id"] for r in db.table("reviews").select("id").execute().data]
+        db.table("reviews").update({"rating": 1, "communication_rating": 2}).eq("id", ids[0]).execute()
+        db.table("reviews").update({"tasker_id": "t2"}).eq("id", ids[1]).execute()
+        db.table("reviews").delete().eq("id", ids[2]).execute()
+
+        for tasker_id in ("t1", "t2"):
+            stored = _stored(db, tasker_id)
+            assert stored == _recomputed(db, tasker_id), tasker_id
+            rating = db.table("profiles").select("rating").eq("id", tasker_id).execute().data[0]["rating"]
+            assert rating == rating_stats.average(stored)
+        assert sum(_stored(db, t)["review_count"] for t in ("t1", "t2")) == 39
+
+
+def test_summary_endpoint():
+    storage = main.db.inner
+    previous = storage._client
+    storage._client = _with_taskers(InMemoryClient())
+    try:
+        client = TestClient(main.app)
+        for rating, service in ((5, 4), (4, None), (2, 2)):
+            response = client.post("/reviews", json={"booking_id": 1, "customer_id": "c1", "tasker_id": "t1",
+                                                     "rating": rating, "service_rating": service})
+            assert response.status_code == 200
+        assert client.post("/reviews", json={"booking_id": 1, "customer_id": "c1", "tasker_id": "t1",
+                                             "rating": 5, "timeliness_rating": 6}).status_code == 400
+
+        summary = client.get("/reviews/t1/summary").json()
+        assert summary["average"] == 3.67 and summary["count"] == 3
+        assert summary["dimensions"]["service"] == {"average": 3.0, "count": 2}
+        assert summary["histogram"] == {"1": 0, "2": 1, "3": 0, "4": 1, "5": 1}
+        assert client.get("/reviews/t2/summary").json()["average"] is None
+    finally:
+        storage._client = previous
+
+
+if __name__ == "__main__":
+    test_aggregates_follow_review_writes()
+    test_summary_endpoint()
+    print("✅ Rating aggregate tests passed")
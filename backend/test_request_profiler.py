@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for opt-in per-request CPU profiling
+"""
+
+import sys
+import os
+import time
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from request_profiler import ProfileStore, RequestProfilerMiddleware, SamplingProfiler
+
+
+def burn_cpu(seconds: float) -> int:
+    total, deadline = 0, time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+def _client(max_per_minute: int = 2):
+    store = ProfileStore(max_profiles=5)
+    app = FastAPI()
+    app.add_middleware(RequestProfilerMiddleware, token="s3cret", store=store,
+                       interval=0.001, max_per_minute=max_per_minute)
+
+    @app.get("/work")
+    def work():
+        return {"total": burn_cpu(0.05)}
+
+    return TestClient(app), store
+
+
+def test_profiles_only_authorized_requests():
+    client, store = _client()
+    assert "x-profile-id" not in client.get("/work").headers
+    assert "x-profile-id" not in client.get("/work", headers={"X-Profile": "wrong"}).headers
+
+    profile_id = client.get("/work", headers={"X-Profile": "s3cret"}).headers["x-profile-id"]
+    recorded = store.get(profile_id)
+    assert recorded["samples"] > 0 and recorded["path"] == "/work"
+    stack, count = recorded["collapsed"].splitlines()[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("burn_cpu (test_request_profiler.py" in line for line in recorded["collapsed"].splitlines())
+
+
+def test_rate_cap():
+    client, store = _client(max_per_minute=2)
+    assert "x-profile-id" in client.get("/work?profile=s3cret").headers
+    assert "x-profile-id" in client.get("/work?profile=s3cret").headers
+    capped = client.get("/work?profile=s3cret")
+    assert capped.status_code == 200
+    assert capped.headers["x-profile-skipped"] == "rate-limited"
+    assert len(store.list()) == 2
+
+
+def test_minimum_interval():
+    assert SamplingProfiler(interval=0).interval == 0.001
+
+
+if __name__ == "__main__":
+    test_profiles_only_authorized_requests()
+    test_rate_cap()
+    test_minimum_interval()
+    print("✅ Request profiler tests passed")
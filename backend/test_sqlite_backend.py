@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script for the embedded SQLite storage backend
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlite_backend import SQLiteClient
+from storage import create_storage
+from supabase.client import SupabaseException
+from uber_like_booking_system import UberLikeBookingSystem
+
+
+def _client():
+    db = SQLiteClient(":memory:")
+    for user_id, name, role in (("c1", "John Customer", "customer"), ("t1", "Mike Tasker", "tasker")):
+        db.auth.sign_up({"email": f"{user_id}@example.com", "password": "secret"})
+        db.table("users").update({"id": user_id}).eq("email", f"{user_id}@example.com").execute()
+        db.table("profiles").insert({"id": user_id, "name": name, "role": role,
+                                     "skills": ["Cleaning"], "hourly_rate": 40}).execute()
+    db.table("tasks").insert({"title": "Home Cleaning", "customer_id": "c1"}).execute()
+    return db
+
+
+def test_query_builder():
+    db = _client()
+    rows = db.table("profiles").select("id, skills").contains("skills", ["Cleaning"]).eq("role", "tasker").execute()
+    assert rows.data == [{"id": "t1", "skills": ["Cleaning"]}]
+
+    db.table("bookings").insert([
+        {"task_id": 1, "customer_id": "c1", "tasker_id": "t1", "service_name": "Deep clean"},
+        {"task_id": 1, "customer_id": "c1", "tasker_id": "t1", "service_name": "Window wash"},
+    ]).execute()
+    counted = db.table("bookings").select("id", count="exact").eq("customer_id", "c1").limit(1).execute()
+    assert counted.count == 2 and len(counted.data) == 1
+
+    updated = db.table("bookings").update({"status": "accepted"}).in_("id", ["1"]).execute()
+    assert [row["status"] for row in updated.data] == ["accepted"]
+
+    embedded = db.table("bookings").select("id, task:tasks(title)").eq("id", 1).execute()
+    assert embedded.data[0]["task"] == {"title": "Home Cleaning"}
+
+
+def test_auth():
+    db = SQLiteClient(":memory:")
+    user = db.auth.sign_up({"email": "a@example.com", "password": "pw"}).user
+    assert db.auth.sign_in_with_password({"email": "a@example.com", "password": "pw"}).user.id == user.id
+    try:
+        db.auth.sign_in_with_password({"email": "a@example.com", "password": "wrong"})
+        assert False, "expected invalid credentials"
+    except Exception as e:
+        assert "Invalid login credentials" in str(e)
+
+
+def test_search_bookings_rpc():
+    db = _client()
+    system = UberLikeBookingSystem(db)
+    db.table("bookings").insert([
+        {"task_id": 1, "customer_id": "c1", "tasker_id": "t1", "service_name": "Plumbing repair"},
+        {"task_id": 1, "customer_id": "c1", "tasker_id": "t1", "service_name": "Lawn mowing"},
+    ]).execute()
+    results = system.search_bookings("c1", "customer", "plumbing")
+    assert [r["service_name"] for r in results] == ["Plumbing repair"]
+    assert system.search_bookings("t1", "tasker", "lawn")[0]["service_name"] == "Lawn mowing"
+
+
+def test_storage_selection():
+    names = ("STORAGE_BACKEND", "SUPABASE_URL", "SUPABASE_KEY", "SQLITE_PATH")
+    saved = {name: os.environ.pop(name, None) for name in names}
+    try:
+        os.environ["SQLITE_PATH"] = ":memory:"
+        assert isinstance(create_storage(), SQLiteClient)
+
+        # A configured but broken Supabase must fail loudly, not fall back to a local file
+        os.environ["SUPABASE_URL"] = "not a url"
+        os.environ["SUPABASE_KEY"] = "key"
+        try:
+            create_storage()
+            assert False
+        except SupabaseException:
+            pass
+        assert isinstance(create_storage("sqlite"), SQLiteClient)
+        try:
+            create_storage("postgres")
+            assert False
+        except ValueError:
+            pass
+    finally:
+        for name, value in saved.items():
+            os.environ.pop(name, None)
+            if value is not None:
+                os.environ[name] = value
+
+
+if __name__ == "__main__":
+    test_query_builder()
+    test_auth()
+    test_search_bookings_rpc()
+    test_storage_selection()
+    print("✅ SQLite backend tests passed")
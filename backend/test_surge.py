@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Test script for the demand/supply aggregator and surge pricing
+"""
+
+import sys
+import os
+import random
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+from geo import geohash
+from memory_backend import InMemoryClient
+from pricing import QuoteEngine
+from provider_catalog import ProviderCatalog
+from surge import DemandSupplyAggregator, WindowCounter, surge_multiplier
+
+HERE = {"lat": 40.7506, "lng": -73.9972}
+ELSEWHERE = {"lat": 40.70, "lng": -73.90}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_window_counter_matches_brute_force():
+    rng = random.Random(3)
+    counter, events, now = WindowCounter(buckets=10, bucket_seconds=6), [], 0.0
+    for _ in range(2000):
+        now += rng.choice((0, 0.5, 1, 3, 7, 40, 200))
+        if rng.random() < 0.6:
+            counter.add(now)
+            events.append(now)
+        # Bucketed window: events in the last 10 whole buckets, the current one included
+        oldest = (int(now // 6) - 9) * 6
+        assert counter.count(now) == sum(1 for t in events if t >= oldest)
+
+
+def test_surge_multiplier_curve():
+    assert surge_multiplier(0, 0) == 1.0
+    assert surge_multiplier(2, 0) == 1.0  # too few bookings to call it a peak
+    assert surge_multiplier(4, 4) == 1.0
+    assert surge_multiplier(6, 2) == 1.5
+    assert surge_multiplier(100, 1) == 2.5
+
+
+def test_supply_follows_provider_changes():
+    catalog = ProviderCatalog()
+    catalog.load([
+        {"id": "t1", "skills": ["cleaning", "repairs"], "latitude": HERE["lat"], "longitude": HERE["lng"],
+         "is_available": True},
+        {"id": "t2", "skills": ["cleaning"], "latitude": HERE["lat"], "longitude": HERE["lng"], "is_available": False},
+        {"id": "t3", "skills": ["cleaning"]},
+    ])
+    aggregator = DemandSupplyAggregator(catalog)
+    assert aggregator.load() == 3
+    cell = geohash(HERE["lat"], HERE["lng"])
+    assert aggregator.supply(cell, "cleaning") == 1 and aggregator.supply(cell, "repairs") == 1
+
+    aggregator.provider_changed({"id": "t2", "is_available": True})
+    aggregator.provider_changed({"id": "t3", "latitude": HERE["lat"], "longitude": HERE["lng"]})
+    assert aggregator.supply(cell, "cleaning") == 3
+    aggregator.provider_changed({"id": "t1", "latitude": ELSEWHERE["lat"], "longitude": ELSEWHERE["lng"]})
+    assert aggregator.supply(cell, "cleaning") == 2 and aggregator.supply(cell, "repairs") == 0
+    assert aggregator.supply(aggregator.cell(ELSEWHERE["lat"], ELSEWHERE["lng"]), "repairs") == 1
+    aggregator.provider_changed({"id": "t2", "skills": ["repairs"]})
+    aggregator.remove_provider("t3")
+    assert aggregator.supply(cell, "cleaning") == 0 and aggregator.supply(cell, "repairs") == 1
+    # Counts that reach zero are dropped
+    elsewhere = aggregator.cell(ELSEWHERE["lat"], ELSEWHERE["lng"])
+    assert aggregator._supply == {(cell, "repairs"): 1, (elsewhere, "cleaning"): 1, (elsewhere, "repairs"): 1}
+
+
+def test_demand_window_drives_quotes():
+    clock = FakeClock()
+    catalog = ProviderCatalog()
+    catalog.load([{"id": "t1", "name": "Mike", "skills": ["cleaning"], "hourly_rate": 1000, "is_available": True,
+                   "latitude": HERE["lat"], "longitude": HERE["lng"]}])
+    aggregator = DemandSupplyAggregator(catalog, window_seconds=600, buckets=10, clock=clock)
+    aggregator.load()
+    booking = {"service_category": "cleaning", "latitude": HERE["lat"], "longitude": HERE["lng"]}
+    for _ in range(3):
+        assert aggregator.record_booking(booking)
+    assert not aggregator.record_booking({"service_category": "cleaning"})
+    assert aggregator.snapshot(HERE["lat"], HERE["lng"], "cleaning")["multiplier"] == 1.5
+    assert aggregator.multiplier(ELSEWHERE["lat"], ELSEWHERE["lng"], "cleaning") == 1.0
+
+    engine = QuoteEngine(catalog, surge=aggregator)
+    plain = engine.quote("home_cleaning")
+    surged = engine.quote("home_cleaning", location=HERE)
+    assert surged["cached"] and surged["surge"] == 1.5
+    assert surged["providers"][0]["price_max"] == plain["providers"][0]["price_max"] * 1.5 == 4500.0
+    assert surged["price_min"] == 2250.0
+
+    # The peak passes once its bookings leave the window
+    clock.now += 601
+    assert engine.quote("home_cleaning", location=HERE)["surge"] == 1.0
+    aggregator.load()
+    assert aggregator._demand == {}
+
+
+def test_surge_endpoints():
+    storage = main.db.inner
+    previous = storage._client
+    storage._client = InMemoryClient({"profiles": [
+        {"id": "c1", "name": "Customer", "role": "customer"},
+        {"id": "t1", "name": "Mike", "role": "tasker", "skills": ["cleaning"], "hourly_rate": 1000,
+         "is_available": True, "latitude": HERE["lat"], "longitude": HERE["lng"]},
+        {"id": "t2", "name": "Ann", "role": "tasker", "skills": ["cleaning"], "hourly_rate": 1200,
+         "is_available": True, "latitude": HERE["lat"], "longitude": HERE["lng"]},
+    ]})
+    main.provider_catalog.invalidate()
+    main.demand_supply.invalidate()
+    try:
+        client = TestClient(main.app)
+        params = {"lat": HERE["lat"], "lng": HERE["lng"], "category": "cleaning"}
+        baseline = client.get("/surge", params=params).json()
+        assert baseline["supply"] == 2 and baseline["multiplier"] == 1.0
+
+        booking = {"task_id": "1", "customer_id": "c1", "tasker_id": "t1", "service_category": "cleaning",
+                   "latitude": HERE["lat"], "longitude": HERE["lng"]}
+        assert client.post("/bookings", json=booking).status_code == 200
+        assert client.post("/bookings/bulk", json={"bookings": [booking] * 2}).json()["succeeded"] == 2
+        assert client.patch("/profiles/t2", json={"is_available": False}).status_code == 200
+        snapshot = client.get("/surge", params=params).json()
+        assert snapshot["demand"] == baseline["demand"] + 3 and snapshot["supply"] == 1
+        surge = snapshot["multiplier"]
+        assert surge > 1.0
+
+        quote = client.post("/api/ai/quotes", json={"quotes": [{"service_id": "home_cleaning", "location": HERE}]})
+        result = quote.json()["results"][0]
+        assert result["surge"] == surge and [p["id"] for p in result["providers"]] == ["t1"]
+        assert result["providers"][0]["price_min"] == round(1000 * 1.5 * surge, 2)
+
+        match = client.post("/api/ai/match", json={"service_id": "home_cleaning", "location": HERE}).json()
+        assert match["surge"] == surge and match["providers"][0]["price_max"] == round(1000 * 3 * surge, 2)
+    finally:
+        storage._client = previous
+        main.provider_catalog.invalidate()
+        main.demand_supply.invalidate()
+
+
+if __name__ == "__main__":
+    test_window_counter_matches_brute_force()
+    test_surge_multiplier_curve()
+    test_supply_follows_provider_changes()
+    test_demand_window_drives_quotes()
+    test_surge_endpoints()
+    print("✅ Surge tests passed")
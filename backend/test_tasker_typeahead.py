@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for the tasker typeahead prefix index
+"""
+
+import sys
+import os
+import time
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import main
+from memory_backend import InMemoryClient
+from tasker_typeahead import TaskerPrefixIndex
+
+TASKERS = [
+    {"id": "t1", "name": "John Smith", "skills": ["cleaning", "repairs"], "bio": "Experienced handyman", "rating": 4.5},
+    {"id": "t2", "name": "Sarah Johnson", "skills": ["beauty", "cleaning"], "bio": "Beauty and cleaning specialist", "rating": 4.9},
+    {"id": "t3", "name": "Clean Home Experts", "skills": ["cleaning"], "bio": "", "rating": 4.7, "phone": "+1-555-0101"},
+]
+
+
+def test_prefix_search_ranks_names_over_skills():
+    index = TaskerPrefixIndex()
+    index.load(TASKERS)
+
+    # "cl" hits t3's name and everyone's skills
+    results = index.search("cl")
+    assert results[0]["id"] == "t3"
+    assert {r["id"] for r in results} == {"t1", "t2", "t3"}
+    assert "phone" not in results[0]
+
+    # Every word must match some token prefix
+    assert [r["id"] for r in index.search("sarah bea")] == ["t2"]
+    # Equal matches fall back to rating
+    assert [r["id"] for r in index.search("joh")] == ["t2", "t1"]
+    assert index.search("plumb") == []
+    assert len(index.search("c", limit=2)) == 2
+
+
+def test_incremental_updates():
+    index = TaskerPrefixIndex()
+    index.load(TASKERS)
+
+    index.upsert({"id": "t1", "name": "John Smith", "skills": ["plumbing"], "bio": ""})
+    assert [r["id"] for r in index.search("plumb")] == ["t1"]
+    assert "t1" not in {r["id"] for r in index.search("repairs")}
+
+    index.upsert({"id": "t4", "name": "Pat Plumber", "skills": [], "bio": ""})
+    assert [r["id"] for r in index.search("plum")][0] == "t4"
+
+    index.remove("t4")
+    assert [r["id"] for r in index.search("plum")] == ["t1"]
+
+
+def test_keystroke_latency():
+    index = TaskerPrefixIndex()
+    index.load([
+        {"id": f"t{i}", "name": f"Tasker {i}", "skills": [f"skill{i % 50}"], "bio": f"bio word{i % 500}"}
+        for i in range(20000)
+    ])
+    start = time.perf_counter()
+    for _ in range(100):
+        index.search("word12", limit=10)
+    per_query_ms = (time.perf_counter() - start) * 1000 / 100
+    assert per_query_ms < 5, per_query_ms
+
+
+def test_search_endpoint_breaks_ties_on_rating():
+    storage = main.db.inner
+    previous, previous_index = storage._client, main.tasker_index
+    storage._client = InMemoryClient({"profiles": [
+        {"id": "c1", "name": "John Customer", "role": "customer"},
+        *({**tasker, "role": "tasker"} for tasker in TASKERS),
+    ]})
+    main.tasker_index = TaskerPrefixIndex()
+    try:
+        client = TestClient(main.app)
+        taskers = client.get("/taskers/search", params={"q": "joh"}).json()["taskers"]
+        assert [t["id"] for t in taskers] == ["t2", "t1"]
+        assert taskers[0]["rating"] == 4.9
+    finally:
+        storage._client = previous
+        main.tasker_index = previous_index
+
+
+if __name__ == "__main__":
+    test_prefix_search_ranks_names_over_skills()
+    test_incremental_updates()
+    test_keystroke_latency()
+    test_search_endpoint_breaks_ties_on_rating()
+    print("✅ Tasker typeahead tests passed")
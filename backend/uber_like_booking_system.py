@@ -4,48 +4,57 @@ Uber-like Booking System Implementation
 This module provides enhanced booking functionality similar to Uber/Uber Eats
 """
 
-import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
-from supabase import create_client, Client
 
-# Supabase configuration
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+from booking_calendar import SCHEDULE_FIELDS, booking_interval
+from storage import LazyStorage
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: SUPABASE_URL and SUPABASE_KEY environment variables are required")
-    exit(1)
+# Valid status changes (like Uber's order lifecycle)
+STATUS_TRANSITIONS = {
+    'pending': ['accepted', 'declined', 'cancelled'],
+    'accepted': ['in-progress', 'cancelled'],
+    'in-progress': ['completed', 'cancelled'],
+    'completed': [],
+    'declined': [],
+    'cancelled': []
+}
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Timestamp column stamped when a booking enters a status
+STATUS_TIMESTAMPS = {
+    'accepted': 'accepted_at',
+    'in-progress': 'started_at',
+    'completed': 'completed_at',
+    'cancelled': 'cancelled_at'
+}
+
+# Optional booking columns copied from create requests (None when not given)
+BOOKING_DETAIL_FIELDS = SCHEDULE_FIELDS + ("service_category", "latitude", "longitude")
 
 class UberLikeBookingSystem:
     """Uber-like booking system with real-time status tracking and management"""
     
-    def __init__(self):
-        self.status_transitions = {
-            'pending': ['accepted', 'declined', 'cancelled'],
-            'accepted': ['in-progress', 'cancelled'],
-            'in-progress': ['completed', 'cancelled'],
-            'completed': [],
-            'declined': [],
-            'cancelled': []
-        }
+    def __init__(self, client=None, catalog=None, calendar=None):
+        # Any client exposing the supabase-py table()/rpc() interface;
+        # defaults to the configured storage backend, built on first use
+        self.db = client if client is not None else LazyStorage()
+        # Optional in-memory ProviderCatalog serving skill-filtered provider lists
+        self.catalog = catalog
+        # Optional BookingCalendar kept in step with status and provider changes
+        self.calendar = calendar
+        self.status_transitions = STATUS_TRANSITIONS
     
     def create_booking(self, customer_id: str, tasker_id: str, task_id: int, 
                       service_name: str = None, special_instructions: str = None) -> Dict:
         """Create a new booking (like placing an Uber order)"""
         try:
-            # Get customer details
-            customer = supabase.table("profiles").select("name, phone, address").eq("id", customer_id).execute()
-            customer_data = customer.data[0] if customer.data else {}
-            
-            # Get tasker details
-            tasker = supabase.table("profiles").select("name, phone, hourly_rate").eq("id", tasker_id).execute()
-            tasker_data = tasker.data[0] if tasker.data else {}
+            # Customer and tasker details in one query
+            profiles = self._rows_by_id("profiles", "id, name, phone, address, hourly_rate", [customer_id, tasker_id])
+            customer_data = profiles.get(str(customer_id), {})
+            tasker_data = profiles.get(str(tasker_id), {})
             
             # Get task details
-            task = supabase.table("tasks").select("title, description, estimated_price").eq("id", task_id).execute()
+            task = self.db.table("tasks").select("title, description, estimated_price").eq("id", task_id).execute()
             task_data = task.data[0] if task.data else {}
             
             # Create booking with Uber-like structure
@@ -67,7 +76,7 @@ class UberLikeBookingSystem:
             }
             
             # Insert booking
-            response = supabase.table("bookings").insert(booking_data).execute()
+            response = self.db.table("bookings").insert(booking_data).execute()
             
             if response.data:
                 return {
@@ -82,10 +91,165 @@ class UberLikeBookingSystem:
         except Exception as e:
             return {"success": False, "message": f"Error creating booking: {str(e)}"}
     
+    def bulk_create_bookings(self, items: List[Dict]) -> Dict:
+        """Create many bookings in one multi-row insert (like an admin import)
+
+        Customer, tasker and task details are fetched with one `in` query
+        per table instead of three lookups per booking. Items with a
+        booking_date/booking_time that would double-book the provider fail.
+        """
+        results = [None] * len(items)
+        valid = []
+        reservations = {}
+        for i, item in enumerate(items):
+            missing = [k for k in ("customer_id", "tasker_id", "task_id") if not item.get(k)]
+            if missing:
+                results[i] = {"index": i, "success": False, "message": f"Missing {', '.join(missing)}"}
+                continue
+            try:
+                interval = booking_interval(item)
+            except ValueError as e:
+                results[i] = {"index": i, "success": False, "message": f"Invalid schedule: {str(e)}"}
+                continue
+            if interval and self.calendar is not None:
+                token, clashes = self.calendar.reserve(item["tasker_id"], *interval)
+                if token is None:
+                    results[i] = {"index": i, "success": False, "message": "Provider is already booked at that time"}
+                    continue
+                reservations[i] = token
+            valid.append(i)
+        
+        if valid:
+            try:
+                customers = self._rows_by_id("profiles", "id, name, phone, address",
+                                             {items[i]["customer_id"] for i in valid})
+                taskers = self._rows_by_id("profiles", "id, name, phone, hourly_rate",
+                                           {items[i]["tasker_id"] for i in valid})
+                tasks = self._rows_by_id("tasks", "id, title, description",
+                                         {items[i]["task_id"] for i in valid})
+                
+                now = datetime.now().isoformat()
+                rows = []
+                for i in valid:
+                    item = items[i]
+                    customer_data = customers.get(str(item["customer_id"]), {})
+                    tasker_data = taskers.get(str(item["tasker_id"]), {})
+                    task_data = tasks.get(str(item["task_id"]), {})
+                    rows.append({
+                        "task_id": item["task_id"],
+                        "customer_id": item["customer_id"],
+                        "tasker_id": item["tasker_id"],
+                        "status": "pending",
+                        "created_at": now,
+                        "service_name": item.get("service_name") or task_data.get("title", "Service"),
+                        "service_description": task_data.get("description", ""),
+                        "customer_name": customer_data.get("name", "Customer"),
+                        "customer_phone": customer_data.get("phone", ""),
+                        "customer_address": customer_data.get("address", ""),
+                        "provider_name": tasker_data.get("name", "Provider"),
+                        "provider_phone": tasker_data.get("phone", ""),
+                        "estimated_price": tasker_data.get("hourly_rate", 0),
+                        "special_instructions": item.get("special_instructions") or "",
+                        # Every row carries the same keys: a multi-row insert needs one column set
+                        **{k: item.get(k) for k in BOOKING_DETAIL_FIELDS}
+                    })
+                
+                response = self.db.table("bookings").insert(rows).execute()
+                inserted = response.data or []
+                for n, i in enumerate(valid):
+                    if n < len(inserted):
+                        results[i] = {"index": i, "success": True, "booking_id": inserted[n]["id"],
+                                      "booking": inserted[n]}
+                        if i in reservations:
+                            self.calendar.confirm(reservations.pop(i), inserted[n]["id"])
+                    else:
+                        results[i] = {"index": i, "success": False, "message": "Failed to create booking"}
+            except Exception as e:
+                for i in valid:
+                    results[i] = {"index": i, "success": False, "message": f"Error creating booking: {str(e)}"}
+            for token in reservations.values():
+                self.calendar.release(token)
+        
+        return self._bulk_summary(results)
+    
+    def bulk_update_status(self, booking_ids: List, new_status: str) -> Dict:
+        """Move many bookings to a new status in one conditional update
+
+        Only rows whose current status allows the transition are updated;
+        every other id is reported back with the reason it was skipped.
+        """
+        allowed_from = [s for s, nxt in self.status_transitions.items() if new_status in nxt]
+        if not allowed_from:
+            return self._bulk_summary([
+                {"booking_id": booking_id, "success": False, "message": f"Cannot change status to {new_status}"}
+                for booking_id in booking_ids
+            ])
+        
+        try:
+            response = self.db.table("bookings") \
+                .update(self._status_update_data(new_status)) \
+                .in_("id", list(booking_ids)) \
+                .in_("status", allowed_from) \
+                .execute()
+            self._sync_calendar(response.data)
+            updated = {str(row["id"]): row for row in response.data or []}
+            
+            # Only skipped ids cost a second round trip, to explain why
+            skipped = [booking_id for booking_id in booking_ids if str(booking_id) not in updated]
+            current = self._rows_by_id("bookings", "id, status", skipped) if skipped else {}
+            
+            results = []
+            for booking_id in booking_ids:
+                if str(booking_id) in updated:
+                    results.append({"booking_id": booking_id, "success": True, "new_status": new_status,
+                                    "tasker_id": updated[str(booking_id)].get("tasker_id")})
+                elif str(booking_id) in current:
+                    current_status = current[str(booking_id)]["status"]
+                    results.append({
+                        "booking_id": booking_id,
+                        "success": False,
+                        "message": f"Cannot change status from {current_status} to {new_status}"
+                    })
+                else:
+                    results.append({"booking_id": booking_id, "success": False, "message": "Booking not found"})
+            return self._bulk_summary(results)
+            
+        except Exception as e:
+            return self._bulk_summary([
+                {"booking_id": booking_id, "success": False, "message": f"Error updating booking: {str(e)}"}
+                for booking_id in booking_ids
+            ])
+    
+    def _rows_by_id(self, table: str, columns: str, ids) -> Dict[str, Dict]:
+        """Fetch rows for a set of ids with a single `in` query"""
+        ids = list(ids)
+        if not ids:
+            return {}
+        response = self.db.table(table).select(columns).in_("id", ids).execute()
+        return {str(row["id"]): row for row in response.data or []}
+    
+    def _sync_calendar(self, rows: Optional[List[Dict]]) -> None:
+        """Tell the booking calendar about updated booking rows"""
+        if self.calendar is not None:
+            for row in rows or []:
+                self.calendar.sync(row)
+    
+    def _status_update_data(self, new_status: str) -> Dict:
+        now = datetime.now().isoformat()
+        update_data = {"status": new_status, "status_updated_at": now}
+        if new_status in STATUS_TIMESTAMPS:
+            update_data[STATUS_TIMESTAMPS[new_status]] = now
+        return update_data
+    
+    @staticmethod
+    def _bulk_summary(results: List[Dict]) -> Dict:
+        succeeded = sum(1 for r in results if r["success"])
+        return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}
+    
     def get_customer_bookings(self, customer_id: str) -> List[Dict]:
         """Get all bookings for a customer (like Uber customer app)"""
         try:
-            response = supabase.table("bookings") \
+            response = self.db.table("bookings") \
                 .select("""
                     id, task_id, customer_id, tasker_id, status, created_at,
                     task:tasks(title, description),
@@ -121,7 +285,7 @@ class UberLikeBookingSystem:
     def get_provider_bookings(self, provider_id: str) -> List[Dict]:
         """Get all bookings for a provider (like Uber driver app)"""
         try:
-            response = supabase.table("bookings") \
+            response = self.db.table("bookings") \
                 .select("""
                     id, task_id, customer_id, tasker_id, status, created_at,
                     task:tasks(title, description),
@@ -160,7 +324,7 @@ class UberLikeBookingSystem:
         """Update booking status (like Uber status updates)"""
         try:
             # Get current booking
-            booking = supabase.table("bookings").select("*").eq("id", booking_id).execute()
+            booking = self.db.table("bookings").select("*").eq("id", booking_id).execute()
             if not booking.data:
                 return {"success": False, "message": "Booking not found"}
             
@@ -174,25 +338,15 @@ class UberLikeBookingSystem:
                     "message": f"Cannot change status from {current_status} to {new_status}"
                 }
             
-            # Prepare update data
-            update_data = {"status": new_status}
-            
-            # Add timestamp based on status
-            now = datetime.now().isoformat()
-            if new_status == "accepted":
-                update_data["accepted_at"] = now
-            elif new_status == "in-progress":
-                update_data["started_at"] = now
-            elif new_status == "completed":
-                update_data["completed_at"] = now
-            elif new_status == "cancelled":
-                update_data["cancelled_at"] = now
+            # Prepare update data (with the timestamp for the new status)
+            update_data = self._status_update_data(new_status)
             
             # Update booking
-            response = supabase.table("bookings") \
+            response = self.db.table("bookings") \
                 .update(update_data) \
                 .eq("id", booking_id) \
                 .execute()
+            self._sync_calendar(response.data)
             
             if response.data:
                 return {
@@ -206,21 +360,41 @@ class UberLikeBookingSystem:
         except Exception as e:
             return {"success": False, "message": f"Error updating booking: {str(e)}"}
     
-    def get_available_providers(self, service_category: str = None) -> List[Dict]:
-        """Get available providers (like Uber driver matching)"""
+    def get_available_providers(self, service_category: str = None, lat: float = None, lng: float = None,
+                                radius_km: float = None, limit: int = 50) -> List[Dict]:
+        """Get available providers (like Uber driver matching)
+
+        With lat/lng/radius_km the database's nearby_providers function does
+        the radius search on its spatial index and results come back closest
+        first, each with distance_km. Otherwise the provider catalog, when
+        attached, answers from memory.
+        """
         try:
-            query = supabase.table("profiles") \
-                .select("id, name, skills, hourly_rate, rating, bio") \
-                .eq("role", "tasker") \
-                .eq("is_available", True)
-            
-            if service_category:
-                query = query.contains("skills", [service_category])
-            
-            response = query.order("rating", desc=True).execute()
+            if lat is not None and lng is not None and radius_km is not None:
+                rows = self.db.rpc("nearby_providers", {
+                    "p_lat": lat,
+                    "p_lng": lng,
+                    "p_radius_km": radius_km,
+                    "p_category": service_category,
+                    "p_limit": limit
+                }).execute().data
+            elif self.catalog is not None:
+                self.catalog.refresh_if_stale()
+                rows = self.catalog.select(skills=[service_category] if service_category else (),
+                                           available=True, order_by="rating")
+            else:
+                query = self.db.table("profiles") \
+                    .select("id, name, skills, hourly_rate, rating, bio, latitude, longitude") \
+                    .eq("role", "tasker") \
+                    .eq("is_available", True)
+
+                if service_category:
+                    query = query.contains("skills", [service_category])
+
+                rows = query.order("rating", desc=True).execute().data
             
             providers = []
-            for provider in response.data or []:
+            for provider in rows or []:
                 provider_info = {
                     "id": provider["id"],
                     "name": provider["name"],
@@ -228,8 +402,12 @@ class UberLikeBookingSystem:
                     "hourly_rate": provider.get("hourly_rate", 0),
                     "rating": provider.get("rating", 0),
                     "bio": provider.get("bio", ""),
+                    "latitude": provider.get("latitude"),
+                    "longitude": provider.get("longitude"),
                     "is_available": True
                 }
+                if "distance_km" in provider:
+                    provider_info["distance_km"] = provider["distance_km"]
                 providers.append(provider_info)
             
             return providers
@@ -238,6 +416,33 @@ class UberLikeBookingSystem:
             print(f"Error fetching providers: {e}")
             return []
     
+    def assign_provider(self, booking_id, provider: Dict, accept: bool = False) -> bool:
+        """Point a pending booking at a provider (offer) or hand it to them (accept)
+
+        The update only applies while the booking is still pending, so a
+        booking accepted or cancelled in the meantime is left alone.
+        """
+        try:
+            update_data = {
+                "tasker_id": provider["id"],
+                "provider_name": provider.get("name", "Provider"),
+                "status_updated_at": datetime.now().isoformat()
+            }
+            if accept:
+                update_data.update(self._status_update_data("accepted"))
+            
+            response = self.db.table("bookings") \
+                .update(update_data) \
+                .eq("id", booking_id) \
+                .eq("status", "pending") \
+                .execute()
+            self._sync_calendar(response.data)
+            return bool(response.data)
+            
+        except Exception as e:
+            print(f"Error assigning provider: {e}")
+            return False
+    
     def get_booking_statistics(self, user_id: str, user_role: str) -> Dict:
         """Get booking statistics (like Uber dashboard stats)"""
         try:
@@ -273,26 +478,28 @@ class UberLikeBookingSystem:
         }
         return status_map.get(status, status.title())
     
-    def search_bookings(self, user_id: str, user_role: str, query: str) -> List[Dict]:
-        """Search bookings (like Uber search functionality)"""
+    def search_bookings(self, user_id: str, user_role: str, query: str,
+                        limit: int = 20, offset: int = 0) -> List[Dict]:
+        """Search bookings (like Uber search functionality)
+
+        Ranked full-text search served by the `search_bookings` SQL function
+        and the GIN index on `bookings.search_vector`.
+        """
         try:
-            if user_role == "customer":
-                bookings = self.get_customer_bookings(user_id)
-            else:
-                bookings = self.get_provider_bookings(user_id)
+            response = self.db.rpc("search_bookings", {
+                "p_user_id": user_id,
+                "p_role": user_role,
+                "p_query": query,
+                "p_limit": limit,
+                "p_offset": offset
+            }).execute()
             
-            # Simple text search
-            query_lower = query.lower()
-            filtered_bookings = []
-            
-            for booking in bookings:
-                if (query_lower in booking.get("service_name", "").lower() or
-                    query_lower in booking.get("service_description", "").lower() or
-                    query_lower in booking.get("provider_name", "").lower() or
-                    query_lower in booking.get("customer_name", "").lower()):
-                    filtered_bookings.append(booking)
+            results = []
+            for booking in response.data or []:
+                booking["status_display"] = self._get_status_display(booking["status"])
+                results.append(booking)
             
-            return filtered_bookings
+            return results
             
         except Exception as e:
             print(f"Error searching bookings: {e}")
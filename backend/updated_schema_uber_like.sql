@@ -24,7 +24,8 @@ create table if not exists profiles (
   latitude numeric,
   longitude numeric,
   is_available boolean default true,
-  last_active timestamp default now()
+  last_active timestamp default now(),
+  availability text
 );
 
 -- Tasks (Service Requests)
@@ -115,32 +116,336 @@ create table if not exists reviews (
 -- =====================================================
 -- These indexes optimize query performance for the Uber-like system
 
--- Bookings table indexes
-CREATE INDEX IF NOT EXISTS idx_bookings_customer_id ON bookings(customer_id);
-CREATE INDEX IF NOT EXISTS idx_bookings_tasker_id ON bookings(tasker_id);
-CREATE INDEX IF NOT EXISTS idx_bookings_status ON bookings(status);
+-- Indexes follow the hot query shapes (filter + sort together) and are
+-- checked with check_query_plans.py, which fails on a sequential scan.
+
+-- Bookings: a user's history, newest first
+CREATE INDEX IF NOT EXISTS idx_bookings_customer_created ON bookings(customer_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_bookings_tasker_created ON bookings(tasker_id, created_at DESC);
+-- Dispatcher queue (pending only) and active load per tasker
+CREATE INDEX IF NOT EXISTS idx_bookings_pending ON bookings(created_at) WHERE status = 'pending';
+-- status IN (...) arrives as bound parameters, which a partial index
+-- predicate cannot match; this covers the tasker ids instead
+CREATE INDEX IF NOT EXISTS idx_bookings_status_tasker ON bookings(status, tasker_id);
 CREATE INDEX IF NOT EXISTS idx_bookings_created_at ON bookings(created_at);
 CREATE INDEX IF NOT EXISTS idx_bookings_booking_date ON bookings(booking_date);
-CREATE INDEX IF NOT EXISTS idx_bookings_payment_status ON bookings(payment_status);
-CREATE INDEX IF NOT EXISTS idx_bookings_priority ON bookings(priority);
 
--- Profiles table indexes
-CREATE INDEX IF NOT EXISTS idx_profiles_role ON profiles(role);
-CREATE INDEX IF NOT EXISTS idx_profiles_is_available ON profiles(is_available);
+-- Profiles: available taskers by rating, and skills @> array[...]
+CREATE INDEX IF NOT EXISTS idx_profiles_available_taskers ON profiles(rating DESC)
+  WHERE role = 'tasker' AND is_available = true;
+CREATE INDEX IF NOT EXISTS idx_profiles_skills ON profiles USING gin(skills) WHERE role = 'tasker';
 CREATE INDEX IF NOT EXISTS idx_profiles_city ON profiles(city);
-CREATE INDEX IF NOT EXISTS idx_profiles_rating ON profiles(rating);
 
 -- Tasks table indexes
-CREATE INDEX IF NOT EXISTS idx_tasks_customer_id ON tasks(customer_id);
-CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS idx_tasks_customer_created ON tasks(customer_id, created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks(category);
-CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority);
 
 -- Reviews table indexes
 CREATE INDEX IF NOT EXISTS idx_reviews_booking_id ON reviews(booking_id);
 CREATE INDEX IF NOT EXISTS idx_reviews_customer_id ON reviews(customer_id);
-CREATE INDEX IF NOT EXISTS idx_reviews_tasker_id ON reviews(tasker_id);
-CREATE INDEX IF NOT EXISTS idx_reviews_rating ON reviews(rating);
+CREATE INDEX IF NOT EXISTS idx_reviews_tasker_created ON reviews(tasker_id, created_at DESC);
+
+-- Superseded by the composite/partial indexes above, or too unselective
+-- (a handful of distinct values) to beat a scan
+DROP INDEX IF EXISTS idx_bookings_customer_id;
+DROP INDEX IF EXISTS idx_bookings_tasker_id;
+DROP INDEX IF EXISTS idx_bookings_status;
+DROP INDEX IF EXISTS idx_bookings_payment_status;
+DROP INDEX IF EXISTS idx_bookings_priority;
+DROP INDEX IF EXISTS idx_profiles_role;
+DROP INDEX IF EXISTS idx_profiles_is_available;
+DROP INDEX IF EXISTS idx_profiles_rating;
+DROP INDEX IF EXISTS idx_tasks_customer_id;
+DROP INDEX IF EXISTS idx_tasks_status;
+DROP INDEX IF EXISTS idx_tasks_priority;
+DROP INDEX IF EXISTS idx_reviews_tasker_id;
+DROP INDEX IF EXISTS idx_reviews_rating;
+
+-- =====================================================
+-- FULL-TEXT SEARCH
+-- =====================================================
+-- Weighted search vector over the denormalized booking fields, kept up to
+-- date by Postgres itself and served from a GIN index.
+
+ALTER TABLE bookings ADD COLUMN IF NOT EXISTS search_vector tsvector
+  GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple'::regconfig, coalesce(service_name, '')), 'A') ||
+    setweight(to_tsvector('simple'::regconfig, coalesce(provider_name, '')), 'B') ||
+    setweight(to_tsvector('simple'::regconfig, coalesce(customer_name, '')), 'B') ||
+    setweight(to_tsvector('simple'::regconfig, coalesce(service_description, '')), 'C')
+  ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_bookings_search_vector ON bookings USING gin(search_vector);
+
+-- Ranked, paginated search over one user's bookings (called via supabase.rpc)
+CREATE OR REPLACE FUNCTION search_bookings(
+  p_user_id uuid,
+  p_role text,
+  p_query text,
+  p_limit int default 20,
+  p_offset int default 0
+)
+RETURNS TABLE (
+  id bigint,
+  task_id bigint,
+  customer_id uuid,
+  tasker_id uuid,
+  status text,
+  created_at timestamp,
+  service_name text,
+  service_description text,
+  provider_name text,
+  customer_name text,
+  rank real
+)
+LANGUAGE sql STABLE AS $$
+  SELECT b.id, b.task_id, b.customer_id, b.tasker_id, b.status, b.created_at,
+         b.service_name, b.service_description, b.provider_name, b.customer_name,
+         ts_rank(b.search_vector, q) AS rank
+  FROM bookings b, websearch_to_tsquery('simple', p_query) q
+  WHERE b.search_vector @@ q
+    AND CASE WHEN p_role = 'customer' THEN b.customer_id = p_user_id
+             ELSE b.tasker_id = p_user_id END
+  ORDER BY rank DESC, b.created_at DESC
+  LIMIT p_limit OFFSET p_offset;
+$$;
+
+-- =====================================================
+-- NEARBY PROVIDERS
+-- =====================================================
+-- earthdistance over cube: a GiST index on the tasker's position answers
+-- earth_box() containment, and earth_distance() trims the box to the radius.
+
+CREATE EXTENSION IF NOT EXISTS cube;
+CREATE EXTENSION IF NOT EXISTS earthdistance;
+
+CREATE INDEX IF NOT EXISTS idx_profiles_location ON profiles
+  USING gist (ll_to_earth(latitude::float8, longitude::float8))
+  WHERE role = 'tasker' AND is_available = true;
+
+-- Available taskers within p_radius_km, closest first (called via supabase.rpc)
+CREATE OR REPLACE FUNCTION nearby_providers(
+  p_lat float8,
+  p_lng float8,
+  p_radius_km float8,
+  p_category text default null,
+  p_limit int default 50
+)
+RETURNS TABLE (
+  id uuid,
+  name text,
+  skills text[],
+  hourly_rate numeric,
+  rating numeric,
+  bio text,
+  latitude numeric,
+  longitude numeric,
+  distance_km float8
+)
+LANGUAGE sql STABLE AS $$
+  SELECT p.id, p.name, p.skills, p.hourly_rate, p.rating, p.bio, p.latitude, p.longitude,
+         round((earth_distance(ll_to_earth(p_lat, p_lng),
+                               ll_to_earth(p.latitude::float8, p.longitude::float8)) / 1000)::numeric, 3)::float8
+           AS distance_km
+  FROM profiles p
+  WHERE p.role = 'tasker' AND p.is_available = true
+    AND earth_box(ll_to_earth(p_lat, p_lng), p_radius_km * 1000)
+        @> ll_to_earth(p.latitude::float8, p.longitude::float8)
+    AND earth_distance(ll_to_earth(p_lat, p_lng),
+                       ll_to_earth(p.latitude::float8, p.longitude::float8)) <= p_radius_km * 1000
+    AND (p_category IS NULL OR p.skills @> ARRAY[p_category])
+  ORDER BY distance_km
+  LIMIT p_limit;
+$$;
+
+-- =====================================================
+-- PROVIDER RATING AGGREGATES
+-- =====================================================
+-- Running sums/counts per tasker, kept in step with reviews by a trigger in
+-- the same transaction as the review write. profiles.rating is refreshed
+-- from them, so listings and ranking never scan reviews.
+
+create table if not exists provider_rating_stats (
+  tasker_id uuid primary key references profiles(id) on delete cascade,
+  review_count int not null default 0,
+  rating_sum int not null default 0,
+  service_count int not null default 0,
+  service_sum int not null default 0,
+  communication_count int not null default 0,
+  communication_sum int not null default 0,
+  timeliness_count int not null default 0,
+  timeliness_sum int not null default 0,
+  rating_1 int not null default 0,
+  rating_2 int not null default 0,
+  rating_3 int not null default 0,
+  rating_4 int not null default 0,
+  rating_5 int not null default 0,
+  updated_at timestamp default now()
+);
+
+-- Add (p_sign = 1) or remove (p_sign = -1) one review's contribution
+CREATE OR REPLACE FUNCTION apply_review_stats(
+  p_tasker uuid, p_rating int, p_service int, p_communication int, p_timeliness int, p_sign int
+) RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+  IF p_tasker IS NULL THEN
+    RETURN;
+  END IF;
+  INSERT INTO provider_rating_stats AS s (
+    tasker_id, review_count, rating_sum, service_count, service_sum,
+    communication_count, communication_sum, timeliness_count, timeliness_sum,
+    rating_1, rating_2, rating_3, rating_4, rating_5
+  ) VALUES (
+    p_tasker, p_sign, p_sign * p_rating,
+    p_sign * (p_service IS NOT NULL)::int, p_sign * coalesce(p_service, 0),
+    p_sign * (p_communication IS NOT NULL)::int, p_sign * coalesce(p_communication, 0),
+    p_sign * (p_timeliness IS NOT NULL)::int, p_sign * coalesce(p_timeliness, 0),
+    p_sign * (p_rating = 1)::int, p_sign * (p_rating = 2)::int, p_sign * (p_rating = 3)::int,
+    p_sign * (p_rating = 4)::int, p_sign * (p_rating = 5)::int
+  )
+  ON CONFLICT (tasker_id) DO UPDATE SET
+    review_count = s.review_count + excluded.review_count,
+    rating_sum = s.rating_sum + excluded.rating_sum,
+    service_count = s.service_count + excluded.service_count,
+    service_sum = s.service_sum + excluded.service_sum,
+    communication_count = s.communication_count + excluded.communication_count,
+    communication_sum = s.communication_sum + excluded.communication_sum,
+    timeliness_count = s.timeliness_count + excluded.timeliness_count,
+    timeliness_sum = s.timeliness_sum + excluded.timeliness_sum,
+    rating_1 = s.rating_1 + excluded.rating_1,
+    rating_2 = s.rating_2 + excluded.rating_2,
+    rating_3 = s.rating_3 + excluded.rating_3,
+    rating_4 = s.rating_4 + excluded.rating_4,
+    rating_5 = s.rating_5 + excluded.rating_5,
+    updated_at = now();
+  UPDATE profiles SET rating = coalesce(
+    (SELECT round(rating_sum::numeric / nullif(review_count, 0), 2)
+     FROM provider_rating_stats WHERE tasker_id = p_tasker), 0)
+  WHERE id = p_tasker;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION reviews_rating_stats() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM apply_review_stats(OLD.tasker_id, OLD.rating, OLD.service_rating,
+                               OLD.communication_rating, OLD.timeliness_rating, -1);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM apply_review_stats(NEW.tasker_id, NEW.rating, NEW.service_rating,
+                               NEW.communication_rating, NEW.timeliness_rating, 1);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS reviews_rating_stats ON reviews;
+CREATE TRIGGER reviews_rating_stats AFTER INSERT OR DELETE
+  OR UPDATE OF tasker_id, rating, service_rating, communication_rating, timeliness_rating ON reviews
+  FOR EACH ROW EXECUTE FUNCTION reviews_rating_stats();
+
+-- One-off backfill for reviews written before the trigger existed
+INSERT INTO provider_rating_stats (
+  tasker_id, review_count, rating_sum, service_count, service_sum,
+  communication_count, communication_sum, timeliness_count, timeliness_sum,
+  rating_1, rating_2, rating_3, rating_4, rating_5
+)
+SELECT tasker_id, count(*), sum(rating),
+       count(service_rating), coalesce(sum(service_rating), 0),
+       count(communication_rating), coalesce(sum(communication_rating), 0),
+       count(timeliness_rating), coalesce(sum(timeliness_rating), 0),
+       count(*) FILTER (WHERE rating = 1), count(*) FILTER (WHERE rating = 2),
+       count(*) FILTER (WHERE rating = 3), count(*) FILTER (WHERE rating = 4),
+       count(*) FILTER (WHERE rating = 5)
+FROM reviews WHERE tasker_id IS NOT NULL
+GROUP BY tasker_id
+ON CONFLICT (tasker_id) DO NOTHING;
+
+UPDATE profiles p SET rating = round(s.rating_sum::numeric / s.review_count, 2)
+FROM provider_rating_stats s WHERE s.tasker_id = p.id AND s.review_count > 0;
+
+-- =====================================================
+-- PROVIDER PERFORMANCE FEATURES
+-- =====================================================
+-- Per-provider, per-skill counters bumped by booking transitions in the
+-- same write (see provider_features.py for how they become features).
+
+create table if not exists provider_skill_stats (
+  tasker_id uuid not null references profiles(id) on delete cascade,
+  skill text not null,
+  offered int not null default 0,
+  accepted int not null default 0,
+  declined int not null default 0,
+  completed int not null default 0,
+  cancelled int not null default 0,
+  accept_seconds float8 not null default 0,
+  updated_at timestamp default now(),
+  primary key (tasker_id, skill)
+);
+
+CREATE OR REPLACE FUNCTION bookings_skill_stats() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+  old_status text;
+  old_tasker uuid;
+  offered_at timestamp;
+  status_changed boolean;
+BEGIN
+  IF NEW.tasker_id IS NULL THEN
+    RETURN NULL;
+  END IF;
+  IF TG_OP = 'UPDATE' THEN
+    old_status := OLD.status;
+    old_tasker := OLD.tasker_id;
+    offered_at := coalesce(OLD.status_updated_at, OLD.created_at);
+  END IF;
+  status_changed := NEW.status IS DISTINCT FROM old_status;
+  IF NOT status_changed AND NEW.tasker_id IS NOT DISTINCT FROM old_tasker THEN
+    RETURN NULL;
+  END IF;
+
+  INSERT INTO provider_skill_stats AS s (tasker_id, skill, offered, accepted, accept_seconds, declined, completed, cancelled)
+  VALUES (
+    NEW.tasker_id,
+    coalesce(NEW.service_category, 'general'),
+    (NEW.status = 'pending' AND NEW.tasker_id IS DISTINCT FROM old_tasker)::int,
+    (status_changed AND NEW.status = 'accepted')::int,
+    CASE WHEN status_changed AND NEW.status = 'accepted'
+         THEN greatest(0, extract(epoch FROM coalesce(NEW.accepted_at, now()::timestamp)
+                                        - coalesce(offered_at, NEW.created_at)))
+         ELSE 0 END,
+    (status_changed AND NEW.status = 'declined')::int,
+    (status_changed AND NEW.status = 'completed')::int,
+    (status_changed AND NEW.status = 'cancelled' AND coalesce(old_status IN ('accepted', 'in-progress'), false))::int
+  )
+  ON CONFLICT (tasker_id, skill) DO UPDATE SET
+    offered = s.offered + excluded.offered,
+    accepted = s.accepted + excluded.accepted,
+    accept_seconds = s.accept_seconds + excluded.accept_seconds,
+    declined = s.declined + excluded.declined,
+    completed = s.completed + excluded.completed,
+    cancelled = s.cancelled + excluded.cancelled,
+    updated_at = now();
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS bookings_skill_stats ON bookings;
+CREATE TRIGGER bookings_skill_stats AFTER INSERT OR UPDATE OF status, tasker_id ON bookings
+  FOR EACH ROW EXECUTE FUNCTION bookings_skill_stats();
+
+-- =====================================================
+-- WEEKLY AVAILABILITY
+-- =====================================================
+-- 7 x 48 half-hour slots as one 336-bit mask in 84 hex digits, Monday
+-- 00:00 in the lowest bit (see availability.py). Hex text rather than
+-- bit(336) so PostgREST returns it as-is; profiles.availability keeps a
+-- readable summary.
+
+create table if not exists provider_availability (
+  tasker_id uuid primary key references profiles(id) on delete cascade,
+  slots text not null check (slots ~ '^[0-9a-f]{84}$'),
+  updated_at timestamp default now()
+);
 
 -- =====================================================
 -- SAMPLE DATA FOR TESTING
@@ -199,11 +504,11 @@ INSERT INTO bookings (
 -- Get tasker's assigned bookings (like Uber driver dashboard)
 -- SELECT * FROM bookings WHERE tasker_id = 'tasker-uuid' ORDER BY booking_date, booking_time;
 
--- Get nearby available taskers (like Uber matching)
--- SELECT * FROM profiles WHERE role = 'tasker' AND is_available = true AND city = 'New York';
+-- Get nearby available taskers (like Uber matching), e.g. within 10 km
+-- SELECT * FROM nearby_providers(40.7128, -74.0060, 10, 'cleaning');
 
 -- Get booking statistics
 -- SELECT status, COUNT(*) FROM bookings GROUP BY status;
 
--- Get average ratings by tasker
--- SELECT tasker_id, AVG(rating) FROM reviews GROUP BY tasker_id;
+-- Get average ratings by tasker (precomputed, no scan of reviews)
+-- SELECT tasker_id, rating_sum::numeric / nullif(review_count, 0) FROM provider_rating_stats;